@@ -1,5 +1,8 @@
 # Monkey patch para resolver problemas de compatibilidade Flask/Werkzeug
 import sys
+import time
+
+_IMPORT_STARTED = time.perf_counter()
 from markupsafe import Markup
 
 # IMPORTANTE: Carregar .env ANTES de qualquer import que use config
@@ -32,10 +35,8 @@ from flask_mail import Mail
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
-from io import BytesIO
-from PIL import Image
-
 from .email_utils import mail_init_app
+from .utils.startup_profile import StartupProfiler
 
 mail = Mail()
 db = SQLAlchemy()
@@ -46,6 +47,9 @@ jwt = JWTManager()
 limiter = Limiter(key_func=get_remote_address, default_limits=["200 per day", "50 per hour"])
 login_manager = LoginManager()
 
+# Tempo de import do pacote (Flask, extensões e config), para o perfil de inicialização
+_PACKAGE_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
 
 def create_app():
     import logging
@@ -57,6 +61,9 @@ def create_app():
     config_class = get_config()
     config_obj = config_class()
     app.config.from_object(config_obj)
+
+    profiler = StartupProfiler(app.config.get('STARTUP_PROFILE', False))
+    profiler.record('import do pacote app', _PACKAGE_IMPORT_SECONDS)
     
     # Configuração de logging
     logging.config.dictConfig(app.config.get('LOGGING_CONFIG', {}))
@@ -68,6 +75,18 @@ def create_app():
     for handler in app.logger.handlers[:]:
         app.logger.removeHandler(handler)
     
+    # Formato dos logs: JSON lines (padrão) ou texto
+    from .utils.structured_logging import (EXTENSION_KEY as LOG_BUFFER_KEY, AccessLogFilter,
+                                           JsonLinesFormatter, RequestContextFilter, RingBufferHandler,
+                                           init_request_logging)
+
+    def log_formatter():
+        if app.config.get("LOG_FORMAT", "json") == "json":
+            return JsonLinesFormatter()
+        return logging.Formatter("%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]")
+
+    request_context = RequestContextFilter()
+
     # Configurar handler para arquivo de log
     if not app.debug and not app.testing:
         # Criar diretório de logs se não existir
@@ -77,28 +96,33 @@ def create_app():
             
         file_handler = RotatingFileHandler(
             app.config["LOG_FILE"], 
-            maxBytes=10240, 
-            backupCount=10
-        )
-        file_handler.setFormatter(
-            logging.Formatter(
-                "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
-            )
+            maxBytes=app.config.get("LOG_MAX_BYTES", 10 * 1024 * 1024),
+            backupCount=app.config.get("LOG_BACKUP_COUNT", 10)
         )
+        file_handler.setFormatter(log_formatter())
+        file_handler.addFilter(request_context)
+        if not app.config.get("LOG_ACCESS_TO_FILE", False):
+            file_handler.addFilter(AccessLogFilter())
         file_handler.setLevel(app.config["LOG_LEVEL"])
         app.logger.addHandler(file_handler)
     
     # Se configurado, também logar para stdout
     if app.config.get("LOG_TO_STDOUT"):
         stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(
-            logging.Formatter(
-                "%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]"
-            )
-        )
+        stream_handler.setFormatter(log_formatter())
+        stream_handler.addFilter(request_context)
         stream_handler.setLevel(app.config["LOG_LEVEL"])
         app.logger.addHandler(stream_handler)
 
+    # Registros recentes em memória para o visualizador de logs do admin
+    if app.config.get("LOG_RING_BUFFER_SIZE", 1000) > 0:
+        ring_buffer = RingBufferHandler(app.config.get("LOG_RING_BUFFER_SIZE", 1000))
+        ring_buffer.addFilter(request_context)
+        app.logger.addHandler(ring_buffer)
+        app.extensions[LOG_BUFFER_KEY] = ring_buffer
+
+    init_request_logging(app)
+
     # Configuração de log para desenvolvimento
     if app.debug or app.testing:
         # Configuração mínima para desenvolvimento
@@ -110,8 +134,15 @@ def create_app():
         import warnings
         warnings.filterwarnings('ignore', message='Using the in-memory storage for tracking rate limits')
 
-    db.init_app(app)
-    mail_init_app(app, mail)
+    with profiler.phase('banco e email'):
+        db.init_app(app)
+        mail_init_app(app, mail)
+
+    # Invalidação do cache de resultados ao alterar chamados, tarefas, lembretes e equipamentos
+    with profiler.phase('listeners de cache'):
+        from .services.cache_service import register_invalidation_listeners
+        register_invalidation_listeners()
+        from .services import badge_counter_service  # noqa: F401 (listeners dos badges)
     jwt.init_app(app)
     
     # Configurar o Limiter após a criação do app
@@ -137,66 +168,25 @@ def create_app():
             flash('Por favor, faça login para acessar esta página.', 'warning')
         return redirect(url_for('auth.login'))
     
-    scheduler.init_app(app)
-    scheduler.start()
     migrate.init_app(app, db)
     bootstrap.init_app(app)
-    
-    def ensure_icons():
-        icons_dir = os.path.join(app.static_folder, 'icons')
-        svg_path = os.path.join(icons_dir, 'logo.svg')
-        if not os.path.exists(svg_path):
-            return
-        try:
-            import cairosvg  # opcional
-        except Exception:
-            cairosvg = None
-
-        def render_svg(size):
-            if not cairosvg:
-                return None
-            with open(svg_path, 'rb') as f:
-                data = f.read()
-            return cairosvg.svg2png(bytestring=data, output_width=size, output_height=size)
-
-        targets = [
-            (144, 'icon-144x144.png'),
-            (180, 'icon-180x180.png'),
-            (192, 'icon-192x192.png'),
-            (512, 'icon-512x512.png'),
-        ]
-        updated = False
-        for size, filename in targets:
-            out_path = os.path.join(icons_dir, filename)
-            if not os.path.exists(out_path) and render_svg(size):
-                png_bytes = render_svg(size)
-                if png_bytes:
-                    with open(out_path, 'wb') as w:
-                        w.write(png_bytes)
-                    updated = True
-
-        ico_path = os.path.join(app.static_folder, 'favicon.ico')
-        if not os.path.exists(ico_path):
-            png16 = render_svg(16)
-            png32 = render_svg(32)
-            if png16 and png32:
-                im32 = Image.open(BytesIO(png32)).convert('RGBA')
-                im32.save(ico_path, format='ICO', sizes=[(16, 16), (32, 32)])
-                updated = True
-            else:
-                png192_path = os.path.join(icons_dir, 'icon-192x192.png')
-                if os.path.exists(png192_path):
-                    im = Image.open(png192_path).convert('RGBA')
-                    im.save(ico_path, format='ICO', sizes=[(16, 16), (32, 32)])
-                    updated = True
-
-        if updated:
-            app.logger.info('Icon assets ensured/updated')
 
-    try:
-        ensure_icons()
-    except Exception as e:
-        app.logger.warning('Icon generation skipped: %s', e)
+    # Ícones PWA/favicon: gerados por `flask icons` ou, se faltarem, na primeira requisição
+    if app.config.get('ICONS_AUTOGENERATE', True):
+        from .utils.icon_assets import ensure_icons, missing_icons
+
+        icons_checked = []
+
+        @app.before_request
+        def ensure_icons_once():
+            if icons_checked:
+                return
+            icons_checked.append(True)
+            try:
+                if missing_icons(app.static_folder):
+                    ensure_icons(app.static_folder)
+            except Exception as e:
+                app.logger.warning('Icon generation skipped: %s', e)
 
     # Configurar headers de segurança HTTP manualmente
     @app.after_request
@@ -249,34 +239,20 @@ def create_app():
     @app.context_processor
     def inject_pending_approvals():
         from flask_login import current_user
-        from .services.equipment_service import EquipmentService
-        from .models import Chamado
+        from .services.badge_counter_service import BadgeCounterService
         
         # Inicializa com valores padrão
-        pending_count = 0
-        chamados_abertos_count = 0
+        counts = {'pending_approvals_count': 0, 'chamados_abertos_count': 0}
         
         # Verifica se o usuário está autenticado
         if current_user and hasattr(current_user, 'is_authenticated') and current_user.is_authenticated:
-            # Contagem de equipamentos pendentes (apenas Admin/TI)
-            if current_user.is_admin or current_user.is_ti:
-                try:
-                    pending_count = EquipmentService.count_pending_approvals()
-                except Exception as e:
-                    app.logger.error(f"Erro ao contar aprovações pendentes: {str(e)}")
-                    pending_count = 0
-            
-            # Contagem de chamados abertos (todos os usuários)
+            # Contadores memorizados por perfil (aprovações pendentes apenas para Admin/TI)
             try:
-                chamados_abertos_count = Chamado.count_open_tickets(current_user)
+                counts = BadgeCounterService.get_counts(current_user)
             except Exception as e:
-                app.logger.error(f"Erro ao contar chamados abertos: {str(e)}")
-                chamados_abertos_count = 0
+                app.logger.error(f"Erro ao contar badges de navegação: {str(e)}")
         
-        return {
-            'pending_approvals_count': pending_count,
-            'chamados_abertos_count': chamados_abertos_count
-        }
+        return counts
 
     # Error handlers customizados
     @app.errorhandler(400)
@@ -317,138 +293,24 @@ def create_app():
         from flask import render_template
         return render_template('errors/503.html'), 503
 
-    # Configurar tarefas agendadas para notificações
-    with app.app_context():
-        from .services.notification_service import NotificationService
-        from .services.satisfaction_service import SatisfactionService
-        from .services.certification_service import CertificationService
-        from .services.performance_service import PerformanceService
-        from .services.reminder_service import ReminderService
-
-        # Funções wrapper para garantir contexto da aplicação
-        def run_notification_checks_with_context():
-            with app.app_context():
-                return NotificationService.run_notification_checks()
-        
-        def process_recurring_reminders_with_context():
-            with app.app_context():
-                return ReminderService.process_recurring_reminders()
-
-        def auto_send_satisfaction_surveys_with_context():
-            with app.app_context():
-                return SatisfactionService.auto_send_satisfaction_surveys()
-
-        def auto_update_certifications_with_context():
-            with app.app_context():
-                return CertificationService.auto_update_certifications()
-
-        def generate_performance_report_with_context():
-            with app.app_context():
-                return PerformanceService.generate_performance_report()
-
-        # Agendar verificação de notificações a cada hora
-        scheduler.add_job(
-            id='check_notifications',
-            func=run_notification_checks_with_context,
-            trigger='interval',
-            hours=1,
-            max_instances=1,
-            replace_existing=True
-        )
-
-        # Agendar processamento de lembretes recorrentes a cada hora
-        scheduler.add_job(
-            id='process_recurring_reminders',
-            func=process_recurring_reminders_with_context,
-            trigger='interval',
-            hours=1,
-            max_instances=1,
-            replace_existing=True
-        )
-
-        # Agendar tarefa de envio automático de pesquisas de satisfação
-        scheduler.add_job(
-            id='auto_send_satisfaction_surveys',
-            func=auto_send_satisfaction_surveys_with_context,
-            trigger='interval',
-            hours=6,  # A cada 6 horas
-            max_instances=1,
-            replace_existing=True
-        )
-
-        # Agendar tarefa de atualização automática de certificações
-        scheduler.add_job(
-            id='auto_update_certifications',
-            func=auto_update_certifications_with_context,
-            trigger='interval',
-            hours=1,  # A cada hora
-            max_instances=1,
-            replace_existing=True
-        )
-
-        # Agendar tarefa de monitoramento de performance
-        scheduler.add_job(
-            id='performance_monitoring',
-            func=generate_performance_report_with_context,
-            trigger='interval',
-            hours=4,  # A cada 4 horas
-            max_instances=1,
-            replace_existing=True
-        )
-
-        # Agendar verificação de SLA de equipamentos
-        def check_equipment_sla_with_context():
-            with app.app_context():
-                from .services.equipment_service import EquipmentService
-                return EquipmentService.check_sla_status()
-
-        scheduler.add_job(
-            id='equipment_sla_check',
-            func=check_equipment_sla_with_context,
-            trigger='interval',
-            hours=1,  # A cada hora
-            max_instances=1,
-            replace_existing=True
-        )
-
-        # Agendar lembretes de devolução de equipamentos
-        def send_equipment_reminders_with_context():
-            with app.app_context():
-                from .services.equipment_service import EquipmentService
-                return EquipmentService.send_return_reminders()
-
-        scheduler.add_job(
-            id='equipment_return_reminders',
-            func=send_equipment_reminders_with_context,
-            trigger='interval',
-            hours=6,  # A cada 6 horas
-            max_instances=1,
-            replace_existing=True
-        )
-
-        # Agendar verificação de alertas de manutenção
-        def check_equipment_maintenance_with_context():
-            with app.app_context():
-                from .services.equipment_service import EquipmentService
-                return EquipmentService.check_maintenance_alerts()
-
-        scheduler.add_job(
-            id='equipment_maintenance_alerts',
-            func=check_equipment_maintenance_with_context,
-            trigger='interval',
-            hours=24,  # Uma vez por dia
-            max_instances=1,
-            replace_existing=True
+    # Scheduler apenas no processo designado (SCHEDULER_ENABLED); ver também `flask scheduler`
+    if app.config.get('SCHEDULER_ENABLED', True):
+        with profiler.phase('scheduler'):
+            start_scheduler(app)
+    else:
+        app.logger.warning(
+            'SCHEDULER_ENABLED=false: jobs agendados (incluindo reenvios e envios em lote da '
+            'fila de emails) exigem um processo `flask scheduler` dedicado'
         )
 
-        # Tarefas agendadas configuradas
-
-    from . import routes
-    app.register_blueprint(routes.bp)
+    with profiler.phase('blueprint main (routes)'):
+        from . import routes
+        app.register_blueprint(routes.bp)
 
     # Registrar blueprint de autenticação
-    from .auth import bp_auth
-    app.register_blueprint(bp_auth, url_prefix="/auth")
+    with profiler.phase('blueprint auth'):
+        from .auth import bp_auth
+        app.register_blueprint(bp_auth, url_prefix="/auth")
 
     # Registrar filtros de template para timezone
     from .template_filters import register_template_filters
@@ -456,8 +318,9 @@ def create_app():
 
     # Registrar blueprint de configurações do sistema
     try:
-        from .blueprints.system_config import system_config
-        app.register_blueprint(system_config)
+        with profiler.phase('blueprint system_config'):
+            from .blueprints.system_config import system_config
+            app.register_blueprint(system_config)
     except Exception as exc:
         app.logger.warning(
             "Blueprint de configurações não pôde ser registrado: %s",
@@ -483,18 +346,133 @@ def create_app():
 
     # Registrar blueprint de equipamentos V2 (NOVO - LIMPO)
     try:
-        from .blueprints.equipment_clean import bp as equipment_v2_bp
-        app.register_blueprint(equipment_v2_bp)
+        with profiler.phase('blueprint equipment_v2'):
+            from .blueprints.equipment_clean import bp as equipment_v2_bp
+            app.register_blueprint(equipment_v2_bp)
         app.logger.info("Blueprint de equipamentos V2 (limpo) registrado com sucesso")
     except Exception as e:
         app.logger.error("Blueprint de equipamentos V2 não pôde ser registrado")
 
     # Registrar blueprint de exportação Analytics
     try:
-        from .analytics_routes import analytics_bp
-        app.register_blueprint(analytics_bp)
+        with profiler.phase('blueprint analytics'):
+            from .analytics_routes import analytics_bp
+            app.register_blueprint(analytics_bp)
         app.logger.info("✅ Blueprint de exportação Analytics registrado com sucesso")
     except Exception as e:
         app.logger.error(f"❌ Blueprint de exportação Analytics não pôde ser registrado: {e}")
 
+    # Comandos CLI (ícones, scheduler dedicado)
+    from .cli import register_cli
+    register_cli(app)
+
+    app.extensions['startup_profile'] = profiler.report() if profiler.enabled else None
+    profiler.log()
+
     return app
+
+
+def start_scheduler(app):
+    """
+    Inicia o APScheduler neste processo e agenda os jobs periódicos
+
+    Chamado por ``create_app`` quando ``SCHEDULER_ENABLED`` está ativo, ou pelo
+    comando ``flask scheduler`` em um processo dedicado (com os workers web
+    rodando com ``SCHEDULER_ENABLED=false``).
+    """
+    if scheduler.running:
+        app.logger.info('Scheduler já está em execução neste processo')
+        return
+    scheduler.init_app(app)
+    scheduler.start()
+
+    # Configurar tarefas agendadas
+    with app.app_context():
+        from datetime import timedelta
+        from .services.notification_service import NotificationService
+        from .services.satisfaction_service import SatisfactionService
+        from .services.certification_service import CertificationService
+        from .services.performance_service import PerformanceService
+        from .services.reminder_service import ReminderService
+        from .services.equipment_service import EquipmentService
+        from .services.export_job_service import ExportJobService
+        from .services.mail_queue_service import MailQueueService
+        from .services.rfid_history import RFIDHistoryService
+        from .services.rfid_service import RFIDService
+        from .services.scheduler_runtime import SchedulerRuntime
+        from .services.sla_engine import SlaEngine
+
+        def schedule_job(job_id, func, **interval):
+            """
+            Agenda um job de intervalo executado com lease no banco: com vários
+            processos (workers do gunicorn) apenas um executa cada rodada, e a
+            execução fica registrada em scheduler_job_run
+            """
+            interval_seconds = timedelta(**interval).total_seconds()
+
+            def run_with_lease():
+                with app.app_context():
+                    return SchedulerRuntime.run(job_id, func, interval_seconds)
+
+            scheduler.add_job(
+                id=job_id,
+                func=run_with_lease,
+                trigger='interval',
+                max_instances=1,
+                replace_existing=True,
+                **interval
+            )
+
+        # Agendar verificação de notificações a cada hora
+        schedule_job('check_notifications', NotificationService.run_notification_checks, hours=1)
+
+        # Agendar processamento de lembretes recorrentes a cada hora
+        schedule_job('process_recurring_reminders', ReminderService.process_recurring_reminders, hours=1)
+
+        # Agendar tarefa de envio automático de pesquisas de satisfação (a cada 6 horas)
+        schedule_job('auto_send_satisfaction_surveys', SatisfactionService.auto_send_satisfaction_surveys, hours=6)
+
+        # Agendar tarefa de atualização automática de certificações (a cada hora)
+        schedule_job('auto_update_certifications', CertificationService.auto_update_certifications, hours=1)
+
+        # Agendar tarefa de monitoramento de performance (a cada 4 horas)
+        schedule_job('performance_monitoring', PerformanceService.generate_performance_report, hours=4)
+
+        # Agendar verificação de SLA de equipamentos (a cada hora)
+        schedule_job('equipment_sla_check', EquipmentService.check_sla_status, hours=1)
+
+        # Atualizar o SLA persistido dos chamados (transições por tempo decorrido)
+        schedule_job('chamado_sla_refresh', lambda: len(SlaEngine.recompute_chamados()), minutes=5)
+
+        # Agendar lembretes de devolução de equipamentos (a cada 6 horas)
+        schedule_job('equipment_return_reminders', EquipmentService.send_return_reminders, hours=6)
+
+        # Agendar verificação de alertas de manutenção (uma vez por dia)
+        schedule_job('equipment_maintenance_alerts', EquipmentService.check_maintenance_alerts, hours=24)
+
+        # Fila de exportação: reenfileirar jobs órfãos e expirar arquivos antigos
+        def process_export_jobs():
+            ExportJobService.requeue_pending()
+            return ExportJobService.cleanup_expired()
+
+        schedule_job('export_jobs_maintenance', process_export_jobs, minutes=5)
+
+        # Envio em lote da fila de emails de saída
+        schedule_job(
+            'mail_queue_dispatch', MailQueueService.dispatch,
+            seconds=app.config.get('MAIL_QUEUE_INTERVAL_SECONDS', 30)
+        )
+
+        # Limpeza do histórico de execuções dos jobs (uma vez por dia)
+        schedule_job('scheduler_history_cleanup', SchedulerRuntime.cleanup_history, hours=24)
+
+        # Partições diárias e retenção do histórico de leituras RFID
+        schedule_job('rfid_reads_maintenance', RFIDHistoryService.maintain, hours=12)
+
+        # Equipamentos sem leitura RFID dentro da janela da categoria
+        schedule_job(
+            'rfid_lost_detection', RFIDService.detect_lost_equipment,
+            minutes=app.config.get('RFID_LOST_CHECK_MINUTES', 15)
+        )
+
+        # Tarefas agendadas configuradas
@@ -10,16 +10,18 @@ FLUXO:
 5. TI/Admin confirma devolução
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, current_app, abort
 import os
 from werkzeug.utils import secure_filename
 from app.utils import flash_success, flash_error, flash_info
 from flask_login import login_required, current_user
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from sqlalchemy import and_, or_
 
 from app import db
 from app.models import Equipment, EquipmentReservation, EquipmentLoan, User
+from app.services.availability_service import MAX_CALENDAR_DAYS, AvailabilityService
+from app.services.equipment_queries import EquipmentQueries
 
 bp = Blueprint('equipment_v2', __name__, url_prefix='/equipment')
 
@@ -30,44 +32,75 @@ bp = Blueprint('equipment_v2', __name__, url_prefix='/equipment')
 @login_required
 def index():
     """Página inicial - Dashboard simples"""
-    # Estatísticas básicas
-    total_equipments = Equipment.query.count()
-    available = Equipment.query.filter_by(status='disponivel').count()
-    
-    # Minhas solicitações pendentes
-    my_pending = EquipmentReservation.query.filter_by(
-        user_id=current_user.id,
-        status='pendente'
-    ).count()
-    
-    # Meus empréstimos ativos
-    my_loans = EquipmentLoan.query.filter_by(
-        user_id=current_user.id,
-        status='ativo'
-    ).count()
-    
-    # Para TI/Admin: Aprovações pendentes
-    pending_approvals = 0
-    if current_user.is_ti or current_user.is_admin:
-        pending_approvals = EquipmentReservation.query.filter_by(
-            status='pendente'
-        ).count()
-    
-    return render_template('equipment_v2/index.html',
-        total_equipments=total_equipments,
-        available=available,
-        my_pending=my_pending,
-        my_loans=my_loans,
-        pending_approvals=pending_approvals
+    # Estatísticas básicas, minhas solicitações/empréstimos e (TI/Admin) aprovações pendentes
+    counts = EquipmentQueries.index_counts(
+        current_user.id, include_pending_approvals=current_user.is_ti or current_user.is_admin
     )
+    return render_template('equipment_v2/index.html', **counts)
 
 
 @bp.route('/catalog')
 @login_required
 def catalog():
     """Lista todos os equipamentos disponíveis"""
-    equipments = Equipment.query.filter_by(status='disponivel').order_by(Equipment.name).all()
-    return render_template('equipment_v2/catalog.html', equipments=equipments)
+    page = EquipmentQueries.catalog(request.args.get('cursor'))
+    # Reservas/empréstimos de todos os equipamentos da página em uma consulta
+    availability = AvailabilityService.catalog_availability(page.items)
+    return render_template('equipment_v2/catalog.html', equipments=page.items, page=page,
+                           availability=availability)
+
+
+@bp.route('/api/availability')
+@login_required
+def api_availability():
+    """
+    Calendário livre/ocupado dos equipamentos
+
+    Parâmetros: ``equipment_id`` (repetível), ``start`` e ``end`` (YYYY-MM-DD ou
+    ISO datetime; padrão: hoje + 7 dias)
+    """
+    equipment_ids = request.args.getlist('equipment_id', type=int)
+    if not equipment_ids:
+        return jsonify({'error': 'Informe ao menos um equipment_id'}), 400
+    try:
+        start = _parse_datetime_arg('start') or datetime.combine(datetime.now().date(), datetime.min.time())
+        end = _parse_datetime_arg('end', end_of_day=True) or start + timedelta(days=7)
+    except ValueError:
+        return jsonify({'error': 'Data inválida (use YYYY-MM-DD ou YYYY-MM-DDTHH:MM)'}), 400
+    if end <= start:
+        return jsonify({'error': 'O fim do período deve ser posterior ao início'}), 400
+    if end - start > timedelta(days=MAX_CALENDAR_DAYS):
+        return jsonify({'error': f'Período máximo de {MAX_CALENDAR_DAYS} dias'}), 400
+
+    index = AvailabilityService.build_index(equipment_ids, start, end)
+    include_user = current_user.is_ti or current_user.is_admin
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'equipments': [
+            index.calendar(equipment_id, start, end, include_user=include_user)
+            for equipment_id in equipment_ids if equipment_id in index.equipments
+        ],
+    })
+
+
+def _parse_datetime_arg(name, end_of_day=False):
+    """
+    Lê YYYY-MM-DD (início ou fim do dia) ou datetime ISO da query string
+
+    Datas com fuso (``+00:00``, ``-04:00``) são convertidas para UTC sem fuso,
+    o formato gravado no banco.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    if len(value) == 10:
+        day = datetime.strptime(value, '%Y-%m-%d')
+        return day + timedelta(days=1) if end_of_day else day
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
 
 
 # ==================== SOLICITAÇÕES (USUÁRIO) ====================
@@ -143,43 +176,17 @@ def request_equipment(equipment_id):
 @login_required
 def my_requests():
     """Minhas solicitações"""
-    requests = EquipmentReservation.query.filter_by(
-        user_id=current_user.id
-    ).order_by(EquipmentReservation.created_at.desc()).all()
-    
-    return render_template('equipment_v2/my_requests.html', requests=requests)
+    page = EquipmentQueries.user_reservations(current_user.id, request.args.get('cursor'))
+    return render_template('equipment_v2/my_requests.html', requests=page.items, page=page)
 
 
 @bp.route('/my-loans')
 @login_required
 def my_loans():
-    loans = EquipmentLoan.query.filter_by(
-        user_id=current_user.id
-    ).order_by(EquipmentLoan.loan_date.desc()).all()
-
-    delivery_map = {}
-    return_map = {}
-    for loan in loans:
-        base_delivery = os.path.join(current_app.root_path, 'static', 'uploads', 'equipment_loans', str(loan.id), 'delivery')
-        base_return = os.path.join(current_app.root_path, 'static', 'uploads', 'equipment_loans', str(loan.id), 'return')
-        urls_delivery = []
-        urls_return = []
-        try:
-            if os.path.isdir(base_delivery):
-                for name in sorted(os.listdir(base_delivery)):
-                    urls_delivery.append(url_for('static', filename=f"uploads/equipment_loans/{loan.id}/delivery/{name}"))
-        except Exception:
-            pass
-        try:
-            if os.path.isdir(base_return):
-                for name in sorted(os.listdir(base_return)):
-                    urls_return.append(url_for('static', filename=f"uploads/equipment_loans/{loan.id}/return/{name}"))
-        except Exception:
-            pass
-        delivery_map[loan.id] = urls_delivery
-        return_map[loan.id] = urls_return
-
-    return render_template('equipment_v2/my_loans.html', loans=loans, delivery_photos_map=delivery_map, return_photos_map=return_map)
+    page = EquipmentQueries.user_loans(current_user.id, request.args.get('cursor'))
+    delivery_map, return_map = _loan_photo_maps(page.items)
+    return render_template('equipment_v2/my_loans.html', loans=page.items, page=page,
+                           delivery_photos_map=delivery_map, return_photos_map=return_map)
 
 
 # ==================== APROVAÇÕES (TI/ADMIN) ====================
@@ -192,11 +199,9 @@ def admin_pending():
         flash_error('Acesso negado! Apenas TI/Admin podem acessar.')
         return redirect(url_for('equipment_v2.index'))
     
-    pending = EquipmentReservation.query.filter_by(
-        status='pendente'
-    ).order_by(EquipmentReservation.created_at).all()
-    
-    return render_template('equipment_v2/admin_pending.html', pending=pending)
+    page = EquipmentQueries.pending_reservations(request.args.get('cursor'))
+    return render_template('equipment_v2/admin_pending.html', pending=page.items, page=page,
+                           pending_total=EquipmentQueries.pending_count())
 
 
 @bp.route('/admin/approve/<int:reservation_id>', methods=['POST'])
@@ -284,39 +289,18 @@ def admin_loans():
         flash_error('Acesso negado!')
         return redirect(url_for('equipment_v2.index'))
     
-    loans = EquipmentLoan.query.filter_by(
-        status='ativo'
-    ).order_by(EquipmentLoan.loan_date.desc()).all()
+    page = EquipmentQueries.active_loans(request.args.get('cursor'))
 
     # Mapas de fotos para visualização
-    delivery_map = {}
-    return_map = {}
-    for loan in loans:
-        base_delivery = os.path.join(current_app.root_path, 'static', 'uploads', 'equipment_loans', str(loan.id), 'delivery')
-        base_return = os.path.join(current_app.root_path, 'static', 'uploads', 'equipment_loans', str(loan.id), 'return')
-        urls_delivery = []
-        urls_return = []
-        try:
-            if os.path.isdir(base_delivery):
-                for name in sorted(os.listdir(base_delivery)):
-                    urls_delivery.append(url_for('static', filename=f"uploads/equipment_loans/{loan.id}/delivery/{name}"))
-        except Exception:
-            pass
-        try:
-            if os.path.isdir(base_return):
-                for name in sorted(os.listdir(base_return)):
-                    urls_return.append(url_for('static', filename=f"uploads/equipment_loans/{loan.id}/return/{name}"))
-        except Exception:
-            pass
-        delivery_map[loan.id] = urls_delivery
-        return_map[loan.id] = urls_return
+    delivery_map, return_map = _loan_photo_maps(page.items)
 
     # Dicionário vazio para empréstimos com solicitação de devolução
     return_requested_map = {}
-    
-    return render_template('equipment_v2/admin_loans.html', 
-                         loans=loans, 
-                         delivery_photos_map=delivery_map, 
+
+    return render_template('equipment_v2/admin_loans.html',
+                         loans=page.items,
+                         page=page,
+                         delivery_photos_map=delivery_map,
                          return_photos_map=return_map,
                          return_requested_map=return_requested_map)
 
@@ -324,31 +308,16 @@ def admin_loans():
 @bp.route('/loan/<int:loan_id>')
 @login_required
 def loan_detail(loan_id):
-    loan = EquipmentLoan.query.get_or_404(loan_id)
+    loan = EquipmentQueries.loan_detail(loan_id)
+    if loan is None:
+        abort(404)
     if not (current_user.is_ti or current_user.is_admin or loan.user_id == current_user.id):
         flash_error('Acesso negado!')
         return redirect(url_for('equipment_v2.index'))
 
-    delivery_urls = []
-    return_urls = []
-    base_delivery = os.path.join(current_app.root_path, 'static', 'uploads', 'equipment_loans', str(loan.id), 'delivery')
-    base_return = os.path.join(current_app.root_path, 'static', 'uploads', 'equipment_loans', str(loan.id), 'return')
-    try:
-        if os.path.isdir(base_delivery):
-            for name in sorted(os.listdir(base_delivery)):
-                delivery_urls.append(url_for('static', filename=f"uploads/equipment_loans/{loan.id}/delivery/{name}"))
-    except Exception:
-        pass
-    try:
-        if os.path.isdir(base_return):
-            for name in sorted(os.listdir(base_return)):
-                return_urls.append(url_for('static', filename=f"uploads/equipment_loans/{loan.id}/return/{name}"))
-    except Exception:
-        pass
-
-    reservation = None
-    if loan.reservation_id:
-        reservation = EquipmentReservation.query.get(loan.reservation_id)
+    delivery_urls = _loan_photo_urls(loan.id, 'delivery')
+    return_urls = _loan_photo_urls(loan.id, 'return')
+    reservation = loan.reservation
 
     return render_template(
         'equipment_v2/loan_detail.html',
@@ -404,8 +373,8 @@ def admin_equipment():
         flash_error('Acesso negado!')
         return redirect(url_for('equipment_v2.index'))
     
-    equipments = Equipment.query.order_by(Equipment.name).all()
-    return render_template('equipment_v2/admin_equipment.html', equipments=equipments)
+    page = EquipmentQueries.all_equipment(request.args.get('cursor'))
+    return render_template('equipment_v2/admin_equipment.html', equipments=page.items, page=page)
 
 
 @bp.route('/admin/equipment/new', methods=['GET', 'POST'])
@@ -477,6 +446,28 @@ def admin_equipment_edit(equipment_id):
             flash_error(f'Erro ao atualizar: {str(e)}')
     
     return render_template('equipment_v2/admin_equipment_form.html', equipment=equipment)
+
+
+def _loan_photo_urls(loan_id, kind):
+    """URLs das fotos de entrega/devolução salvas para o empréstimo"""
+    base = os.path.join(current_app.root_path, 'static', 'uploads', 'equipment_loans', str(loan_id), kind)
+    urls = []
+    try:
+        if os.path.isdir(base):
+            for name in sorted(os.listdir(base)):
+                urls.append(url_for('static', filename=f"uploads/equipment_loans/{loan_id}/{kind}/{name}"))
+    except Exception:
+        pass
+    return urls
+
+
+def _loan_photo_maps(loans):
+    """Mapas loan_id -> URLs das fotos de entrega e de devolução"""
+    delivery_map = {loan.id: _loan_photo_urls(loan.id, 'delivery') for loan in loans}
+    return_map = {loan.id: _loan_photo_urls(loan.id, 'return') for loan in loans}
+    return delivery_map, return_map
+
+
 def _process_and_save_images(files, loan_id, kind):
     """Processa e salva até 3 imagens com validações e compressão.
     kind: 'delivery' ou 'return'
@@ -1373,7 +1373,11 @@ def system_logs():
             'timestamp': log['timestamp'].strftime('%Y-%m-%d %H:%M:%S') if isinstance(log['timestamp'], datetime) else log['timestamp'],
             'level': log['level'],
             'message': log['message'],
-            'file': log.get('file', '')
+            'file': log.get('file', ''),
+            'request_id': log.get('request_id'),
+            'user_id': log.get('user_id'),
+            'route': log.get('route'),
+            'latency_ms': log.get('latency_ms'),
         })
     
     # Dados para paginação
@@ -1400,6 +1404,21 @@ def system_logs():
                           error=log_result.get('error'),
                           now=now)
 
+@system_config.route("/sistema/logs/recentes")
+@login_required
+@admin_required
+def system_logs_recent():
+    """Registros recentes do buffer em memória (aba de logs ao vivo)"""
+    result = LogReaderService.read_recent(
+        level=request.args.get('level') or None,
+        search=request.args.get('search') or None,
+        after=request.args.get('after', 0, type=int),
+        limit=min(request.args.get('limit', 100, type=int), 500),
+    )
+    for log in result['logs']:
+        log['timestamp'] = log['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
+    return jsonify(result)
+
 # ========================================
 # NOTIFICAÇÕES
 # ========================================
@@ -0,0 +1,42 @@
+"""
+Comandos ``flask`` da aplicação
+
+- ``flask icons``: gera os ícones PWA e o favicon (executar no deploy)
+- ``flask scheduler``: processo dedicado aos jobs agendados; os workers web
+  rodam com ``SCHEDULER_ENABLED=false``
+"""
+import time
+
+import click
+
+
+def register_cli(app):
+    """Registra os comandos CLI no app"""
+
+    @app.cli.command('icons')
+    def icons_command():
+        """Gera os ícones ausentes a partir de static/icons/logo.svg."""
+        from .utils.icon_assets import ensure_icons, missing_icons
+
+        missing = missing_icons(app.static_folder)
+        if not missing:
+            click.echo('Ícones já gerados.')
+            return
+        ensure_icons(app.static_folder)
+        still_missing = missing_icons(app.static_folder)
+        click.echo(f'{len(missing) - len(still_missing)} ícone(s) gerado(s).')
+        for path in still_missing:
+            click.echo(f'Não gerado (cairosvg ausente?): {path}')
+
+    @app.cli.command('scheduler')
+    def scheduler_command():
+        """Executa os jobs agendados neste processo até ser interrompido."""
+        from . import scheduler, start_scheduler
+
+        start_scheduler(app)
+        click.echo(f'Scheduler em execução com {len(scheduler.get_jobs())} jobs (Ctrl+C para sair).')
+        try:
+            while True:
+                time.sleep(60)
+        except (KeyboardInterrupt, SystemExit):
+            scheduler.shutdown()
@@ -1,5 +1,5 @@
 from flask import current_app
-from flask_mail import Mail, Message
+from flask_mail import Mail
 
 mail = Mail()
 
@@ -60,26 +60,20 @@ def configure_mail_from_settings():
 
 
 def send_email(subject, recipients, body, html_body=None):
-    """Envia email usando configurações dinâmicas"""
-    # Configurar mail antes de enviar
-    configure_mail_from_settings()
-    
+    """
+    Grava o email na fila e tenta o envio imediato (MAIL_SEND_IMMEDIATELY);
+    se falhar, o reenvio fica com o dispatcher da fila
+    """
+    from app.services.mail_queue_service import MailQueueService
+
     try:
-        msg = Message(subject, recipients=recipients, body=body, html=html_body)
-        
-        # Garantir remetente
-        if not msg.sender:
-            msg.sender = current_app.config.get("MAIL_DEFAULT_SENDER")
-        
-        # Usar instância global ou do app
-        mail_instance = current_app.extensions.get('mail', mail)
-        mail_instance.send(msg)
-        
-        current_app.logger.info(f"Email enviado para {recipients} com assunto: {subject}")
+        MailQueueService.enqueue(recipients, subject, html_body=html_body, text_body=body,
+                                 immediate=True)
+        current_app.logger.info(f"Email enfileirado para {recipients} com assunto: {subject}")
         return True
         
     except Exception as e:
-        current_app.logger.error(f"Erro ao enviar email: {e}")
+        current_app.logger.error(f"Erro ao enfileirar email: {e}")
         return False
 
 
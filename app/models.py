@@ -2,6 +2,8 @@ import secrets
 from datetime import datetime, timedelta, time
 from flask_login import UserMixin
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import check_password_hash, generate_password_hash
 
 from . import db
@@ -115,6 +117,13 @@ class Sector(db.Model):
 
 
 class Reminder(db.Model):
+    __table_args__ = (
+        # Varredura de notificações/recorrência: status + completed + vencimento
+        db.Index("ix_reminder_status_completed_due_date", "status", "completed", "due_date"),
+        # Lembretes do usuário por vencimento (index, listagens)
+        db.Index("ix_reminder_user_id_due_date", "user_id", "due_date"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     type = db.Column(db.String(50), nullable=False)
@@ -163,6 +172,11 @@ class ReminderHistory(db.Model):
 
 
 class Task(db.Model):
+    __table_args__ = (
+        # Tarefas do usuário por situação e data (index, dashboard, SLA)
+        db.Index("ix_task_user_id_completed_date", "user_id", "completed", "date"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(200), nullable=False)
     date = db.Column(db.Date, default=datetime.utcnow)
@@ -174,6 +188,16 @@ class Task(db.Model):
 
 
 class Chamado(db.Model):
+    __table_args__ = (
+        # Listagens/contagens por status ordenadas ou filtradas por abertura
+        db.Index("ix_chamado_status_data_abertura", "status", "data_abertura"),
+        # Filtro de permissão: solicitante OU setor do usuário
+        db.Index("ix_chamado_solicitante_id", "solicitante_id"),
+        db.Index("ix_chamado_setor_id", "setor_id"),
+        # Filtros e ordenação por SLA persistido (listas e dashboard)
+        db.Index("ix_chamado_sla_status_prazo_sla", "sla_status", "prazo_sla"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(120), nullable=False)
     descricao = db.Column(db.Text, nullable=False)
@@ -209,6 +233,9 @@ class Chamado(db.Model):
     tempo_resposta_horas = db.Column(
         db.Float, nullable=True
     )  # Tempo de resposta em horas
+    sla_status = db.Column(
+        db.String(20), nullable=False, default="normal", server_default="normal"
+    )  # Último status_sla calculado (atualizado na gravação e pelo SlaEngine)
 
     # Campos de Satisfação
     satisfaction_rating = db.Column(
@@ -542,8 +569,29 @@ class VisualizacaoTutorial(db.Model):
         return f"<VisualizacaoTutorial {self.id} - Tutorial {self.tutorial_id}>"
 
 
+class TutorialViewCounter(db.Model):
+    """Contador materializado de visualizações por tutorial (atualizado a cada visualização)"""
+    __tablename__ = "tutorial_view_counter"
+
+    tutorial_id = db.Column(db.Integer, db.ForeignKey("tutorial.id"), primary_key=True)
+    total_views = db.Column(db.Integer, nullable=False, default=0, index=True)
+    last_viewed_at = db.Column(db.DateTime, nullable=True)
+
+    tutorial = db.relationship(
+        "Tutorial",
+        backref=db.backref("view_counter", uselist=False, lazy=True, cascade="all, delete-orphan"),
+    )
+
+    def __repr__(self):
+        return f"<TutorialViewCounter Tutorial {self.tutorial_id}: {self.total_views}>"
+
+
 class Equipment(db.Model):
     """Inventário central de equipamentos disponíveis para empréstimo"""
+    __table_args__ = (
+        # Detector de perdidos: percorre só os 'ativo' com leitura anterior ao corte
+        db.Index("ix_equipment_rfid_status_rfid_last_scan", "rfid_status", "rfid_last_scan"),
+    )
     id = db.Column(db.Integer, primary_key=True)
 
     # Identificação
@@ -624,25 +672,17 @@ class Equipment(db.Model):
         return f"<Equipment {self.id}: {self.name} ({self.patrimony or 'Sem patrimônio'})>"
 
     def is_available(self):
-        """Verifica se o equipamento está disponível para empréstimo"""
-        # Verifica status básico e condição
-        if self.status != "disponivel" or self.condition not in ["novo", "bom", "regular"]:
-            return False
-            
-        # Verifica se há reservas ativas
-        now = datetime.utcnow().date()
-        active_reservation = EquipmentReservation.query.filter(
-            EquipmentReservation.equipment_id == self.id,
-            EquipmentReservation.status == "confirmada",
-            EquipmentReservation.start_date <= now,
-            EquipmentReservation.end_date >= now
-        ).first()
-        
-        # Se houver reserva ativa, não está disponível
-        if active_reservation:
-            return False
-            
-        return True
+        """
+        Verifica se o equipamento está disponível para empréstimo agora
+
+        Para listas de equipamentos use AvailabilityService.build_index, que
+        carrega os períodos ocupados de todos em uma única consulta.
+        """
+        from .services.availability_service import AvailabilityService
+
+        now = datetime.now()
+        index = AvailabilityService.build_index([self], now, now + timedelta(minutes=1))
+        return index.is_available(self.id, now, now + timedelta(minutes=1))
 
     def can_be_reserved_by(self, user):
         """Verifica se o usuário pode reservar este equipamento"""
@@ -792,6 +832,10 @@ class SecureConfig(db.Model):
 class EquipmentLoan(db.Model):
     """Empréstimos ativos de equipamentos"""
     __tablename__ = 'equipment_loan'
+    __table_args__ = (
+        # Verificação de SLA/atrasos: empréstimos por status e data prevista de devolução
+        db.Index('ix_equipment_loan_status_expected_return_date', 'status', 'expected_return_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
 
@@ -971,6 +1015,9 @@ class EquipmentRequest(db.Model):
         db.String(50), nullable=True
     )  # Tipo de equipamento (notebook, monitor, etc.)
     destination_sector = db.Column(db.String(100), nullable=True)  # Setor/Destino
+    destination_sector_id = db.Column(
+        db.Integer, db.ForeignKey("sector.id"), nullable=True, index=True
+    )  # Setor resolvido a partir de destination_sector (mantido na escrita)
     request_reason = db.Column(db.Text, nullable=True)  # Motivo da solicitação
 
     # Timestamps
@@ -997,10 +1044,65 @@ class EquipmentRequest(db.Model):
     approved_by = db.relationship(
         "User", foreign_keys=[approved_by_id], backref="equipment_requests_aprovadas"
     )
+    destination_sector_ref = db.relationship("Sector", foreign_keys=[destination_sector_id])
 
     def __repr__(self):
         return f"<EquipmentRequest {self.id}: {self.description[:50]}...>"
 
+    @staticmethod
+    def resolve_sector_id(destination, sectors):
+        """
+        Resolve o texto livre de destino para o ID de um setor cadastrado
+
+        Usa o nome exato (sem diferenciar maiúsculas) e, se não houver, o nome de
+        setor mais longo contido no texto (mesmo critério do antigo filtro LIKE).
+
+        Args:
+            destination: Texto de destination_sector
+            sectors: Iterável de tuplas (id, nome) dos setores
+
+        Returns:
+            ID do setor ou None
+        """
+        if not destination:
+            return None
+        destination_lower = destination.strip().lower()
+        best_id, best_len = None, 0
+        for sector_id, name in sectors:
+            if not name:
+                continue
+            name_lower = name.strip().lower()
+            if name_lower == destination_lower:
+                return sector_id
+            if name_lower in destination_lower and len(name_lower) > best_len:
+                best_id, best_len = sector_id, len(name_lower)
+        return best_id
+
+    @classmethod
+    def backfill_destination_sectors(cls):
+        """
+        Preenche destination_sector_id das solicitações existentes
+
+        Returns:
+            Quantidade de solicitações atualizadas
+        """
+        sectors = db.session.query(Sector.id, Sector.name).all()
+        pending = db.session.query(cls.id, cls.destination_sector).filter(
+            cls.destination_sector.isnot(None),
+            cls.destination_sector_id.is_(None),
+        ).all()
+
+        mappings = []
+        for request_id, destination in pending:
+            sector_id = cls.resolve_sector_id(destination, sectors)
+            if sector_id:
+                mappings.append({'id': request_id, 'destination_sector_id': sector_id})
+
+        if mappings:
+            db.session.bulk_update_mappings(cls, mappings)
+            db.session.commit()
+        return len(mappings)
+
     def get_status_display(self):
         """Retorna o status em português"""
         status_map = {
@@ -1210,3 +1312,284 @@ class SystemConfig(db.Model):
     
     def __repr__(self):
         return f"<SystemConfig {self.category}.{self.key}={self.value}>"
+
+
+class ExportJob(db.Model):
+    """Fila de geração de relatórios (PDF/Excel) em segundo plano"""
+    __tablename__ = "export_job"
+    __table_args__ = (
+        db.Index("ix_export_job_status_created_at", "status", "created_at"),
+    )
+
+    STATUS_PENDING = "pendente"
+    STATUS_RUNNING = "processando"
+    STATUS_DONE = "concluido"
+    STATUS_FAILED = "erro"
+    STATUS_EXPIRED = "expirado"
+
+    id = db.Column(db.Integer, primary_key=True)
+    token = db.Column(db.String(32), unique=True, nullable=False)  # Identificador público do job
+    kind = db.Column(db.String(30), nullable=False)  # excel, sla_pdf, analytics_pdf
+    params = db.Column(db.Text, nullable=True)  # Parâmetros do relatório (JSON)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0-100
+    file_path = db.Column(db.String(500), nullable=True)
+    file_name = db.Column(db.String(200), nullable=True)  # Nome sugerido para download
+    mimetype = db.Column(db.String(100), nullable=True)
+    file_size = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=get_current_time_for_db, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True)  # Execução que assumiu o job
+    progress_updated_at = db.Column(db.DateTime, nullable=True)  # Heartbeat do worker
+
+    user = db.relationship("User", backref=db.backref("export_jobs", lazy="dynamic"))
+
+    def to_dict(self):
+        """Converte o job para dicionário (resposta da API de status)"""
+        return {
+            'id': self.token,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'file_name': self.file_name,
+            'file_size': self.file_size,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+        }
+
+    def __repr__(self):
+        return f"<ExportJob {self.token} {self.kind} {self.status}>"
+
+
+class OutboundEmail(db.Model):
+    """Fila de emails de saída (enviados em lote pelo MailQueueService)"""
+    __tablename__ = "outbound_email"
+    __table_args__ = (
+        db.Index("ix_outbound_email_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    STATUS_PENDING = "pendente"
+    STATUS_SENDING = "enviando"
+    STATUS_SENT = "enviado"
+    STATUS_FAILED = "erro"
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipients = db.Column(db.Text, nullable=False)  # Endereços separados por vírgula
+    subject = db.Column(db.String(255), nullable=False)
+    html_body = db.Column(db.Text, nullable=True)
+    text_body = db.Column(db.Text, nullable=True)
+    sender = db.Column(db.String(255), nullable=True)  # Vazio = MAIL_DEFAULT_SENDER
+    category = db.Column(db.String(100), nullable=True)  # Template ou origem da mensagem
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    next_attempt_at = db.Column(db.DateTime, default=get_current_time_for_db, nullable=False)
+    claimed_at = db.Column(db.DateTime, nullable=True)  # Início do envio pelo dispatcher
+    claim_token = db.Column(db.String(32), nullable=True)  # Execução do dispatcher que reservou
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=get_current_time_for_db, nullable=False)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def recipient_list(self):
+        return [r.strip() for r in (self.recipients or "").split(",") if r.strip()]
+
+    def __repr__(self):
+        return f"<OutboundEmail {self.id} {self.status} {self.subject!r}>"
+
+
+class ReminderAlertLog(db.Model):
+    """Avisos preventivos já enviados (um por lembrete, antecedência e vencimento)"""
+    __tablename__ = "reminder_alert_log"
+    __table_args__ = (
+        db.UniqueConstraint(
+            "reminder_id", "horizon_days", "due_date", name="uq_reminder_alert_log_reminder_horizon_due"
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    reminder_id = db.Column(
+        db.Integer, db.ForeignKey("reminder.id", ondelete="CASCADE"), nullable=False
+    )
+    horizon_days = db.Column(db.Integer, nullable=False)  # Dias antes do vencimento
+    due_date = db.Column(db.Date, nullable=False)  # Vencimento avisado (muda ao adiar o lembrete)
+    sent_at = db.Column(db.DateTime, default=get_current_time_for_db, nullable=False)
+
+    def __repr__(self):
+        return f"<ReminderAlertLog {self.reminder_id} {self.horizon_days}d {self.due_date}>"
+
+
+class SchedulerLease(db.Model):
+    """Lease de execução de um job agendado (um único processo executa cada rodada)"""
+    __tablename__ = "scheduler_lease"
+
+    job_id = db.Column(db.String(100), primary_key=True)
+    owner = db.Column(db.String(200), nullable=False)  # host:pid do processo que executou
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)  # Outros processos aguardam até aqui
+    running_since = db.Column(db.DateTime, nullable=True)  # Preenchido enquanto o job executa
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Renovado periodicamente durante a execução
+
+    def __repr__(self):
+        return f"<SchedulerLease {self.job_id} {self.owner} até {self.expires_at}>"
+
+
+class SchedulerJobRun(db.Model):
+    """Histórico de execuções dos jobs agendados"""
+    __tablename__ = "scheduler_job_run"
+    __table_args__ = (
+        db.Index("ix_scheduler_job_run_job_id_started_at", "job_id", "started_at"),
+    )
+
+    STATUS_RUNNING = "executando"
+    STATUS_SUCCESS = "sucesso"
+    STATUS_FAILED = "erro"
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(100), nullable=False)
+    owner = db.Column(db.String(200), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_RUNNING)
+    started_at = db.Column(db.DateTime, nullable=False, default=get_current_time_for_db)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)
+    rows_processed = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "job_id": self.job_id,
+            "owner": self.owner,
+            "status": self.status,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_ms": self.duration_ms,
+            "rows_processed": self.rows_processed,
+            "error": self.error,
+        }
+
+    def __repr__(self):
+        return f"<SchedulerJobRun {self.job_id} {self.status} {self.started_at}>"
+
+
+class RFIDLocation(db.Model):
+    """Locais dos leitores RFID (id compacto usado no histórico de leituras)"""
+    __tablename__ = "rfid_location"
+
+    id = db.Column(db.SmallInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+
+    def __repr__(self):
+        return f"<RFIDLocation {self.id} {self.name}>"
+
+
+class RFIDReader(db.Model):
+    """Leitores RFID (id compacto usado no histórico de leituras)"""
+    __tablename__ = "rfid_reader"
+
+    id = db.Column(db.SmallInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    code = db.Column(db.String(50), nullable=False, unique=True)  # reader_id enviado pelo leitor
+    location_id = db.Column(db.SmallInteger, db.ForeignKey("rfid_location.id"), nullable=True)
+
+    def __repr__(self):
+        return f"<RFIDReader {self.id} {self.code}>"
+
+
+class RFIDRead(db.Model):
+    """
+    Histórico de leituras RFID (somente inserção)
+
+    No PostgreSQL a tabela é particionada por dia em ``ts`` (ver migração
+    add_rfid_reads e RFIDHistoryService.maintain). Sem chave estrangeira para
+    equipment: as inserções são em lote e partições antigas são descartadas inteiras.
+    """
+    __tablename__ = "rfid_reads"
+    __table_args__ = (
+        db.Index("ix_rfid_reads_equipment_id_ts", "equipment_id", "ts"),
+        db.Index("ix_rfid_reads_reader_id_ts", "reader_id", "ts"),
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    equipment_id = db.Column(db.Integer, nullable=False)
+    reader_id = db.Column(db.SmallInteger, nullable=False)  # rfid_reader.id
+    location_id = db.Column(db.SmallInteger, nullable=False)  # rfid_location.id no momento da leitura
+    ts = db.Column(db.DateTime, nullable=False)  # Horário da leitura (UTC)
+
+    def __repr__(self):
+        return f"<RFIDRead {self.equipment_id} {self.reader_id} {self.ts}>"
+
+
+@event.listens_for(Chamado, "before_insert")
+@event.listens_for(Chamado, "before_update")
+def _sync_chamado_sla_status(mapper, connection, target):
+    """Persiste o status de SLA calculado sempre que o chamado é gravado"""
+    target.sla_status = target.status_sla
+
+
+@event.listens_for(EquipmentRequest, "before_insert")
+@event.listens_for(EquipmentRequest, "before_update")
+def _sync_destination_sector_id(mapper, connection, target):
+    """Mantém destination_sector_id sincronizado com o texto de destination_sector"""
+    if not db.inspect(target).attrs.destination_sector.history.has_changes():
+        return
+    if not target.destination_sector:
+        target.destination_sector_id = None
+        return
+    # Só os setores cujo nome aparece no texto (candidatos a resolve_sector_id)
+    sector_table = Sector.__table__
+    sectors = connection.execute(
+        db.select(sector_table.c.id, sector_table.c.name).where(
+            db.literal(target.destination_sector.strip().lower()).contains(
+                db.func.lower(db.func.trim(sector_table.c.name))
+            )
+        )
+    ).all()
+    target.destination_sector_id = EquipmentRequest.resolve_sector_id(
+        target.destination_sector, sectors
+    )
+
+
+@event.listens_for(VisualizacaoTutorial, "after_insert")
+def _increment_tutorial_view_counter(mapper, connection, target):
+    """
+    Incrementa o contador materializado na mesma transação da visualização
+
+    Usa upsert (``INSERT ... ON CONFLICT DO UPDATE``) para que duas primeiras
+    visualizações simultâneas do mesmo tutorial não colidam na chave primária.
+    """
+    counter_table = TutorialViewCounter.__table__
+    viewed_at = target.data or get_current_time_for_db()
+    increment = {"total_views": counter_table.c.total_views + 1, "last_viewed_at": viewed_at}
+
+    if connection.dialect.name in ("postgresql", "sqlite"):
+        if connection.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        connection.execute(
+            dialect_insert(counter_table)
+            .values(tutorial_id=target.tutorial_id, total_views=1, last_viewed_at=viewed_at)
+            .on_conflict_do_update(index_elements=[counter_table.c.tutorial_id], set_=increment)
+        )
+        return
+
+    # Demais bancos: UPDATE e, na primeira visualização, INSERT em savepoint
+    update_counter = counter_table.update().where(counter_table.c.tutorial_id == target.tutorial_id).values(**increment)
+    if connection.execute(update_counter).rowcount:
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(
+                counter_table.insert().values(
+                    tutorial_id=target.tutorial_id, total_views=1, last_viewed_at=viewed_at
+                )
+            )
+    except IntegrityError:
+        # Outra transação criou o contador entre o UPDATE e o INSERT
+        connection.execute(update_counter)
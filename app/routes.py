@@ -1,12 +1,14 @@
 import os
-from datetime import date, datetime, time, timedelta
+from datetime import date, datetime, time, timedelta, timezone
 import time as time_module
 from functools import wraps
 
 from dateutil.relativedelta import relativedelta
-from flask import (Blueprint, current_app, flash, jsonify, redirect,
-                   render_template, request, session, url_for, send_from_directory)
+from flask import (Blueprint, Response, current_app, flash, jsonify, redirect,
+                   render_template, request, session, stream_with_context, url_for,
+                   send_from_directory)
 from app.utils import flash_success, flash_error, flash_warning, flash_info
+from sqlalchemy.orm import joinedload
 from werkzeug.utils import secure_filename
 
 import markdown
@@ -17,16 +19,24 @@ from .forms import ChamadoAdminForm  # Importados formulários necessários
 from .forms import (ChamadoEditForm, ChamadoForm, ComentarioTutorialForm, FeedbackTutorialForm,
                      ReminderForm, TaskForm, TutorialForm, UserEditForm)
 from .models import Chamado  # Importados modelos necessários
-from .models import ComentarioChamado, ComentarioTutorial, Equipment, EquipmentRequest, FeedbackTutorial, Reminder, Sector, Task, Tutorial, TutorialImage, User, VisualizacaoTutorial, db
+from .models import ComentarioChamado, ComentarioTutorial, Equipment, EquipmentRequest, ExportJob, FeedbackTutorial, Reminder, Sector, Task, Tutorial, TutorialImage, User, VisualizacaoTutorial, db
+from .services.cache_service import CacheService
 from .services.dashboard_service import DashboardService
+from .services.dashboard_stats_engine import DashboardStatsEngine
+from .services.export_job_service import ExportJobService
+from .services.mail_queue_service import MailQueueService
 from .services.permission_manager import PermissionManager
+from .services.rfid_history import RFIDHistoryService
 from .services.rfid_service import RFIDService
 from .services.satisfaction_service import SatisfactionService
+from .services.scheduler_runtime import SchedulerRuntime
+from .services.tutorial_metrics_service import TutorialMetricsService
 from .services.certification_service import CertificationService
 from .services.performance_service import PerformanceService
+from .services.report_service import ReportService
 from .utils.timezone_utils import (format_local_datetime,
-                                    get_current_time_for_db, now_local,
-                                    utc_to_local)
+                                    get_current_time_for_db, local_to_utc,
+                                    now_local, utc_to_local)
 
 
 # Função para exigir que o usuário seja administrador
@@ -122,13 +132,7 @@ def index():
             Task.date <= date.today(), Task.user_id == user_id
         ).all()
         # Buscar chamados do usuário ou do setor do usuário
-        user = User.query.get(user_id)
-        primeiro_lembrete = Reminder.query.filter_by(user_id=user_id).first()
-        setor_id_usuario = (
-            primeiro_lembrete.sector_id
-            if primeiro_lembrete and primeiro_lembrete.sector_id
-            else None
-        )
+        setor_id_usuario = PermissionManager.get_user_sector(user_id)
 
         chamados_abertos = (
             Chamado.query.filter(
@@ -373,12 +377,9 @@ def index():
 
 from io import BytesIO
 
-import pandas as pd
 # --- Lembretes ---
 from dateutil.relativedelta import relativedelta
 from flask import make_response, send_file
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
 
 
 @bp.route("/reminders/complete/<int:id>", methods=["POST"])
@@ -613,89 +614,19 @@ def analytics_export_excel():
 @login_required
 def analytics_export_pdf():
     """Exporta um PDF com KPIs e tabelas resumidas do dashboard Analytics."""
-    from app.services.analytics.analytics_service import AnalyticsService
     from io import BytesIO
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    
-    # Parâmetros
-    start = request.args.get("start")
-    end = request.args.get("end")
-    if not start or not end:
-        today = date.today()
-        start = (today - timedelta(days=30)).isoformat()
-        end = today.isoformat()
-    start_d = date.fromisoformat(start)
-    end_d = date.fromisoformat(end)
-    
-    # Buscar dados
-    kpis = AnalyticsService.get_dashboard_kpis()
-    evolucao = AnalyticsService.get_chamados_por_periodo(start_d, end_d)
-    prioridade = AnalyticsService.get_chamados_por_prioridade()
-    perf = AnalyticsService.get_performance_por_tecnico(start_d, end_d)
-    setor = AnalyticsService.get_chamados_por_setor()
-    
-    # Montar PDF
+
+    start, end = request.args.get("start"), request.args.get("end")
+    if _wants_async_export():
+        return _submit_export_job("analytics_pdf", {"start": start, "end": end})
+
     buf = BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=landscape(A4), leftMargin=20, rightMargin=20, topMargin=20, bottomMargin=20)
-    styles = getSampleStyleSheet()
-    content = []
-    
-    content.append(Paragraph("Dashboard Analytics - Relatório", styles["Title"]))
-    content.append(Paragraph(f"Período: {start} a {end}", styles["Normal"]))
-    content.append(Spacer(1, 12))
-    
-    # KPIs
-    kpi_table = [["Métrica", "Valor"],
-                 ["Chamados Abertos", kpis.get("chamados_abertos", 0)],
-                 ["Chamados do Mês", kpis.get("chamados_mes", 0)],
-                 ["Taxa de SLA (%)", kpis.get("sla_taxa", 0)],
-                 ["Satisfação Média", kpis.get("satisfacao_media", 0)],
-                 ["Lembretes Ativos", kpis.get("lembretes_ativos", 0)],
-                 ["Lembretes Vencidos", kpis.get("lembretes_vencidos", 0)],
-                 ["Equipamentos em Uso", kpis.get("equipamentos_uso", 0)],
-                 ["Total Tutoriais", kpis.get("total_tutoriais", 0)],
-                 ["Visualizações Tutoriais", kpis.get("total_visualizacoes", 0)],
-                 ["Tarefas Concluídas", kpis.get("tasks_concluidas", 0)],
-                 ["Tarefas Pendentes", kpis.get("tasks_pendentes", 0)]]
-    t = Table(kpi_table, hAlign='LEFT')
-    t.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-        ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-    ]))
-    content.append(t)
-    content.append(Spacer(1, 14))
-    
-    def add_table(title, data, headers):
-        content.append(Paragraph(title, styles['Heading2']))
-        rows = [headers] + [list(d.values()) if isinstance(d, dict) else d for d in data]
-        tbl = Table(rows, hAlign='LEFT')
-        tbl.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ]))
-        content.append(tbl)
-        content.append(Spacer(1, 10))
-    
-    if evolucao:
-        add_table("Evolução de Chamados", evolucao, ["periodo", "total"])
-    if prioridade:
-        add_table("Chamados por Prioridade", prioridade, ["prioridade", "total"])
-    if perf:
-        add_table("Performance por Técnico", perf, ["tecnico", "total", "tempo_medio", "sla_taxa"])
-    if setor:
-        add_table("Chamados por Setor", setor, ["setor", "total"])
-    
-    doc.build(content)
+    download_name = ReportService.write_analytics_pdf(buf, start, end)
     buf.seek(0)
     return send_file(
         buf,
         as_attachment=True,
-        download_name=f"analytics_dashboard_{date.today().isoformat()}.pdf",
+        download_name=download_name,
         mimetype='application/pdf'
     )
 
@@ -1241,84 +1172,48 @@ def dashboard():
 
     # ======================================================
     # ESTATÍSTICAS GLOBAIS (SEM FILTRO POR USUÁRIO/SETOR)
-    # Usadas pelos cards principais do topo do dashboard
+    # Usadas pelos cards principais do topo do dashboard.
+    # Uma query agregada por tabela (Task, Reminder, Chamado,
+    # Equipment, EquipmentReservation, EquipmentLoan).
     # ======================================================
-    from app.models import Task, Reminder, Chamado
-
-    # Atividades & Projetos (Task)
-    tasks_total_global = Task.query.count()
-    tasks_done_global = Task.query.filter_by(completed=True).count()
-    tasks_pending_global = Task.query.filter(
-        Task.completed == False,  # noqa: E712
-        Task.date >= date.today()
-    ).count()
-    tasks_expired_global = Task.query.filter(
-        Task.completed == False,  # noqa: E712
-        Task.date < date.today()
-    ).count()
-
-    # Notificações Programadas (Reminder)
-    reminders_total_global = Reminder.query.count()
-    reminders_done_global = Reminder.query.filter_by(completed=True).count()
-    reminders_pending_global = Reminder.query.filter_by(completed=False).count()
-
-    # Tickets & Suporte (Chamado)
-    chamados_total_global = Chamado.query.count()
-    chamados_aberto_global = Chamado.query.filter_by(status='Aberto').count()
-    chamados_em_andamento_global = Chamado.query.filter_by(status='Em Andamento').count()
-    chamados_resolvido_global = Chamado.query.filter_by(status='Resolvido').count()
-    chamados_fechado_global = Chamado.query.filter_by(status='Fechado').count()
-
-    # Preparar dados para o template
-    if can_view_all:
-        inventory_total = Equipment.query.count()
-        inventory_disponiveis = Equipment.query.filter_by(status='disponivel').count()
-        inventory_emprestados = Equipment.query.filter_by(status='emprestado').count()
-        inventory_manutencao = Equipment.query.filter_by(status='manutencao').count()
-        inventory_danificados = Equipment.query.filter_by(status='danificado').count()
-        inventory_perdidos = Equipment.query.filter_by(status='perdido').count()
-    else:
-        inventory_total = 0
-        inventory_disponiveis = 0
-        inventory_emprestados = 0
-        inventory_manutencao = 0
-        inventory_danificados = 0
-        inventory_perdidos = 0
-
-    # Estatísticas de equipamentos para o card "Gestão de Ativos" (fluxo equipment_v2)
-    # Sempre globais: somam todas as solicitações/empréstimos do sistema
-    from app.models import EquipmentReservation, EquipmentLoan
-    equipamentos_total = EquipmentReservation.query.count()
-    equipamentos_solicitados = EquipmentReservation.query.filter_by(status='pendente').count()
-    equipamentos_negados = EquipmentReservation.query.filter_by(status='rejeitada').count()
-    equipamentos_entregues = EquipmentLoan.query.count()
+    global_stats = CacheService.get_or_set(
+        'dashboard.global_snapshot',
+        lambda: DashboardStatsEngine.global_snapshot(include_inventory=can_view_all),
+        params={'include_inventory': can_view_all},
+        tags=('task', 'reminder', 'chamado', 'equipment'),
+    )
+    tasks_global = global_stats.tasks
+    reminders_global = global_stats.reminders
+    chamados_global = global_stats.chamados
+    inventory = global_stats.inventory
+    asset_flow = global_stats.asset_flow
 
     template_data = {
         # Estatísticas de tarefas (globais para o card de Atividades & Projetos)
-        'tasks_total': tasks_total_global,
-        'tasks_done': tasks_done_global,
-        'tasks_pending': tasks_pending_global,
-        'tasks_expired': tasks_expired_global,
+        'tasks_total': tasks_global.total,
+        'tasks_done': tasks_global.done,
+        'tasks_pending': tasks_global.pending,
+        'tasks_expired': tasks_global.expired,
 
         # Estatísticas de lembretes (globais para o card de Notificações Programadas)
-        'reminders_total': reminders_total_global,
-        'reminders_done': reminders_done_global,
-        'reminders_pending': reminders_pending_global,
+        'reminders_total': reminders_global.total,
+        'reminders_done': reminders_global.done,
+        'reminders_pending': reminders_global.pending,
 
         # Estatísticas de chamados (globais para o card de Tickets & Suporte)
-        'chamados_total': chamados_total_global,
-        'chamados_aberto': chamados_aberto_global,
-        'chamados_em_andamento': chamados_em_andamento_global,
-        'chamados_resolvido': chamados_resolvido_global,
-        'chamados_fechado': chamados_fechado_global,
+        'chamados_total': chamados_global.total,
+        'chamados_aberto': chamados_global.aberto,
+        'chamados_em_andamento': chamados_global.em_andamento,
+        'chamados_resolvido': chamados_global.resolvido,
+        'chamados_fechado': chamados_global.fechado,
 
         # Estatísticas de equipamentos (novo fluxo equipment_v2)
-        'equipamentos_total': equipamentos_total,
-        'equipamentos_solicitados': equipamentos_solicitados,
+        'equipamentos_total': asset_flow.reservas_total,
+        'equipamentos_solicitados': asset_flow.reservas_pendentes,
         'equipamentos_aprovados': dashboard_data['stats']['equipamentos']['aprovados'],
-        'equipamentos_entregues': equipamentos_entregues,
+        'equipamentos_entregues': asset_flow.emprestimos_total,
         'equipamentos_devolvidos': dashboard_data['stats']['equipamentos']['devolvidos'],
-        'equipamentos_negados': equipamentos_negados,
+        'equipamentos_negados': asset_flow.reservas_rejeitadas,
 
         # Dados para gráficos de evolução
         'meses_labels': dashboard_data['chart_data']['evolution']['labels'],
@@ -1357,12 +1252,12 @@ def dashboard():
         'overall_performance': dashboard_data['performance'],
 
         # Inventário de equipamentos (globais)
-        'inventory_total': inventory_total,
-        'inventory_disponiveis': inventory_disponiveis,
-        'inventory_emprestados': inventory_emprestados,
-        'inventory_manutencao': inventory_manutencao,
-        'inventory_danificados': inventory_danificados,
-        'inventory_perdidos': inventory_perdidos,
+        'inventory_total': inventory.total,
+        'inventory_disponiveis': inventory.disponiveis,
+        'inventory_emprestados': inventory.emprestados,
+        'inventory_manutencao': inventory.manutencao,
+        'inventory_danificados': inventory.danificados,
+        'inventory_perdidos': inventory.perdidos,
         'can_view_inventory': can_view_all,
 
         # Dados para filtros
@@ -1373,10 +1268,10 @@ def dashboard():
     }
 
     # Adicionar tutoriais mais visualizados/utilizados (compatibilidade com template antigo)
-    if dashboard_data['chart_data']['tutorials']['top_labels']:
-        template_data['tutorial_mais_visualizado'] = Tutorial.query.filter_by(
-            titulo=dashboard_data['chart_data']['tutorials']['top_labels'][0]
-        ).first()
+    if dashboard_data['chart_data']['tutorials']['top_ids']:
+        template_data['tutorial_mais_visualizado'] = db.session.get(
+            Tutorial, dashboard_data['chart_data']['tutorials']['top_ids'][0]
+        )
 
     # Encontrar tutorial mais útil - otimizado com query SQL
     from sqlalchemy import func
@@ -1681,419 +1576,102 @@ def dashboard():
     return render_template("dashboard.html", **template_data)
 
 
-@bp.route("/export/excel")
-def export_excel():
-    from datetime import date  # Adicionado datetime, date
-    from datetime import datetime
-    from io import BytesIO  # BytesIO já estava importado globalmente
+def _wants_async_export():
+    """Exportação em segundo plano solicitada (?async=1)"""
+    return request.args.get("async", "").lower() in ("1", "true", "sim")
 
-    import pandas as pd  # pd já estava importado globalmente
-    from flask import \
-        request  # session já estava importado globalmente, mas garantindo
-    from flask import session
 
-    from .models import Chamado  # Adicionado Tutorial
-    from .models import Reminder, Sector, Task, Tutorial, User, ReminderHistory
+def _submit_export_job(kind, params):
+    """Registra a exportação na fila e responde 202 com o job"""
+    if not session.get("user_id"):
+        return jsonify({"error": "Autenticação necessária"}), 401
+    job = ExportJobService.submit(kind, params, session.get("user_id"))
+    return jsonify(ExportJobService.status_payload(job)), 202
 
-    task_status = request.args.get("task_status", "")
-    reminder_status = request.args.get("reminder_status", "")
-    # Filtro opcional para estado operacional do lembrete (ativo, pausado, cancelado, encerrado)
-    reminder_state = request.args.get("reminder_state", "")
-    chamado_status = request.args.get("chamado_status", "")  # Novo
-    start_date_str = request.args.get("start_date", "")
-    end_date_str = request.args.get("end_date", "")
-    sector_id = request.args.get("sector_id", type=int)
-    user_id_filter = request.args.get(
-        "user_id", type=int
-    )  # Renomeado para evitar conflito com user_id da sessão
 
-    # Conversão de datas
-    start_date = None
-    if start_date_str:
-        try:
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-        except ValueError:
-            pass  # Ignorar data inválida para exportação, ou poderia dar flash
-    end_date = None
-    if end_date_str:
-        try:
-            end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date()
-        except ValueError:
-            pass
-
-    task_query = Task.query
-    reminder_query = Reminder.query
-    chamado_query = Chamado.query  # Novo
-    equipment_query = EquipmentRequest.query  # Query para equipamentos
-
-    current_user_id = session.get("user_id")
-    is_admin = session.get("is_admin", False)
-    is_ti = session.get("is_ti", False)
-
-    # Filtros de permissão
-    if not is_admin and not is_ti:
-        task_query = task_query.filter(Task.user_id == current_user_id)
-        reminder_query = reminder_query.filter(Reminder.user_id == current_user_id)
-        chamado_query = chamado_query.filter(Chamado.solicitante_id == current_user_id)
-        equipment_query = equipment_query.filter(
-            EquipmentRequest.requester_id == current_user_id
-        )
-    elif not is_admin and is_ti:
-        user = User.query.get(current_user_id)
-        primeiro_lembrete = Reminder.query.filter_by(user_id=current_user_id).first()
-        setor_id_usuario = (
-            primeiro_lembrete.sector_id
-            if primeiro_lembrete and primeiro_lembrete.sector_id
-            else None
-        )
-        chamado_query = chamado_query.filter(
-            (Chamado.solicitante_id == current_user_id)
-            | (Chamado.setor_id == setor_id_usuario)
-        )
-        equipment_query = (
-            EquipmentRequest.query
-        )  # TI pode ver todas as solicitações de equipamento
-
-    if task_status == "done":
-        task_query = task_query.filter(Task.completed == True)
-    elif task_status == "pending":
-        task_query = task_query.filter(
-            Task.completed == False, Task.date >= date.today()
-        )
-    elif task_status == "expired":
-        task_query = task_query.filter(
-            Task.completed == False, Task.date < date.today()
-        )
-
-    if reminder_status == "done":
-        reminder_query = reminder_query.filter(Reminder.completed == True)
-    elif reminder_status == "pending":
-        reminder_query = reminder_query.filter(Reminder.completed == False)
+@bp.route("/api/export-jobs/<token>")
+@login_required
+def export_job_status(token):
+    """Status e progresso de uma exportação em segundo plano"""
+    from flask_login import current_user
 
-    # Aplicar filtro de estado operacional do lembrete, se fornecido
-    if reminder_state in ["ativo", "pausado", "cancelado", "encerrado"]:
-        reminder_query = reminder_query.filter(Reminder.status == reminder_state)
+    job = ExportJobService.get_for_user(token, current_user)
+    if job is None:
+        return jsonify({"error": "Exportação não encontrada"}), 404
+    return jsonify(ExportJobService.status_payload(job))
 
-    if chamado_status:
-        chamado_query = chamado_query.filter(Chamado.status == chamado_status)
 
-    if start_date:
-        task_query = task_query.filter(Task.date >= start_date)
-        reminder_query = reminder_query.filter(Reminder.due_date >= start_date)
-        chamado_query = chamado_query.filter(Chamado.data_abertura >= start_date)
-        equipment_query = equipment_query.filter(
-            EquipmentRequest.request_date >= start_date
-        )
-    if end_date:
-        task_query = task_query.filter(Task.date <= end_date)
-        reminder_query = reminder_query.filter(Reminder.due_date <= end_date)
-        chamado_query = chamado_query.filter(Chamado.data_abertura <= end_date)
-        equipment_query = equipment_query.filter(
-            EquipmentRequest.request_date <= end_date
-        )
+@bp.route("/api/export-jobs/<token>/download")
+@login_required
+def export_job_download(token):
+    """Baixa o arquivo gerado (suporta requisições parciais via Range)"""
+    from flask_login import current_user
 
-    if sector_id:
-        task_query = task_query.filter(Task.sector_id == sector_id)
-        reminder_query = reminder_query.filter(Reminder.sector_id == sector_id)
-        chamado_query = chamado_query.filter(Chamado.setor_id == sector_id)
-        # Filtro para equipamentos por setor de destino
-        setor_nome = (
-            Sector.query.get(sector_id).name if Sector.query.get(sector_id) else ""
-        )
-        equipment_query = equipment_query.filter(
-            EquipmentRequest.destination_sector.contains(setor_nome)
-        )
+    job = ExportJobService.get_for_user(token, current_user)
+    if job is None:
+        return jsonify({"error": "Exportação não encontrada"}), 404
+    if job.status == ExportJob.STATUS_EXPIRED:
+        return jsonify({"error": "Exportação expirada"}), 410
+    if job.status != ExportJob.STATUS_DONE or not job.file_path or not os.path.exists(job.file_path):
+        return jsonify(ExportJobService.status_payload(job)), 409
 
-    if user_id_filter and (
-        is_admin or is_ti
-    ):  # Admin ou TI pode filtrar por qualquer usuário
-        task_query = task_query.filter(Task.user_id == user_id_filter)
-        reminder_query = reminder_query.filter(Reminder.user_id == user_id_filter)
-        chamado_query = chamado_query.filter(Chamado.solicitante_id == user_id_filter)
-        equipment_query = equipment_query.filter(
-            EquipmentRequest.requester_id == user_id_filter
-        )
+    return send_file(
+        job.file_path,
+        as_attachment=True,
+        download_name=job.file_name,
+        mimetype=job.mimetype,
+        conditional=True,
+    )
 
-    export_type = request.args.get("export_type", "all")
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        workbook = writer.book
-        title_format = workbook.add_format(
-            {"bold": True, "font_size": 14, "align": "center", "valign": "vcenter"}
-        )
-        header_format = workbook.add_format(
-            {
-                "bold": True,
-                "text_wrap": True,
-                "valign": "top",
-                "fg_color": "#D7E4BC",
-                "border": 1,
-            }
-        )
 
-        if export_type in ["all", "tasks"]:
-            tasks = task_query.all()
-            tasks_data = [
-                {
-                    "Descrição": t.description,
-                    "Data": t.date.strftime("%d/%m/%Y") if t.date else "",
-                    "Responsável": t.responsible,
-                    "Setor": t.sector.name if t.sector else "",
-                    "Usuário": t.user.username if t.user else t.responsible if hasattr(t, 'responsible') else "",
-                    "Concluída": "Sim" if t.completed else "Não",
-                }
-                for t in tasks
-            ]
-            df_tasks = pd.DataFrame(tasks_data)
-            df_tasks.to_excel(
-                writer, sheet_name="Tarefas", index=False, header=False, startrow=1
-            )
-            worksheet_tasks = writer.sheets["Tarefas"]
-            worksheet_tasks.merge_range("A1:F1", "Relatório de Tarefas", title_format)
-            for col_num, value in enumerate(df_tasks.columns.values):
-                worksheet_tasks.write(0, col_num, value, header_format)
-            # Auto-ajustar colunas (exemplo)
-            for i, col in enumerate(df_tasks.columns):
-                column_len = max(df_tasks[col].astype(str).map(len).max(), len(col))
-                worksheet_tasks.set_column(i, i, column_len + 2)
-
-        if export_type in ["all", "reminders"]:
-            reminders = reminder_query.all()
-            reminders_data = [
-                {
-                    "Nome": r.name,
-                    "Tipo": r.type,
-                    "Vencimento": r.due_date.strftime("%d/%m/%Y") if r.due_date else "",
-                    "Responsável": r.responsible,
-                    "Setor": r.sector.name if r.sector else "",
-                    "Usuário": r.user.username if r.user else r.responsible if hasattr(r, 'responsible') else "",
-                    "Realizado": "Sim" if r.completed else "Não",
-                    "Prioridade": r.priority or "",
-                    "Categoria": r.category or "",
-                    "Nº Contrato/Licença": r.contract_number or "",
-                    "Valor/Custo": (float(r.cost) if isinstance(r.cost, (int, float)) else None),
-                    "Fornecedor": r.supplier or "",
-                    "Status": r.status or "",
-                    "Pausado Até": r.pause_until.strftime("%d/%m/%Y") if r.pause_until else "",
-                    "Data Final": r.end_date.strftime("%d/%m/%Y") if r.end_date else "",
-                }
-                for r in reminders
-            ]
-            df_reminders = pd.DataFrame(reminders_data)
-            df_reminders.to_excel(
-                writer, sheet_name="Lembretes", index=False, header=False, startrow=1
-            )
-            worksheet_reminders = writer.sheets["Lembretes"]
-            worksheet_reminders.merge_range(
-                "A1:O1", "Relatório de Lembretes", title_format
-            )
-            for col_num, value in enumerate(df_reminders.columns.values):
-                worksheet_reminders.write(0, col_num, value, header_format)
-            for i, col in enumerate(df_reminders.columns):
-                column_len = max(df_reminders[col].astype(str).map(len).max(), len(col))
-                worksheet_reminders.set_column(i, i, column_len + 2)
-
-            # Formatação monetária BRL para coluna Valor/Custo, se existir
-            if not df_reminders.empty and "Valor/Custo" in df_reminders.columns:
-                currency_format = workbook.add_format({"num_format": "R$ #,##0.00"})
-                cost_idx = df_reminders.columns.get_loc("Valor/Custo")
-                # Ajusta largura padrão para coluna de custo com formato
-                worksheet_reminders.set_column(cost_idx, cost_idx, 14, currency_format)
-
-        # Nova aba: Histórico de Lembretes
-        if export_type in ["all", "reminders_history"]:
-            # Respeita filtros aplicados em reminder_query
-            reminder_ids = [r.id for r in reminder_query.all()]
-            histories = []
-            if reminder_ids:
-                histories = ReminderHistory.query.filter(
-                    ReminderHistory.reminder_id.in_(reminder_ids)
-                ).all()
-
-            history_data = [
-                {
-                    "Lembrete": (Reminder.query.get(h.reminder_id).name if Reminder.query.get(h.reminder_id) else h.reminder_id),
-                    "Ação": h.action_type,
-                    "Data Ação": h.action_date.strftime("%d/%m/%Y %H:%M") if h.action_date else "",
-                    "Vencimento Original": h.original_due_date.strftime("%d/%m/%Y") if h.original_due_date else "",
-                    "Concluído": "Sim" if h.completed else "Não",
-                    "Concluído por": (User.query.get(h.completed_by).username if h.completed_by else ""),
-                    "Notas": h.notes or "",
-                }
-                for h in histories
-            ]
+@bp.route("/export/excel")
+def export_excel():
+    """
+    Exporta tarefas, lembretes, chamados, equipamentos e tutoriais em streaming
 
-            df_history = pd.DataFrame(history_data)
-            df_history.to_excel(
-                writer, sheet_name="Histórico Lembretes", index=False, header=False, startrow=1
-            )
-            ws_hist = writer.sheets["Histórico Lembretes"]
-            ws_hist.merge_range("A1:G1", "Histórico de Lembretes", title_format)
-            for col_num, value in enumerate(df_history.columns.values):
-                ws_hist.write(0, col_num, value, header_format)
-            for i, col in enumerate(df_history.columns):
-                column_len = max(df_history[col].astype(str).map(len).max(), len(col))
-                ws_hist.set_column(i, i, column_len + 2)
-
-
-        if export_type in ["all", "chamados"]:  # Novo bloco para chamados
-            chamados = chamado_query.all()
-            chamados_data = [
-                {
-                    "ID": c.id,
-                    "Título": c.titulo,
-                    "Status": c.status,
-                    "Prioridade": c.prioridade,
-                    "Abertura": c.data_abertura.strftime("%d/%m/%Y %H:%M")
-                    if c.data_abertura
-                    else "",
-                    "Prazo SLA": c.prazo_sla.strftime("%d/%m/%Y %H:%M")
-                    if c.prazo_sla
-                    else "N/A",
-                    "Status SLA": c.status_sla if hasattr(c, "status_sla") else "N/A",
-                    "Solicitante": c.solicitante.username if c.solicitante else "",
-                    "Setor": c.setor.name if c.setor else "",
-                    "Responsável TI": c.responsavel_ti.username
-                    if c.responsavel_ti
-                    else "",
-                    "Fechamento": c.data_fechamento.strftime("%d/%m/%Y %H:%M")
-                    if c.data_fechamento
-                    else "Em Aberto",
-                }
-                for c in chamados
-            ]
-            df_chamados = pd.DataFrame(chamados_data)
-            if not df_chamados.empty:
-                df_chamados.to_excel(
-                    writer, sheet_name="Chamados", index=False, header=False, startrow=2
-                )
-                worksheet_chamados = writer.sheets["Chamados"]
-                worksheet_chamados.merge_range(
-                    "A1:K1", "Relatório de Chamados", title_format
-                )
-                for col_num, value in enumerate(df_chamados.columns.values):
-                    worksheet_chamados.write(1, col_num, value, header_format)
-                for i, col in enumerate(df_chamados.columns):
-                    column_len = max(
-                        df_chamados[col].astype(str).map(len).max(), len(col)
-                    )
-                    worksheet_chamados.set_column(i, i, column_len + 2)
-            else:
-                # Criar planilha mesmo sem dados
-                worksheet_chamados = workbook.add_worksheet("Chamados")
-                worksheet_chamados.merge_range(
-                    "A1:K1", "Relatório de Chamados", title_format
-                )
-                worksheet_chamados.write_row(
-                    1,
-                    0,
-                    [
-                        "ID",
-                        "Título",
-                        "Status",
-                        "Prioridade",
-                        "Abertura",
-                        "Prazo SLA",
-                        "Status SLA",
-                        "Solicitante",
-                        "Setor",
-                        "Responsável TI",
-                        "Fechamento",
-                    ],
-                    header_format,
-                )
-                worksheet_chamados.write(
-                    2, 0, "Nenhum chamado encontrado com os filtros aplicados"
-                )
+    ``format=csv`` gera CSV (uma aba) ou ZIP de CSVs (várias abas); o padrão é XLSX.
+    """
+    from flask import request, session
 
-        if export_type in ["all", "equipamentos"]:  # Bloco para equipamentos
-            equipamentos = equipment_query.all()
-            equipamentos_data = [
-                {
-                    "ID": e.id,
-                    "Descrição": e.description,
-                    "Patrimônio": e.patrimony,
-                    "Tipo": e.equipment_type,
-                    "Status": e.status,
-                    "Solicitante": e.requester.username if e.requester else "",
-                    "Data Solicitação": e.request_date.strftime("%d/%m/%Y")
-                    if e.request_date
-                    else "",
-                }
-                for e in equipamentos
-            ]
-            df_equipamentos = pd.DataFrame(equipamentos_data)
-            df_equipamentos.to_excel(
-                writer, sheet_name="Equipamentos", index=False, header=False, startrow=1
-            )
-            worksheet_equipamentos = writer.sheets["Equipamentos"]
-            worksheet_equipamentos.merge_range(
-                "A1:G1", "Relatório de Equipamentos", title_format
-            )
-            for col_num, value in enumerate(df_equipamentos.columns.values):
-                worksheet_equipamentos.write(0, col_num, value, header_format)
-            for i, col in enumerate(df_equipamentos.columns):
-                column_len = max(
-                    df_equipamentos[col].astype(str).map(len).max(), len(col)
-                )
-                worksheet_equipamentos.set_column(i, i, column_len + 2)
+    from .services.export_service import XLSX_MIMETYPE, ExportFilters, ExportService
 
-        if export_type in ["all", "tutoriais"]:
-            # Consulta para obter os tutoriais
-            tutorial_query = Tutorial.query
+    if _wants_async_export():
+        return _submit_export_job("excel", {
+            "args": request.args.to_dict(),
+            "user_id": session.get("user_id"),
+            "is_admin": session.get("is_admin", False),
+            "is_ti": session.get("is_ti", False),
+            # Resolvido aqui: o worker não tem acesso à sessão
+            "sector_id": PermissionManager.get_user_sector(),
+        })
 
-            # Aplicar filtros de data se fornecidos
-            if start_date:
-                tutorial_query = tutorial_query.filter(
-                    Tutorial.data_criacao >= start_date
-                )
-            if end_date:
-                tutorial_query = tutorial_query.filter(
-                    Tutorial.data_criacao <= end_date
-                )
+    filters = ExportFilters.from_args(request.args)
+    export_type = request.args.get("export_type", "all")
+    export_format = request.args.get("format", "xlsx")
 
-            # Aplicar filtro de usuário se fornecido
-            if user_id_filter and (is_admin or is_ti):
-                tutorial_query = tutorial_query.filter(
-                    Tutorial.autor_id == user_id_filter
-                )
+    sheets = ExportService.build_sheets(
+        filters,
+        export_type,
+        user_id=session.get("user_id"),
+        is_admin=session.get("is_admin", False),
+        is_ti=session.get("is_ti", False),
+    )
 
-            # Obter todos os tutoriais filtrados
-            tutoriais = tutorial_query.all()
+    if export_format == "csv":
+        if len(sheets) == 1:
+            body = ExportService.stream_csv(sheets[0])
+            mimetype, download_name = "text/csv; charset=utf-8", "relatorio_reminder.csv"
+        else:
+            body = ExportService.stream_csv_zip(sheets)
+            mimetype, download_name = "application/zip", "relatorio_reminder.zip"
+    else:
+        body = ExportService.stream_xlsx(sheets)
+        mimetype, download_name = XLSX_MIMETYPE, "relatorio_reminder.xlsx"
 
-            tutoriais_data = [
-                {
-                    "Título": t.titulo,
-                    "Categoria": t.categoria or "",
-                    "Autor": t.autor.username,
-                    "Data de Criação": t.data_criacao.strftime("%d/%m/%Y %H:%M"),
-                    "Visualizações": len(t.visualizacoes),
-                    "Feedback Útil": sum(1 for f in t.feedbacks if f.util),
-                    "Feedback Não Útil": sum(1 for f in t.feedbacks if not f.util),
-                }
-                for t in tutoriais
-            ]
-            df_tutoriais = pd.DataFrame(tutoriais_data)
-            df_tutoriais.to_excel(
-                writer, sheet_name="Tutoriais", index=False, header=False, startrow=1
-            )
-            worksheet_tutoriais = writer.sheets["Tutoriais"]
-            worksheet_tutoriais.merge_range(
-                "A1:G1", "Relatório de Tutoriais", title_format
-            )
-            for col_num, value in enumerate(df_tutoriais.columns.values):
-                worksheet_tutoriais.write(0, col_num, value, header_format)
-            for i, col in enumerate(df_tutoriais.columns):
-                column_len = max(df_tutoriais[col].astype(str).map(len).max(), len(col))
-                worksheet_tutoriais.set_column(i, i, column_len + 2)
-
-    output.seek(0)
-    # Forçar mimetype correto para navegadores modernos
-    return send_file(
-        output,
-        download_name="relatorio_reminder.xlsx",
-        as_attachment=True,
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={download_name}"},
     )
 
 
@@ -2105,409 +1683,20 @@ def export_pdf():
     Suporta: chamados, equipamentos, tasks, reminders
     """
     from io import BytesIO
-    from datetime import datetime
     from flask import request, session
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-    from reportlab.pdfgen import canvas
-    
+
     export_type = request.args.get('export_type', 'chamados')
-    
-    # Criar buffer para o PDF
-    buffer = BytesIO()
-    
-    # Configurar documento (landscape para mais colunas)
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=landscape(A4),
-        rightMargin=1*cm,
-        leftMargin=1*cm,
-        topMargin=2*cm,
-        bottomMargin=2*cm
-    )
-    
-    # Elementos do PDF
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Estilo de título
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#0d6efd'),
-        spaceAfter=12,
-        alignment=1  # Center
-    )
-    
-    # Estilo de subtítulo
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.grey,
-        spaceAfter=20,
-        alignment=1
-    )
-    
-    # Data e hora do relatório
-    data_hora = datetime.now().strftime('%d/%m/%Y às %H:%M')
     usuario = session.get('username', 'Usuário')
-    
-    # ============================================
-    # EXPORTAÇÃO DE CHAMADOS COM ANÁLISE DE SLA
-    # ============================================
-    if export_type == 'chamados':
-        elements.append(Paragraph('Análise de SLA - Chamados de Suporte', title_style))
-        elements.append(Paragraph(f'Relatório de Indicadores de Cumprimento de Prazos de Atendimento', subtitle_style))
-        elements.append(Paragraph(f'Gerado em {data_hora} por {usuario}', subtitle_style))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Buscar chamados
-        chamados = Chamado.query.order_by(Chamado.data_abertura.desc()).limit(200).all()
-        
-        if chamados:
-            # ==== INDICADORES DE DESEMPENHO ====
-            info_style = ParagraphStyle(
-                'InfoStyle',
-                parent=styles['Normal'],
-                fontSize=9,
-                textColor=colors.HexColor('#2c3e50'),
-                spaceAfter=8,
-                leading=12
-            )
-            
-            # Calcular KPIs
-            total_chamados = len(chamados)
-            chamados_com_sla = [c for c in chamados if c.prazo_sla]
-            total_com_sla = len(chamados_com_sla)
-            
-            sla_cumprido = len([c for c in chamados_com_sla if c.sla_cumprido == True])
-            sla_vencido = len([c for c in chamados_com_sla if c.sla_cumprido == False])
-            sla_andamento = total_com_sla - sla_cumprido - sla_vencido
-            
-            taxa_cumprimento = (sla_cumprido / total_com_sla * 100) if total_com_sla > 0 else 0
-            
-            # Chamados por prioridade
-            criticos = len([c for c in chamados if c.prioridade == 'Critica'])
-            altos = len([c for c in chamados if c.prioridade == 'Alta'])
-            medios = len([c for c in chamados if c.prioridade == 'Media'])
-            baixos = len([c for c in chamados if c.prioridade == 'Baixa'])
-            
-            # Chamados por status
-            abertos = len([c for c in chamados if c.status == 'Aberto'])
-            em_andamento = len([c for c in chamados if c.status == 'Em Andamento'])
-            resolvidos = len([c for c in chamados if c.status == 'Resolvido'])
-            fechados = len([c for c in chamados if c.status == 'Fechado'])
-            
-            # Tempo médio de resposta
-            tempos_resposta = [c.tempo_resposta_horas for c in chamados if c.tempo_resposta_horas]
-            tempo_medio_resposta = sum(tempos_resposta) / len(tempos_resposta) if tempos_resposta else 0
-            
-            # Criar painel de indicadores
-            elements.append(Paragraph('<b>INDICADORES DE DESEMPENHO (KPIs)</b>', info_style))
-            elements.append(Spacer(1, 0.3*cm))
-            
-            # Tabela de KPIs
-            kpi_data = [
-                ['<b>Métrica</b>', '<b>Valor</b>', '<b>Detalhes</b>'],
-                ['Total de Chamados', str(total_chamados), f'{abertos} Abertos, {em_andamento} Em Andamento, {fechados} Fechados'],
-                ['Taxa de Cumprimento SLA', f'{taxa_cumprimento:.1f}%', f'{sla_cumprido} cumpridos de {total_com_sla} com SLA'],
-                ['SLA Cumprido', str(sla_cumprido), f'{(sla_cumprido/total_com_sla*100):.1f}% do total' if total_com_sla > 0 else 'N/A'],
-                ['SLA Vencido', str(sla_vencido), f'{(sla_vencido/total_com_sla*100):.1f}% do total' if total_com_sla > 0 else 'N/A'],
-                ['SLA Em Andamento', str(sla_andamento), 'Chamados ainda dentro do prazo'],
-                ['Tempo Médio Resposta', f'{tempo_medio_resposta:.1f}h', 'Tempo até primeira resposta'],
-                ['Chamados Críticos', str(criticos), f'{(criticos/total_chamados*100):.1f}% do total'],
-                ['Chamados por Prioridade', f'C:{criticos} A:{altos}', f'M:{medios} B:{baixos}'],
-            ]
-            
-            kpi_table = Table(kpi_data, colWidths=[6*cm, 4*cm, 10*cm])
-            kpi_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#ecf0f1')),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('ALIGN', (0, 1), (1, -1), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
-            ]))
-            
-            elements.append(kpi_table)
-            elements.append(Spacer(1, 0.7*cm))
-            
-            # ==== DETALHAMENTO DOS CHAMADOS ====
-            elements.append(Paragraph('<b>DETALHAMENTO DE CHAMADOS</b>', info_style))
-            elements.append(Spacer(1, 0.3*cm))
-            
-            # Cabeçalho da tabela
-            data = [['ID', 'Título', 'Prior.', 'Status', 'Abertura', 'SLA', 'Tempo Resp.', 'Satisfação']]
-            
-            # Adicionar dados (primeiros 80 registros)
-            for chamado in chamados[:80]:
-                # Status SLA
-                if chamado.sla_cumprido == True:
-                    status_sla_text = '✓ Cumprido'
-                elif chamado.sla_cumprido == False:
-                    status_sla_text = '✗ Vencido'
-                elif chamado.status_sla == 'vencido':
-                    status_sla_text = '✗ Vencido'
-                elif chamado.status_sla == 'atencao':
-                    status_sla_text = '⚠ Crítico'
-                else:
-                    status_sla_text = '◷ Normal'
-                
-                # Tempo de resposta
-                if chamado.tempo_resposta_horas:
-                    tempo_resp = f'{chamado.tempo_resposta_horas:.1f}h'
-                else:
-                    tempo_resp = 'Pendente'
-                
-                # Satisfação
-                if chamado.satisfaction_rating:
-                    satisfacao = '★' * chamado.satisfaction_rating + '☆' * (5 - chamado.satisfaction_rating)
-                else:
-                    satisfacao = 'N/A'
-                
-                # Prioridade abreviada
-                prior_map = {'Critica': 'CRIT', 'Alta': 'ALTA', 'Media': 'MED', 'Baixa': 'BXA'}
-                prior = prior_map.get(chamado.prioridade, chamado.prioridade[:4].upper())
-                
-                data.append([
-                    str(chamado.id),
-                    chamado.titulo[:35] + '...' if len(chamado.titulo) > 35 else chamado.titulo,
-                    prior,
-                    chamado.status[:10],
-                    chamado.data_abertura.strftime('%d/%m %H:%M'),
-                    status_sla_text,
-                    tempo_resp,
-                    satisfacao
-                ])
-            
-            # Criar tabela
-            detail_table = Table(data, colWidths=[1.5*cm, 7*cm, 2*cm, 2.5*cm, 2.5*cm, 2.5*cm, 2*cm, 2*cm])
-            detail_table.setStyle(TableStyle([
-                # Header
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-                # Body
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-                ('ALIGN', (2, 1), (2, -1), 'CENTER'),
-                ('ALIGN', (3, 1), (5, -1), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 7),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
-            ]))
-            
-            elements.append(detail_table)
-            
-            # Adicionar legenda
-            elements.append(Spacer(1, 0.5*cm))
-            legenda_text = '<b>Legenda:</b> ✓=Cumprido | ✗=Vencido | ⚠=Crítico | ◷=Normal | ★=Satisfação | CRIT=Crítica | ALTA=Alta | MED=Média | BXA=Baixa'
-            elements.append(Paragraph(legenda_text, subtitle_style))
-            
-        else:
-            elements.append(Paragraph('Nenhum chamado encontrado no sistema', styles['Normal']))
-    
-    # ============================================
-    # EXPORTAÇÃO DE EQUIPAMENTOS
-    # ============================================
-    elif export_type == 'equipamentos':
-        elements.append(Paragraph('Relatório de SLA - Equipamentos', title_style))
-        elements.append(Paragraph(f'Gerado em {data_hora} por {usuario}', subtitle_style))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Buscar equipamentos
-        equipamentos = EquipmentRequest.query.filter(
-            EquipmentRequest.status.in_(['Solicitado', 'Aprovado', 'Entregue'])
-        ).order_by(EquipmentRequest.request_date.desc()).limit(100).all()
-        
-        if equipamentos:
-            data = [['ID', 'Descrição', 'Solicitante', 'Status', 'Data Solicitação', 'SLA']]
-            
-            for eq in equipamentos:
-                tempo_desde_solicitacao = (datetime.now() - eq.request_date).total_seconds() / 3600
-                
-                if eq.status == 'Solicitado':
-                    status_sla = 'Vencido' if tempo_desde_solicitacao > 24 else ('Crítico' if tempo_desde_solicitacao > 20 else 'OK')
-                elif eq.status == 'Aprovado' and eq.approval_date:
-                    tempo_desde_aprovacao = (datetime.now() - eq.approval_date).total_seconds() / 3600
-                    status_sla = 'Vencido' if tempo_desde_aprovacao > 48 else ('Crítico' if tempo_desde_aprovacao > 40 else 'OK')
-                else:
-                    status_sla = 'Concluído'
-                
-                data.append([
-                    str(eq.id),
-                    (eq.description or 'Equipamento')[:35] + '...' if eq.description and len(eq.description) > 35 else (eq.description or 'Equipamento'),
-                    eq.requester.username if eq.requester else 'N/A',
-                    eq.status,
-                    eq.request_date.strftime('%d/%m/%Y %H:%M'),
-                    status_sla
-                ])
-            
-            table = Table(data, colWidths=[2*cm, 7*cm, 4*cm, 3*cm, 4*cm, 3*cm])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#6f42c1')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-            ]))
-            
-            elements.append(table)
-        else:
-            elements.append(Paragraph('Nenhum equipamento encontrado', styles['Normal']))
-    
-    # ============================================
-    # EXPORTAÇÃO DE TAREFAS
-    # ============================================
-    elif export_type == 'tasks':
-        elements.append(Paragraph('Relatório de SLA - Tarefas', title_style))
-        elements.append(Paragraph(f'Gerado em {data_hora} por {usuario}', subtitle_style))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Buscar tarefas
-        tarefas = Task.query.order_by(Task.date.desc(), Task.completed.asc()).limit(100).all()
-        
-        if tarefas:
-            data = [['ID', 'Descrição', 'Responsável', 'Data', 'Setor', 'Status']]
-            
-            for task in tarefas:
-                if task.completed:
-                    task_status = 'Concluída'
-                else:
-                    dias_desde_criacao = (datetime.now().date() - task.date).days
-                    task_status = 'Vencida' if dias_desde_criacao > 7 else ('Crítica' if dias_desde_criacao > 5 else 'Pendente')
-                
-                data.append([
-                    str(task.id),
-                    (task.description[:45] + '...') if task.description and len(task.description) > 45 else (task.description or 'Sem descrição'),
-                    task.user.username if task.user else task.responsible if hasattr(task, 'responsible') else 'N/A',
-                    task.date.strftime('%d/%m/%Y'),
-                    task.sector.name if task.sector else 'N/A',
-                    task_status
-                ])
-            
-            table = Table(data, colWidths=[2*cm, 8*cm, 4*cm, 3*cm, 4*cm, 3*cm])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d6efd')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-            ]))
-            
-            elements.append(table)
-        else:
-            elements.append(Paragraph('Nenhuma tarefa encontrada', styles['Normal']))
-    
-    # ============================================
-    # EXPORTAÇÃO DE LEMBRETES
-    # ============================================
-    elif export_type == 'reminders':
-        elements.append(Paragraph('Relatório de SLA - Lembretes', title_style))
-        elements.append(Paragraph(f'Gerado em {data_hora} por {usuario}', subtitle_style))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Buscar lembretes
-        lembretes = Reminder.query.filter(
-            Reminder.status == 'ativo'
-        ).order_by(Reminder.due_date.asc(), Reminder.completed.asc()).limit(100).all()
-        
-        if lembretes:
-            data = [['ID', 'Nome', 'Tipo', 'Responsável', 'Vencimento', 'Status']]
-            
-            for reminder in lembretes:
-                if reminder.completed:
-                    reminder_status = 'Realizado'
-                else:
-                    if reminder.due_date < datetime.now().date():
-                        reminder_status = 'Vencido'
-                    elif reminder.due_date == datetime.now().date():
-                        reminder_status = 'Vence Hoje'
-                    else:
-                        dias_restantes = (reminder.due_date - datetime.now().date()).days
-                        reminder_status = 'Próximo' if dias_restantes <= 2 else 'Pendente'
-                
-                data.append([
-                    str(reminder.id),
-                    (reminder.name[:40] + '...') if reminder.name and len(reminder.name) > 40 else (reminder.name or 'Sem nome'),
-                    reminder.type or 'Geral',
-                    reminder.user.username if reminder.user else reminder.responsible if hasattr(reminder, 'responsible') else 'N/A',
-                    reminder.due_date.strftime('%d/%m/%Y'),
-                    reminder_status
-                ])
-            
-            table = Table(data, colWidths=[2*cm, 8*cm, 3*cm, 4*cm, 3*cm, 4*cm])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ffc107')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
-            ]))
-            
-            elements.append(table)
-        else:
-            elements.append(Paragraph('Nenhum lembrete encontrado', styles['Normal']))
-    
-    # Adicionar rodapé
-    elements.append(Spacer(1, 1*cm))
-    footer_text = f'Documento gerado automaticamente pelo TI OSN System • {data_hora}'
-    elements.append(Paragraph(footer_text, subtitle_style))
-    
-    # Construir PDF
-    doc.build(elements)
-    
-    # Retornar PDF
+    if _wants_async_export():
+        return _submit_export_job("sla_pdf", {"export_type": export_type, "usuario": usuario})
+
+    buffer = BytesIO()
+    download_name = ReportService.write_sla_pdf(buffer, export_type, usuario)
     buffer.seek(0)
     return send_file(
         buffer,
         as_attachment=True,
-        download_name=f'sla_{export_type}_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf',
+        download_name=download_name,
         mimetype='application/pdf'
     )
 
@@ -3125,6 +2314,7 @@ def listar_chamados():
     per_page = 10
     status_filter = request.args.get("status", "")
     prioridade_filter = request.args.get("prioridade", "")
+    sla_filter = request.args.get("sla", "")
     setor_filter = request.args.get("sector_id", type=int)
 
     query = Chamado.query
@@ -3134,14 +2324,8 @@ def listar_chamados():
         "is_admin"
     ):  # Assumindo que 'is_admin' também cobre a equipe de TI por enquanto
         user_id = session.get("user_id")
-        # Obter setor do usuário (mesma lógica/problema de 'abrir_chamado')
-        user = User.query.get(user_id)
-        primeiro_lembrete = Reminder.query.filter_by(user_id=user_id).first()
-        setor_id_usuario = (
-            primeiro_lembrete.sector_id
-            if primeiro_lembrete and primeiro_lembrete.sector_id
-            else None
-        )
+        # Setor do usuário (User.sector_id, memorizado por requisição)
+        setor_id_usuario = PermissionManager.get_user_sector(user_id)
         # Mostrar chamados do usuário ou do setor do usuário (ajustar conforme regra)
         query = query.filter(
             (Chamado.solicitante_id == user_id) | (Chamado.setor_id == setor_id_usuario)
@@ -3152,10 +2336,16 @@ def listar_chamados():
         query = query.filter(Chamado.status == status_filter)
     if prioridade_filter:
         query = query.filter(Chamado.prioridade == prioridade_filter)
+    if sla_filter:
+        # Status de SLA persistido (ix_chamado_sla_status_prazo_sla); mais urgentes primeiro
+        query = query.filter(Chamado.sla_status == sla_filter).order_by(Chamado.prazo_sla.asc())
     if setor_filter:
         query = query.filter(Chamado.setor_id == setor_filter)
 
-    chamados_paginated = query.order_by(Chamado.data_abertura.desc()).paginate(
+    # Solicitante e setor carregados junto (evita uma query por linha na listagem)
+    chamados_paginated = query.options(
+        joinedload(Chamado.solicitante), joinedload(Chamado.setor)
+    ).order_by(Chamado.data_abertura.desc()).paginate(
         page=page, per_page=per_page
     )
 
@@ -3171,6 +2361,10 @@ def listar_chamados():
         setores=setores,
         status_list=[s[0] for s in status_list],
         prioridade_list=[p[0] for p in prioridade_list],
+        sla_options=[
+            ("normal", "Normal"), ("atencao", "Atenção"),
+            ("vencido", "Vencido"), ("cumprido", "Cumprido"),
+        ],
         title="Meus Chamados",
     )
 
@@ -3186,13 +2380,7 @@ def detalhe_chamado(id):
 
     # Aplicar restrição de acesso
     if not is_admin:
-        user = User.query.get(user_id)
-        primeiro_lembrete = Reminder.query.filter_by(user_id=user_id).first()
-        setor_id_usuario = (
-            primeiro_lembrete.sector_id
-            if primeiro_lembrete and primeiro_lembrete.sector_id
-            else None
-        )
+        setor_id_usuario = PermissionManager.get_user_sector(user_id)
         # Permitir ver se for o solicitante ou do mesmo setor
         query = query.filter(
             (Chamado.solicitante_id == user_id) | (Chamado.setor_id == setor_id_usuario)
@@ -3422,20 +2610,11 @@ def detalhe_tutorial(tutorial_id):
     )
     db.session.add(visualizacao)
     db.session.commit()
-    # Preparar dados para gráficos (mantém se já estiver)
-    visualizacoes = VisualizacaoTutorial.query.filter_by(tutorial_id=tutorial.id).all()
-    datas = [v.data.strftime("%d/%m") for v in visualizacoes]
-    from collections import Counter
-
-    contagem_datas = Counter(datas)
-    datas_ordenadas = sorted(
-        contagem_datas.keys(), key=lambda x: tuple(map(int, x.split("/")[::-1]))
-    )
-    visualizacoes_labels = datas_ordenadas[-15:]
-    visualizacoes_values = [contagem_datas[d] for d in visualizacoes_labels]
-    feedbacks = tutorial.feedbacks
-    total_util = sum(1 for f in feedbacks if f.util)
-    total_nao_util = sum(1 for f in feedbacks if not f.util)
+    # Preparar dados para gráficos (agregados por dia no banco)
+    visualizacoes_por_dia = TutorialMetricsService.daily_views(tutorial.id, limit=15)
+    visualizacoes_labels = [dia.strftime("%d/%m") for dia, _ in visualizacoes_por_dia]
+    visualizacoes_values = [total for _, total in visualizacoes_por_dia]
+    total_util, total_nao_util = TutorialMetricsService.feedback_counts(tutorial_id=tutorial.id)
     feedback_data = {
         "labels": ["Útil", "Não útil"],
         "values": [total_util, total_nao_util],
@@ -3578,6 +2757,9 @@ def feedback_tutorial(tutorial_id):
 @bp.route("/tutoriais/<int:tutorial_id>/pdf")
 @login_required
 def exportar_tutorial_pdf(tutorial_id):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
     tutorial = Tutorial.query.get_or_404(tutorial_id)
     buffer = BytesIO()
     p = canvas.Canvas(buffer, pagesize=letter)
@@ -3734,6 +2916,27 @@ def rfid_scan():
     return jsonify(result)
 
 
+@bp.route("/rfid/scan/batch", methods=["POST"])
+@login_required
+@admin_or_ti_required_json
+def rfid_scan_batch():
+    """Endpoint para lotes de leituras RFID (leitores de portal)"""
+    data = request.get_json(silent=True)
+    reads = data.get("reads") if isinstance(data, dict) else data
+
+    if not isinstance(reads, list) or not reads:
+        return jsonify({"success": False, "message": "Lista de leituras não fornecida"}), 400
+
+    max_reads = current_app.config.get("RFID_BATCH_MAX_READS", 5000)
+    if len(reads) > max_reads:
+        return jsonify({"success": False, "message": f"Máximo de {max_reads} leituras por lote"}), 413
+
+    result = RFIDService.scan_batch(reads)
+    if not result["success"]:
+        return jsonify(result), 500
+    return jsonify(result)
+
+
 @bp.route("/rfid/simulate/<rfid_tag>/<reader_id>", methods=["POST"])
 @login_required
 @admin_or_ti_required
@@ -3794,6 +2997,59 @@ def get_equipment_location(equipment_id):
     return jsonify(result)
 
 
+def _rfid_window():
+    """Janela [start, end) em UTC a partir da query string (padrão: últimas 24 horas)"""
+    now = get_current_time_for_db()
+    bounds = []
+    for name, default in (("start", now - timedelta(days=1)), ("end", now)):
+        value = request.args.get(name)
+        if not value:
+            bounds.append(default)
+            continue
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = local_to_utc(parsed)
+        bounds.append(parsed.astimezone(timezone.utc).replace(tzinfo=None))
+    start, end = bounds
+    if end <= start:
+        raise ValueError("Fim da janela deve ser posterior ao início")
+    if end - start > timedelta(days=current_app.config.get("RFID_TRAIL_MAX_DAYS", 31)):
+        raise ValueError("Janela maior que o permitido")
+    return start, end
+
+
+@bp.route("/rfid/trail/<int:equipment_id>")
+@login_required
+@admin_or_ti_required_json
+def rfid_equipment_trail(equipment_id):
+    """Trilha de leituras de um equipamento em uma janela de tempo"""
+    try:
+        start, end = _rfid_window()
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    result = RFIDHistoryService.equipment_trail(
+        equipment_id, start, end, request.args.get("cursor"), request.args.get("limit", 500, type=int)
+    )
+    return jsonify(result)
+
+
+@bp.route("/rfid/readers/<reader_id>/reads")
+@login_required
+@admin_or_ti_required_json
+def rfid_reader_reads(reader_id):
+    """Equipamentos que passaram por um leitor em uma janela de tempo"""
+    try:
+        start, end = _rfid_window()
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    result = RFIDHistoryService.reader_passages(
+        reader_id, start, end, request.args.get("cursor"), request.args.get("limit", 500, type=int)
+    )
+    if result is None:
+        return jsonify({"success": False, "message": f"Leitor {reader_id} sem leituras registradas"}), 404
+    return jsonify(result)
+
+
 @bp.route("/rfid/dashboard")
 @login_required
 @admin_or_ti_required
@@ -4103,11 +3359,21 @@ def performance_dashboard():
     # Relatório completo
     performance_report = PerformanceService.generate_performance_report()
 
+    # Contadores do cache de resultados
+    cache_stats = CacheService.stats()
+
+    # Execuções dos jobs agendados (últimas 24h)
+    scheduler_jobs = SchedulerRuntime.job_summary()
+    scheduler_runs = SchedulerRuntime.recent_runs(limit=20)
+
     return render_template(
         "performance_dashboard.html",
         system_metrics=system_metrics,
         db_stats=db_stats,
-        performance_report=performance_report
+        performance_report=performance_report,
+        cache_stats=cache_stats,
+        scheduler_jobs=scheduler_jobs,
+        scheduler_runs=scheduler_runs
     )
 
 
@@ -4146,6 +3412,12 @@ def performance_metrics_api():
     return jsonify({
         "system": metrics,
         "database": db_stats,
+        "result_cache": CacheService.stats(),
+        "mail_queue": MailQueueService.queue_stats(),
+        "scheduler": {
+            "jobs": SchedulerRuntime.job_summary(),
+            "recent_runs": SchedulerRuntime.recent_runs(limit=20),
+        },
         "timestamp": time_module.time()
     })
 
@@ -5,13 +5,16 @@ Serviço responsável por gerar métricas e análises do sistema
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_, or_
 from app import db
-from app.models import Chamado, User, Reminder, Task, EquipmentLoan, Sector, Tutorial, VisualizacaoTutorial, FeedbackTutorial
+from app.models import Chamado, User, Reminder, Task, EquipmentLoan, Sector, Tutorial
+from app.services.cache_service import cached_result
+from app.services.tutorial_metrics_service import TutorialMetricsService
 
 
 class AnalyticsService:
     """Serviço de analytics e métricas"""
     
     @staticmethod
+    @cached_result('analytics', tags=('chamado',))
     def get_chamados_por_periodo(start_date, end_date, group_by='day'):
         """
         Retorna chamados agrupados por período
@@ -61,6 +64,7 @@ class AnalyticsService:
             return []
     
     @staticmethod
+    @cached_result('analytics', tags=('chamado',))
     def get_chamados_por_status():
         """Retorna distribuição de chamados por status"""
         try:
@@ -78,6 +82,7 @@ class AnalyticsService:
             return []
     
     @staticmethod
+    @cached_result('analytics', tags=('chamado',))
     def get_chamados_por_prioridade(start_date=None, end_date=None):
         """Retorna distribuição de chamados por prioridade"""
         try:
@@ -100,6 +105,7 @@ class AnalyticsService:
             return []
     
     @staticmethod
+    @cached_result('analytics', tags=('chamado',))
     def get_sla_compliance(start_date, end_date):
         """
         Retorna taxa de cumprimento de SLA
@@ -134,6 +140,7 @@ class AnalyticsService:
             return {'total': 0, 'cumpridos': 0, 'nao_cumpridos': 0, 'taxa': 0}
     
     @staticmethod
+    @cached_result('analytics', tags=('chamado',))
     def get_performance_por_tecnico(start_date, end_date):
         """
         Retorna performance de cada técnico
@@ -177,6 +184,7 @@ class AnalyticsService:
             return []
     
     @staticmethod
+    @cached_result('analytics', tags=('chamado',))
     def get_chamados_por_setor(start_date=None, end_date=None):
         """Retorna distribuição de chamados por setor"""
         try:
@@ -201,6 +209,7 @@ class AnalyticsService:
             return []
     
     @staticmethod
+    @cached_result('analytics')
     def get_dashboard_kpis():
         """
         Retorna KPIs principais para o dashboard
@@ -313,6 +322,7 @@ class AnalyticsService:
             }
     
     @staticmethod
+    @cached_result('analytics', tags=('chamado',))
     def get_tempo_medio_resolucao(start_date, end_date):
         """Retorna tempo médio de resolução de chamados"""
         try:
@@ -332,6 +342,7 @@ class AnalyticsService:
             return 0
     
     @staticmethod
+    @cached_result('analytics', tags=('chamado',))
     def get_satisfacao_mensal(meses=6):
         """Retorna evolução da satisfação nos últimos meses"""
         try:
@@ -359,6 +370,7 @@ class AnalyticsService:
             return []
     
     @staticmethod
+    @cached_result('analytics', tags=('tutorial',))
     def get_tutoriais_metrics():
         """
         Retorna métricas de tutoriais
@@ -370,8 +382,8 @@ class AnalyticsService:
             # Total de tutoriais
             total_tutoriais = Tutorial.query.count()
             
-            # Total de visualizações
-            total_visualizacoes = VisualizacaoTutorial.query.count()
+            # Total de visualizações (contador materializado)
+            total_visualizacoes = TutorialMetricsService.total_views()
             
             # Tutoriais criados no último mês
             mes_atual = datetime.now().date().replace(day=1)
@@ -379,12 +391,9 @@ class AnalyticsService:
                 Tutorial.data_criacao >= mes_atual
             ).count()
             
-            # Feedbacks positivos
-            feedbacks_positivos = FeedbackTutorial.query.filter(
-                FeedbackTutorial.util == True
-            ).count()
-            
-            total_feedbacks = FeedbackTutorial.query.count()
+            # Feedbacks positivos e negativos em uma única agregação
+            feedbacks_positivos, feedbacks_negativos = TutorialMetricsService.feedback_counts()
+            total_feedbacks = feedbacks_positivos + feedbacks_negativos
             
             taxa_satisfacao = 0
             if total_feedbacks > 0:
@@ -417,6 +426,7 @@ class AnalyticsService:
             }
     
     @staticmethod
+    @cached_result('analytics', tags=('tutorial',))
     def get_tutoriais_mais_visualizados(limit=10):
         """
         Retorna tutoriais mais visualizados
@@ -428,32 +438,8 @@ class AnalyticsService:
             Lista de tutoriais com contagem de visualizações
         """
         try:
-            # Verificar se existem tutoriais antes de fazer a query complexa
-            if Tutorial.query.count() == 0:
-                return []
-            
-            query = db.session.query(
-                Tutorial.id,
-                Tutorial.titulo,
-                Tutorial.categoria,
-                func.count(VisualizacaoTutorial.id).label('visualizacoes')
-            ).outerjoin(
-                VisualizacaoTutorial, VisualizacaoTutorial.tutorial_id == Tutorial.id
-            ).group_by(
-                Tutorial.id, Tutorial.titulo, Tutorial.categoria
-            ).order_by(
-                func.count(VisualizacaoTutorial.id).desc()
-            ).limit(limit).all()
-            
-            return [
-                {
-                    'id': r.id,
-                    'titulo': r.titulo,
-                    'categoria': r.categoria or 'Geral',
-                    'visualizacoes': r.visualizacoes
-                }
-                for r in query
-            ]
+            # Ranking pelo contador materializado (sem GROUP BY sobre as visualizações)
+            return TutorialMetricsService.top_viewed(limit=limit, include_unviewed=True)
         except Exception as e:
             print(f"Erro ao buscar tutoriais mais visualizados: {e}")
             import traceback
@@ -461,6 +447,7 @@ class AnalyticsService:
             return []
     
     @staticmethod
+    @cached_result('analytics', tags=('tutorial',))
     def get_tutoriais_por_categoria():
         """Retorna distribuição de tutoriais por categoria"""
         try:
@@ -484,6 +471,7 @@ class AnalyticsService:
             return []
     
     @staticmethod
+    @cached_result('analytics', tags=('task',))
     def get_tasks_metrics():
         """
         Retorna métricas de tarefas
@@ -544,6 +532,7 @@ class AnalyticsService:
             }
     
     @staticmethod
+    @cached_result('analytics', tags=('task',))
     def get_tasks_por_periodo(start_date, end_date):
         """
         Retorna tarefas agrupadas por período
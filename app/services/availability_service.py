@@ -0,0 +1,315 @@
+"""
+Disponibilidade de equipamentos por intervalos ocupados
+
+Os períodos ocupados (empréstimos ativos e reservas confirmadas) de um
+conjunto de equipamentos são carregados em uma única consulta (``UNION ALL``)
+e organizados, por equipamento, em um índice ordenado pelo início com o
+maior fim acumulado (``max_end``). Com ele, "está livre em [início, fim]?" é
+uma busca binária, e a próxima janela livre e os blocos livres/ocupados de um
+calendário saem dos intervalos já mesclados, sem novas consultas.
+
+Empréstimos ativos ocupam de ``loan_date`` até a devolução prevista; se a
+devolução está atrasada, o equipamento fica ocupado sem previsão de fim.
+"""
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, literal, select, union_all
+
+from ..models import Equipment, EquipmentLoan, EquipmentReservation, User, db
+
+KIND_LOAN = 'emprestimo'
+KIND_RESERVATION = 'reserva'
+
+# Condições em que o equipamento pode ser emprestado
+USABLE_CONDITIONS = ("novo", "bom", "regular")
+# Período máximo aceito pela API de calendário
+MAX_CALENDAR_DAYS = 92
+# Fim de um empréstimo com devolução atrasada (sem previsão)
+OPEN_END = datetime.max
+
+
+@dataclass(frozen=True)
+class BusyInterval:
+    """Período em que o equipamento está ocupado"""
+    start: datetime
+    end: datetime
+    kind: str
+    ref_id: int
+    username: Optional[str] = None
+
+    @property
+    def overdue(self) -> bool:
+        return self.end == OPEN_END
+
+    def reason(self) -> str:
+        """Mensagem de indisponibilidade (mesmo texto da verificação individual)"""
+        if self.overdue:
+            return f"Emprestado para {self.username} (devolução atrasada)"
+        if self.kind == KIND_LOAN:
+            return f"Emprestado para {self.username} até {self.end.date()}"
+        return (f"Reservado por {self.username} de {self.start.strftime('%d/%m/%Y %H:%M')} "
+                f"a {self.end.strftime('%d/%m/%Y %H:%M')}")
+
+    def to_dict(self, include_user: bool = False) -> Dict:
+        data = {
+            'start': self.start.isoformat(),
+            'end': None if self.overdue else self.end.isoformat(),
+            'kind': self.kind,
+            'overdue': self.overdue,
+        }
+        if include_user:
+            data.update(ref_id=self.ref_id, username=self.username)
+        return data
+
+
+class IntervalIndex:
+    """Intervalos ocupados de um equipamento, ordenados pelo início"""
+
+    def __init__(self, intervals: Iterable[BusyInterval]):
+        self.intervals: List[BusyInterval] = sorted(intervals, key=lambda i: (i.start, i.end))
+        self._starts = [i.start for i in self.intervals]
+        # max_end[k] = maior fim entre intervals[0..k]
+        self._max_end: List[datetime] = []
+        current = None
+        for interval in self.intervals:
+            current = interval.end if current is None or interval.end > current else current
+            self._max_end.append(current)
+
+    def conflict(self, start: datetime, end: datetime) -> Optional[BusyInterval]:
+        """Primeiro intervalo (pelo início) que se sobrepõe a [start, end), ou None"""
+        # Candidatos: intervalos que começam antes de ``end``
+        k = bisect_left(self._starts, end)
+        if k == 0 or self._max_end[k - 1] <= start:
+            return None
+        # max_end é crescente: o primeiro k com max_end > start é o primeiro conflito
+        lo, hi = 0, k - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._max_end[mid] > start:
+                hi = mid
+            else:
+                lo = mid + 1
+        return self.intervals[lo]
+
+    def busy_blocks(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Períodos ocupados mesclados e recortados a [start, end)"""
+        blocks: List[List[datetime]] = []
+        for interval in self.intervals:
+            if interval.start >= end:
+                break
+            if interval.end <= start:
+                continue
+            s, e = max(interval.start, start), min(interval.end, end)
+            if blocks and s <= blocks[-1][1]:
+                blocks[-1][1] = max(blocks[-1][1], e)
+            else:
+                blocks.append([s, e])
+        return [(s, e) for s, e in blocks]
+
+    def free_blocks(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """Períodos livres em [start, end)"""
+        free, cursor = [], start
+        for s, e in self.busy_blocks(start, end):
+            if s > cursor:
+                free.append((cursor, s))
+            cursor = max(cursor, e)
+        if cursor < end:
+            free.append((cursor, end))
+        return free
+
+    def next_free_slot(self, after: datetime, duration: timedelta) -> Optional[datetime]:
+        """Primeiro início >= ``after`` com ``duration`` livre em seguida (None: sem previsão)"""
+        candidate = after
+        for interval in self.intervals:
+            if interval.end <= candidate:
+                continue
+            if interval.start >= candidate + duration:
+                break
+            if interval.overdue:
+                return None
+            candidate = interval.end
+        return candidate
+
+
+class AvailabilityIndex:
+    """Índices de disponibilidade de um conjunto de equipamentos"""
+
+    def __init__(self, equipments: Dict[int, Equipment], intervals: Dict[int, List[BusyInterval]]):
+        self.equipments = equipments
+        self._indexes = {
+            equipment_id: IntervalIndex(intervals.get(equipment_id, ()))
+            for equipment_id in equipments
+        }
+
+    def index_for(self, equipment_id: int) -> IntervalIndex:
+        return self._indexes.get(equipment_id) or IntervalIndex(())
+
+    def check(self, equipment_id: int, start: datetime, end: datetime) -> Tuple[bool, str]:
+        """
+        Disponibilidade do equipamento em [start, end)
+
+        Returns:
+            Tuple[bool, str]: (disponivel, motivo_indisponibilidade)
+        """
+        if end <= start:
+            return False, "A data/hora final deve ser posterior à data/hora inicial"
+        equipment = self.equipments.get(equipment_id)
+        if equipment is None:
+            return False, "Equipamento não encontrado"
+        if equipment.status != "disponivel":
+            return False, f"Equipamento {equipment.status}"
+        if equipment.condition not in USABLE_CONDITIONS:
+            return False, f"Equipamento em condição inadequada: {equipment.condition}"
+
+        conflict = self.index_for(equipment_id).conflict(start, end)
+        if conflict:
+            return False, conflict.reason()
+        return True, ""
+
+    def is_available(self, equipment_id: int, start: datetime, end: datetime) -> bool:
+        return self.check(equipment_id, start, end)[0]
+
+    def next_free_slot(self, equipment_id: int, after: datetime, duration: timedelta) -> Optional[datetime]:
+        return self.index_for(equipment_id).next_free_slot(after, duration)
+
+    def calendar(self, equipment_id: int, start: datetime, end: datetime,
+                 include_user: bool = False) -> Dict:
+        """Blocos livres/ocupados do equipamento em [start, end)"""
+        index = self.index_for(equipment_id)
+        return {
+            'equipment_id': equipment_id,
+            'busy': [
+                i.to_dict(include_user) for i in index.intervals if i.start < end and i.end > start
+            ],
+            'busy_blocks': [
+                {'start': s.isoformat(), 'end': e.isoformat()} for s, e in index.busy_blocks(start, end)
+            ],
+            'free_blocks': [
+                {'start': s.isoformat(), 'end': e.isoformat()} for s, e in index.free_blocks(start, end)
+            ],
+        }
+
+
+class AvailabilityService:
+    """Carga dos intervalos ocupados e consultas de disponibilidade em lote"""
+
+    @staticmethod
+    def build_index(equipments: Sequence, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None, now: Optional[datetime] = None) -> AvailabilityIndex:
+        """
+        Monta o índice para os equipamentos informados (objetos ou ids)
+
+        Args:
+            equipments: Equipamentos (ou ids) a indexar
+            start, end: Janela de interesse; intervalos fora dela não são carregados
+            now: Referência para identificar devoluções atrasadas
+
+        Returns:
+            AvailabilityIndex com uma única consulta de intervalos
+        """
+        now = now or datetime.now()
+        by_id = {}
+        missing_ids = []
+        for item in equipments:
+            if isinstance(item, Equipment):
+                by_id[item.id] = item
+            else:
+                missing_ids.append(item)
+        if missing_ids:
+            for equipment in Equipment.query.filter(Equipment.id.in_(missing_ids)):
+                by_id[equipment.id] = equipment
+        if not by_id:
+            return AvailabilityIndex({}, {})
+
+        intervals: Dict[int, List[BusyInterval]] = {}
+        for row in db.session.execute(AvailabilityService._busy_query(list(by_id), start, end)):
+            interval = AvailabilityService._to_interval(row, now)
+            if interval is None:
+                continue
+            if start and interval.end <= start:
+                continue
+            intervals.setdefault(row.equipment_id, []).append(interval)
+        return AvailabilityIndex(by_id, intervals)
+
+    @staticmethod
+    def _busy_query(equipment_ids: List[int], start: Optional[datetime], end: Optional[datetime]):
+        """Empréstimos ativos + reservas confirmadas dos equipamentos (UNION ALL)"""
+        loan_filters = [EquipmentLoan.equipment_id.in_(equipment_ids), EquipmentLoan.status == "ativo"]
+        reservation_filters = [
+            EquipmentReservation.equipment_id.in_(equipment_ids),
+            EquipmentReservation.status == "confirmada",
+            EquipmentReservation.start_datetime.isnot(None),
+            EquipmentReservation.end_datetime.isnot(None),
+        ]
+        if end is not None:
+            loan_filters.append(EquipmentLoan.loan_date < end)
+            reservation_filters.append(EquipmentReservation.start_datetime < end)
+        if start is not None:
+            # Empréstimos atrasados continuam ocupando: filtro final feito em Python
+            reservation_filters.append(EquipmentReservation.end_datetime > start)
+
+        loans = select(
+            literal(KIND_LOAN).label('kind'),
+            EquipmentLoan.id.label('ref_id'),
+            EquipmentLoan.equipment_id.label('equipment_id'),
+            EquipmentLoan.loan_date.label('start_at'),
+            literal(None, db.DateTime).label('end_at'),
+            EquipmentLoan.expected_return_date.label('end_date'),
+            EquipmentLoan.expected_return_time.label('end_time'),
+            User.username.label('username'),
+        ).join(User, User.id == EquipmentLoan.user_id).where(and_(*loan_filters))
+
+        reservations = select(
+            literal(KIND_RESERVATION).label('kind'),
+            EquipmentReservation.id.label('ref_id'),
+            EquipmentReservation.equipment_id.label('equipment_id'),
+            EquipmentReservation.start_datetime.label('start_at'),
+            EquipmentReservation.end_datetime.label('end_at'),
+            literal(None, db.Date).label('end_date'),
+            literal(None, db.Time).label('end_time'),
+            User.username.label('username'),
+        ).join(User, User.id == EquipmentReservation.user_id).where(and_(*reservation_filters))
+
+        return union_all(loans, reservations)
+
+    @staticmethod
+    def _to_interval(row, now: datetime) -> Optional[BusyInterval]:
+        start_at, end_at = row.start_at, row.end_at
+        if row.kind == KIND_LOAN:
+            end_at = datetime.combine(row.end_date, row.end_time or time(18, 0))
+            if end_at <= now:
+                # Devolução atrasada: ocupado até ser devolvido
+                end_at = OPEN_END
+        if start_at is None or end_at is None or end_at <= start_at:
+            return None
+        return BusyInterval(start_at, end_at, row.kind, row.ref_id, row.username)
+
+    @staticmethod
+    def check(equipment_id: int, start: datetime, end: datetime) -> Tuple[bool, str]:
+        """Disponibilidade de um equipamento (uma consulta de intervalos)"""
+        index = AvailabilityService.build_index([equipment_id], start, end)
+        return index.check(equipment_id, start, end)
+
+    @staticmethod
+    def catalog_availability(equipments: Sequence[Equipment], start: Optional[datetime] = None,
+                             duration: timedelta = timedelta(hours=1)) -> Dict[int, Dict]:
+        """
+        Situação de cada equipamento de uma página do catálogo
+
+        Returns:
+            {equipment_id: {'available': bool, 'reason': str, 'next_free': datetime}}
+        """
+        start = start or datetime.now()
+        index = AvailabilityService.build_index(equipments, start)
+        result = {}
+        for equipment in equipments:
+            available, reason = index.check(equipment.id, start, start + duration)
+            next_free = None
+            if not available and index.index_for(equipment.id).conflict(start, start + duration):
+                next_free = index.next_free_slot(equipment.id, start, duration)
+            result[equipment.id] = {'available': available, 'reason': reason, 'next_free': next_free}
+        return result
+
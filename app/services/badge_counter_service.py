@@ -0,0 +1,101 @@
+"""
+Contadores dos badges da navegação (aprovações pendentes e chamados abertos)
+"""
+import logging
+from typing import Dict
+
+from flask import current_app, g, has_request_context
+from sqlalchemy import event, func, inspect, select
+
+from ..models import Chamado, EquipmentReservation, db
+from .cache_service import CacheService, defer_invalidation
+
+logger = logging.getLogger(__name__)
+
+BADGE_TAG = 'badges'
+OPEN_TICKET_STATUSES = ('Aberto', 'Em Andamento')
+PENDING_RESERVATION_STATUS = 'pendente'
+
+
+class BadgeCounterService:
+    """
+    Contadores de badges memorizados por perfil com TTL curto
+
+    Admin e TI compartilham os mesmos contadores; usuários comuns têm o
+    contador de chamados próprio. Os valores são invalidados quando um chamado
+    ou uma reserva muda de status e, dentro de uma mesma requisição, calculados
+    no máximo uma vez (templates parciais e páginas de erro reutilizam o valor).
+    """
+
+    @staticmethod
+    def get_counts(user) -> Dict[str, int]:
+        """
+        Retorna os contadores dos badges para o usuário
+
+        Args:
+            user: Usuário autenticado (current_user)
+
+        Returns:
+            Dict com pending_approvals_count e chamados_abertos_count
+        """
+        if has_request_context() and 'badge_counts' in g:
+            return g.badge_counts
+
+        is_staff = bool(user.is_admin or user.is_ti)
+        scope = {'role': 'staff'} if is_staff else {'role': 'user', 'user_id': user.id}
+        counts = CacheService.get_or_set(
+            'badges.counts',
+            lambda: BadgeCounterService._query_counts(user.id, is_staff),
+            scope=scope,
+            tags=(BADGE_TAG,),
+            ttl=current_app.config.get('BADGE_COUNTER_TTL', 30),
+        )
+
+        if has_request_context():
+            g.badge_counts = counts
+        return counts
+
+    @staticmethod
+    def _query_counts(user_id: int, is_staff: bool) -> Dict[str, int]:
+        """Calcula os contadores com uma única consulta (subconsultas escalares)"""
+        open_tickets = select(func.count(Chamado.id)).where(Chamado.status.in_(OPEN_TICKET_STATUSES))
+        if not is_staff:
+            open_tickets = open_tickets.where(Chamado.solicitante_id == user_id)
+        columns = [open_tickets.scalar_subquery()]
+
+        if is_staff:
+            columns.append(
+                select(func.count(EquipmentReservation.id))
+                .where(EquipmentReservation.status == PENDING_RESERVATION_STATUS)
+                .scalar_subquery()
+            )
+
+        row = db.session.execute(select(*columns)).one()
+        return {
+            'pending_approvals_count': (row[1] or 0) if is_staff else 0,
+            'chamados_abertos_count': row[0] or 0,
+        }
+
+    @staticmethod
+    def invalidate() -> None:
+        """Descarta os contadores memorizados"""
+        CacheService.invalidate(BADGE_TAG)
+
+
+def _status_changed(target) -> bool:
+    return inspect(target).attrs.status.history.has_changes()
+
+
+@event.listens_for(Chamado, 'after_insert')
+@event.listens_for(Chamado, 'after_delete')
+@event.listens_for(EquipmentReservation, 'after_insert')
+@event.listens_for(EquipmentReservation, 'after_delete')
+def _badge_rows_changed(mapper, connection, target):
+    defer_invalidation(target, BADGE_TAG)
+
+
+@event.listens_for(Chamado, 'after_update')
+@event.listens_for(EquipmentReservation, 'after_update')
+def _badge_status_changed(mapper, connection, target):
+    if _status_changed(target):
+        defer_invalidation(target, BADGE_TAG)
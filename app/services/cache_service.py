@@ -0,0 +1,499 @@
+"""
+Cache de resultados para payloads de dashboard e analytics
+
+Os resultados são armazenados por chave (endpoint/namespace + filtros +
+escopo de permissão) com TTL, em um backend plugável:
+
+- ``memory``: LRU em memória do processo (padrão)
+- ``filesystem``: arquivos pickle em um diretório compartilhado
+- ``redis``: servidor Redis (dependência opcional; cai para ``memory`` se ausente)
+- ``null``: desativado (sempre recalcula)
+
+A invalidação é feita por *tags* ('chamado', 'task', 'reminder', 'equipment',
+'tutorial'). Cada tag possui uma geração que entra na chave do cache; quando um
+registro dessas entidades é inserido, alterado ou removido, a geração é
+incrementada após o commit e as entradas antigas deixam de ser encontradas
+(expirando depois pelo TTL/LRU).
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Tags de invalidação por modelo (nome da classe -> tag)
+MODEL_TAGS = {
+    'Chamado': 'chamado',
+    'Task': 'task',
+    'Reminder': 'reminder',
+    'Equipment': 'equipment',
+    'EquipmentRequest': 'equipment',
+    'EquipmentReservation': 'equipment',
+    'EquipmentLoan': 'equipment',
+    'Tutorial': 'tutorial',
+    'FeedbackTutorial': 'tutorial',
+    'VisualizacaoTutorial': 'tutorial',
+}
+
+ALL_TAGS = ('chamado', 'task', 'reminder', 'equipment', 'tutorial')
+
+_SESSION_TAGS_KEY = 'result_cache_pending_tags'
+
+
+class NullCacheBackend:
+    """Backend que não armazena nada (cache desativado)"""
+
+    name = 'null'
+
+    def get(self, key: str) -> Any:
+        return _MISSING
+
+    def set(self, key: str, value: Any, ttl: Optional[int]) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def size(self) -> int:
+        return 0
+
+    def get_generation(self, tag: str) -> str:
+        return '0'
+
+    def bump_generation(self, tag: str) -> None:
+        pass
+
+
+class MemoryCacheBackend:
+    """LRU em memória com TTL por entrada (seguro para threads)"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._generations: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at and expires_at < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int]) -> None:
+        expires_at = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def get_generation(self, tag: str) -> str:
+        return self._generations.get(tag, '0')
+
+    def bump_generation(self, tag: str) -> None:
+        with self._lock:
+            self._generations[tag] = uuid.uuid4().hex
+
+
+class FileSystemCacheBackend:
+    """Cache em arquivos pickle, compartilhado entre processos da mesma máquina"""
+
+    name = 'filesystem'
+
+    def __init__(self, directory: str, max_entries: int = 512):
+        self.directory = directory
+        self.max_entries = max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.cache')
+
+    def _generation_path(self, tag: str) -> str:
+        return os.path.join(self.directory, f'generation-{tag}')
+
+    def get(self, key: str) -> Any:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires_at, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return _MISSING
+        if expires_at and expires_at < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return _MISSING
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int]) -> None:
+        expires_at = time.time() + ttl if ttl else 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((expires_at, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))
+        self._prune()
+
+    def _prune(self) -> None:
+        entries = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith('.cache')
+        ]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda p: os.path.getmtime(p))
+        for path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.endswith('.cache'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def size(self) -> int:
+        return sum(1 for name in os.listdir(self.directory) if name.endswith('.cache'))
+
+    def get_generation(self, tag: str) -> str:
+        try:
+            with open(self._generation_path(tag), 'r', encoding='utf-8') as f:
+                return f.read().strip() or '0'
+        except OSError:
+            return '0'
+
+    def bump_generation(self, tag: str) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp_path, self._generation_path(tag))
+
+
+class RedisCacheBackend:
+    """Cache em Redis, compartilhado entre processos e servidores"""
+
+    name = 'redis'
+
+    def __init__(self, url: str, prefix: str = 'ti_reminder:cache:'):
+        import redis  # dependência opcional
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return _MISSING
+        return pickle.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[int]) -> None:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.client.set(self.prefix + key, payload, ex=ttl or None)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + '*'))
+
+    def get_generation(self, tag: str) -> str:
+        raw = self.client.get(f'{self.prefix}generation:{tag}')
+        return raw.decode('utf-8') if raw else '0'
+
+    def bump_generation(self, tag: str) -> None:
+        self.client.incr(f'{self.prefix}generation:{tag}')
+
+
+class ResultCache:
+    """Cache de resultados com chaves por namespace/parâmetros/escopo e contadores de uso"""
+
+    def __init__(self, backend, default_ttl: int = 60):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'invalidations': 0, 'errors': 0}
+        self._namespaces: Dict[str, Dict[str, int]] = {}
+
+    def make_key(self, namespace: str, params: Any = None, scope: Any = None,
+                 tags: Iterable[str] = ()) -> str:
+        """Monta a chave a partir do namespace, parâmetros, escopo e gerações das tags"""
+        generations = {tag: self.backend.get_generation(tag) for tag in sorted(set(tags))}
+        payload = json.dumps(
+            {'p': params, 's': scope, 'g': generations},
+            sort_keys=True, default=str
+        )
+        digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        return f'{namespace}:{digest}'
+
+    def get_or_set(self, namespace: str, producer: Callable[[], Any], params: Any = None,
+                   scope: Any = None, tags: Iterable[str] = ALL_TAGS,
+                   ttl: Optional[int] = None) -> Any:
+        """
+        Retorna o valor em cache ou calcula com ``producer`` e armazena
+
+        O valor retornado é compartilhado entre requisições e deve ser tratado
+        como somente leitura.
+        """
+        try:
+            key = self.make_key(namespace, params, scope, tags)
+            value = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Falha ao ler cache '{namespace}': {str(e)}")
+            self._count('errors')
+            return producer()
+
+        if value is not _MISSING:
+            self._count('hits', namespace)
+            return value
+
+        self._count('misses', namespace)
+        value = producer()
+        try:
+            self.backend.set(key, value, self.default_ttl if ttl is None else ttl)
+            self._count('sets')
+        except Exception as e:
+            logger.warning(f"Falha ao gravar cache '{namespace}': {str(e)}")
+            self._count('errors')
+        return value
+
+    def invalidate(self, *tags: str) -> None:
+        """Invalida todas as entradas associadas às tags informadas"""
+        for tag in set(tags):
+            try:
+                self.backend.bump_generation(tag)
+                self._count('invalidations')
+            except Exception as e:
+                logger.warning(f"Falha ao invalidar tag de cache '{tag}': {str(e)}")
+                self._count('errors')
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de acerto/erro do cache"""
+        with self._lock:
+            stats = dict(self._stats)
+            namespaces = {name: dict(values) for name, values in self._namespaces.items()}
+        lookups = stats['hits'] + stats['misses']
+        try:
+            size = self.backend.size()
+        except Exception:
+            size = None
+        stats.update({
+            'backend': self.backend.name,
+            'default_ttl': self.default_ttl,
+            'entries': size,
+            'hit_ratio': round(stats['hits'] / lookups * 100, 1) if lookups else 0,
+            'namespaces': namespaces,
+        })
+        return stats
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+            self._namespaces.clear()
+
+    def _count(self, counter: str, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            self._stats[counter] += 1
+            if namespace:
+                per_namespace = self._namespaces.setdefault(namespace, {'hits': 0, 'misses': 0})
+                per_namespace[counter] += 1
+
+
+class CacheService:
+    """
+    Acesso ao cache de resultados da aplicação atual
+    """
+
+    EXTENSION_KEY = 'result_cache'
+
+    @staticmethod
+    def create_backend(config) -> Any:
+        """Cria o backend conforme ``RESULT_CACHE_BACKEND``"""
+        backend_name = (config.get('RESULT_CACHE_BACKEND') or 'memory').lower()
+        max_entries = int(config.get('RESULT_CACHE_MAX_ENTRIES', 512))
+
+        if backend_name == 'null':
+            return NullCacheBackend()
+        if backend_name == 'filesystem':
+            directory = config.get('RESULT_CACHE_DIR') or os.path.join(
+                tempfile.gettempdir(), 'ti_reminder_cache'
+            )
+            return FileSystemCacheBackend(directory, max_entries=max_entries)
+        if backend_name == 'redis':
+            try:
+                return RedisCacheBackend(config.get('RESULT_CACHE_REDIS_URL') or 'redis://localhost:6379/0')
+            except ImportError:
+                logger.warning("Pacote 'redis' não instalado; usando cache em memória")
+        return MemoryCacheBackend(max_entries=max_entries)
+
+    @staticmethod
+    def get_cache() -> Optional[ResultCache]:
+        """Retorna o cache da aplicação atual (criado sob demanda)"""
+        if not has_app_context():
+            return None
+        app = current_app._get_current_object()
+        cache = app.extensions.get(CacheService.EXTENSION_KEY)
+        if cache is None:
+            cache = ResultCache(
+                CacheService.create_backend(app.config),
+                default_ttl=int(app.config.get('RESULT_CACHE_TTL', 60)),
+            )
+            app.extensions[CacheService.EXTENSION_KEY] = cache
+        return cache
+
+    @staticmethod
+    def get_or_set(namespace: str, producer: Callable[[], Any], params: Any = None,
+                   scope: Any = None, tags: Iterable[str] = ALL_TAGS,
+                   ttl: Optional[int] = None) -> Any:
+        """Atalho para ``ResultCache.get_or_set`` (recalcula se não houver aplicação)"""
+        cache = CacheService.get_cache()
+        if cache is None:
+            return producer()
+        return cache.get_or_set(namespace, producer, params=params, scope=scope, tags=tags, ttl=ttl)
+
+    @staticmethod
+    def invalidate(*tags: str) -> None:
+        """Invalida as tags informadas (todas se nenhuma for informada)"""
+        if not has_app_context():
+            return
+        cache = current_app.extensions.get(CacheService.EXTENSION_KEY)
+        if cache is not None:
+            cache.invalidate(*(tags or ALL_TAGS))
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """Contadores de uso do cache para o dashboard de performance"""
+        cache = CacheService.get_cache()
+        return cache.stats() if cache else {}
+
+    @staticmethod
+    def permission_scope(permissions: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Escopo de permissão usado na chave do cache
+
+        Só administradores compartilham as entradas. TI e usuários comuns veem
+        chamados próprios e do seu setor, então a chave inclui usuário e setor.
+        """
+        if permissions.get('is_admin'):
+            return {'role': 'admin'}
+        from .permission_manager import PermissionManager  # evita import circular
+
+        user_id = permissions.get('user_id')
+        return {
+            'role': 'ti' if permissions.get('can_view_all') else 'user',
+            'user_id': user_id,
+            'sector_id': PermissionManager.get_user_sector(user_id) if user_id else None,
+        }
+
+
+def cached_result(namespace: str, tags: Iterable[str] = ALL_TAGS, ttl: Optional[int] = None):
+    """
+    Decorador que armazena o retorno da função no cache de resultados
+
+    A chave é formada pelo namespace, nome da função e argumentos recebidos.
+    """
+    tags = tuple(tags)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return CacheService.get_or_set(
+                f'{namespace}.{func.__name__}',
+                lambda: func(*args, **kwargs),
+                params={'args': args, 'kwargs': kwargs},
+                tags=tags,
+                ttl=ttl,
+            )
+        return wrapper
+    return decorator
+
+
+def defer_invalidation(target, *tags: str) -> None:
+    """
+    Agenda a invalidação das tags para depois do commit da sessão de ``target``
+
+    Sem sessão associada, invalida imediatamente.
+    """
+    session = object_session(target)
+    if session is None:
+        CacheService.invalidate(*tags)
+        return
+    session.info.setdefault(_SESSION_TAGS_KEY, set()).update(tags)
+
+
+_listeners_registered = False
+
+
+def register_invalidation_listeners() -> None:
+    """
+    Registra os listeners que invalidam o cache quando os modelos mudam
+
+    As tags são acumuladas na sessão durante o flush e aplicadas somente após
+    o commit, para que outra requisição não grave em cache dados ainda não
+    confirmados.
+    """
+    global _listeners_registered
+    if _listeners_registered:
+        return
+
+    from .. import models
+
+    def _mark_dirty(mapper, connection, target):
+        tag = MODEL_TAGS.get(type(target).__name__)
+        if tag:
+            defer_invalidation(target, tag)
+
+    for model_name in MODEL_TAGS:
+        model = getattr(models, model_name)
+        for event_name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(model, event_name, _mark_dirty)
+
+    @event.listens_for(Session, 'after_commit')
+    def _invalidate_after_commit(session):
+        tags = session.info.pop(_SESSION_TAGS_KEY, None)
+        if tags:
+            CacheService.invalidate(*tags)
+
+    @event.listens_for(Session, 'after_soft_rollback')
+    def _discard_after_rollback(session, previous_transaction):
+        session.info.pop(_SESSION_TAGS_KEY, None)
+
+    _listeners_registered = True
@@ -7,9 +7,10 @@ from typing import Dict, List, Optional, Tuple
 
 from flask import current_app
 
-from ..models import (ComentarioTutorial, FeedbackTutorial, Tutorial,
+from ..models import (ComentarioTutorial, Tutorial,
                       UserCertification, ContributionMetrics, User, db)
 from ..utils.timezone_utils import get_current_time_for_db
+from .tutorial_metrics_service import TutorialMetricsService
 
 logger = logging.getLogger(__name__)
 
@@ -42,17 +43,14 @@ class CertificationService:
             # Calcular métricas
             metrics.tutorials_created = Tutorial.query.filter_by(autor_id=user_id).count()
 
-            # Visualizações dos tutoriais do usuário
-            user_tutorials = Tutorial.query.filter_by(autor_id=user_id).all()
-            metrics.tutorial_views = sum(len(t.visualizacoes) for t in user_tutorials)
+            # Visualizações dos tutoriais do usuário (contador materializado)
+            metrics.tutorial_views = TutorialMetricsService.total_views(autor_id=user_id)
 
             # Comentários feitos
             metrics.comments_made = ComentarioTutorial.query.filter_by(usuario_id=user_id).count()
 
             # Votos úteis recebidos
-            metrics.helpful_votes = sum(
-                len([f for f in t.feedbacks if f.util]) for t in user_tutorials
-            )
+            metrics.helpful_votes, _ = TutorialMetricsService.feedback_counts(autor_id=user_id)
 
             # Calcular pontos totais
             metrics.calculate_points()
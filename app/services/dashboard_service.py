@@ -4,14 +4,24 @@ from sqlalchemy import func, case, and_, or_
 from sqlalchemy.orm import Query
 
 from ..models import (
-    Task, Reminder, Chamado, EquipmentRequest, Sector, User,
-    Tutorial, VisualizacaoTutorial, FeedbackTutorial, db
+    Task, Reminder, Chamado, EquipmentRequest, Sector, db
 )
+from .cache_service import CacheService
+from .dashboard_stats_engine import DashboardStatsEngine
+from .permission_manager import PermissionManager
+from .tutorial_metrics_service import TutorialMetricsService
+from ..utils import time_buckets
 
 
 class DashboardService:
     """Serviço centralizado para lógica do dashboard"""
 
+    # Filtros que alteram estatísticas/gráficos (a paginação do SLA não entra na chave)
+    CACHE_FILTER_KEYS = (
+        'task_status', 'reminder_status', 'chamado_status', 'start_date', 'end_date',
+        'sector_id', 'user_id', 'global',
+    )
+
     @staticmethod
     def get_filtered_data(filters: Dict[str, Any], permissions: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -54,9 +64,10 @@ class DashboardService:
             task_query = task_query.filter(Task.sector_id == filters['sector_id'])
             reminder_query = reminder_query.filter(Reminder.sector_id == filters['sector_id'])
             chamado_query = chamado_query.filter(Chamado.setor_id == filters['sector_id'])
-            # Para equipamentos, filtrar por setor de destino (string contains)
-            sector_name = Sector.query.get(filters['sector_id']).name if Sector.query.get(filters['sector_id']) else ""
-            equipment_query = equipment_query.filter(EquipmentRequest.destination_sector.contains(sector_name))
+            # Para equipamentos, filtrar pelo setor de destino resolvido
+            equipment_query = equipment_query.filter(
+                EquipmentRequest.destination_sector_id == filters['sector_id']
+            )
 
         # Aplicar filtros de usuário (apenas admin/TI)
         if filters.get('user_id') and (permissions.get('is_admin') or permissions.get('is_ti')):
@@ -65,15 +76,25 @@ class DashboardService:
             chamado_query = chamado_query.filter(Chamado.solicitante_id == filters['user_id'])
             equipment_query = equipment_query.filter(EquipmentRequest.requester_id == filters['user_id'])
 
-        # Obter estatísticas otimizadas
-        stats = DashboardService._calculate_optimized_stats(
-            task_query, reminder_query, chamado_query, equipment_query
-        )
+        # Estatísticas e gráficos (em cache por filtros + escopo de permissão)
+        def compute_aggregates():
+            return {
+                'stats': DashboardService._calculate_optimized_stats(
+                    task_query, reminder_query, chamado_query, equipment_query
+                ),
+                'chart_data': DashboardService._prepare_chart_data(
+                    task_query, reminder_query, chamado_query, equipment_query, filters
+                ),
+            }
 
-        # Preparar dados para gráficos
-        chart_data = DashboardService._prepare_chart_data(
-            task_query, reminder_query, chamado_query, equipment_query, filters
+        aggregates = CacheService.get_or_set(
+            'dashboard.filtered_data',
+            compute_aggregates,
+            params={name: filters.get(name) for name in DashboardService.CACHE_FILTER_KEYS},
+            scope=CacheService.permission_scope(permissions),
         )
+        stats = aggregates['stats']
+        chart_data = aggregates['chart_data']
 
         # Obter dados SLA se for admin (com paginação)
         sla_data = {}
@@ -105,30 +126,9 @@ class DashboardService:
     @staticmethod
     def _apply_base_filters_chamados(query: Query, permissions: Dict[str, Any]) -> Query:
         """Aplica filtros base específicos para chamados"""
-        if not permissions.get('is_admin') and not permissions.get('is_ti'):
-            # Usuário comum vê chamados que criou ou do seu setor
-            user = User.query.get(permissions['user_id'])
-            primeiro_lembrete = Reminder.query.filter_by(user_id=permissions['user_id']).first()
-            setor_id_usuario = (
-                primeiro_lembrete.sector_id
-                if primeiro_lembrete and primeiro_lembrete.sector_id
-                else None
-            )
-            return query.filter(
-                or_(
-                    Chamado.solicitante_id == permissions['user_id'],
-                    Chamado.setor_id == setor_id_usuario
-                )
-            )
-        elif not permissions.get('is_admin') and permissions.get('is_ti'):
-            # TI vê chamados do seu setor também
-            user = User.query.get(permissions['user_id'])
-            primeiro_lembrete = Reminder.query.filter_by(user_id=permissions['user_id']).first()
-            setor_id_usuario = (
-                primeiro_lembrete.sector_id
-                if primeiro_lembrete and primeiro_lembrete.sector_id
-                else None
-            )
+        if not permissions.get('is_admin'):
+            # Usuário comum e TI veem chamados que criaram ou do seu setor (User.sector_id)
+            setor_id_usuario = PermissionManager.get_user_sector(permissions['user_id'])
             return query.filter(
                 or_(
                     Chamado.solicitante_id == permissions['user_id'],
@@ -201,69 +201,11 @@ class DashboardService:
 
     @staticmethod
     def _calculate_optimized_stats(task_query, reminder_query, chamado_query, equipment_query) -> Dict[str, Any]:
-        """Calcula estatísticas usando agregações SQL otimizadas"""
-        # Estatísticas de tarefas - agregar diretamente na query original
-        task_stats = task_query.with_entities(
-            func.count(Task.id).label('total'),
-            func.count(case((Task.completed == True, 1))).label('done'),
-            func.count(case((and_(Task.completed == False, Task.date >= date.today()), 1))).label('pending'),
-            func.count(case((and_(Task.completed == False, Task.date < date.today()), 1))).label('expired')
-        ).first()
-
-        # Estatísticas de lembretes - agregar diretamente na query original
-        reminder_stats = reminder_query.with_entities(
-            func.count(Reminder.id).label('total'),
-            func.count(case((Reminder.completed == True, 1))).label('done'),
-            func.count(case((Reminder.completed == False, 1))).label('pending')
-        ).first()
-
-        # Estatísticas de chamados - agregar diretamente na query original
-        chamado_stats = chamado_query.with_entities(
-            func.count(Chamado.id).label('total'),
-            func.count(case((Chamado.status == 'Aberto', 1))).label('aberto'),
-            func.count(case((Chamado.status == 'Em Andamento', 1))).label('em_andamento'),
-            func.count(case((Chamado.status == 'Resolvido', 1))).label('resolvido'),
-            func.count(case((Chamado.status == 'Fechado', 1))).label('fechado')
-        ).first()
-
-        # Estatísticas de equipamentos - agregar diretamente na query original
-        equipment_stats = equipment_query.with_entities(
-            func.count(EquipmentRequest.id).label('total'),
-            func.count(case((EquipmentRequest.status == 'Solicitado', 1))).label('solicitados'),
-            func.count(case((EquipmentRequest.status == 'Aprovado', 1))).label('aprovados'),
-            func.count(case((EquipmentRequest.status == 'Entregue', 1))).label('entregues'),
-            func.count(case((EquipmentRequest.status == 'Negado', 1))).label('negados'),
-            func.count(case((EquipmentRequest.status == 'Devolvido', 1))).label('devolvidos')
-        ).first()
-
-        return {
-            'tasks': {
-                'total': task_stats.total or 0,
-                'done': task_stats.done or 0,
-                'pending': task_stats.pending or 0,
-                'expired': task_stats.expired or 0
-            },
-            'reminders': {
-                'total': reminder_stats.total or 0,
-                'done': reminder_stats.done or 0,
-                'pending': reminder_stats.pending or 0
-            },
-            'chamados': {
-                'total': chamado_stats.total or 0,
-                'aberto': chamado_stats.aberto or 0,
-                'em_andamento': chamado_stats.em_andamento or 0,
-                'resolvido': chamado_stats.resolvido or 0,
-                'fechado': chamado_stats.fechado or 0
-            },
-            'equipamentos': {
-                'total': equipment_stats.total or 0,
-                'solicitados': equipment_stats.solicitados or 0,
-                'aprovados': equipment_stats.aprovados or 0,
-                'entregues': equipment_stats.entregues or 0,
-                'negados': equipment_stats.negados or 0,
-                'devolvidos': equipment_stats.devolvidos or 0
-            }
-        }
+        """Calcula estatísticas usando agregações SQL otimizadas (uma query por tabela)"""
+        snapshot = DashboardStatsEngine.filtered_snapshot(
+            task_query, reminder_query, chamado_query, equipment_query
+        )
+        return snapshot.as_dict()
 
     @staticmethod
     def _prepare_chart_data(task_query, reminder_query, chamado_query, equipment_query, filters) -> Dict[str, Any]:
@@ -285,130 +227,57 @@ class DashboardService:
 
     @staticmethod
     def _prepare_evolution_chart(task_query, reminder_query, chamado_query, equipment_query):
-        """Prepara dados para gráfico de evolução mensal"""
-        from dateutil.relativedelta import relativedelta
-
-        today = date.today()
-        meses = []
-        for i in range(11, -1, -1):
-            m = today.replace(day=1) - relativedelta(months=i)
-            meses.append(m)
-
+        """Prepara dados para gráfico de evolução mensal (um GROUP BY por entidade)"""
+        meses = time_buckets.last_n_buckets(12, 'month')
         meses_labels = [m.strftime("%b/%Y") for m in meses]
 
-        # Dados de tarefas por mês
-        tarefas_por_mes = []
-        lembretes_por_mes = []
-        chamados_por_mes = []
-        equipamentos_por_mes = []
-
-        for idx, m in enumerate(meses):
-            prox = m + relativedelta(months=1)
-
-            # Tarefas no mês
-            tarefas_mes = db.session.query(func.count(Task.id)).filter(
-                and_(Task.date >= m, Task.date < prox)
-            ).scalar()
-            tarefas_por_mes.append(tarefas_mes or 0)
-
-            # Lembretes no mês
-            lembretes_mes = db.session.query(func.count(Reminder.id)).filter(
-                and_(Reminder.due_date >= m, Reminder.due_date < prox)
-            ).scalar()
-            lembretes_por_mes.append(lembretes_mes or 0)
-
-            # Chamados no mês
-            chamados_mes = db.session.query(func.count(Chamado.id)).filter(
-                and_(Chamado.data_abertura >= m, Chamado.data_abertura < prox)
-            ).scalar()
-            chamados_por_mes.append(chamados_mes or 0)
-
-            # Equipamentos no mês
-            equipamentos_mes = db.session.query(func.count(EquipmentRequest.id)).filter(
-                and_(EquipmentRequest.request_date >= m, EquipmentRequest.request_date < prox)
-            ).scalar()
-            equipamentos_por_mes.append(equipamentos_mes or 0)
+        series = time_buckets.series_for([
+            ('tarefas', task_query, Task.date),
+            ('lembretes', reminder_query, Reminder.due_date),
+            ('chamados', chamado_query, Chamado.data_abertura),
+            ('equipamentos', equipment_query, EquipmentRequest.request_date),
+        ], meses, 'month')
 
         return {
             'labels': meses_labels,
-            'tarefas': tarefas_por_mes,
-            'lembretes': lembretes_por_mes,
-            'chamados': chamados_por_mes,
-            'equipamentos': equipamentos_por_mes
+            'tarefas': series['tarefas'],
+            'lembretes': series['lembretes'],
+            'chamados': series['chamados'],
+            'equipamentos': series['equipamentos']
         }
 
+    @staticmethod
+    def _count_by_sector(column) -> Dict[int, int]:
+        """Conta registros agrupados pela coluna de setor com um único GROUP BY"""
+        rows = db.session.query(column, func.count()).filter(
+            column.isnot(None)
+        ).group_by(column).all()
+        return {sector_id: total for sector_id, total in rows}
+
     @staticmethod
     def _prepare_sector_chart():
         """Prepara dados para gráfico de distribuição por setor"""
         sectors = Sector.query.order_by(Sector.name).all()
         setores_labels = [s.name for s in sectors]
 
-        tarefas_por_setor = []
-        lembretes_por_setor = []
-        chamados_por_setor = []
-        equipamentos_por_setor = []
-
-        for sector in sectors:
-            # Tarefas por setor
-            tarefas_count = Task.query.filter_by(sector_id=sector.id).count()
-            tarefas_por_setor.append(tarefas_count)
-
-            # Lembretes por setor
-            lembretes_count = Reminder.query.filter_by(sector_id=sector.id).count()
-            lembretes_por_setor.append(lembretes_count)
-
-            # Chamados por setor
-            chamados_count = Chamado.query.filter_by(setor_id=sector.id).count()
-            chamados_por_setor.append(chamados_count)
-
-            # Equipamentos por setor (baseado em destination_sector)
-            equipamentos_count = EquipmentRequest.query.filter(
-                EquipmentRequest.destination_sector.contains(sector.name)
-            ).count()
-            equipamentos_por_setor.append(equipamentos_count)
+        tarefas = DashboardService._count_by_sector(Task.sector_id)
+        lembretes = DashboardService._count_by_sector(Reminder.sector_id)
+        chamados = DashboardService._count_by_sector(Chamado.setor_id)
+        # Equipamentos por setor de destino resolvido (destination_sector_id)
+        equipamentos = DashboardService._count_by_sector(EquipmentRequest.destination_sector_id)
 
         return {
             'labels': setores_labels,
-            'tarefas': tarefas_por_setor,
-            'lembretes': lembretes_por_setor,
-            'chamados': chamados_por_setor,
-            'equipamentos': equipamentos_por_setor
+            'tarefas': [tarefas.get(s.id, 0) for s in sectors],
+            'lembretes': [lembretes.get(s.id, 0) for s in sectors],
+            'chamados': [chamados.get(s.id, 0) for s in sectors],
+            'equipamentos': [equipamentos.get(s.id, 0) for s in sectors]
         }
 
     @staticmethod
     def _prepare_tutorial_data():
-        """Prepara dados para estatísticas de tutoriais"""
-        total_tutoriais = Tutorial.query.count()
-
-        # Feedbacks agregados
-        feedbacks = FeedbackTutorial.query.all()
-        feedbacks_util = sum(1 for f in feedbacks if f.util)
-        feedbacks_nao_util = sum(1 for f in feedbacks if not f.util)
-
-        # Top tutoriais mais visualizados
-        visualizacoes_por_tutorial = {}
-        for v in VisualizacaoTutorial.query.all():
-            if v.tutorial_id not in visualizacoes_por_tutorial:
-                visualizacoes_por_tutorial[v.tutorial_id] = 0
-            visualizacoes_por_tutorial[v.tutorial_id] += 1
-
-        top_tutoriais_ids = sorted(
-            visualizacoes_por_tutorial,
-            key=visualizacoes_por_tutorial.get,
-            reverse=True
-        )[:5]
-
-        top_tutoriais = [Tutorial.query.get(tid) for tid in top_tutoriais_ids if Tutorial.query.get(tid)]
-        top_tutoriais_labels = [t.titulo for t in top_tutoriais]
-        top_tutoriais_values = [visualizacoes_por_tutorial[t.id] for t in top_tutoriais]
-
-        return {
-            'total': total_tutoriais,
-            'feedbacks_util': feedbacks_util,
-            'feedbacks_nao_util': feedbacks_nao_util,
-            'top_labels': top_tutoriais_labels,
-            'top_values': top_tutoriais_values
-        }
+        """Prepara dados para estatísticas de tutoriais (agregações no banco)"""
+        return TutorialMetricsService.dashboard_summary(top_n=5)
 
     @staticmethod
     def _calculate_sla_data(page: int = 1, per_page: int = 10):
@@ -435,20 +304,15 @@ class DashboardService:
         if chamados_sem_sla:
             db.session.commit()
 
-        # Contar status SLA (todos os chamados, sem paginação)
-        chamados_abertos = chamados_abertos_query.all()
-        sla_vencidos = 0
-        sla_criticos = 0
-        sla_ok = 0
-
-        for chamado in chamados_abertos:
-            status_sla = chamado.status_sla
-            if status_sla == "vencido":
-                sla_vencidos += 1
-            elif status_sla == "atencao":
-                sla_criticos += 1
-            elif status_sla == "normal":
-                sla_ok += 1
+        # Contar status SLA (todos os chamados, sem paginação) pelo status persistido,
+        # mantido em dia pelo job chamado_sla_refresh
+        sla_counts = dict(
+            chamados_abertos_query.with_entities(Chamado.sla_status, func.count(Chamado.id))
+            .group_by(Chamado.sla_status).all()
+        )
+        sla_vencidos = sla_counts.get("vencido", 0)
+        sla_criticos = sla_counts.get("atencao", 0)
+        sla_ok = sla_counts.get("normal", 0)
 
         # Performance SLA (últimos 30 dias)
         trinta_dias_atras = get_current_time_for_db() - timedelta(days=30)
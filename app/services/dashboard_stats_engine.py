@@ -0,0 +1,247 @@
+"""
+Motor de estatísticas agregadas do dashboard.
+
+Calcula todos os contadores dos cards do dashboard com uma única query
+agregada por tabela, em vez de um ``COUNT(*)`` por status.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Query
+
+from ..models import (
+    Chamado, Equipment, EquipmentLoan, EquipmentRequest, EquipmentReservation,
+    Reminder, Task, db
+)
+
+
+@dataclass(frozen=True)
+class TaskCounters:
+    total: int = 0
+    done: int = 0
+    pending: int = 0
+    expired: int = 0
+
+
+@dataclass(frozen=True)
+class ReminderCounters:
+    total: int = 0
+    done: int = 0
+    pending: int = 0
+
+
+@dataclass(frozen=True)
+class ChamadoCounters:
+    total: int = 0
+    aberto: int = 0
+    em_andamento: int = 0
+    resolvido: int = 0
+    fechado: int = 0
+
+
+@dataclass(frozen=True)
+class EquipmentRequestCounters:
+    total: int = 0
+    solicitados: int = 0
+    aprovados: int = 0
+    entregues: int = 0
+    negados: int = 0
+    devolvidos: int = 0
+
+
+@dataclass(frozen=True)
+class InventoryCounters:
+    total: int = 0
+    disponiveis: int = 0
+    emprestados: int = 0
+    manutencao: int = 0
+    danificados: int = 0
+    perdidos: int = 0
+
+
+@dataclass(frozen=True)
+class AssetFlowCounters:
+    """Contadores do fluxo equipment_v2 (reservas e empréstimos)"""
+    reservas_total: int = 0
+    reservas_pendentes: int = 0
+    reservas_confirmadas: int = 0
+    reservas_rejeitadas: int = 0
+    emprestimos_total: int = 0
+
+
+@dataclass(frozen=True)
+class DashboardStatsSnapshot:
+    """Fotografia imutável dos contadores exibidos no dashboard"""
+    tasks: TaskCounters
+    reminders: ReminderCounters
+    chamados: ChamadoCounters
+    equipamentos: Optional[EquipmentRequestCounters] = None
+    inventory: Optional[InventoryCounters] = None
+    asset_flow: Optional[AssetFlowCounters] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Converte para o formato de dicionário usado pelos templates e serviços"""
+        data = {
+            'tasks': asdict(self.tasks),
+            'reminders': asdict(self.reminders),
+            'chamados': asdict(self.chamados),
+        }
+        if self.equipamentos is not None:
+            data['equipamentos'] = asdict(self.equipamentos)
+        if self.inventory is not None:
+            data['inventory'] = asdict(self.inventory)
+        if self.asset_flow is not None:
+            data['asset_flow'] = asdict(self.asset_flow)
+        return data
+
+
+class DashboardStatsEngine:
+    """Calcula os contadores do dashboard com uma query agregada por tabela"""
+
+    @staticmethod
+    def _counts_by_status(query: Query, status_column, id_column) -> Dict[str, int]:
+        """Executa um único ``GROUP BY status`` e devolve {status: quantidade}"""
+        rows = (
+            query.order_by(None)
+            .with_entities(status_column, func.count(id_column))
+            .group_by(status_column)
+            .all()
+        )
+        return {status: count for status, count in rows}
+
+    @staticmethod
+    def task_counters(query: Optional[Query] = None) -> TaskCounters:
+        """Contadores de tarefas (total, concluídas, pendentes e vencidas)"""
+        query = query if query is not None else Task.query
+        today = date.today()
+        row = query.order_by(None).with_entities(
+            func.count(Task.id),
+            func.count(case((Task.completed == True, 1))),  # noqa: E712
+            func.count(case((and_(Task.completed == False, Task.date >= today), 1))),  # noqa: E712
+            func.count(case((and_(Task.completed == False, Task.date < today), 1))),  # noqa: E712
+        ).first()
+        total, done, pending, expired = row if row else (0, 0, 0, 0)
+        return TaskCounters(
+            total=total or 0,
+            done=done or 0,
+            pending=pending or 0,
+            expired=expired or 0,
+        )
+
+    @staticmethod
+    def reminder_counters(query: Optional[Query] = None) -> ReminderCounters:
+        """Contadores de lembretes (total, realizados e pendentes)"""
+        query = query if query is not None else Reminder.query
+        row = query.order_by(None).with_entities(
+            func.count(Reminder.id),
+            func.count(case((Reminder.completed == True, 1))),  # noqa: E712
+            func.count(case((Reminder.completed == False, 1))),  # noqa: E712
+        ).first()
+        total, done, pending = row if row else (0, 0, 0)
+        return ReminderCounters(total=total or 0, done=done or 0, pending=pending or 0)
+
+    @staticmethod
+    def chamado_counters(query: Optional[Query] = None) -> ChamadoCounters:
+        """Contadores de chamados por status"""
+        query = query if query is not None else Chamado.query
+        counts = DashboardStatsEngine._counts_by_status(query, Chamado.status, Chamado.id)
+        return ChamadoCounters(
+            total=sum(counts.values()),
+            aberto=counts.get('Aberto', 0),
+            em_andamento=counts.get('Em Andamento', 0),
+            resolvido=counts.get('Resolvido', 0),
+            fechado=counts.get('Fechado', 0),
+        )
+
+    @staticmethod
+    def equipment_request_counters(query: Optional[Query] = None) -> EquipmentRequestCounters:
+        """Contadores das solicitações de equipamento (fluxo legado)"""
+        query = query if query is not None else EquipmentRequest.query
+        counts = DashboardStatsEngine._counts_by_status(
+            query, EquipmentRequest.status, EquipmentRequest.id
+        )
+        return EquipmentRequestCounters(
+            total=sum(counts.values()),
+            solicitados=counts.get('Solicitado', 0),
+            aprovados=counts.get('Aprovado', 0),
+            entregues=counts.get('Entregue', 0),
+            negados=counts.get('Negado', 0),
+            devolvidos=counts.get('Devolvido', 0),
+        )
+
+    @staticmethod
+    def inventory_counters(query: Optional[Query] = None) -> InventoryCounters:
+        """Contadores do inventário de equipamentos por status"""
+        query = query if query is not None else Equipment.query
+        counts = DashboardStatsEngine._counts_by_status(query, Equipment.status, Equipment.id)
+        return InventoryCounters(
+            total=sum(counts.values()),
+            disponiveis=counts.get('disponivel', 0),
+            emprestados=counts.get('emprestado', 0),
+            manutencao=counts.get('manutencao', 0),
+            danificados=counts.get('danificado', 0),
+            perdidos=counts.get('perdido', 0),
+        )
+
+    @staticmethod
+    def asset_flow_counters() -> AssetFlowCounters:
+        """Contadores de reservas (por status) e total de empréstimos"""
+        reservation_counts = DashboardStatsEngine._counts_by_status(
+            EquipmentReservation.query, EquipmentReservation.status, EquipmentReservation.id
+        )
+        loans_total = db.session.query(func.count(EquipmentLoan.id)).scalar() or 0
+        return AssetFlowCounters(
+            reservas_total=sum(reservation_counts.values()),
+            reservas_pendentes=reservation_counts.get('pendente', 0),
+            reservas_confirmadas=reservation_counts.get('confirmada', 0),
+            reservas_rejeitadas=reservation_counts.get('rejeitada', 0),
+            emprestimos_total=loans_total,
+        )
+
+    @staticmethod
+    def filtered_snapshot(task_query: Query, reminder_query: Query,
+                          chamado_query: Query, equipment_query: Query) -> DashboardStatsSnapshot:
+        """
+        Calcula os contadores respeitando as queries já filtradas por permissão/data
+
+        Args:
+            task_query: Query de tarefas filtrada
+            reminder_query: Query de lembretes filtrada
+            chamado_query: Query de chamados filtrada
+            equipment_query: Query de solicitações de equipamento filtrada
+
+        Returns:
+            DashboardStatsSnapshot com tarefas, lembretes, chamados e solicitações
+        """
+        return DashboardStatsSnapshot(
+            tasks=DashboardStatsEngine.task_counters(task_query),
+            reminders=DashboardStatsEngine.reminder_counters(reminder_query),
+            chamados=DashboardStatsEngine.chamado_counters(chamado_query),
+            equipamentos=DashboardStatsEngine.equipment_request_counters(equipment_query),
+        )
+
+    @staticmethod
+    def global_snapshot(include_inventory: bool = True) -> DashboardStatsSnapshot:
+        """
+        Calcula os contadores globais (sem filtro por usuário/setor) dos cards do topo
+
+        Args:
+            include_inventory: Se False, o inventário não é consultado (usuário sem permissão)
+
+        Returns:
+            DashboardStatsSnapshot com todos os contadores globais
+        """
+        return DashboardStatsSnapshot(
+            tasks=DashboardStatsEngine.task_counters(),
+            reminders=DashboardStatsEngine.reminder_counters(),
+            chamados=DashboardStatsEngine.chamado_counters(),
+            inventory=(
+                DashboardStatsEngine.inventory_counters()
+                if include_inventory else InventoryCounters()
+            ),
+            asset_flow=DashboardStatsEngine.asset_flow_counters(),
+        )
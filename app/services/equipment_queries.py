@@ -0,0 +1,133 @@
+"""
+Consultas de leitura do módulo de equipamentos (blueprint equipment_v2)
+
+Cada listagem carrega junto, com ``joinedload``, os relacionamentos que o
+template usa (equipamento, usuário e setor do usuário), e é paginada por
+chave. Contadores usam apenas ``COUNT``, sem carregar linhas. Assim o número
+de consultas de cada página é fixo, independente da quantidade de registros.
+"""
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import joinedload
+
+from ..models import Equipment, EquipmentLoan, EquipmentReservation, User, db
+from ..utils.keyset import KeysetPage, keyset_page
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def _with_user_and_sector(relationship):
+    return joinedload(relationship).joinedload(User.sector)
+
+
+class EquipmentQueries:
+    """Listagens e contadores com estratégia de carga definida"""
+
+    # ---------- Listagens ----------
+
+    @staticmethod
+    def catalog(cursor: Optional[str] = None, per_page: int = DEFAULT_PAGE_SIZE) -> KeysetPage:
+        """Equipamentos disponíveis, por nome"""
+        query = Equipment.query.filter(Equipment.status == 'disponivel')
+        return keyset_page(query, Equipment.name, Equipment.id, cursor, per_page)
+
+    @staticmethod
+    def all_equipment(cursor: Optional[str] = None, per_page: int = DEFAULT_PAGE_SIZE) -> KeysetPage:
+        """Todos os equipamentos (gestão), por nome"""
+        return keyset_page(Equipment.query, Equipment.name, Equipment.id, cursor, per_page)
+
+    @staticmethod
+    def user_reservations(user_id: int, cursor: Optional[str] = None,
+                          per_page: int = DEFAULT_PAGE_SIZE) -> KeysetPage:
+        """Solicitações do usuário, mais recentes primeiro"""
+        query = EquipmentReservation.query.filter(
+            EquipmentReservation.user_id == user_id
+        ).options(joinedload(EquipmentReservation.equipment))
+        return keyset_page(query, EquipmentReservation.created_at, EquipmentReservation.id,
+                           cursor, per_page, descending=True)
+
+    @staticmethod
+    def pending_reservations(cursor: Optional[str] = None,
+                             per_page: int = DEFAULT_PAGE_SIZE) -> KeysetPage:
+        """Solicitações pendentes, mais antigas primeiro"""
+        query = EquipmentReservation.query.filter(
+            EquipmentReservation.status == 'pendente'
+        ).options(
+            joinedload(EquipmentReservation.equipment),
+            _with_user_and_sector(EquipmentReservation.user),
+        )
+        return keyset_page(query, EquipmentReservation.created_at, EquipmentReservation.id,
+                           cursor, per_page)
+
+    @staticmethod
+    def user_loans(user_id: int, cursor: Optional[str] = None,
+                   per_page: int = DEFAULT_PAGE_SIZE) -> KeysetPage:
+        """Empréstimos do usuário, mais recentes primeiro"""
+        query = EquipmentLoan.query.filter(
+            EquipmentLoan.user_id == user_id
+        ).options(joinedload(EquipmentLoan.equipment))
+        return keyset_page(query, EquipmentLoan.loan_date, EquipmentLoan.id,
+                           cursor, per_page, descending=True)
+
+    @staticmethod
+    def active_loans(cursor: Optional[str] = None, per_page: int = DEFAULT_PAGE_SIZE) -> KeysetPage:
+        """Empréstimos ativos, mais recentes primeiro"""
+        query = EquipmentLoan.query.filter(
+            EquipmentLoan.status == 'ativo'
+        ).options(
+            joinedload(EquipmentLoan.equipment),
+            _with_user_and_sector(EquipmentLoan.user),
+        )
+        return keyset_page(query, EquipmentLoan.loan_date, EquipmentLoan.id,
+                           cursor, per_page, descending=True)
+
+    @staticmethod
+    def loan_detail(loan_id: int) -> Optional[EquipmentLoan]:
+        """Empréstimo com equipamento, usuário e reserva de origem"""
+        return EquipmentLoan.query.options(
+            joinedload(EquipmentLoan.equipment),
+            joinedload(EquipmentLoan.user),
+            joinedload(EquipmentLoan.reservation),
+        ).filter(EquipmentLoan.id == loan_id).first()
+
+    # ---------- Contadores ----------
+
+    @staticmethod
+    def pending_count() -> int:
+        return db.session.query(func.count(EquipmentReservation.id)).filter(
+            EquipmentReservation.status == 'pendente'
+        ).scalar() or 0
+
+    @staticmethod
+    def loan_counts(user_id: Optional[int] = None, today=None) -> Dict[str, int]:
+        """Empréstimos ativos e atrasados (por data prevista) em uma consulta"""
+        today = today or datetime.utcnow().date()
+        query = db.session.query(
+            func.count(EquipmentLoan.id),
+            func.count(case((EquipmentLoan.expected_return_date < today, 1))),
+        ).filter(EquipmentLoan.status == 'ativo')
+        if user_id is not None:
+            query = query.filter(EquipmentLoan.user_id == user_id)
+        active, overdue = query.one()
+        return {'active': active or 0, 'overdue': overdue or 0}
+
+    @staticmethod
+    def index_counts(user_id: int, include_pending_approvals: bool) -> Dict[str, int]:
+        """Contadores da página inicial do módulo"""
+        equipment = db.session.query(
+            func.count(Equipment.id),
+            func.count(case((Equipment.status == 'disponivel', 1))),
+        ).one()
+        reservations = db.session.query(
+            func.count(case((EquipmentReservation.user_id == user_id, 1))),
+            func.count(EquipmentReservation.id),
+        ).filter(EquipmentReservation.status == 'pendente').one()
+        return {
+            'total_equipments': equipment[0] or 0,
+            'available': equipment[1] or 0,
+            'my_pending': reservations[0] or 0,
+            'my_loans': EquipmentQueries.loan_counts(user_id)['active'],
+            'pending_approvals': (reservations[1] or 0) if include_pending_approvals else 0,
+        }
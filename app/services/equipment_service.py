@@ -5,6 +5,7 @@ from datetime import datetime, timedelta, time
 from typing import List, Dict, Optional, Tuple
 from flask import current_app
 from sqlalchemy import and_, or_, func, case
+from sqlalchemy.orm import contains_eager, joinedload
 from flask import current_app
 
 from .. import db
@@ -12,7 +13,11 @@ from ..models import (
     Equipment, EquipmentReservation, EquipmentLoan, User,
     EquipmentRequest
 )
+from .availability_service import AvailabilityService
+from .equipment_queries import EquipmentQueries
 from .notification_service import NotificationService
+from .recipient_resolver import RecipientResolver
+from .sla_engine import SlaEngine
 
 
 class EquipmentService:
@@ -89,50 +94,9 @@ class EquipmentService:
             
         equipment = Equipment.query.get_or_404(equipment_id)
 
-        # Verificar status básico do equipamento
-        if equipment.status != "disponivel":
-            return False, f"Equipamento {equipment.status}"
-            
-        if equipment.condition not in ["novo", "bom", "regular"]:
-            return False, f"Equipamento em condição inadequada: {equipment.condition}"
-
-        # Verificar empréstimos ativos que conflitam
-        conflicting_loans = EquipmentLoan.query.filter(
-            and_(
-                EquipmentLoan.equipment_id == equipment_id,
-                EquipmentLoan.status == "ativo",
-                or_(
-                    and_(
-                        EquipmentLoan.loan_date <= end_datetime,
-                        EquipmentLoan.expected_return_date >= start_datetime
-                    )
-                )
-            )
-        ).all()
-
-        if conflicting_loans:
-            loan = conflicting_loans[0]
-            return False, f"Emprestado para {loan.user.username} até {loan.expected_return_date}"
-
-        # Verificar reservas confirmadas que conflitam
-        conflicting_reservations = EquipmentReservation.query.filter(
-            and_(
-                EquipmentReservation.equipment_id == equipment_id,
-                EquipmentReservation.status == "confirmada",
-                EquipmentReservation.start_datetime.isnot(None),
-                EquipmentReservation.end_datetime.isnot(None),
-                EquipmentReservation.start_datetime < end_datetime,
-                EquipmentReservation.end_datetime > start_datetime
-            )
-        ).all()
-
-        if conflicting_reservations:
-            reservation = conflicting_reservations[0]
-            start = reservation.start_datetime.strftime('%d/%m/%Y %H:%M')
-            end = reservation.end_datetime.strftime('%d/%m/%Y %H:%M')
-            return False, f"Reservado por {reservation.user.username} de {start} a {end}"
-
-        return True, ""
+        # Status, condição e conflitos com empréstimos ativos/reservas confirmadas (uma consulta)
+        index = AvailabilityService.build_index([equipment], start_datetime, end_datetime)
+        return index.check(equipment.id, start_datetime, end_datetime)
 
     @staticmethod
     def create_reservation(
@@ -614,7 +578,10 @@ class EquipmentService:
                 EquipmentLoan.expected_return_date == tomorrow,
                 EquipmentLoan.return_reminder_sent == False
             )
-        ).join(Equipment).all()
+        ).join(Equipment).options(
+            contains_eager(EquipmentLoan.equipment), joinedload(EquipmentLoan.user)
+        ).all()
+        resolver = RecipientResolver()
 
         reminders_sent = 0
         for loan in due_loans:
@@ -627,20 +594,20 @@ class EquipmentService:
                     loan.user.email,
                     f"Lembrete: Devolução do equipamento {loan.equipment.name}",
                     "emails/equipment_return_reminder.html",
+                    commit=False,
                     loan=loan,
                     user=loan.user
                 )
 
                 # Notificar TI se necessário
-                ti_users = User.query.filter_by(is_ti=True).all()
-                for ti_user in ti_users:
-                    NotificationService.send_email_notification(
-                        ti_user.email,
-                        f"[TI] Lembrete: Equipamento {loan.equipment.name} deve ser devolvido amanhã",
-                        "emails/equipment_return_reminder_ti.html",
-                        loan=loan,
-                        ti_user=ti_user
-                    )
+                NotificationService.send_email_fan_out(
+                    resolver.ti_users(),
+                    f"[TI] Lembrete: Equipamento {loan.equipment.name} deve ser devolvido amanhã",
+                    "emails/equipment_return_reminder_ti.html",
+                    "ti_user",
+                    commit=False,
+                    loan=loan
+                )
 
                 loan.return_reminder_sent = True
                 reminders_sent += 1
@@ -653,35 +620,33 @@ class EquipmentService:
 
     @staticmethod
     def check_sla_status():
-        """Verifica e atualiza status de SLA de todos os empréstimos ativos"""
-        active_loans = EquipmentLoan.query.filter_by(status="ativo").all()
-
-        updated_count = 0
-        for loan in active_loans:
-            old_status = loan.sla_status
-            loan.update_sla_status()
-
-            if old_status != loan.sla_status:
-                updated_count += 1
-
-                # Notificar se SLA estiver em atenção ou vencido
-                if loan.sla_status in ["atencao", "vencido"]:
-                    try:
-                        # Notificar TI sobre SLA crítico
-                        ti_users = User.query.filter_by(is_ti=True).all()
-                        for ti_user in ti_users:
-                            NotificationService.send_email_notification(
-                                ti_user.email,
-                                f"[SLA] {loan.sla_status.upper()}: Equipamento {loan.equipment.name}",
-                                "emails/equipment_sla_alert.html",
-                                loan=loan,
-                                ti_user=ti_user
-                            )
-                    except Exception as e:
-                        current_app.logger.error(f"Erro ao enviar alerta SLA para empréstimo {loan.id}: {str(e)}")
+        """Atualiza em lote o status de SLA dos empréstimos ativos e alerta a TI sobre as mudanças"""
+        transitions = SlaEngine.recompute_equipment_loans()
+
+        # Notificar apenas empréstimos que passaram para atenção ou vencido
+        alert_ids = [t.id for t in transitions if t.status in ["atencao", "vencido"]]
+        if alert_ids:
+            resolver = RecipientResolver()
+            loans = EquipmentLoan.query.options(
+                joinedload(EquipmentLoan.user), joinedload(EquipmentLoan.equipment)
+            ).filter(EquipmentLoan.id.in_(alert_ids)).order_by(EquipmentLoan.id).all()
+
+            for loan in loans:
+                try:
+                    # Notificar TI sobre SLA crítico
+                    NotificationService.send_email_fan_out(
+                        resolver.ti_users(),
+                        f"[SLA] {loan.sla_status.upper()}: Equipamento {loan.equipment.name}",
+                        "emails/equipment_sla_alert.html",
+                        "ti_user",
+                        commit=False,
+                        loan=loan
+                    )
+                except Exception as e:
+                    current_app.logger.error(f"Erro ao enviar alerta SLA para empréstimo {loan.id}: {str(e)}")
 
-        db.session.commit()
-        return updated_count
+            db.session.commit()
+        return len(transitions)
 
     @staticmethod
     def get_sla_stats() -> Dict:
@@ -718,20 +683,20 @@ class EquipmentService:
             Equipment.next_maintenance <= alert_date,
             Equipment.maintenance_alert_sent == False
         ).all()
+        resolver = RecipientResolver()
 
         alerts_sent = 0
         for equipment in maintenance_due:
             try:
                 # Notificar TI sobre manutenção necessária
-                ti_users = User.query.filter_by(is_ti=True).all()
-                for ti_user in ti_users:
-                    NotificationService.send_email_notification(
-                        ti_user.email,
-                        f"[Manutenção] Equipamento {equipment.name} precisa de manutenção",
-                        "emails/equipment_maintenance_alert.html",
-                        equipment=equipment,
-                        ti_user=ti_user
-                    )
+                NotificationService.send_email_fan_out(
+                    resolver.ti_users(),
+                    f"[Manutenção] Equipamento {equipment.name} precisa de manutenção",
+                    "emails/equipment_maintenance_alert.html",
+                    "ti_user",
+                    commit=False,
+                    equipment=equipment
+                )
 
                 equipment.maintenance_alert_sent = True
                 alerts_sent += 1
@@ -772,8 +737,8 @@ class EquipmentService:
             func.count(case((Equipment.status == 'danificado', 1))).label('danificados')
         ).first()
 
-        active_loans = EquipmentLoan.query.filter_by(status="ativo").count()
-        overdue_loans = len(EquipmentService.get_overdue_loans())
+        # Apenas COUNT, sem carregar os empréstimos
+        loan_counts = EquipmentQueries.loan_counts()
 
         return {
             'total_equipment': stats.total or 0,
@@ -781,8 +746,8 @@ class EquipmentService:
             'loaned_equipment': stats.emprestados or 0,
             'maintenance_equipment': stats.manutencao or 0,
             'damaged_equipment': stats.danificados or 0,
-            'active_loans': active_loans,
-            'overdue_loans': overdue_loans
+            'active_loans': loan_counts['active'],
+            'overdue_loans': loan_counts['overdue']
         }
 
     @staticmethod
@@ -0,0 +1,386 @@
+"""
+Fila de exportação de relatórios em segundo plano
+
+As rotas de exportação registram um ``ExportJob`` e devolvem o identificador;
+um pool de threads gera o arquivo em disco e atualiza o progresso na tabela.
+A tabela é a fila: a mudança para ``processando`` é atômica e grava um
+``claim_token`` da execução, e o worker renova ``progress_updated_at``
+(heartbeat) enquanto gera o arquivo. Jobs pendentes que não foram assumidos e
+jobs em ``processando`` sem heartbeat recente (worker interrompido, ex.:
+reinício do servidor) são reenfileirados pelo agendador. Cada execução grava
+em um arquivo temporário próprio, movido com ``os.replace``, e o status final
+só é gravado se o ``claim_token`` ainda for o dela: uma execução que perdeu o
+job descarta o resultado. Arquivos expirados são removidos periodicamente.
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import current_app, url_for
+from werkzeug.datastructures import MultiDict
+
+from ..models import ExportJob, db
+from ..utils.timezone_utils import get_current_time_for_db
+from .export_service import XLSX_MIMETYPE, ExportFilters, ExportService
+from .report_service import ReportService
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = 'export_job_executor'
+STALE_PENDING_SECONDS = 60
+# Heartbeat do worker durante a geração; sem renovação por STALE_RUNNING_SECONDS o job é reenfileirado
+HEARTBEAT_INTERVAL_SECONDS = 30
+STALE_RUNNING_SECONDS = 300
+
+# kind -> renderer(params, fileobj, progress) -> (nome do arquivo, mimetype)
+_RENDERERS: Dict[str, Callable] = {}
+_executor_lock = threading.Lock()
+
+
+def register_renderer(kind: str):
+    """Registra a função que gera o arquivo de um tipo de exportação"""
+    def decorator(func):
+        _RENDERERS[kind] = func
+        return func
+    return decorator
+
+
+@register_renderer('excel')
+def _render_excel(params: Dict, fileobj, progress) -> Tuple[str, str]:
+    args = MultiDict(params.get('args') or {})
+    sheets = ExportService.build_sheets(
+        ExportFilters.from_args(args),
+        args.get('export_type', 'all'),
+        user_id=params.get('user_id'),
+        is_admin=params.get('is_admin', False),
+        is_ti=params.get('is_ti', False),
+        sector_id=params.get('sector_id'),
+    )
+    if args.get('format') == 'csv':
+        if len(sheets) == 1:
+            chunks, name, mimetype = ExportService.stream_csv(sheets[0]), 'relatorio_reminder.csv', 'text/csv'
+        else:
+            chunks, name, mimetype = ExportService.stream_csv_zip(sheets), 'relatorio_reminder.zip', 'application/zip'
+        for chunk in chunks:
+            fileobj.write(chunk)
+        return name, mimetype
+
+    ExportService.write_xlsx(sheets, fileobj, progress=progress)
+    return 'relatorio_reminder.xlsx', XLSX_MIMETYPE
+
+
+@register_renderer('sla_pdf')
+def _render_sla_pdf(params: Dict, fileobj, progress) -> Tuple[str, str]:
+    name = ReportService.write_sla_pdf(
+        fileobj, params.get('export_type', 'chamados'), params.get('usuario', 'Usuário')
+    )
+    return name, 'application/pdf'
+
+
+@register_renderer('analytics_pdf')
+def _render_analytics_pdf(params: Dict, fileobj, progress) -> Tuple[str, str]:
+    name = ReportService.write_analytics_pdf(fileobj, params.get('start'), params.get('end'))
+    return name, 'application/pdf'
+
+
+class _ProgressHeartbeat:
+    """Thread que renova ``progress_updated_at`` enquanto o arquivo é gerado"""
+
+    def __init__(self, engine, job_id: int, claim_token: str, interval_seconds: float):
+        self.engine = engine
+        self.job_id = job_id
+        self.claim_token = claim_token
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"export-heartbeat-{job_id}",
+                                        daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self) -> None:
+        # Conexão própria: a sessão do worker não é compartilhada entre threads
+        table = ExportJob.__table__
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(
+                        table.update().where(
+                            table.c.id == self.job_id,
+                            table.c.claim_token == self.claim_token,
+                            table.c.status == ExportJob.STATUS_RUNNING,
+                        ).values(progress_updated_at=get_current_time_for_db())
+                    )
+            except Exception as e:
+                logger.warning(f"Erro ao renovar o heartbeat da exportação {self.job_id}: {e}")
+
+
+class ExportJobService:
+    """Submissão, execução, consulta e expiração dos jobs de exportação"""
+
+    @staticmethod
+    def submit(kind: str, params: Dict, user_id: Optional[int]) -> ExportJob:
+        """
+        Registra um job de exportação e o envia ao pool de workers
+
+        Args:
+            kind: Tipo registrado (excel, sla_pdf, analytics_pdf)
+            params: Parâmetros serializáveis em JSON
+            user_id: Dono do job (único que pode baixar o arquivo, além de admins)
+
+        Returns:
+            ExportJob criado
+        """
+        if kind not in _RENDERERS:
+            raise ValueError(f"Tipo de exportação desconhecido: {kind}")
+
+        job = ExportJob(
+            token=uuid.uuid4().hex,
+            kind=kind,
+            params=json.dumps(params),
+            user_id=user_id,
+            status=ExportJob.STATUS_PENDING,
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        ExportJobService._dispatch(job.id)
+        return job
+
+    @staticmethod
+    def run(job_id: int) -> bool:
+        """
+        Gera o arquivo do job (executado pelo worker)
+
+        Returns:
+            True se este worker assumiu e concluiu o job
+        """
+        claim_token = ExportJobService._claim(job_id)
+        if claim_token is None:
+            return False
+
+        job = db.session.get(ExportJob, job_id)
+        path = os.path.join(ExportJobService.storage_dir(), job.token)
+        # Arquivo próprio desta execução; só vira o arquivo do job se o claim ainda for dela
+        temp_path = f"{path}.{claim_token}.part"
+        ttl = timedelta(hours=current_app.config.get('EXPORT_JOB_TTL_HOURS', 24))
+        heartbeat = _ProgressHeartbeat(db.engine, job_id, claim_token, HEARTBEAT_INTERVAL_SECONDS)
+        heartbeat.start()
+        try:
+            params = json.loads(job.params or '{}')
+            with open(temp_path, 'wb') as fileobj:
+                file_name, mimetype = _RENDERERS[job.kind](
+                    params, fileobj,
+                    lambda pct: ExportJobService._set_progress(job_id, claim_token, pct)
+                )
+            heartbeat.stop()
+
+            now = get_current_time_for_db()
+            finished = ExportJobService._finish(
+                job_id, claim_token,
+                status=ExportJob.STATUS_DONE,
+                progress=100,
+                file_path=path,
+                file_name=file_name,
+                mimetype=mimetype,
+                file_size=os.path.getsize(temp_path),
+                finished_at=now,
+                expires_at=now + ttl,
+            )
+            if not finished:
+                db.session.rollback()
+                os.remove(temp_path)
+                logger.warning(f"Exportação {job.token} reassumida por outra execução; resultado descartado")
+                return False
+            # Arquivo no lugar antes do commit: o job nunca aparece concluído sem o arquivo
+            os.replace(temp_path, path)
+            db.session.commit()
+            logger.info(f"Exportação {job.token} ({job.kind}) concluída: {os.path.getsize(path)} bytes")
+            return True
+
+        except Exception as e:
+            logger.error(f"Erro na exportação {job_id}: {str(e)}")
+            db.session.rollback()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            now = get_current_time_for_db()
+            ExportJobService._finish(
+                job_id, claim_token,
+                status=ExportJob.STATUS_FAILED,
+                error=str(e),
+                finished_at=now,
+                expires_at=now + ttl,
+            )
+            db.session.commit()
+            return False
+
+        finally:
+            heartbeat.stop()
+
+    @staticmethod
+    def get_for_user(token: str, user) -> Optional[ExportJob]:
+        """Retorna o job se pertencer ao usuário (admins veem todos)"""
+        job = ExportJob.query.filter_by(token=token).first()
+        if job is None:
+            return None
+        if job.user_id != user.id and not user.is_admin:
+            return None
+        return job
+
+    @staticmethod
+    def status_payload(job: ExportJob) -> Dict:
+        """Resposta da API de status com as URLs de acompanhamento e download"""
+        payload = job.to_dict()
+        payload['status_url'] = url_for('main.export_job_status', token=job.token)
+        if job.status == ExportJob.STATUS_DONE:
+            payload['download_url'] = url_for('main.export_job_download', token=job.token)
+        return payload
+
+    @staticmethod
+    def requeue_pending() -> int:
+        """
+        Reenvia ao pool jobs pendentes que não foram assumidos
+
+        Jobs em processamento sem heartbeat há mais de ``STALE_RUNNING_SECONDS``
+        (worker interrompido) voltam para pendente antes do reenvio; o claim
+        anterior deixa de valer e aquela execução descarta o resultado.
+
+        Returns:
+            Quantidade de jobs reenfileirados
+        """
+        now = get_current_time_for_db()
+        table = ExportJob.__table__
+        db.session.execute(
+            table.update().where(
+                table.c.status == ExportJob.STATUS_RUNNING,
+                db.func.coalesce(table.c.progress_updated_at, table.c.started_at)
+                < now - timedelta(seconds=STALE_RUNNING_SECONDS),
+            ).values(status=ExportJob.STATUS_PENDING, started_at=None, progress=0,
+                     claim_token=None, progress_updated_at=None)
+        )
+        db.session.commit()
+
+        limit = now - timedelta(seconds=STALE_PENDING_SECONDS)
+        job_ids = [
+            job_id for (job_id,) in db.session.query(ExportJob.id).filter(
+                ExportJob.status == ExportJob.STATUS_PENDING,
+                ExportJob.created_at <= limit,
+            ).order_by(ExportJob.created_at)
+        ]
+        for job_id in job_ids:
+            ExportJobService._dispatch(job_id)
+        return len(job_ids)
+
+    @staticmethod
+    def cleanup_expired() -> int:
+        """
+        Remove os arquivos de jobs expirados e marca os jobs como expirados
+
+        Returns:
+            Quantidade de jobs expirados
+        """
+        try:
+            now = get_current_time_for_db()
+            jobs = ExportJob.query.filter(
+                ExportJob.status.in_([ExportJob.STATUS_DONE, ExportJob.STATUS_FAILED]),
+                ExportJob.expires_at.isnot(None),
+                ExportJob.expires_at <= now,
+            ).all()
+            for job in jobs:
+                if job.file_path and os.path.exists(job.file_path):
+                    os.remove(job.file_path)
+                job.status = ExportJob.STATUS_EXPIRED
+                job.file_path = None
+            db.session.commit()
+            if jobs:
+                logger.info(f"{len(jobs)} exportações expiradas removidas")
+            return len(jobs)
+
+        except Exception as e:
+            logger.error(f"Erro ao remover exportações expiradas: {str(e)}")
+            db.session.rollback()
+            return 0
+
+    @staticmethod
+    def storage_dir() -> str:
+        """Diretório onde os arquivos gerados são gravados"""
+        directory = current_app.config.get('EXPORT_JOB_DIR') or os.path.join(
+            current_app.instance_path, 'exports'
+        )
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    @staticmethod
+    def _dispatch(job_id: int) -> None:
+        app = current_app._get_current_object()
+        workers = int(app.config.get('EXPORT_JOB_WORKERS', 2))
+        if workers <= 0:
+            ExportJobService.run(job_id)
+            return
+
+        with _executor_lock:
+            executor = app.extensions.get(EXTENSION_KEY)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='export-job')
+                app.extensions[EXTENSION_KEY] = executor
+        executor.submit(_run_in_app_context, app, job_id)
+
+    @staticmethod
+    def _claim(job_id: int) -> Optional[str]:
+        """
+        Muda o job de pendente para processando (atômico entre workers/processos)
+
+        Returns:
+            claim_token desta execução, ou None se o job já foi assumido
+        """
+        now = get_current_time_for_db()
+        claim_token = uuid.uuid4().hex
+        table = ExportJob.__table__
+        result = db.session.execute(
+            table.update()
+            .where(table.c.id == job_id, table.c.status == ExportJob.STATUS_PENDING)
+            .values(status=ExportJob.STATUS_RUNNING, started_at=now, progress_updated_at=now,
+                    claim_token=claim_token)
+        )
+        db.session.commit()
+        return claim_token if result.rowcount == 1 else None
+
+    @staticmethod
+    def _set_progress(job_id: int, claim_token: str, progress: int) -> None:
+        table = ExportJob.__table__
+        db.session.execute(
+            table.update().where(table.c.id == job_id, table.c.claim_token == claim_token).values(
+                progress=min(max(progress, 0), 99), progress_updated_at=get_current_time_for_db()
+            )
+        )
+        db.session.commit()
+
+    @staticmethod
+    def _finish(job_id: int, claim_token: str, **values) -> bool:
+        """Grava o status final (sem commit) se o job ainda pertence a esta execução"""
+        table = ExportJob.__table__
+        result = db.session.execute(
+            table.update().where(
+                table.c.id == job_id,
+                table.c.claim_token == claim_token,
+                table.c.status == ExportJob.STATUS_RUNNING,
+            ).values(**values)
+        )
+        return result.rowcount == 1
+
+
+def _run_in_app_context(app, job_id: int) -> None:
+    with app.app_context():
+        try:
+            ExportJobService.run(job_id)
+        finally:
+            db.session.remove()
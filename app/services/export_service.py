@@ -0,0 +1,495 @@
+"""
+Exportação de relatórios (Excel/CSV) em streaming
+
+As linhas são lidas do banco em lotes (``yield_per``) e escritas diretamente
+no arquivo de saída, sem montar DataFrames nem a planilha inteira em memória.
+O XLSX usa o modo ``constant_memory`` do xlsxwriter (cada linha é descarregada
+em arquivo temporário assim que a próxima começa); o CSV é gerado linha a linha
+e, quando há mais de uma aba, compactado em um ZIP também em streaming.
+"""
+import csv
+import io
+import logging
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import aliased, joinedload
+
+from ..models import (Chamado, EquipmentRequest, FeedbackTutorial, Reminder, ReminderHistory,
+                      Task, Tutorial, TutorialViewCounter, User)
+from .permission_manager import PermissionManager
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 500
+STREAM_CHUNK_SIZE = 64 * 1024
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORT_TYPES = ('all', 'tasks', 'reminders', 'reminders_history', 'chamados', 'equipamentos', 'tutoriais')
+
+
+@dataclass
+class ExportFilters:
+    """Filtros da exportação (mesmos parâmetros de /export/excel)"""
+    task_status: str = ''
+    reminder_status: str = ''
+    reminder_state: str = ''
+    chamado_status: str = ''
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    sector_id: Optional[int] = None
+    user_id: Optional[int] = None
+
+    @classmethod
+    def from_args(cls, args) -> 'ExportFilters':
+        """Cria os filtros a partir de request.args (datas inválidas são ignoradas)"""
+        return cls(
+            task_status=args.get('task_status', ''),
+            reminder_status=args.get('reminder_status', ''),
+            reminder_state=args.get('reminder_state', ''),
+            chamado_status=args.get('chamado_status', ''),
+            start_date=_parse_date(args.get('start_date', '')),
+            end_date=_parse_date(args.get('end_date', '')),
+            sector_id=args.get('sector_id', type=int),
+            user_id=args.get('user_id', type=int),
+        )
+
+
+@dataclass(frozen=True)
+class ExportSheet:
+    """Aba da exportação: colunas (cabeçalho, largura) e iterador de linhas"""
+    key: str
+    name: str
+    title: str
+    columns: Sequence[Tuple[str, int]]
+    rows: Callable[[], Iterable[Sequence]]
+    empty_message: Optional[str] = None
+    currency_columns: Tuple[str, ...] = ()
+
+    @property
+    def headers(self) -> List[str]:
+        return [header for header, _width in self.columns]
+
+
+def _parse_date(value: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _fmt_date(value, fmt: str = "%d/%m/%Y", default: str = "") -> str:
+    return value.strftime(fmt) if value else default
+
+
+def _sim_nao(value) -> str:
+    return "Sim" if value else "Não"
+
+
+class ExportService:
+    """Monta as consultas filtradas e escreve os relatórios em streaming"""
+
+    @staticmethod
+    def build_sheets(filters: ExportFilters, export_type: str, user_id: int,
+                     is_admin: bool = False, is_ti: bool = False,
+                     sector_id: Optional[int] = None) -> List[ExportSheet]:
+        """
+        Monta as abas da exportação aplicando filtros e regras de permissão
+
+        Args:
+            filters: Filtros da exportação
+            export_type: 'all' ou a chave de uma aba (tasks, reminders, ...)
+            user_id: Usuário que solicitou a exportação
+            is_admin: Se o usuário é administrador
+            is_ti: Se o usuário é da equipe de TI
+            sector_id: Setor do usuário (consultado por ``user_id`` se não informado)
+
+        Returns:
+            Lista de ExportSheet na ordem das abas
+        """
+        task_query = Task.query
+        reminder_query = Reminder.query
+        chamado_query = Chamado.query
+        equipment_query = EquipmentRequest.query
+
+        # Filtros de permissão
+        if not is_admin and not is_ti:
+            task_query = task_query.filter(Task.user_id == user_id)
+            reminder_query = reminder_query.filter(Reminder.user_id == user_id)
+            chamado_query = chamado_query.filter(Chamado.solicitante_id == user_id)
+            equipment_query = equipment_query.filter(EquipmentRequest.requester_id == user_id)
+        elif not is_admin and is_ti:
+            setor_id_usuario = sector_id if sector_id is not None else PermissionManager.get_user_sector(user_id)
+            chamado_query = chamado_query.filter(
+                (Chamado.solicitante_id == user_id) | (Chamado.setor_id == setor_id_usuario)
+            )
+            # TI pode ver todas as solicitações de equipamento
+
+        today = date.today()
+        if filters.task_status == "done":
+            task_query = task_query.filter(Task.completed == True)  # noqa: E712
+        elif filters.task_status == "pending":
+            task_query = task_query.filter(Task.completed == False, Task.date >= today)  # noqa: E712
+        elif filters.task_status == "expired":
+            task_query = task_query.filter(Task.completed == False, Task.date < today)  # noqa: E712
+
+        if filters.reminder_status == "done":
+            reminder_query = reminder_query.filter(Reminder.completed == True)  # noqa: E712
+        elif filters.reminder_status == "pending":
+            reminder_query = reminder_query.filter(Reminder.completed == False)  # noqa: E712
+
+        if filters.reminder_state in ["ativo", "pausado", "cancelado", "encerrado"]:
+            reminder_query = reminder_query.filter(Reminder.status == filters.reminder_state)
+
+        if filters.chamado_status:
+            chamado_query = chamado_query.filter(Chamado.status == filters.chamado_status)
+
+        tutorial_query = Tutorial.query
+        if filters.start_date:
+            task_query = task_query.filter(Task.date >= filters.start_date)
+            reminder_query = reminder_query.filter(Reminder.due_date >= filters.start_date)
+            chamado_query = chamado_query.filter(Chamado.data_abertura >= filters.start_date)
+            equipment_query = equipment_query.filter(EquipmentRequest.request_date >= filters.start_date)
+            tutorial_query = tutorial_query.filter(Tutorial.data_criacao >= filters.start_date)
+        if filters.end_date:
+            task_query = task_query.filter(Task.date <= filters.end_date)
+            reminder_query = reminder_query.filter(Reminder.due_date <= filters.end_date)
+            chamado_query = chamado_query.filter(Chamado.data_abertura <= filters.end_date)
+            equipment_query = equipment_query.filter(EquipmentRequest.request_date <= filters.end_date)
+            tutorial_query = tutorial_query.filter(Tutorial.data_criacao <= filters.end_date)
+
+        if filters.sector_id:
+            task_query = task_query.filter(Task.sector_id == filters.sector_id)
+            reminder_query = reminder_query.filter(Reminder.sector_id == filters.sector_id)
+            chamado_query = chamado_query.filter(Chamado.setor_id == filters.sector_id)
+            equipment_query = equipment_query.filter(
+                EquipmentRequest.destination_sector_id == filters.sector_id
+            )
+
+        # Admin ou TI pode filtrar por qualquer usuário
+        if filters.user_id and (is_admin or is_ti):
+            task_query = task_query.filter(Task.user_id == filters.user_id)
+            reminder_query = reminder_query.filter(Reminder.user_id == filters.user_id)
+            chamado_query = chamado_query.filter(Chamado.solicitante_id == filters.user_id)
+            equipment_query = equipment_query.filter(EquipmentRequest.requester_id == filters.user_id)
+            tutorial_query = tutorial_query.filter(Tutorial.autor_id == filters.user_id)
+
+        sheets = [
+            ExportService._tasks_sheet(task_query),
+            ExportService._reminders_sheet(reminder_query),
+            ExportService._reminder_history_sheet(reminder_query),
+            ExportService._chamados_sheet(chamado_query),
+            ExportService._equipment_sheet(equipment_query),
+            ExportService._tutorials_sheet(tutorial_query),
+        ]
+        return [s for s in sheets if export_type in ('all', s.key)]
+
+    # ------------------------------------------------------------------
+    # Abas
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _tasks_sheet(query) -> ExportSheet:
+        def rows():
+            q = query.options(joinedload(Task.sector), joinedload(Task.user)).order_by(Task.id)
+            for t in q.yield_per(EXPORT_BATCH_SIZE):
+                yield (
+                    t.description,
+                    _fmt_date(t.date),
+                    t.responsible,
+                    t.sector.name if t.sector else "",
+                    t.user.username if t.user else t.responsible or "",
+                    _sim_nao(t.completed),
+                )
+
+        return ExportSheet(
+            key='tasks', name="Tarefas", title="Relatório de Tarefas", rows=rows,
+            columns=[("Descrição", 40), ("Data", 12), ("Responsável", 20), ("Setor", 20),
+                     ("Usuário", 20), ("Concluída", 11)],
+        )
+
+    @staticmethod
+    def _reminders_sheet(query) -> ExportSheet:
+        def rows():
+            q = query.options(joinedload(Reminder.sector), joinedload(Reminder.user)).order_by(Reminder.id)
+            for r in q.yield_per(EXPORT_BATCH_SIZE):
+                yield (
+                    r.name,
+                    r.type,
+                    _fmt_date(r.due_date),
+                    r.responsible,
+                    r.sector.name if r.sector else "",
+                    r.user.username if r.user else r.responsible or "",
+                    _sim_nao(r.completed),
+                    r.priority or "",
+                    r.category or "",
+                    r.contract_number or "",
+                    float(r.cost) if isinstance(r.cost, (int, float)) else None,
+                    r.supplier or "",
+                    r.status or "",
+                    _fmt_date(r.pause_until),
+                    _fmt_date(r.end_date),
+                )
+
+        return ExportSheet(
+            key='reminders', name="Lembretes", title="Relatório de Lembretes", rows=rows,
+            columns=[("Nome", 30), ("Tipo", 15), ("Vencimento", 12), ("Responsável", 20),
+                     ("Setor", 20), ("Usuário", 20), ("Realizado", 11), ("Prioridade", 12),
+                     ("Categoria", 20), ("Nº Contrato/Licença", 22), ("Valor/Custo", 14),
+                     ("Fornecedor", 20), ("Status", 12), ("Pausado Até", 13), ("Data Final", 12)],
+            currency_columns=("Valor/Custo",),
+        )
+
+    @staticmethod
+    def _reminder_history_sheet(reminder_query) -> ExportSheet:
+        def rows():
+            # Respeita os filtros aplicados em reminder_query
+            reminder_ids = reminder_query.with_entities(Reminder.id).order_by(None)
+            completed_by = aliased(User)
+            q = ReminderHistory.query.join(
+                Reminder, Reminder.id == ReminderHistory.reminder_id
+            ).outerjoin(
+                completed_by, completed_by.id == ReminderHistory.completed_by
+            ).filter(
+                ReminderHistory.reminder_id.in_(reminder_ids.scalar_subquery())
+            ).with_entities(
+                Reminder.name, ReminderHistory.action_type, ReminderHistory.action_date,
+                ReminderHistory.original_due_date, ReminderHistory.completed,
+                completed_by.username, ReminderHistory.notes,
+            ).order_by(ReminderHistory.id)
+
+            for name, action, action_date, due_date, completed, username, notes in q.yield_per(EXPORT_BATCH_SIZE):
+                yield (
+                    name,
+                    action,
+                    _fmt_date(action_date, "%d/%m/%Y %H:%M"),
+                    _fmt_date(due_date),
+                    _sim_nao(completed),
+                    username or "",
+                    notes or "",
+                )
+
+        return ExportSheet(
+            key='reminders_history', name="Histórico Lembretes", title="Histórico de Lembretes", rows=rows,
+            columns=[("Lembrete", 30), ("Ação", 15), ("Data Ação", 17), ("Vencimento Original", 20),
+                     ("Concluído", 11), ("Concluído por", 20), ("Notas", 40)],
+        )
+
+    @staticmethod
+    def _chamados_sheet(query) -> ExportSheet:
+        def rows():
+            q = query.options(
+                joinedload(Chamado.solicitante), joinedload(Chamado.setor), joinedload(Chamado.responsavel_ti)
+            ).order_by(Chamado.id)
+            for c in q.yield_per(EXPORT_BATCH_SIZE):
+                yield (
+                    c.id,
+                    c.titulo,
+                    c.status,
+                    c.prioridade,
+                    _fmt_date(c.data_abertura, "%d/%m/%Y %H:%M"),
+                    _fmt_date(c.prazo_sla, "%d/%m/%Y %H:%M", "N/A"),
+                    c.status_sla,
+                    c.solicitante.username if c.solicitante else "",
+                    c.setor.name if c.setor else "",
+                    c.responsavel_ti.username if c.responsavel_ti else "",
+                    _fmt_date(c.data_fechamento, "%d/%m/%Y %H:%M", "Em Aberto"),
+                )
+
+        return ExportSheet(
+            key='chamados', name="Chamados", title="Relatório de Chamados", rows=rows,
+            columns=[("ID", 8), ("Título", 40), ("Status", 14), ("Prioridade", 12), ("Abertura", 17),
+                     ("Prazo SLA", 17), ("Status SLA", 12), ("Solicitante", 20), ("Setor", 20),
+                     ("Responsável TI", 20), ("Fechamento", 17)],
+            empty_message="Nenhum chamado encontrado com os filtros aplicados",
+        )
+
+    @staticmethod
+    def _equipment_sheet(query) -> ExportSheet:
+        def rows():
+            q = query.options(joinedload(EquipmentRequest.requester)).order_by(EquipmentRequest.id)
+            for e in q.yield_per(EXPORT_BATCH_SIZE):
+                yield (
+                    e.id,
+                    e.description,
+                    e.patrimony,
+                    e.equipment_type,
+                    e.status,
+                    e.requester.username if e.requester else "",
+                    _fmt_date(e.request_date),
+                )
+
+        return ExportSheet(
+            key='equipamentos', name="Equipamentos", title="Relatório de Equipamentos", rows=rows,
+            columns=[("ID", 8), ("Descrição", 40), ("Patrimônio", 15), ("Tipo", 18), ("Status", 14),
+                     ("Solicitante", 20), ("Data Solicitação", 17)],
+        )
+
+    @staticmethod
+    def _tutorials_sheet(query) -> ExportSheet:
+        def rows():
+            feedbacks = FeedbackTutorial.query.with_entities(
+                FeedbackTutorial.tutorial_id.label('tutorial_id'),
+                func.count(case((FeedbackTutorial.util == True, 1))).label('util'),  # noqa: E712
+                func.count(case((FeedbackTutorial.util == False, 1))).label('nao_util'),  # noqa: E712
+            ).group_by(FeedbackTutorial.tutorial_id).subquery()
+
+            q = query.join(User, User.id == Tutorial.autor_id).outerjoin(
+                TutorialViewCounter, TutorialViewCounter.tutorial_id == Tutorial.id
+            ).outerjoin(
+                feedbacks, feedbacks.c.tutorial_id == Tutorial.id
+            ).with_entities(
+                Tutorial.titulo, Tutorial.categoria, User.username, Tutorial.data_criacao,
+                func.coalesce(TutorialViewCounter.total_views, 0),
+                func.coalesce(feedbacks.c.util, 0),
+                func.coalesce(feedbacks.c.nao_util, 0),
+            ).order_by(Tutorial.id)
+
+            for titulo, categoria, autor, criacao, views, util, nao_util in q.yield_per(EXPORT_BATCH_SIZE):
+                yield (titulo, categoria or "", autor, _fmt_date(criacao, "%d/%m/%Y %H:%M"),
+                       views, util, nao_util)
+
+        return ExportSheet(
+            key='tutoriais', name="Tutoriais", title="Relatório de Tutoriais", rows=rows,
+            columns=[("Título", 40), ("Categoria", 20), ("Autor", 20), ("Data de Criação", 17),
+                     ("Visualizações", 14), ("Feedback Útil", 14), ("Feedback Não Útil", 18)],
+        )
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def write_xlsx(sheets: List[ExportSheet], fileobj,
+                   progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Escreve as abas em um XLSX com memória constante
+
+        Args:
+            sheets: Abas a exportar
+            fileobj: Arquivo binário de destino
+            progress: Callback opcional chamado com o percentual após cada aba
+
+        Returns:
+            Quantidade de linhas de dados escritas
+        """
+        import xlsxwriter  # carregado sob demanda (fora do caminho de inicialização)
+
+        workbook = xlsxwriter.Workbook(fileobj, {'constant_memory': True})
+        title_format = workbook.add_format(
+            {"bold": True, "font_size": 14, "align": "center", "valign": "vcenter"}
+        )
+        header_format = workbook.add_format(
+            {"bold": True, "text_wrap": True, "valign": "top", "fg_color": "#D7E4BC", "border": 1}
+        )
+        currency_format = workbook.add_format({"num_format": "R$ #,##0.00"})
+
+        total = 0
+        try:
+            for index, sheet in enumerate(sheets):
+                worksheet = workbook.add_worksheet(sheet.name)
+                for col, (header, width) in enumerate(sheet.columns):
+                    cell_format = currency_format if header in sheet.currency_columns else None
+                    worksheet.set_column(col, col, width, cell_format)
+
+                # constant_memory exige escrita em ordem de linha: título, cabeçalho, dados
+                worksheet.merge_range(0, 0, 0, len(sheet.columns) - 1, sheet.title, title_format)
+                worksheet.write_row(1, 0, sheet.headers, header_format)
+
+                row_num = 2
+                for row in sheet.rows():
+                    worksheet.write_row(row_num, 0, row)
+                    row_num += 1
+
+                if row_num == 2 and sheet.empty_message:
+                    worksheet.write(2, 0, sheet.empty_message)
+                total += row_num - 2
+                if progress:
+                    progress(int(100 * (index + 1) / (len(sheets) + 1)))
+        finally:
+            workbook.close()
+        return total
+
+    @staticmethod
+    def stream_xlsx(sheets: List[ExportSheet]) -> Iterator[bytes]:
+        """
+        Gera o XLSX em arquivo temporário e o transmite em blocos
+
+        O formato ZIP do XLSX só é finalizado ao fechar a planilha; o arquivo
+        temporário mantém a memória do worker constante mesmo em exportações grandes.
+        """
+        with tempfile.TemporaryFile() as tmp:
+            rows = ExportService.write_xlsx(sheets, tmp)
+            logger.info(f"Exportação XLSX gerada: {len(sheets)} abas, {rows} linhas")
+            tmp.seek(0)
+            while True:
+                chunk = tmp.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    @staticmethod
+    def iter_csv(sheet: ExportSheet) -> Iterator[str]:
+        """Gera o CSV de uma aba em blocos de texto (cabeçalho + linhas)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(sheet.headers)
+        for row in sheet.rows():
+            writer.writerow(row)
+            if buffer.tell() >= STREAM_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    @staticmethod
+    def stream_csv(sheet: ExportSheet) -> Iterator[bytes]:
+        """Transmite o CSV de uma aba (UTF-8 com BOM para abrir corretamente no Excel)"""
+        yield '\ufeff'.encode('utf-8')
+        for chunk in ExportService.iter_csv(sheet):
+            yield chunk.encode('utf-8')
+
+    @staticmethod
+    def stream_csv_zip(sheets: List[ExportSheet]) -> Iterator[bytes]:
+        """Transmite um ZIP com um CSV por aba, sem materializar o arquivo"""
+        output = _ChunkBuffer()
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for sheet in sheets:
+                with archive.open(f"{sheet.name}.csv", 'w', force_zip64=True) as entry:
+                    entry.write('\ufeff'.encode('utf-8'))
+                    for chunk in ExportService.iter_csv(sheet):
+                        entry.write(chunk.encode('utf-8'))
+                        yield from output.drain()
+                yield from output.drain()
+        yield from output.drain()
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Destino não posicionável para ZipFile: acumula bytes até serem drenados"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        if chunks:
+            yield b''.join(chunks)
@@ -1,13 +1,21 @@
 """
 Serviço de Leitura de Logs
-Lê e processa logs reais do sistema
+Lê e processa logs reais do sistema (linhas JSON estruturadas ou texto legado)
 """
 
+import json
 import os
 import re
 from datetime import datetime, timedelta
 from flask import current_app
 
+from ..utils.log_index import LEVELS, LogIndex, from_ms
+from ..utils.structured_logging import CONTEXT_FIELDS, get_ring_buffer
+
+
+# Timestamp de uma linha JSON estruturada (sem decodificar o JSON inteiro)
+JSON_TIMESTAMP = re.compile(r'^\{"ts":\s*"(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})"')
+
 
 class LogReaderService:
     """Serviço para leitura e análise de logs do sistema"""
@@ -15,7 +23,7 @@ class LogReaderService:
     # Padrões de regex para diferentes níveis de log
     LOG_PATTERN = re.compile(
         r'(?P<timestamp>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3})\s+'
-        r'(?P<level>\w+)\s+'
+        r'(?P<level>\w+):?\s+'
         r'(?P<message>.+?)(?:\s+\[in\s+(?P<file>[^\]]+)\])?$'
     )
     
@@ -48,11 +56,81 @@ class LogReaderService:
         
         return None
     
+    @classmethod
+    def get_log_index(cls, log_file):
+        """Índice do log e dos arquivos rotacionados (ver utils/log_index)"""
+        return LogIndex(log_file, current_app.config.get('LOG_INDEX_DIR'))
+
+    @classmethod
+    def _parse_entry(cls, line, ts_ms):
+        """Entrada no formato de read_logs a partir da linha do log"""
+        if line[:1] == b'{':
+            try:
+                return cls._structured_entry(json.loads(line), from_ms(ts_ms))
+            except ValueError:
+                pass
+        text = line.decode('utf-8', errors='ignore').strip()
+        match = cls.LOG_PATTERN.match(text)
+        if match:
+            log_data = match.groupdict()
+        else:
+            parts = text.split(None, 3)
+            log_data = {'level': parts[2].rstrip(':') if len(parts) > 2 else '',
+                        'message': parts[3] if len(parts) > 3 else '', 'file': None}
+        log_data['timestamp'] = from_ms(ts_ms)
+        return log_data
+
+    @classmethod
+    def _structured_entry(cls, data, timestamp=None):
+        """Entrada de read_logs a partir de um registro estruturado (JSON ou buffer)"""
+        entry = {
+            'timestamp': timestamp or datetime.strptime(data['ts'], '%Y-%m-%d %H:%M:%S,%f'),
+            'level': data.get('level', ''),
+            'message': data.get('message', ''),
+            'file': data.get('file'),
+        }
+        for field in CONTEXT_FIELDS:
+            if field in data:
+                entry[field] = data[field]
+        if 'exc' in data:
+            entry['exc'] = data['exc']
+        return entry
+
+    @classmethod
+    def read_recent(cls, level=None, limit=100, offset=0, search=None, after=0):
+        """
+        Registros recentes do buffer em memória deste processo (sem ler arquivo)
+        
+        Args:
+            level: Filtrar por nível
+            limit: Número máximo de logs a retornar
+            offset: Offset para paginação
+            search: Texto para buscar nas mensagens
+            after: Só registros com sequência maior (atualização incremental)
+            
+        Returns:
+            dict no formato de read_logs, com 'last_seq'
+        """
+        ring_buffer = get_ring_buffer(current_app)
+        if ring_buffer is None:
+            return {'logs': [], 'total': 0, 'last_seq': after, 'error': 'Buffer de logs desativado'}
+        result = ring_buffer.recent(level=level, search=search, after=after, limit=limit, offset=offset)
+        logs = []
+        for seq, data in result['entries']:
+            entry = cls._structured_entry(data)
+            entry['seq'] = seq
+            logs.append(entry)
+        return {'logs': logs, 'total': result['total'], 'last_seq': result['last_seq'], 'source': 'memory'}
+
     @classmethod
     def read_logs(cls, level=None, limit=100, offset=0, search=None, 
                   start_date=None, end_date=None):
         """
-        Lê logs do arquivo
+        Lê logs do arquivo atual e dos rotacionados, mais recentes primeiro
+        
+        Nível e período são resolvidos pelo índice; só as entradas da página
+        são lidas do log. A busca por texto percorre as entradas candidatas
+        em blocos, do fim para o início.
         
         Args:
             level: Filtrar por nível (DEBUG, INFO, WARNING, ERROR, CRITICAL)
@@ -76,56 +154,40 @@ class LogReaderService:
             }
         
         try:
+            files = cls.get_log_index(log_file).refresh()
+            windows = []
+            for indexed in files:
+                records = indexed.records(level)
+                lo, hi = records.window(start_date, end_date)
+                windows.append((indexed, records, lo, hi))
+
             logs = []
-            total_count = 0
-            
-            # Ler arquivo de trás para frente para pegar logs mais recentes primeiro
-            with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-            
-            # Processar linhas de trás para frente
-            for line in reversed(lines):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Tentar parsear a linha
-                match = cls.LOG_PATTERN.match(line)
-                if match:
-                    log_data = match.groupdict()
-                    
-                    # Aplicar filtros
-                    if level and log_data['level'] != level:
-                        continue
-                    
-                    if search and search.lower() not in log_data['message'].lower():
-                        continue
-                    
-                    # Parsear timestamp
-                    try:
-                        log_timestamp = datetime.strptime(
-                            log_data['timestamp'], 
-                            '%Y-%m-%d %H:%M:%S,%f'
-                        )
-                        
-                        if start_date and log_timestamp < start_date:
-                            continue
-                        if end_date and log_timestamp > end_date:
-                            continue
-                        
-                        log_data['timestamp'] = log_timestamp
-                    except:
-                        pass
-                    
-                    total_count += 1
-                    
-                    # Aplicar paginação
-                    if total_count > offset and len(logs) < limit:
-                        logs.append(log_data)
-                    
+            if not search:
+                total_count = sum(hi - lo for _, _, lo, hi in windows)
+                skip = offset
+                for indexed, records, lo, hi in windows:
                     if len(logs) >= limit:
                         break
-            
+                    if skip >= hi - lo:
+                        skip -= hi - lo
+                        continue
+                    top = hi - skip
+                    skip = 0
+                    bottom = max(lo, top - (limit - len(logs)))
+                    for _, ts, _, line in indexed.iter_reverse(records, bottom, top):
+                        logs.append(cls._parse_entry(line, ts))
+            else:
+                needle = search.lower()
+                total_count = 0
+                for indexed, records, lo, hi in windows:
+                    for _, ts, _, line in indexed.iter_reverse(records, lo, hi):
+                        log_data = cls._parse_entry(line, ts)
+                        if needle not in log_data['message'].lower():
+                            continue
+                        total_count += 1
+                        if total_count > offset and len(logs) < limit:
+                            logs.append(log_data)
+
             return {
                 'logs': logs,
                 'total': total_count,
@@ -147,6 +209,9 @@ class LogReaderService:
         """
         Retorna estatísticas dos logs
         
+        As contagens vêm dos índices por nível (busca binária pelo horário de
+        corte), sem reler os arquivos.
+        
         Args:
             hours: Número de horas para considerar
             
@@ -167,32 +232,12 @@ class LogReaderService:
         
         try:
             cutoff_time = datetime.now() - timedelta(hours=hours)
-            stats = {
-                'DEBUG': 0,
-                'INFO': 0,
-                'WARNING': 0,
-                'ERROR': 0,
-                'CRITICAL': 0
-            }
+            stats = {level: 0 for level in LEVELS}
             
-            with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    match = cls.LOG_PATTERN.match(line.strip())
-                    if match:
-                        log_data = match.groupdict()
-                        
-                        # Verificar se está dentro do período
-                        try:
-                            log_time = datetime.strptime(
-                                log_data['timestamp'],
-                                '%Y-%m-%d %H:%M:%S,%f'
-                            )
-                            if log_time >= cutoff_time:
-                                level = log_data['level']
-                                if level in stats:
-                                    stats[level] += 1
-                        except:
-                            pass
+            for indexed in cls.get_log_index(log_file).refresh():
+                for level in LEVELS:
+                    lo, hi = indexed.records(level).window(cutoff_time, None)
+                    stats[level] += hi - lo
             
             return {
                 'errors_count': stats['ERROR'] + stats['CRITICAL'],
@@ -239,7 +284,8 @@ class LogReaderService:
             with open(log_file, 'r', encoding='utf-8', errors='ignore') as infile:
                 with open(temp_file, 'w', encoding='utf-8') as outfile:
                     for line in infile:
-                        match = cls.LOG_PATTERN.match(line.strip())
+                        stripped = line.strip()
+                        match = (JSON_TIMESTAMP if stripped.startswith('{') else cls.LOG_PATTERN).match(stripped)
                         if match:
                             log_data = match.groupdict()
                             try:
@@ -0,0 +1,309 @@
+"""
+Fila de emails de saída com envio em lote
+
+As notificações são gravadas em ``outbound_email`` e enviadas pelo dispatcher,
+que reserva um lote de mensagens, abre uma conexão SMTP persistente por worker
+(``mail.connect()``) e envia todas as mensagens do lote por ela. Falhas são
+reprogramadas com backoff exponencial até ``max_attempts``. Emails transacionais
+(``immediate=True``) são enviados logo após o commit por ``send_now``; se o envio
+falhar, a mensagem continua na fila para o dispatcher.
+"""
+import logging
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import func
+
+from .. import mail
+from ..models import OutboundEmail, db
+from ..utils.timezone_utils import get_current_time_for_db
+
+logger = logging.getLogger(__name__)
+
+# Mensagens em "enviando" há mais tempo que isso voltam para a fila (dispatcher interrompido)
+STALE_CLAIM_MINUTES = 10
+MAX_BACKOFF_SECONDS = 6 * 3600
+
+_recent_runs = deque(maxlen=50)
+
+
+@dataclass(frozen=True)
+class _QueuedMessage:
+    """Dados de envio desacoplados da sessão (usados pelas threads de envio)"""
+    id: int
+    recipients: Tuple[str, ...]
+    subject: str
+    html_body: Optional[str]
+    text_body: Optional[str]
+    sender: Optional[str]
+
+
+class MailQueueService:
+    """Enfileiramento e envio em lote de emails"""
+
+    @staticmethod
+    def enqueue(recipients, subject: str, html_body: Optional[str] = None,
+                text_body: Optional[str] = None, sender: Optional[str] = None,
+                category: Optional[str] = None, commit: bool = True,
+                immediate: bool = False) -> OutboundEmail:
+        """
+        Adiciona um email à fila de saída
+
+        Args:
+            recipients: Endereço ou lista de endereços
+            subject: Assunto
+            html_body: Corpo HTML
+            text_body: Corpo texto
+            sender: Remetente (padrão MAIL_DEFAULT_SENDER)
+            category: Template ou origem (para métricas)
+            commit: Se False, a mensagem é gravada no commit do chamador
+            immediate: Enviar logo após o commit (MAIL_SEND_IMMEDIATELY); ignorado com commit=False
+
+        Returns:
+            OutboundEmail criado
+        """
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        message = OutboundEmail(
+            recipients=",".join(r.strip() for r in recipients if r and r.strip()),
+            subject=subject,
+            html_body=html_body,
+            text_body=text_body,
+            sender=sender,
+            category=category,
+            max_attempts=current_app.config.get('MAIL_QUEUE_MAX_ATTEMPTS', 5),
+            next_attempt_at=get_current_time_for_db(),
+        )
+        db.session.add(message)
+        if commit:
+            db.session.commit()
+            if immediate and current_app.config.get('MAIL_SEND_IMMEDIATELY', True):
+                MailQueueService.send_now([message.id])
+        return message
+
+    @staticmethod
+    def send_now(message_ids: List[int]) -> int:
+        """
+        Envia imediatamente mensagens já gravadas na fila (melhor esforço)
+
+        Falhas seguem o mesmo backoff do dispatcher; a mensagem permanece na fila.
+
+        Returns:
+            Quantidade de mensagens enviadas
+        """
+        try:
+            messages = MailQueueService._claim_batch(len(message_ids), message_ids)
+            if not messages:
+                return 0
+            from ..email_utils import configure_mail_from_settings
+            configure_mail_from_settings()
+            outcomes = _send_chunk(current_app._get_current_object(), messages)
+            sent, _retried, _failed = MailQueueService._record_outcomes(outcomes)
+            return sent
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Envio imediato falhou, mensagens mantidas na fila: {e}")
+            return 0
+
+    @staticmethod
+    def dispatch(batch_size: Optional[int] = None, concurrency: Optional[int] = None) -> Dict:
+        """
+        Envia as mensagens pendentes cujo horário de tentativa já chegou
+
+        Args:
+            batch_size: Máximo de mensagens por execução (MAIL_QUEUE_BATCH_SIZE)
+            concurrency: Conexões SMTP simultâneas (MAIL_QUEUE_CONCURRENCY)
+
+        Returns:
+            Métricas da execução (enviadas, reprogramadas, falhas, throughput)
+        """
+        config = current_app.config
+        batch_size = batch_size or config.get('MAIL_QUEUE_BATCH_SIZE', 200)
+        concurrency = max(1, concurrency or config.get('MAIL_QUEUE_CONCURRENCY', 1))
+        started = time.perf_counter()
+
+        MailQueueService._release_stale_claims()
+        messages = MailQueueService._claim_batch(batch_size)
+        result = {
+            'claimed': len(messages), 'sent': 0, 'retried': 0, 'failed': 0,
+            'connections': 0, 'elapsed_seconds': 0.0, 'throughput_per_second': 0.0,
+            'timestamp': get_current_time_for_db().isoformat(),
+        }
+        if not messages:
+            return result
+
+        # Configurações de SMTP do sistema são aplicadas uma vez por execução
+        from ..email_utils import configure_mail_from_settings
+        configure_mail_from_settings()
+
+        chunks = [messages[i::concurrency] for i in range(concurrency) if messages[i::concurrency]]
+        result['connections'] = len(chunks)
+        if len(chunks) == 1:
+            outcomes = _send_chunk(current_app._get_current_object(), chunks[0])
+        else:
+            app = current_app._get_current_object()
+            with ThreadPoolExecutor(max_workers=len(chunks), thread_name_prefix='mail-dispatch') as pool:
+                outcomes = [o for chunk_result in pool.map(lambda c: _send_chunk(app, c), chunks)
+                            for o in chunk_result]
+
+        sent, retried, failed = MailQueueService._record_outcomes(outcomes)
+        elapsed = time.perf_counter() - started
+        result.update(
+            sent=sent, retried=retried, failed=failed,
+            elapsed_seconds=round(elapsed, 3),
+            throughput_per_second=round(sent / elapsed, 2) if elapsed > 0 else 0.0,
+        )
+        _recent_runs.append(result)
+        logger.info(
+            f"Fila de emails: {sent} enviados, {retried} reprogramados, {failed} com erro "
+            f"em {result['elapsed_seconds']}s ({result['throughput_per_second']} msg/s, "
+            f"{result['connections']} conexões)"
+        )
+        return result
+
+    @staticmethod
+    def queue_stats() -> Dict:
+        """Quantidade de mensagens por status e métricas das últimas execuções"""
+        counts = dict(
+            db.session.query(OutboundEmail.status, func.count(OutboundEmail.id))
+            .group_by(OutboundEmail.status).all()
+        )
+        return {
+            'pending': counts.get(OutboundEmail.STATUS_PENDING, 0),
+            'sending': counts.get(OutboundEmail.STATUS_SENDING, 0),
+            'sent': counts.get(OutboundEmail.STATUS_SENT, 0),
+            'failed': counts.get(OutboundEmail.STATUS_FAILED, 0),
+            'recent_runs': list(_recent_runs),
+        }
+
+    @staticmethod
+    def retry_delay(attempts: int) -> timedelta:
+        """Backoff exponencial a partir de MAIL_QUEUE_RETRY_BASE_SECONDS"""
+        base = current_app.config.get('MAIL_QUEUE_RETRY_BASE_SECONDS', 60)
+        return timedelta(seconds=min(base * (2 ** max(attempts - 1, 0)), MAX_BACKOFF_SECONDS))
+
+    @staticmethod
+    def _claim_batch(batch_size: int, message_ids: Optional[List[int]] = None) -> List[_QueuedMessage]:
+        """Reserva um lote de mensagens (pendente -> enviando) de forma atômica"""
+        now = get_current_time_for_db()
+        claim_token = uuid.uuid4().hex
+        query = db.session.query(OutboundEmail.id).filter(
+            OutboundEmail.status == OutboundEmail.STATUS_PENDING,
+            OutboundEmail.next_attempt_at <= now,
+        )
+        if message_ids is not None:
+            query = query.filter(OutboundEmail.id.in_(message_ids))
+        candidate_ids = [
+            row_id for (row_id,) in
+            query.order_by(OutboundEmail.next_attempt_at, OutboundEmail.id).limit(batch_size)
+        ]
+        if not candidate_ids:
+            return []
+
+        table = OutboundEmail.__table__
+        db.session.execute(
+            table.update()
+            .where(table.c.id.in_(candidate_ids), table.c.status == OutboundEmail.STATUS_PENDING)
+            .values(status=OutboundEmail.STATUS_SENDING, claimed_at=now, claim_token=claim_token)
+        )
+        db.session.commit()
+
+        # Apenas as linhas reservadas por esta execução (outro processo pode ter reservado parte)
+        rows = db.session.query(
+            OutboundEmail.id, OutboundEmail.recipients, OutboundEmail.subject,
+            OutboundEmail.html_body, OutboundEmail.text_body, OutboundEmail.sender,
+        ).filter(
+            OutboundEmail.claim_token == claim_token,
+            OutboundEmail.status == OutboundEmail.STATUS_SENDING,
+        ).order_by(OutboundEmail.id).all()
+
+        return [
+            _QueuedMessage(
+                id=r.id,
+                recipients=tuple(a.strip() for a in r.recipients.split(",") if a.strip()),
+                subject=r.subject, html_body=r.html_body, text_body=r.text_body, sender=r.sender,
+            )
+            for r in rows
+        ]
+
+    @staticmethod
+    def _record_outcomes(outcomes: Iterable[Tuple[int, Optional[str]]]) -> Tuple[int, int, int]:
+        now = get_current_time_for_db()
+        table = OutboundEmail.__table__
+        errors = {}
+        sent_ids = []
+        for message_id, error in outcomes:
+            if error is None:
+                sent_ids.append(message_id)
+            else:
+                errors[message_id] = error
+
+        if sent_ids:
+            db.session.execute(
+                table.update().where(table.c.id.in_(sent_ids)).values(
+                    status=OutboundEmail.STATUS_SENT, sent_at=now,
+                    attempts=table.c.attempts + 1, last_error=None,
+                )
+            )
+
+        retried = failed = 0
+        if errors:
+            for message in OutboundEmail.query.filter(OutboundEmail.id.in_(list(errors))):
+                message.attempts += 1
+                message.last_error = errors[message.id][:2000]
+                message.claimed_at = None
+                message.claim_token = None
+                if message.attempts >= message.max_attempts:
+                    message.status = OutboundEmail.STATUS_FAILED
+                    failed += 1
+                else:
+                    message.status = OutboundEmail.STATUS_PENDING
+                    message.next_attempt_at = now + MailQueueService.retry_delay(message.attempts)
+                    retried += 1
+
+        db.session.commit()
+        return len(sent_ids), retried, failed
+
+    @staticmethod
+    def _release_stale_claims() -> None:
+        limit = get_current_time_for_db() - timedelta(minutes=STALE_CLAIM_MINUTES)
+        table = OutboundEmail.__table__
+        db.session.execute(
+            table.update().where(
+                table.c.status == OutboundEmail.STATUS_SENDING,
+                table.c.claimed_at < limit,
+            ).values(status=OutboundEmail.STATUS_PENDING, claimed_at=None, claim_token=None)
+        )
+        db.session.commit()
+
+
+def _send_chunk(app, messages: List[_QueuedMessage]) -> List[Tuple[int, Optional[str]]]:
+    """Envia as mensagens por uma única conexão SMTP; retorna (id, erro ou None)"""
+    outcomes = []
+    with app.app_context():
+        try:
+            with mail.connect() as connection:
+                for message in messages:
+                    try:
+                        connection.send(Message(
+                            subject=message.subject,
+                            recipients=list(message.recipients),
+                            html=message.html_body,
+                            body=message.text_body,
+                            sender=message.sender or None,
+                        ))
+                        outcomes.append((message.id, None))
+                    except Exception as e:
+                        outcomes.append((message.id, str(e)))
+        except Exception as e:
+            # Falha ao conectar (ou conexão perdida): mensagens restantes voltam para a fila
+            done = {message_id for message_id, _error in outcomes}
+            outcomes.extend((m.id, f"Falha na conexão SMTP: {e}") for m in messages if m.id not in done)
+    return outcomes
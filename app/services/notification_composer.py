@@ -0,0 +1,226 @@
+"""
+Composição de emails de notificação com renderização compartilhada
+
+Em um fan-out (o mesmo alerta para todos os usuários de TI, por exemplo) o
+template é renderizado uma única vez com um marcador no lugar do destinatário;
+para cada destinatário só os campos marcados (``{{ ti_user.username }}``) são
+substituídos, sem passar pelo Jinja de novo. Só atributos de primeiro nível
+são suportados: se o template usar o destinatário em condições, comparações,
+filtros, atributos aninhados (``ti_user.sector.name``) ou chamadas de método,
+ou se a renderização compartilhada falhar, cada destinatário é renderizado
+individualmente. Os templates compilados ficam em
+cache enquanto o recarregamento automático de templates estiver desligado.
+"""
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from markupsafe import escape
+
+from .mail_queue_service import MailQueueService
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = '\x00rcpt:{}\x00'
+_TOKEN_RE = re.compile('\x00rcpt:([^\x00]*)\x00')
+
+# (id do ambiente Jinja, nome do template) -> Template compilado
+_template_cache: Dict[Tuple[int, str], object] = {}
+
+
+class _RecipientField(str):
+    """
+    Marcador de um campo; avaliá-lo em condição ou comparação, acessar um
+    atributo aninhado ou chamá-lo invalida o render compartilhado
+    """
+
+    def __new__(cls, placeholder, name):
+        field = super().__new__(cls, _TOKEN.format(name))
+        field.placeholder = placeholder
+        return field
+
+    def _depends_on_value(self):
+        self.placeholder.used_in_logic = True
+
+    def __bool__(self):
+        self._depends_on_value()
+        return True
+
+    def __len__(self):
+        self._depends_on_value()
+        return super().__len__()
+
+    def __eq__(self, other):
+        self._depends_on_value()
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        self._depends_on_value()
+        return super().__ne__(other)
+
+    def __lt__(self, other):
+        self._depends_on_value()
+        return super().__lt__(other)
+
+    def __gt__(self, other):
+        self._depends_on_value()
+        return super().__gt__(other)
+
+    def __contains__(self, item):
+        self._depends_on_value()
+        return super().__contains__(item)
+
+    def __getattr__(self, name):
+        # Atributo aninhado (ex.: sector.name): o valor depende do destinatário.
+        # Atributos internos (consultados pelo Jinja/markupsafe) não existem.
+        if name.startswith('_') or name.startswith('jinja_'):
+            raise AttributeError(name)
+        self._depends_on_value()
+        return self
+
+    def __getitem__(self, key):
+        self._depends_on_value()
+        return self
+
+    def __call__(self, *args, **kwargs):
+        self._depends_on_value()
+        return self
+
+    __hash__ = str.__hash__
+
+
+class _RecipientPlaceholder:
+    """Substitui o destinatário no contexto: cada atributo lido vira um marcador"""
+
+    def __init__(self):
+        self.used_in_logic = False
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _RecipientField(self, name)
+
+    def __bool__(self):
+        self.used_in_logic = True
+        return True
+
+    def __str__(self):
+        return _TOKEN.format('')
+
+
+class SharedRender:
+    """Corpo renderizado uma vez, com os campos do destinatário a preencher"""
+
+    def __init__(self, parts: List[str], autoescape: bool):
+        # parts alterna texto fixo e nome do campo: [texto, campo, texto, campo, texto]
+        self.parts = parts
+        self.autoescape = autoescape
+
+    @property
+    def fields(self) -> List[str]:
+        return self.parts[1::2]
+
+    def for_recipient(self, recipient) -> str:
+        """Monta o corpo final de um destinatário"""
+        output = []
+        for index, part in enumerate(self.parts):
+            if index % 2 == 0:
+                output.append(part)
+                continue
+            value = getattr(recipient, part) if part else recipient
+            value = '' if value is None else value
+            output.append(str(escape(value)) if self.autoescape else str(value))
+        return ''.join(output)
+
+
+class NotificationComposer:
+    """Renderização de templates de email com cache e fan-out"""
+
+    @staticmethod
+    def get_template(template_name: str):
+        """Template compilado (cache próprio quando o auto-reload está desligado)"""
+        env = current_app.jinja_env
+        if env.auto_reload:
+            return env.get_template(template_name)
+        key = (id(env), template_name)
+        template = _template_cache.get(key)
+        if template is None:
+            template = env.get_template(template_name)
+            _template_cache[key] = template
+        return template
+
+    @staticmethod
+    def render(template_name: str, **context) -> str:
+        """Renderiza um template com os context processors da aplicação"""
+        current_app.update_template_context(context)
+        return NotificationComposer.get_template(template_name).render(context)
+
+    @staticmethod
+    def render_shared(template_name: str, recipient_var: str, **context) -> Optional[SharedRender]:
+        """
+        Renderiza o template uma vez com o destinatário como marcador
+
+        Args:
+            template_name: Template de email
+            recipient_var: Nome da variável do destinatário no template (ex.: 'ti_user')
+            **context: Contexto compartilhado por todos os destinatários
+
+        Returns:
+            SharedRender, ou None se o template usar o destinatário de forma que
+            não permite substituição (filtros, condições, comparações) — nesse
+            caso cada destinatário deve ser renderizado individualmente
+        """
+        placeholder = _RecipientPlaceholder()
+        context[recipient_var] = placeholder
+        try:
+            rendered = NotificationComposer.render(template_name, **context)
+        except Exception as e:
+            logger.debug(f"Render compartilhado de {template_name} indisponível: {str(e)}")
+            return None
+        if placeholder.used_in_logic:
+            return None
+        parts = _TOKEN_RE.split(rendered)
+        if any('\x00' in part for part in parts[::2]):
+            return None
+        return SharedRender(parts, current_app.select_jinja_autoescape(template_name))
+
+    @staticmethod
+    def fan_out(recipients: Iterable, subject: str, template_name: str, recipient_var: str,
+                commit: bool = True, **context) -> int:
+        """
+        Enfileira o mesmo email para vários destinatários com uma única renderização
+
+        Args:
+            recipients: Objetos com ``email`` (ex.: usuários)
+            subject: Assunto comum
+            template_name: Template de email
+            recipient_var: Nome da variável do destinatário no template
+            commit: Se False, as mensagens são gravadas no commit do chamador
+            **context: Contexto compartilhado
+
+        Returns:
+            Quantidade de emails enfileirados
+        """
+        recipients = [r for r in recipients if getattr(r, 'email', None) and '@' in r.email]
+        if not recipients:
+            return 0
+
+        shared = NotificationComposer.render_shared(template_name, recipient_var, **dict(context))
+        for recipient in recipients:
+            html = None
+            if shared is not None:
+                try:
+                    html = shared.for_recipient(recipient)
+                except AttributeError:
+                    html = None  # Destinatário sem o campo: renderização própria
+            if html is None:
+                html = NotificationComposer.render(template_name, **{**context, recipient_var: recipient})
+            MailQueueService.enqueue(
+                [recipient.email], subject, html_body=html, category=template_name, commit=False
+            )
+
+        if commit:
+            from ..models import db
+            db.session.commit()
+        return len(recipients)
@@ -5,23 +5,29 @@ Gerencia notificações automáticas, alertas e comunicações
 
 import os
 from datetime import datetime, timedelta
-from flask import current_app, render_template
-from flask_mail import Message
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
-from .. import mail
-from ..models import (Task, Reminder, EquipmentRequest, User, NotificationSettings,
+from ..models import (Task, Reminder, EquipmentRequest, NotificationSettings,
                       TaskSlaConfig, db)
 from ..utils.timezone_utils import get_current_time_for_db
+from .mail_queue_service import MailQueueService
+from .notification_composer import NotificationComposer
+from .recipient_resolver import RecipientResolver, notification_settings_payload
+from .reminder_alert_planner import ReminderAlertPlanner
 
 
 class NotificationService:
     """Serviço centralizado para gerenciar notificações"""
 
     @staticmethod
-    def send_email_notification(recipient_email, subject, template, **context):
+    def send_email_notification(recipient_email, subject, template, commit=True, **context):
         """
-        Envia notificação por email
+        Enfileira notificação por email e tenta o envio imediato após o commit
         Funciona tanto em contexto de requisição quanto em tarefas agendadas
+        Com commit=False a mensagem é gravada no commit do job chamador e enviada
+        em lote pelo MailQueueService
         """
         try:
             # Validar email
@@ -29,55 +35,40 @@ class NotificationService:
                 current_app.logger.warning(f"Email inválido para notificação: {recipient_email}")
                 return False
             
-            # render_template requer um contexto de aplicação ativo
+            # A renderização requer um contexto de aplicação ativo
             # Se estamos em uma tarefa agendada, current_app já está disponível
-            html_content = render_template(template, **context)
+            html_content = NotificationComposer.render(template, **context)
             
-            msg = Message(
-                subject=subject,
-                recipients=[recipient_email],
-                html=html_content
+            MailQueueService.enqueue(
+                [recipient_email], subject, html_body=html_content, category=template,
+                commit=commit, immediate=commit
             )
-            mail.send(msg)
-            current_app.logger.debug(f"Email enviado para {recipient_email}: {subject}")
+            current_app.logger.debug(f"Email enfileirado para {recipient_email}: {subject}")
             return True
             
         except Exception as e:
-            current_app.logger.error(f"Erro ao enviar email para {recipient_email}: {str(e)}")
+            current_app.logger.error(f"Erro ao enfileirar email para {recipient_email}: {str(e)}")
             return False
 
+    @staticmethod
+    def send_email_fan_out(recipients, subject, template, recipient_var, commit=True, **context):
+        """
+        Enfileira o mesmo email para vários destinatários renderizando o template uma vez
+        O destinatário fica disponível no template como ``recipient_var``
+        """
+        try:
+            return NotificationComposer.fan_out(
+                recipients, subject, template, recipient_var, commit=commit, **context
+            )
+        except Exception as e:
+            current_app.logger.error(f"Erro ao enfileirar {template} para {len(recipients)} destinatários: {str(e)}")
+            return 0
+
     @staticmethod
     def get_user_notification_settings(user_id, notification_type):
         """Obtém configurações de notificação do usuário"""
         settings = NotificationSettings.query.filter_by(user_id=user_id).first()
-
-        if not settings:
-            # Configurações padrão
-            return {
-                'enabled': True,
-                'advance_hours': 24,
-                'email_enabled': True,
-                'browser_enabled': True
-            }
-
-        # Configurações baseadas no tipo de notificação
-        if 'reminder' in notification_type:
-            email_enabled = settings.email_reminders
-        elif 'task' in notification_type:
-            email_enabled = settings.email_tasks
-        elif 'chamado' in notification_type:
-            email_enabled = settings.email_chamados
-        elif 'equipment' in notification_type:
-            email_enabled = settings.email_equipment
-        else:
-            email_enabled = True
-
-        return {
-            'enabled': True,
-            'advance_hours': 24,
-            'email_enabled': email_enabled,
-            'browser_enabled': True
-        }
+        return notification_settings_payload(settings, notification_type)
 
     @staticmethod
     def check_task_notifications():
@@ -86,7 +77,9 @@ class NotificationService:
         notifications_sent = 0
 
         # Buscar tarefas não concluídas
-        tasks = Task.query.filter_by(completed=False).all()
+        tasks = Task.query.options(joinedload(Task.user)).filter_by(completed=False).all()
+        resolver = RecipientResolver()
+        resolver.preload_settings(task.user_id for task in tasks)
 
         for task in tasks:
             if not task.date:
@@ -101,7 +94,7 @@ class NotificationService:
                 current_time < task_datetime):
 
                 # Enviar notificações para usuários relacionados
-                NotificationService._notify_task_due(task)
+                NotificationService._notify_task_due(task, resolver)
                 notifications_sent += 1
 
         db.session.commit()
@@ -114,18 +107,20 @@ class NotificationService:
         alerts_sent = 0
 
         # Equipamentos entregues com data de devolução
-        equipments = EquipmentRequest.query.filter(
+        equipments = EquipmentRequest.query.options(joinedload(EquipmentRequest.requester)).filter(
             EquipmentRequest.status == "Entregue",
             EquipmentRequest.return_date.isnot(None),
             EquipmentRequest.return_alert_sent == False
         ).all()
+        resolver = RecipientResolver()
+        resolver.preload_settings(equipment.requester_id for equipment in equipments)
 
         for equipment in equipments:
             return_datetime = datetime.combine(equipment.return_date, datetime.strptime("00:00:00", "%H:%M:%S").time())
             alert_time = return_datetime - timedelta(days=1)  # Alerta 1 dia antes
 
             if current_time >= alert_time and current_time < return_datetime:
-                NotificationService._notify_equipment_return_due(equipment)
+                NotificationService._notify_equipment_return_due(equipment, resolver)
                 equipment.return_alert_sent = True
                 alerts_sent += 1
 
@@ -145,19 +140,20 @@ class NotificationService:
             Reminder.due_date < current_time.date() - timedelta(days=7),
             Reminder.escalation_level < 3  # Máximo 3 níveis de escalação
         ).all()
+        resolver = RecipientResolver()
 
         for reminder in overdue_reminders:
             days_overdue = (current_time.date() - reminder.due_date).days
 
             # Escalar baseado no tempo de atraso
             if days_overdue >= 14 and reminder.escalation_level < 2:
-                NotificationService._escalate_reminder(reminder, 2)
+                NotificationService._escalate_reminder(reminder, 2, resolver)
                 reminder.escalation_level = 2
                 reminder.last_escalation = current_time
                 escalations_done += 1
 
             elif days_overdue >= 7 and reminder.escalation_level < 1:
-                NotificationService._escalate_reminder(reminder, 1)
+                NotificationService._escalate_reminder(reminder, 1, resolver)
                 reminder.escalation_level = 1
                 reminder.last_escalation = current_time
                 escalations_done += 1
@@ -166,101 +162,90 @@ class NotificationService:
         return escalations_done
 
     @staticmethod
-    def _notify_task_due(task):
+    def _notify_task_due(task, resolver=None):
         """Notifica sobre tarefa próxima do vencimento"""
+        resolver = resolver or RecipientResolver()
+
         # Notificar responsável da tarefa
         if task.user and task.user.email:
-            settings = NotificationService.get_user_notification_settings(
-                task.user.id, 'task_reminder'
-            )
+            settings = resolver.settings_for(task.user.id, 'task_reminder')
 
             if settings['email_enabled']:
                 NotificationService.send_email_notification(
                     task.user.email,
                     f"Tarefa próxima do vencimento: {task.description[:50]}",
                     "emails/task_due.html",
+                    commit=False,
                     task=task,
                     user=task.user
                 )
 
         # Notificar administradores
-        admins = User.query.filter_by(is_admin=True, ativo=True).all()
-        for admin in admins:
-            settings = NotificationService.get_user_notification_settings(
-                admin.id, 'task_reminder'
-            )
-
-            if settings['email_enabled']:
-                NotificationService.send_email_notification(
-                    admin.email,
-                    f"[ADMIN] Tarefa próxima do vencimento: {task.description[:50]}",
-                    "emails/task_due_admin.html",
-                    task=task,
-                    admin=admin
-                )
+        admins = resolver.with_email_enabled(resolver.admins(), 'task_reminder')
+        NotificationService.send_email_fan_out(
+            admins,
+            f"[ADMIN] Tarefa próxima do vencimento: {task.description[:50]}",
+            "emails/task_due_admin.html",
+            "admin",
+            commit=False,
+            task=task
+        )
 
     @staticmethod
-    def _notify_task_sla_warning(task):
+    def _notify_task_sla_warning(task, resolver=None):
         """Notifica sobre SLA crítico de tarefa"""
+        resolver = resolver or RecipientResolver()
+
         # Notificar responsável e administradores
         recipients = []
 
         if task.user:
             recipients.append(task.user)
 
-        admins = User.query.filter_by(is_admin=True, ativo=True).all()
-        recipients.extend(admins)
+        recipients.extend(resolver.admins())
 
-        for user in recipients:
-            settings = NotificationService.get_user_notification_settings(
-                user.id, 'task_reminder'
-            )
-
-            if settings['email_enabled']:
-                NotificationService.send_email_notification(
-                    user.email,
-                    f"[URGENTE] SLA crítico - Tarefa: {task.description[:50]}",
-                    "emails/task_sla_warning.html",
-                    task=task,
-                    user=user
-                )
+        recipients = resolver.with_email_enabled(recipients, 'task_reminder')
+        NotificationService.send_email_fan_out(
+            recipients,
+            f"[URGENTE] SLA crítico - Tarefa: {task.description[:50]}",
+            "emails/task_sla_warning.html",
+            "user",
+            commit=False,
+            task=task
+        )
 
     @staticmethod
-    def _notify_equipment_return_due(equipment):
+    def _notify_equipment_return_due(equipment, resolver=None):
         """Notifica sobre equipamento próximo da devolução"""
+        resolver = resolver or RecipientResolver()
+
         # Notificar solicitante
         if equipment.requester and equipment.requester.email:
-            settings = NotificationService.get_user_notification_settings(
-                equipment.requester.id, 'equipment_return'
-            )
+            settings = resolver.settings_for(equipment.requester.id, 'equipment_return')
 
             if settings['email_enabled']:
                 NotificationService.send_email_notification(
                     equipment.requester.email,
                     f"Equipamento próximo da devolução: {equipment.description[:50]}",
                     "emails/equipment_return_due.html",
+                    commit=False,
                     equipment=equipment,
                     user=equipment.requester
                 )
 
         # Notificar TI
-        ti_users = User.query.filter_by(is_ti=True, ativo=True).all()
-        for ti_user in ti_users:
-            settings = NotificationService.get_user_notification_settings(
-                ti_user.id, 'equipment_return'
-            )
-
-            if settings['email_enabled']:
-                NotificationService.send_email_notification(
-                    ti_user.email,
-                    f"[TI] Equipamento próximo da devolução: {equipment.description[:50]}",
-                    "emails/equipment_return_due_ti.html",
-                    equipment=equipment,
-                    ti_user=ti_user
-                )
+        ti_users = resolver.with_email_enabled(resolver.ti_users(active_only=True), 'equipment_return')
+        NotificationService.send_email_fan_out(
+            ti_users,
+            f"[TI] Equipamento próximo da devolução: {equipment.description[:50]}",
+            "emails/equipment_return_due_ti.html",
+            "ti_user",
+            commit=False,
+            equipment=equipment
+        )
 
     @staticmethod
-    def _escalate_reminder(reminder, level):
+    def _escalate_reminder(reminder, level, resolver=None):
         """Escala lembrete para nível superior"""
         escalation_targets = {
             1: "Supervisor TI",
@@ -271,23 +256,18 @@ class NotificationService:
         target = escalation_targets.get(level, "Administração")
 
         # Encontrar usuários para escalação (lógica simplificada)
-        escalation_users = User.query.filter_by(is_admin=True, ativo=True).all()
-
-        for user in escalation_users:
-            settings = NotificationService.get_user_notification_settings(
-                user.id, 'reminder_escalation'
-            )
-
-            if settings['email_enabled']:
-                NotificationService.send_email_notification(
-                    user.email,
-                    f"[ESCALAÇÃO NÍVEL {level}] Lembrete atrasado: {reminder.name}",
-                    "emails/reminder_escalation.html",
-                    reminder=reminder,
-                    user=user,
-                    level=level,
-                    target=target
-                )
+        resolver = resolver or RecipientResolver()
+        escalation_users = resolver.with_email_enabled(resolver.admins(), 'reminder_escalation')
+        NotificationService.send_email_fan_out(
+            escalation_users,
+            f"[ESCALAÇÃO NÍVEL {level}] Lembrete atrasado: {reminder.name}",
+            "emails/reminder_escalation.html",
+            "user",
+            commit=False,
+            reminder=reminder,
+            level=level,
+            target=target
+        )
 
         reminder.escalated_to = target
 
@@ -320,88 +300,64 @@ class NotificationService:
     def check_upcoming_reminders():
         """
         Verifica lembretes que estão próximos do vencimento
-        Envia notificações preventivas em intervalos configuráveis
+        Envia notificações preventivas em intervalos configuráveis (NOTIFICATION_HORIZONS);
+        avisos já enviados ficam em reminder_alert_log e não são repetidos
         """
-        from datetime import date, timedelta
-        
-        current_time = get_current_time_for_db()
-        today = current_time.date()
         notifications_sent = 0
-        
-        # Definir intervalos de notificação (em dias antes do vencimento)
-        notification_intervals = [90, 60, 30, 15, 7, 3, 1]
-        
-        for days_before in notification_intervals:
-            target_date = today + timedelta(days=days_before)
-            
-            # Buscar lembretes ativos que vencem na data alvo e ainda não foram notificados
-            upcoming_reminders = Reminder.query.filter(
-                Reminder.status == 'ativo',
-                Reminder.completed == False,
-                Reminder.due_date == target_date,
-                # Evitar notificar lembretes que já foram escalados recentemente
-                db.or_(
-                    Reminder.last_escalation.is_(None),
-                    Reminder.last_escalation < current_time - timedelta(hours=24)
-                )
-            ).all()
-            
-            for reminder in upcoming_reminders:
-                try:
-                    # Determinar urgência baseado no tempo restante
-                    if days_before <= 3:
-                        urgency = "CRÍTICO"
-                        priority_label = "danger"
-                    elif days_before <= 7:
-                        urgency = "URGENTE"
-                        priority_label = "warning"
-                    elif days_before <= 15:
-                        urgency = "IMPORTANTE"
-                        priority_label = "info"
-                    else:
-                        urgency = "Atenção"
-                        priority_label = "primary"
-                    
+        resolver = RecipientResolver()
+
+        for alert in ReminderAlertPlanner.pending_alerts():
+            reminder = alert.reminder
+            days_before = alert.horizon_days
+            urgency, priority_label = alert.urgency
+            sent = 0
+            try:
+                # Savepoint por aviso: uma falha descarta os e-mails já enfileirados
+                # deste aviso junto com o registro em reminder_alert_log
+                with db.session.begin_nested():
                     # Notificar responsável
                     if reminder.user and reminder.user.email:
                         NotificationService.send_email_notification(
                             reminder.user.email,
                             f"[{urgency}] Lembrete vence em {days_before} dias: {reminder.name}",
                             "emails/reminder_upcoming.html",
+                            commit=False,
                             reminder=reminder,
                             user=reminder.user,
                             days_remaining=days_before,
                             urgency=urgency,
                             priority_label=priority_label
                         )
-                        notifications_sent += 1
-                    
+                        sent += 1
+
                     # Para lembretes críticos (alta prioridade), notificar também os admins
                     if reminder.priority in ['alta', 'critica'] and days_before <= 15:
-                        admins = User.query.filter_by(is_admin=True, ativo=True).all()
-                        for admin in admins:
-                            settings = NotificationService.get_user_notification_settings(
-                                admin.id, 'reminder_upcoming'
-                            )
-                            
-                            if settings.get('email_enabled', True):
-                                NotificationService.send_email_notification(
-                                    admin.email,
-                                    f"[ADMIN - {urgency}] Lembrete crítico em {days_before} dias: {reminder.name}",
-                                    "emails/reminder_upcoming_admin.html",
-                                    reminder=reminder,
-                                    admin=admin,
-                                    days_remaining=days_before,
-                                    urgency=urgency,
-                                    priority_label=priority_label
-                                )
-                    
-                    # Notificação enviada para lembrete
-                    
-                except Exception as e:
-                    current_app.logger.error(f"Erro ao notificar lembrete {reminder.id}")
-                    continue
-        
+                        admins = resolver.with_email_enabled(resolver.admins(), 'reminder_upcoming')
+                        NotificationService.send_email_fan_out(
+                            admins,
+                            f"[ADMIN - {urgency}] Lembrete crítico em {days_before} dias: {reminder.name}",
+                            "emails/reminder_upcoming_admin.html",
+                            "admin",
+                            commit=False,
+                            reminder=reminder,
+                            days_remaining=days_before,
+                            urgency=urgency,
+                            priority_label=priority_label
+                        )
+
+                    ReminderAlertPlanner.record(alert)
+                notifications_sent += sent
+            except Exception as e:
+                current_app.logger.error(f"Erro ao notificar lembrete {reminder.id}: {str(e)}")
+                continue
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Outra execução registrou os mesmos avisos ao mesmo tempo
+            db.session.rollback()
+            current_app.logger.warning("Avisos de lembretes já registrados por outra execução")
+            return 0
         return notifications_sent
 
     @staticmethod
@@ -299,102 +299,49 @@ class PerformanceService:
     @staticmethod
     def create_database_indexes():
         """
-        Cria índices otimizados para melhor performance (SQLite)
+        Cria os índices declarados nos modelos que ainda não existem no banco
+
+        Os índices das consultas frequentes ficam em ``__table_args__`` dos
+        modelos (e na migration correspondente); aqui apenas garantimos que
+        todos existam, sem SQL específico de banco.
         """
         from ..models import db
-        from sqlalchemy import text
+        from sqlalchemy import inspect as sa_inspect
 
+        bind = db.engine
+        database_type = bind.dialect.name
         try:
+            inspector = sa_inspect(bind)
+            existing_tables = set(inspector.get_table_names())
             indexes_created = []
 
-            # Verificar se tabelas existem antes de criar índices
-            tables_check_query = text("SELECT name FROM sqlite_master WHERE type='table'")
-            result = db.session.execute(tables_check_query)
-            existing_tables = [row.name for row in result]
-
-            # Índice para chamados (se tabela existir)
-            if 'chamado' in existing_tables:
-                try:
-                    db.session.execute(text("""
-                        CREATE INDEX IF NOT EXISTS idx_chamado_status_data 
-                        ON chamado (status, data_abertura DESC)
-                    """))
-                    indexes_created.append("idx_chamado_status_data")
-                except Exception as e:
-                    logger.warning(f"Erro ao criar índice chamado: {str(e)}")
-
-            # Índice para lembretes (se tabela existir)
-            if 'reminder' in existing_tables:
-                try:
-                    db.session.execute(text("""
-                        CREATE INDEX IF NOT EXISTS idx_reminder_due_date_status 
-                        ON reminder (due_date, status, user_id)
-                    """))
-                    indexes_created.append("idx_reminder_due_date_status")
-                except Exception as e:
-                    logger.warning(f"Erro ao criar índice reminder: {str(e)}")
-
-            # Índice para tarefas (se tabela existir)
-            if 'task' in existing_tables:
-                try:
-                    db.session.execute(text("""
-                        CREATE INDEX IF NOT EXISTS idx_task_date_completed 
-                        ON task (date DESC, completed, user_id)
-                    """))
-                    indexes_created.append("idx_task_date_completed")
-                except Exception as e:
-                    logger.warning(f"Erro ao criar índice task: {str(e)}")
-
-            # Índice para equipamentos (se tabela existir)
-            if 'equipment_request' in existing_tables:
-                try:
-                    db.session.execute(text("""
-                        CREATE INDEX IF NOT EXISTS idx_equipment_rfid 
-                        ON equipment_request (rfid_tag, rfid_status)
-                    """))
-                    indexes_created.append("idx_equipment_rfid")
-                except Exception as e:
-                    logger.warning(f"Erro ao criar índice equipment: {str(e)}")
-
-            # Índice para satisfação (se tabela existir)
-            if 'chamado' in existing_tables:
-                try:
-                    db.session.execute(text("""
-                        CREATE INDEX IF NOT EXISTS idx_chamado_satisfaction 
-                        ON chamado (satisfaction_rating, satisfaction_date DESC)
-                    """))
-                    indexes_created.append("idx_chamado_satisfaction")
-                except Exception as e:
-                    logger.warning(f"Erro ao criar índice satisfação: {str(e)}")
-
-            # Índices para usuário (se tabela existir)
-            if 'user' in existing_tables:
-                try:
-                    db.session.execute(text("""
-                        CREATE INDEX IF NOT EXISTS idx_user_email 
-                        ON user (email)
-                    """))
-                    indexes_created.append("idx_user_email")
-                except Exception as e:
-                    logger.warning(f"Erro ao criar índice user email: {str(e)}")
-
-            db.session.commit()
+            for table in db.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+                existing = {idx['name'] for idx in inspector.get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name in existing:
+                        continue
+                    try:
+                        index.create(bind, checkfirst=True)
+                        indexes_created.append(index.name)
+                    except Exception as e:
+                        logger.warning(f"Erro ao criar índice {index.name}: {str(e)}")
 
-            logger.info(f"Índices SQLite criados: {', '.join(indexes_created)}")
+            logger.info(f"Índices criados: {', '.join(indexes_created) or 'nenhum'}")
             return {
                 "success": True,
                 "indexes_created": indexes_created,
                 "count": len(indexes_created),
-                "database_type": "SQLite"
+                "database_type": database_type
             }
 
         except Exception as e:
-            logger.error(f"Erro ao criar índices SQLite: {str(e)}")
-            db.session.rollback()
+            logger.error(f"Erro ao criar índices: {str(e)}")
             return {
                 "success": False,
                 "error": str(e),
-                "database_type": "SQLite"
+                "database_type": database_type
             }
 
     @staticmethod
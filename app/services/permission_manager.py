@@ -1,12 +1,70 @@
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
-from flask import session
+from flask import g, has_request_context, session
+from sqlalchemy import or_
 
-from ..models import User, Reminder
+from ..models import Chamado, User, db
+
+
+@dataclass(frozen=True)
+class PermissionScope:
+    """Escopo de permissão do usuário atual, resolvido uma vez por requisição"""
+    user_id: Optional[int]
+    is_admin: bool = False
+    is_ti: bool = False
+    sector_id: Optional[int] = None
+
+    @property
+    def can_view_all(self) -> bool:
+        return self.is_admin or self.is_ti
+
+    def chamado_criterion(self):
+        """Critério SQL: chamados abertos pelo usuário ou do seu setor"""
+        return or_(Chamado.solicitante_id == self.user_id, Chamado.setor_id == self.sector_id)
+
+    def can_access_chamado(self, solicitante_id: Optional[int], setor_id: Optional[int]) -> bool:
+        """Verifica em memória se o chamado é do usuário ou do seu setor"""
+        return solicitante_id == self.user_id or bool(self.sector_id and setor_id == self.sector_id)
 
 
 class PermissionManager:
     """Gerenciador centralizado de permissões do sistema"""
 
+    @staticmethod
+    def get_scope() -> PermissionScope:
+        """
+        Obtém o escopo de permissão do usuário da sessão
+
+        O setor vem de ``User.sector_id`` (o usuário normalmente já está no
+        identity map carregado pelo Flask-Login) e o escopo é memorizado em
+        ``flask.g`` durante a requisição.
+
+        Returns:
+            PermissionScope do usuário atual
+        """
+        if not has_request_context():
+            # Scheduler e threads de trabalho não têm sessão
+            return PermissionScope(user_id=None)
+        if 'permission_scope' in g:
+            return g.permission_scope
+
+        user_id = session.get('user_id')
+        scope = PermissionScope(
+            user_id=user_id,
+            is_admin=bool(session.get('is_admin', False)),
+            is_ti=bool(session.get('is_ti', False)),
+            sector_id=PermissionManager._load_user_sector(user_id),
+        )
+        g.permission_scope = scope
+        return scope
+
+    @staticmethod
+    def _load_user_sector(user_id: Optional[int]) -> Optional[int]:
+        if not user_id:
+            return None
+        user = db.session.get(User, user_id)
+        return user.sector_id if user else None
+
     @staticmethod
     def get_user_permissions() -> Dict[str, Any]:
         """
@@ -31,7 +89,7 @@ class PermissionManager:
     @staticmethod
     def get_user_sector(user_id: Optional[int] = None) -> Optional[int]:
         """
-        Obtém o setor do usuário baseado nos lembretes
+        Obtém o setor do usuário (``User.sector_id``)
 
         Args:
             user_id: ID do usuário (usa da sessão se não informado)
@@ -39,14 +97,9 @@ class PermissionManager:
         Returns:
             ID do setor ou None
         """
-        if not user_id:
-            user_id = session.get('user_id')
-
-        if not user_id:
-            return None
-
-        primeiro_lembrete = Reminder.query.filter_by(user_id=user_id).first()
-        return primeiro_lembrete.sector_id if primeiro_lembrete and primeiro_lembrete.sector_id else None
+        if has_request_context() and (not user_id or user_id == session.get('user_id')):
+            return PermissionManager.get_scope().sector_id
+        return PermissionManager._load_user_sector(user_id)
 
     @staticmethod
     def can_user_access_task(user_id: int, task_user_id: int) -> bool:
@@ -96,22 +149,16 @@ class PermissionManager:
         Returns:
             True se pode acessar
         """
-        permissions = PermissionManager.get_user_permissions()
+        scope = PermissionManager.get_scope()
 
         # Admin vê tudo
-        if permissions['is_admin']:
+        if scope.is_admin:
             return True
 
-        # TI vê chamados do seu setor também
-        if permissions['is_ti']:
-            user_sector = PermissionManager.get_user_sector(user_id)
-            return (chamado_solicitante_id == user_id or
-                   (user_sector and chamado_setor_id == user_sector))
-
-        # Usuário comum vê apenas os seus ou do seu setor
-        user_sector = PermissionManager.get_user_sector(user_id)
-        return (chamado_solicitante_id == user_id or
-               (user_sector and chamado_setor_id == user_sector))
+        # TI e usuário comum veem os seus ou do seu setor (sem query por chamado)
+        if user_id != scope.user_id:
+            scope = PermissionScope(user_id=user_id, sector_id=PermissionManager.get_user_sector(user_id))
+        return scope.can_access_chamado(chamado_solicitante_id, chamado_setor_id)
 
     @staticmethod
     def can_user_access_equipment(user_id: int, equipment_requester_id: int) -> bool:
@@ -286,8 +333,6 @@ class PermissionManager:
             # Para chamados, incluir do setor também
             user_sector = PermissionManager.get_user_sector(user_id)
             if user_sector:
-                from ..models import Chamado
-                from sqlalchemy import or_
                 return query.filter(
                     or_(
                         Chamado.solicitante_id == user_id,
@@ -0,0 +1,175 @@
+"""
+Verificação dos planos de execução das consultas mais frequentes
+
+Cada consulta registrada em ``_hot_queries`` reproduz o formato usado nas
+rotas/serviços (mesmos filtros e ordenação). ``QueryPlanService.check``
+executa ``EXPLAIN QUERY PLAN`` (SQLite) ou ``EXPLAIN (FORMAT JSON)``
+(PostgreSQL) e aponta as consultas que caem em varredura completa da tabela.
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import text
+
+from ..models import Chamado, EquipmentLoan, Reminder, Task, db
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """Consulta monitorada: nome, origem no código e construtor da query"""
+    name: str
+    source: str
+    build: Callable
+
+
+@dataclass
+class QueryPlanResult:
+    name: str
+    source: str
+    plan: List[str] = field(default_factory=list)
+    full_scans: List[str] = field(default_factory=list)
+    error: str = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.full_scans and not self.error
+
+
+def _hot_queries() -> List[HotQuery]:
+    today = date.today()
+    return [
+        HotQuery(
+            'chamados_por_status',
+            'AnalyticsService.get_dashboard_kpis / DashboardStatsEngine',
+            lambda: Chamado.query.filter(
+                Chamado.status.in_(['Aberto', 'Em Andamento']),
+                Chamado.data_abertura >= today - timedelta(days=30),
+            ),
+        ),
+        HotQuery(
+            'chamados_do_usuario_ou_setor',
+            'routes.index / listar_chamados',
+            lambda: Chamado.query.filter(
+                (Chamado.solicitante_id == 1) | (Chamado.setor_id == 1),
+            ).order_by(Chamado.data_abertura.desc()),
+        ),
+        HotQuery(
+            'tarefas_do_usuario',
+            'routes.index / DashboardService',
+            lambda: Task.query.filter(
+                Task.user_id == 1, Task.completed == False, Task.date <= today  # noqa: E712
+            ),
+        ),
+        HotQuery(
+            'lembretes_ativos_vencidos',
+            'NotificationService / ReminderService.get_reminder_stats',
+            lambda: Reminder.query.filter(
+                Reminder.status == 'ativo', Reminder.completed == False,  # noqa: E712
+                Reminder.due_date < today,
+            ),
+        ),
+        HotQuery(
+            'lembretes_do_usuario',
+            'routes.index',
+            lambda: Reminder.query.filter(Reminder.user_id == 1, Reminder.due_date <= today),
+        ),
+        HotQuery(
+            'emprestimos_em_atraso',
+            'EquipmentService.get_overdue_loans / send_return_reminders',
+            lambda: EquipmentLoan.query.filter(
+                EquipmentLoan.status == 'ativo', EquipmentLoan.expected_return_date < today
+            ),
+        ),
+    ]
+
+
+class QueryPlanService:
+    """Executa EXPLAIN nas consultas monitoradas e detecta varreduras completas"""
+
+    @staticmethod
+    def hot_queries() -> List[HotQuery]:
+        """Consultas monitoradas"""
+        return _hot_queries()
+
+    @staticmethod
+    def explain(query) -> List[str]:
+        """
+        Retorna o plano de execução da query no banco atual
+
+        Args:
+            query: Query ORM ou instrução SELECT
+
+        Returns:
+            Linhas do plano (texto)
+        """
+        statement = getattr(query, 'statement', query)
+        dialect = db.engine.dialect
+        sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+        if dialect.name == 'sqlite':
+            rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')).fetchall()
+            return [row[-1] for row in rows]
+
+        if dialect.name == 'postgresql':
+            # Em tabelas pequenas o PostgreSQL prefere Seq Scan mesmo com índice;
+            # desativar seqscan na transação revela se existe índice utilizável
+            db.session.execute(text('SET LOCAL enable_seqscan = off'))
+            try:
+                raw = db.session.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+            finally:
+                db.session.rollback()
+            plan = raw if isinstance(raw, list) else json.loads(raw)
+            return QueryPlanService._flatten_pg_plan(plan[0]['Plan'])
+
+        raise ValueError(f"EXPLAIN não suportado para o dialeto {dialect.name}")
+
+    @staticmethod
+    def full_scans(plan: List[str]) -> List[str]:
+        """Linhas do plano que representam varredura completa de tabela"""
+        scans = []
+        for line in plan:
+            upper = line.upper()
+            if upper.startswith('SCAN ') and 'USING' not in upper:
+                scans.append(line)
+            elif upper.startswith('SEQ SCAN'):
+                scans.append(line)
+        return scans
+
+    @staticmethod
+    def check() -> List[QueryPlanResult]:
+        """
+        Executa EXPLAIN em todas as consultas monitoradas
+
+        Returns:
+            Lista de QueryPlanResult (``ok`` False indica varredura completa ou erro)
+        """
+        results = []
+        for hot_query in QueryPlanService.hot_queries():
+            result = QueryPlanResult(name=hot_query.name, source=hot_query.source)
+            try:
+                result.plan = QueryPlanService.explain(hot_query.build())
+                result.full_scans = QueryPlanService.full_scans(result.plan)
+            except Exception as e:
+                logger.error(f"Erro ao analisar plano de '{hot_query.name}': {str(e)}")
+                result.error = str(e)
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _flatten_pg_plan(node: Dict, depth: int = 0) -> List[str]:
+        relation = node.get('Relation Name')
+        index = node.get('Index Name')
+        line = node['Node Type']
+        if relation:
+            line += f" on {relation}"
+        if index:
+            line += f" using {index}"
+        lines = [line]
+        for child in node.get('Plans', []):
+            lines.extend(QueryPlanService._flatten_pg_plan(child, depth + 1))
+        return lines
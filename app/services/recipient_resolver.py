@@ -0,0 +1,94 @@
+"""
+Resolução de destinatários para os jobs de notificação
+
+Os jobs do agendador notificam os mesmos grupos (TI, administradores) para
+cada item processado. O ``RecipientResolver`` carrega os grupos e as
+configurações de notificação uma vez por execução e responde a partir de um
+índice em memória, de forma que o número de consultas do job não depende da
+quantidade de itens.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import or_
+
+from ..models import NotificationSettings, User
+
+DEFAULT_SETTINGS = {
+    'enabled': True,
+    'advance_hours': 24,
+    'email_enabled': True,
+    'browser_enabled': True
+}
+
+
+def notification_settings_payload(settings: Optional[NotificationSettings], notification_type: str) -> Dict:
+    """Converte as configurações do usuário no formato usado pelas notificações"""
+    if settings is None:
+        return dict(DEFAULT_SETTINGS)
+
+    # Configurações baseadas no tipo de notificação
+    if 'reminder' in notification_type:
+        email_enabled = settings.email_reminders
+    elif 'task' in notification_type:
+        email_enabled = settings.email_tasks
+    elif 'chamado' in notification_type:
+        email_enabled = settings.email_chamados
+    elif 'equipment' in notification_type:
+        email_enabled = settings.email_equipment
+    else:
+        email_enabled = True
+
+    return {
+        'enabled': True,
+        'advance_hours': 24,
+        'email_enabled': email_enabled,
+        'browser_enabled': True
+    }
+
+
+class RecipientResolver:
+    """Índice em memória dos grupos de destinatários de uma execução de job"""
+
+    def __init__(self):
+        self._users: Optional[List[User]] = None
+        self._settings: Dict[int, Optional[NotificationSettings]] = {}
+
+    def ti_users(self, active_only: bool = False) -> List[User]:
+        """Usuários de TI (por padrão inclui inativos, como os alertas de equipamento)"""
+        return [u for u in self._load_users() if u.is_ti and (u.ativo or not active_only)]
+
+    def admins(self, active_only: bool = True) -> List[User]:
+        """Administradores ativos"""
+        return [u for u in self._load_users() if u.is_admin and (u.ativo or not active_only)]
+
+    def preload_settings(self, user_ids: Iterable[int]) -> None:
+        """Carrega em uma consulta as configurações dos usuários ainda não indexados"""
+        missing = {uid for uid in user_ids if uid is not None and uid not in self._settings}
+        if not missing:
+            return
+        for settings in NotificationSettings.query.filter(NotificationSettings.user_id.in_(missing)):
+            self._settings.setdefault(settings.user_id, settings)
+        for uid in missing:
+            self._settings.setdefault(uid, None)
+
+    def settings_for(self, user_id: int, notification_type: str) -> Dict:
+        """Configurações de notificação do usuário (mesmo formato de get_user_notification_settings)"""
+        if user_id not in self._settings:
+            self.preload_settings([user_id])
+        return notification_settings_payload(self._settings.get(user_id), notification_type)
+
+    def with_email_enabled(self, users: Iterable[User], notification_type: str,
+                           default: bool = True) -> List[User]:
+        """Filtra os usuários que aceitam email para o tipo de notificação"""
+        users = [u for u in users if u is not None]
+        self.preload_settings(u.id for u in users)
+        return [
+            u for u in users
+            if self.settings_for(u.id, notification_type).get('email_enabled', default)
+        ]
+
+    def _load_users(self) -> List[User]:
+        if self._users is None:
+            self._users = User.query.filter(or_(User.is_ti == True, User.is_admin == True)).all()
+            self.preload_settings(u.id for u in self._users)
+        return self._users
@@ -0,0 +1,243 @@
+"""
+Geração de recorrências de lembretes em lote
+
+Para cada lembrete recorrente vencido são calculadas de uma vez todas as
+ocorrências perdidas (até a primeira que vence hoje ou depois), com o mesmo
+resultado que execuções sucessivas do job teriam: cada ocorrência vira um
+lembrete, as já vencidas ficam marcadas como notificadas e cada ocorrência
+substituída ganha uma entrada de histórico ``recurring``. Os lembretes de
+origem são lidos em blocos por id e as inserções/atualizações são feitas com
+``insert().values`` / ``update`` em lote, com commit por bloco. Como essas
+instruções não passam pelos eventos do ORM, o cache de resultados (tag
+``reminder``) é invalidado após cada bloco confirmado.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import and_, insert, or_, select, update
+
+from ..models import Reminder, ReminderHistory, db
+from ..utils.timezone_utils import get_current_time_for_db
+from .cache_service import CacheService
+
+logger = logging.getLogger(__name__)
+
+RECURRENCE_CHUNK_SIZE = 1000
+
+# Frequência -> incremento entre ocorrências
+FREQUENCY_STEPS = {
+    'diario': relativedelta(days=1),
+    'quinzenal': relativedelta(days=15),
+    'mensal': relativedelta(months=1),
+    'anual': relativedelta(years=1),
+}
+
+# Campos copiados do lembrete de origem para as novas ocorrências
+COPIED_COLUMNS = (
+    'name', 'type', 'responsible', 'frequency', 'sector_id', 'user_id', 'status',
+    'pause_until', 'end_date', 'priority', 'notes', 'contract_number', 'cost',
+    'supplier', 'category',
+)
+
+HISTORY_NOTE = "Recorrência automática - próxima data será calculada"
+
+
+@dataclass
+class RecurrencePlan:
+    """Ocorrências a criar para um lembrete de origem"""
+    due_dates: List[date] = field(default_factory=list)
+    # True se a série terminou (end_date) antes de alcançar hoje
+    ended: bool = False
+
+
+class RecurrenceEngine:
+    """Cálculo e gravação em lote das ocorrências de lembretes recorrentes"""
+
+    @staticmethod
+    def plan(due_date: date, frequency: str, today: date,
+             end_date: Optional[date] = None) -> Optional[RecurrencePlan]:
+        """
+        Ocorrências perdidas de um lembrete vencido
+
+        Cada data é calculada a partir da ocorrência anterior, como nas
+        execuções sucessivas do job: o ajuste de fim de mês se acumula
+        (31/07 mensal gera 31/08, 30/09 e 30/10).
+
+        Returns:
+            RecurrencePlan, ou None se a frequência for inválida
+        """
+        step = FREQUENCY_STEPS.get(frequency)
+        if step is None:
+            return None
+
+        plan = RecurrencePlan()
+        next_due = due_date
+        while True:
+            next_due = next_due + step
+            if end_date and next_due > end_date:
+                plan.ended = True
+                return plan
+            plan.due_dates.append(next_due)
+            if next_due >= today:
+                return plan
+
+    @staticmethod
+    def run(today: Optional[date] = None, chunk_size: int = RECURRENCE_CHUNK_SIZE) -> Dict:
+        """
+        Processa todos os lembretes recorrentes vencidos
+
+        Returns:
+            Métricas: lembretes processados, ocorrências criadas, séries
+            encerradas, blocos, tempo e throughput
+        """
+        today = today or date.today()
+        started = time.perf_counter()
+        result = {'processed': 0, 'created': 0, 'closed': 0, 'skipped': 0, 'chunks': 0}
+
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                RecurrenceEngine._candidates(today)
+                .where(Reminder.id > last_id)
+                .order_by(Reminder.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            chunk_result = {'processed': 0, 'created': 0, 'closed': 0, 'skipped': 0}
+            try:
+                RecurrenceEngine._process_chunk(rows, today, chunk_result)
+                db.session.commit()
+                CacheService.invalidate('reminder')
+                for key, value in chunk_result.items():
+                    result[key] += value
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"[RecurrenceEngine] Erro no bloco até o lembrete {last_id}: {str(e)}")
+            result['chunks'] += 1
+
+        elapsed = time.perf_counter() - started
+        result.update(
+            elapsed_seconds=round(elapsed, 3),
+            throughput_per_second=round(result['processed'] / elapsed, 1) if elapsed > 0 else 0.0,
+            timestamp=get_current_time_for_db(),
+        )
+        logger.info(
+            f"[RecurrenceEngine] {result['processed']} lembretes, {result['created']} ocorrências "
+            f"criadas em {result['elapsed_seconds']}s ({result['throughput_per_second']} lembretes/s)"
+        )
+        return result
+
+    @staticmethod
+    def _candidates(today: date):
+        """Lembretes recorrentes vencidos ainda não processados (apenas colunas)"""
+        return select(
+            Reminder.id, Reminder.due_date, Reminder.completed,
+            *[getattr(Reminder, column) for column in COPIED_COLUMNS]
+        ).where(
+            and_(
+                Reminder.due_date < today,
+                Reminder.notified == False,
+                Reminder.frequency.isnot(None),
+                Reminder.frequency != '',
+                Reminder.status == 'ativo',
+                # Verificar se não passou da data final
+                or_(Reminder.end_date.is_(None), Reminder.end_date > today),
+                # Verificar se não está pausado
+                or_(Reminder.pause_until.is_(None), Reminder.pause_until <= today),
+            )
+        )
+
+    @staticmethod
+    def _process_chunk(rows, today: date, result: Dict) -> None:
+        now = get_current_time_for_db()
+        new_reminders = []  # mapeamentos das novas ocorrências, na ordem de inserção
+        histories = []  # histórico dos lembretes de origem
+        # índices em new_reminders que recebem histórico após a inserção (ocorrências substituídas)
+        replaced_positions = []
+        notified_ids, closed_ids = [], []
+
+        for row in rows:
+            plan = RecurrenceEngine.plan(row.due_date, row.frequency, today, row.end_date)
+            if plan is None:
+                logger.warning(f"[RecurrenceEngine] Frequência inválida para lembrete {row.id}")
+                result['skipped'] += 1
+                continue
+
+            if not plan.due_dates:
+                # Lembrete atingiu data final, não criando recorrência
+                closed_ids.append(row.id)
+                result['closed'] += 1
+                continue
+
+            histories.append(RecurrenceEngine._history(row.id, row.due_date, row.completed, now))
+            notified_ids.append(row.id)
+
+            base = {column: getattr(row, column) for column in COPIED_COLUMNS}
+            last = len(plan.due_dates) - 1
+            for index, due in enumerate(plan.due_dates):
+                is_last = index == last
+                # Ocorrências já vencidas são substituídas pela seguinte na mesma execução
+                replaced = not is_last or plan.ended
+                if not is_last:
+                    replaced_positions.append(len(new_reminders))
+                new_reminders.append({
+                    **base,
+                    'due_date': due,
+                    'notified': replaced,
+                    'status': 'encerrado' if is_last and plan.ended else base['status'],
+                    'completed': False,
+                    'escalation_level': 0,
+                    'created_at': now,
+                })
+            result['closed'] += 1 if plan.ended else 0
+            result['created'] += len(plan.due_dates)
+            result['processed'] += 1
+
+        table = Reminder.__table__
+        if new_reminders and replaced_positions:
+            new_ids = RecurrenceEngine._insert_returning_ids(table, new_reminders)
+            histories.extend(
+                RecurrenceEngine._history(new_ids[pos], new_reminders[pos]['due_date'], False, now)
+                for pos in replaced_positions
+            )
+        elif new_reminders:
+            db.session.execute(insert(table), new_reminders)
+        if histories:
+            db.session.execute(insert(ReminderHistory.__table__), histories)
+        if notified_ids:
+            db.session.execute(update(table).where(table.c.id.in_(notified_ids)).values(notified=True))
+        if closed_ids:
+            db.session.execute(
+                update(table).where(table.c.id.in_(closed_ids)).values(notified=True, status='encerrado')
+            )
+
+    @staticmethod
+    def _insert_returning_ids(table, mappings: List[Dict]) -> List[int]:
+        """Insere em lote e devolve os ids na ordem dos mapeamentos"""
+        if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+            return list(db.session.execute(
+                insert(table).returning(table.c.id, sort_by_parameter_order=True), mappings
+            ).scalars())
+        return [
+            db.session.execute(insert(table).values(**mapping)).inserted_primary_key[0]
+            for mapping in mappings
+        ]
+
+    @staticmethod
+    def _history(reminder_id: int, due_date: date, completed: bool, now) -> Dict:
+        return {
+            'reminder_id': reminder_id,
+            'original_due_date': due_date,
+            'action_type': 'recurring',
+            'action_date': now,
+            'completed': bool(completed),
+            'completed_by': None,
+            'notes': HISTORY_NOTE,
+        }
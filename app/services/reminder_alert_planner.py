@@ -0,0 +1,98 @@
+"""
+Planejamento dos avisos preventivos de lembretes
+
+Todos os lembretes que vencem em alguma das antecedências configuradas são
+buscados em uma única consulta (``due_date IN (...)``). Os avisos já enviados
+ficam registrados em ``reminder_alert_log`` por (lembrete, antecedência,
+vencimento), então reexecuções do job no mesmo dia — reinício do servidor ou
+agendamento de hora em hora — só processam os avisos ainda não enviados.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+
+from ..models import Reminder, ReminderAlertLog, db
+from ..utils.timezone_utils import get_current_time_for_db
+
+# Antecedências (em dias antes do vencimento) em que o aviso é enviado
+NOTIFICATION_HORIZONS = (90, 60, 30, 15, 7, 3, 1)
+
+
+@dataclass(frozen=True)
+class ReminderAlert:
+    """Aviso a enviar: lembrete e antecedência em dias"""
+    reminder: Reminder
+    horizon_days: int
+
+    @property
+    def urgency(self) -> Tuple[str, str]:
+        """Rótulo de urgência e classe visual conforme o tempo restante"""
+        if self.horizon_days <= 3:
+            return "CRÍTICO", "danger"
+        if self.horizon_days <= 7:
+            return "URGENTE", "warning"
+        if self.horizon_days <= 15:
+            return "IMPORTANTE", "info"
+        return "Atenção", "primary"
+
+
+class ReminderAlertPlanner:
+    """Seleção dos avisos pendentes e registro dos enviados"""
+
+    @staticmethod
+    def pending_alerts(today: Optional[date] = None, now: Optional[datetime] = None,
+                       horizons: Iterable[int] = NOTIFICATION_HORIZONS) -> List[ReminderAlert]:
+        """
+        Avisos devidos hoje que ainda não constam no registro
+
+        Args:
+            today: Data de referência (padrão: hoje)
+            now: Momento de referência para o filtro de escalação recente
+            horizons: Antecedências em dias
+
+        Returns:
+            Lista de ReminderAlert ordenada por vencimento
+        """
+        now = now or get_current_time_for_db()
+        today = today or now.date()
+        targets = {today + timedelta(days=days): days for days in horizons}
+
+        reminders = Reminder.query.options(joinedload(Reminder.user)).filter(
+            Reminder.status == 'ativo',
+            Reminder.completed == False,
+            Reminder.due_date.in_(list(targets)),
+            # Evitar notificar lembretes que já foram escalados recentemente
+            or_(
+                Reminder.last_escalation.is_(None),
+                Reminder.last_escalation < now - timedelta(hours=24)
+            )
+        ).order_by(Reminder.due_date, Reminder.id).all()
+        if not reminders:
+            return []
+
+        sent = set(
+            db.session.query(
+                ReminderAlertLog.reminder_id, ReminderAlertLog.horizon_days, ReminderAlertLog.due_date
+            ).filter(
+                ReminderAlertLog.reminder_id.in_([r.id for r in reminders]),
+                ReminderAlertLog.due_date.in_(list(targets)),
+            ).all()
+        )
+
+        return [
+            ReminderAlert(reminder, targets[reminder.due_date])
+            for reminder in reminders
+            if (reminder.id, targets[reminder.due_date], reminder.due_date) not in sent
+        ]
+
+    @staticmethod
+    def record(alert: ReminderAlert) -> None:
+        """Registra o aviso como enviado (gravado no commit do job)"""
+        db.session.add(ReminderAlertLog(
+            reminder_id=alert.reminder.id,
+            horizon_days=alert.horizon_days,
+            due_date=alert.reminder.due_date,
+        ))
@@ -4,13 +4,12 @@ Responsável por processar recorrências automáticas e lógica de negócio
 """
 
 from datetime import date, timedelta
-from dateutil.relativedelta import relativedelta
 from flask import current_app
-from sqlalchemy import and_
 
 from .. import db
 from ..models import Reminder, ReminderHistory, User
 from ..utils.timezone_utils import get_current_time_for_db
+from .recurrence_engine import RECURRENCE_CHUNK_SIZE, RecurrenceEngine
 
 
 class ReminderService:
@@ -20,105 +19,15 @@ class ReminderService:
     def process_recurring_reminders():
         """
         Processa lembretes recorrentes que venceram
-        Cria novos lembretes baseado na frequência configurada
+        Cria de uma vez todas as ocorrências perdidas baseado na frequência configurada
+        (ver RecurrenceEngine)
         
         Executa automaticamente via scheduler
         """
         try:
-            today = date.today()
-            processed = 0
-            created = 0
-
-            # Buscar lembretes vencidos que têm recorrência
-            overdue_reminders = Reminder.query.filter(
-                and_(
-                    Reminder.due_date < today,
-                    Reminder.notified == False,
-                    Reminder.frequency.isnot(None),
-                    Reminder.frequency != '',
-                    Reminder.status == 'ativo',
-                    # Verificar se não passou da data final
-                    db.or_(
-                        Reminder.end_date.is_(None),
-                        Reminder.end_date > today
-                    ),
-                    # Verificar se não está pausado
-                    db.or_(
-                        Reminder.pause_until.is_(None),
-                        Reminder.pause_until <= today
-                    )
-                )
-            ).all()
-
-            # Processando lembretes para recorrência
-
-            for reminder in overdue_reminders:
-                try:
-                    # Calcular próxima data baseado na frequência
-                    next_due = ReminderService._calculate_next_due_date(
-                        reminder.due_date, 
-                        reminder.frequency
-                    )
-
-                    if next_due is None:
-                        current_app.logger.warning(f"[ReminderService] Frequência inválida para lembrete {reminder.id}")
-                        continue
-
-                    # Verificar se não passou da data final
-                    if reminder.end_date and next_due > reminder.end_date:
-                        # Lembrete atingiu data final, não criando recorrência
-                        reminder.notified = True
-                        reminder.status = 'encerrado'
-                        continue
-
-                    # Criar histórico do lembrete anterior
-                    ReminderService._create_history_entry(reminder, 'recurring')
-
-                    # Criar novo lembrete recorrente
-                    new_reminder = Reminder(
-                        name=reminder.name,
-                        type=reminder.type,
-                        due_date=next_due,
-                        responsible=reminder.responsible,
-                        frequency=reminder.frequency,
-                        sector_id=reminder.sector_id,
-                        user_id=reminder.user_id,
-                        status=reminder.status,
-                        pause_until=reminder.pause_until,
-                        end_date=reminder.end_date,
-                        priority=reminder.priority,
-                        notes=reminder.notes,
-                        contract_number=reminder.contract_number,
-                        cost=reminder.cost,
-                        supplier=reminder.supplier,
-                        category=reminder.category,
-                        created_at=get_current_time_for_db()
-                    )
-                    
-                    db.session.add(new_reminder)
-                    
-                    # Marcar lembrete antigo como notificado
-                    reminder.notified = True
-                    
-                    created += 1
-                    # Novo lembrete recorrente criado
-
-                except Exception as e:
-                    current_app.logger.error(f"[ReminderService] Erro ao processar recorrência do lembrete {reminder.id}")
-                    continue
-
-                processed += 1
-
-            # Commit todas as alterações
-            db.session.commit()
-            
-            # Processamento de recorrências concluído
-            
-            return {
-                'processed': processed,
-                'created': created,
-                'timestamp': get_current_time_for_db()
-            }
+            return RecurrenceEngine.run(
+                chunk_size=current_app.config.get('RECURRENCE_CHUNK_SIZE', RECURRENCE_CHUNK_SIZE)
+            )
 
         except Exception as e:
             db.session.rollback()
@@ -129,52 +38,6 @@ class ReminderService:
                 'created': 0
             }
 
-    @staticmethod
-    def _calculate_next_due_date(current_due_date, frequency):
-        """
-        Calcula a próxima data de vencimento baseado na frequência
-        
-        Args:
-            current_due_date: Data de vencimento atual
-            frequency: Frequência (diario, quinzenal, mensal, anual)
-            
-        Returns:
-            Nova data de vencimento ou None se frequência inválida
-        """
-        if frequency == 'diario':
-            return current_due_date + relativedelta(days=1)
-        elif frequency == 'quinzenal':
-            return current_due_date + relativedelta(days=15)
-        elif frequency == 'mensal':
-            return current_due_date + relativedelta(months=1)
-        elif frequency == 'anual':
-            return current_due_date + relativedelta(years=1)
-        else:
-            return None
-
-    @staticmethod
-    def _create_history_entry(reminder, action_type):
-        """
-        Cria entrada no histórico do lembrete
-        
-        Args:
-            reminder: Objeto Reminder
-            action_type: Tipo de ação (recurring, completed, skipped, etc.)
-        """
-        try:
-            history = ReminderHistory(
-                reminder_id=reminder.id,
-                original_due_date=reminder.due_date,
-                action_type=action_type,
-                action_date=get_current_time_for_db(),
-                completed=reminder.completed,
-                notes=f"Recorrência automática - próxima data será calculada"
-            )
-            db.session.add(history)
-            # Histórico de lembrete criado
-        except Exception as e:
-            current_app.logger.error("[ReminderService] Erro ao criar histórico")
-
     @staticmethod
     def complete_reminder(reminder_id, user_id, notes=None):
         """
@@ -0,0 +1,518 @@
+"""
+Geração dos relatórios PDF (SLA e Analytics)
+
+Os relatórios são escritos em qualquer arquivo binário, permitindo que as rotas
+respondam diretamente ou que a fila de exportação os gere em segundo plano.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from ..models import Chamado, EquipmentRequest, Reminder, Task
+
+logger = logging.getLogger(__name__)
+
+SLA_EXPORT_TYPES = ('chamados', 'equipamentos', 'tasks', 'reminders')
+
+
+class ReportService:
+    """Relatórios PDF gerados com reportlab"""
+
+    @staticmethod
+    def analytics_period(start: Optional[str], end: Optional[str]) -> Tuple[str, str]:
+        """Período do relatório Analytics (padrão: últimos 30 dias)"""
+        if not start or not end:
+            today = date.today()
+            start = (today - timedelta(days=30)).isoformat()
+            end = today.isoformat()
+        return start, end
+
+    @staticmethod
+    def write_sla_pdf(fileobj, export_type: str = 'chamados', usuario: str = 'Usuário') -> str:
+        """
+        Escreve o relatório de SLA em PDF
+
+        Args:
+            fileobj: Arquivo binário de destino
+            export_type: chamados, equipamentos, tasks ou reminders
+            usuario: Nome exibido como autor do relatório
+
+        Returns:
+            Nome sugerido para download
+        """
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import cm
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+        # Configurar documento (landscape para mais colunas)
+        doc = SimpleDocTemplate(
+            fileobj,
+            pagesize=landscape(A4),
+            rightMargin=1*cm,
+            leftMargin=1*cm,
+            topMargin=2*cm,
+            bottomMargin=2*cm
+        )
+
+        # Elementos do PDF
+        elements = []
+        styles = getSampleStyleSheet()
+
+        # Estilo de título
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            textColor=colors.HexColor('#0d6efd'),
+            spaceAfter=12,
+            alignment=1  # Center
+        )
+
+        # Estilo de subtítulo
+        subtitle_style = ParagraphStyle(
+            'CustomSubtitle',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.grey,
+            spaceAfter=20,
+            alignment=1
+        )
+
+        # Data e hora do relatório
+        data_hora = datetime.now().strftime('%d/%m/%Y às %H:%M')
+
+        # ============================================
+        # EXPORTAÇÃO DE CHAMADOS COM ANÁLISE DE SLA
+        # ============================================
+        if export_type == 'chamados':
+            elements.append(Paragraph('Análise de SLA - Chamados de Suporte', title_style))
+            elements.append(Paragraph(f'Relatório de Indicadores de Cumprimento de Prazos de Atendimento', subtitle_style))
+            elements.append(Paragraph(f'Gerado em {data_hora} por {usuario}', subtitle_style))
+            elements.append(Spacer(1, 0.5*cm))
+
+            # Buscar chamados
+            chamados = Chamado.query.order_by(Chamado.data_abertura.desc()).limit(200).all()
+
+            if chamados:
+                # ==== INDICADORES DE DESEMPENHO ====
+                info_style = ParagraphStyle(
+                    'InfoStyle',
+                    parent=styles['Normal'],
+                    fontSize=9,
+                    textColor=colors.HexColor('#2c3e50'),
+                    spaceAfter=8,
+                    leading=12
+                )
+
+                # Calcular KPIs
+                total_chamados = len(chamados)
+                chamados_com_sla = [c for c in chamados if c.prazo_sla]
+                total_com_sla = len(chamados_com_sla)
+
+                sla_cumprido = len([c for c in chamados_com_sla if c.sla_cumprido == True])
+                sla_vencido = len([c for c in chamados_com_sla if c.sla_cumprido == False])
+                sla_andamento = total_com_sla - sla_cumprido - sla_vencido
+
+                taxa_cumprimento = (sla_cumprido / total_com_sla * 100) if total_com_sla > 0 else 0
+
+                # Chamados por prioridade
+                criticos = len([c for c in chamados if c.prioridade == 'Critica'])
+                altos = len([c for c in chamados if c.prioridade == 'Alta'])
+                medios = len([c for c in chamados if c.prioridade == 'Media'])
+                baixos = len([c for c in chamados if c.prioridade == 'Baixa'])
+
+                # Chamados por status
+                abertos = len([c for c in chamados if c.status == 'Aberto'])
+                em_andamento = len([c for c in chamados if c.status == 'Em Andamento'])
+                resolvidos = len([c for c in chamados if c.status == 'Resolvido'])
+                fechados = len([c for c in chamados if c.status == 'Fechado'])
+
+                # Tempo médio de resposta
+                tempos_resposta = [c.tempo_resposta_horas for c in chamados if c.tempo_resposta_horas]
+                tempo_medio_resposta = sum(tempos_resposta) / len(tempos_resposta) if tempos_resposta else 0
+
+                # Criar painel de indicadores
+                elements.append(Paragraph('<b>INDICADORES DE DESEMPENHO (KPIs)</b>', info_style))
+                elements.append(Spacer(1, 0.3*cm))
+
+                # Tabela de KPIs
+                kpi_data = [
+                    ['<b>Métrica</b>', '<b>Valor</b>', '<b>Detalhes</b>'],
+                    ['Total de Chamados', str(total_chamados), f'{abertos} Abertos, {em_andamento} Em Andamento, {fechados} Fechados'],
+                    ['Taxa de Cumprimento SLA', f'{taxa_cumprimento:.1f}%', f'{sla_cumprido} cumpridos de {total_com_sla} com SLA'],
+                    ['SLA Cumprido', str(sla_cumprido), f'{(sla_cumprido/total_com_sla*100):.1f}% do total' if total_com_sla > 0 else 'N/A'],
+                    ['SLA Vencido', str(sla_vencido), f'{(sla_vencido/total_com_sla*100):.1f}% do total' if total_com_sla > 0 else 'N/A'],
+                    ['SLA Em Andamento', str(sla_andamento), 'Chamados ainda dentro do prazo'],
+                    ['Tempo Médio Resposta', f'{tempo_medio_resposta:.1f}h', 'Tempo até primeira resposta'],
+                    ['Chamados Críticos', str(criticos), f'{(criticos/total_chamados*100):.1f}% do total'],
+                    ['Chamados por Prioridade', f'C:{criticos} A:{altos}', f'M:{medios} B:{baixos}'],
+                ]
+
+                kpi_table = Table(kpi_data, colWidths=[6*cm, 4*cm, 10*cm])
+                kpi_table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 9),
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#ecf0f1')),
+                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+                    ('ALIGN', (0, 1), (1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                    ('FONTSIZE', (0, 1), (-1, -1), 8),
+                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
+                ]))
+
+                elements.append(kpi_table)
+                elements.append(Spacer(1, 0.7*cm))
+
+                # ==== DETALHAMENTO DOS CHAMADOS ====
+                elements.append(Paragraph('<b>DETALHAMENTO DE CHAMADOS</b>', info_style))
+                elements.append(Spacer(1, 0.3*cm))
+
+                # Cabeçalho da tabela
+                data = [['ID', 'Título', 'Prior.', 'Status', 'Abertura', 'SLA', 'Tempo Resp.', 'Satisfação']]
+
+                # Adicionar dados (primeiros 80 registros)
+                for chamado in chamados[:80]:
+                    # Status SLA
+                    if chamado.sla_cumprido == True:
+                        status_sla_text = '✓ Cumprido'
+                    elif chamado.sla_cumprido == False:
+                        status_sla_text = '✗ Vencido'
+                    elif chamado.status_sla == 'vencido':
+                        status_sla_text = '✗ Vencido'
+                    elif chamado.status_sla == 'atencao':
+                        status_sla_text = '⚠ Crítico'
+                    else:
+                        status_sla_text = '◷ Normal'
+
+                    # Tempo de resposta
+                    if chamado.tempo_resposta_horas:
+                        tempo_resp = f'{chamado.tempo_resposta_horas:.1f}h'
+                    else:
+                        tempo_resp = 'Pendente'
+
+                    # Satisfação
+                    if chamado.satisfaction_rating:
+                        satisfacao = '★' * chamado.satisfaction_rating + '☆' * (5 - chamado.satisfaction_rating)
+                    else:
+                        satisfacao = 'N/A'
+
+                    # Prioridade abreviada
+                    prior_map = {'Critica': 'CRIT', 'Alta': 'ALTA', 'Media': 'MED', 'Baixa': 'BXA'}
+                    prior = prior_map.get(chamado.prioridade, chamado.prioridade[:4].upper())
+
+                    data.append([
+                        str(chamado.id),
+                        chamado.titulo[:35] + '...' if len(chamado.titulo) > 35 else chamado.titulo,
+                        prior,
+                        chamado.status[:10],
+                        chamado.data_abertura.strftime('%d/%m %H:%M'),
+                        status_sla_text,
+                        tempo_resp,
+                        satisfacao
+                    ])
+
+                # Criar tabela
+                detail_table = Table(data, colWidths=[1.5*cm, 7*cm, 2*cm, 2.5*cm, 2.5*cm, 2.5*cm, 2*cm, 2*cm])
+                detail_table.setStyle(TableStyle([
+                    # Header
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 8),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+                    # Body
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+                    ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+                    ('ALIGN', (2, 1), (2, -1), 'CENTER'),
+                    ('ALIGN', (3, 1), (5, -1), 'CENTER'),
+                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                    ('FONTSIZE', (0, 1), (-1, -1), 7),
+                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
+                ]))
+
+                elements.append(detail_table)
+
+                # Adicionar legenda
+                elements.append(Spacer(1, 0.5*cm))
+                legenda_text = '<b>Legenda:</b> ✓=Cumprido | ✗=Vencido | ⚠=Crítico | ◷=Normal | ★=Satisfação | CRIT=Crítica | ALTA=Alta | MED=Média | BXA=Baixa'
+                elements.append(Paragraph(legenda_text, subtitle_style))
+
+            else:
+                elements.append(Paragraph('Nenhum chamado encontrado no sistema', styles['Normal']))
+
+        # ============================================
+        # EXPORTAÇÃO DE EQUIPAMENTOS
+        # ============================================
+        elif export_type == 'equipamentos':
+            elements.append(Paragraph('Relatório de SLA - Equipamentos', title_style))
+            elements.append(Paragraph(f'Gerado em {data_hora} por {usuario}', subtitle_style))
+            elements.append(Spacer(1, 0.5*cm))
+
+            # Buscar equipamentos
+            equipamentos = EquipmentRequest.query.filter(
+                EquipmentRequest.status.in_(['Solicitado', 'Aprovado', 'Entregue'])
+            ).order_by(EquipmentRequest.request_date.desc()).limit(100).all()
+
+            if equipamentos:
+                data = [['ID', 'Descrição', 'Solicitante', 'Status', 'Data Solicitação', 'SLA']]
+
+                for eq in equipamentos:
+                    tempo_desde_solicitacao = (datetime.now() - eq.request_date).total_seconds() / 3600
+
+                    if eq.status == 'Solicitado':
+                        status_sla = 'Vencido' if tempo_desde_solicitacao > 24 else ('Crítico' if tempo_desde_solicitacao > 20 else 'OK')
+                    elif eq.status == 'Aprovado' and eq.approval_date:
+                        tempo_desde_aprovacao = (datetime.now() - eq.approval_date).total_seconds() / 3600
+                        status_sla = 'Vencido' if tempo_desde_aprovacao > 48 else ('Crítico' if tempo_desde_aprovacao > 40 else 'OK')
+                    else:
+                        status_sla = 'Concluído'
+
+                    data.append([
+                        str(eq.id),
+                        (eq.description or 'Equipamento')[:35] + '...' if eq.description and len(eq.description) > 35 else (eq.description or 'Equipamento'),
+                        eq.requester.username if eq.requester else 'N/A',
+                        eq.status,
+                        eq.request_date.strftime('%d/%m/%Y %H:%M'),
+                        status_sla
+                    ])
+
+                table = Table(data, colWidths=[2*cm, 7*cm, 4*cm, 3*cm, 4*cm, 3*cm])
+                table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#6f42c1')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 10),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+                    ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                    ('FONTSIZE', (0, 1), (-1, -1), 8),
+                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+                ]))
+
+                elements.append(table)
+            else:
+                elements.append(Paragraph('Nenhum equipamento encontrado', styles['Normal']))
+
+        # ============================================
+        # EXPORTAÇÃO DE TAREFAS
+        # ============================================
+        elif export_type == 'tasks':
+            elements.append(Paragraph('Relatório de SLA - Tarefas', title_style))
+            elements.append(Paragraph(f'Gerado em {data_hora} por {usuario}', subtitle_style))
+            elements.append(Spacer(1, 0.5*cm))
+
+            # Buscar tarefas
+            tarefas = Task.query.order_by(Task.date.desc(), Task.completed.asc()).limit(100).all()
+
+            if tarefas:
+                data = [['ID', 'Descrição', 'Responsável', 'Data', 'Setor', 'Status']]
+
+                for task in tarefas:
+                    if task.completed:
+                        task_status = 'Concluída'
+                    else:
+                        dias_desde_criacao = (datetime.now().date() - task.date).days
+                        task_status = 'Vencida' if dias_desde_criacao > 7 else ('Crítica' if dias_desde_criacao > 5 else 'Pendente')
+
+                    data.append([
+                        str(task.id),
+                        (task.description[:45] + '...') if task.description and len(task.description) > 45 else (task.description or 'Sem descrição'),
+                        task.user.username if task.user else task.responsible if hasattr(task, 'responsible') else 'N/A',
+                        task.date.strftime('%d/%m/%Y'),
+                        task.sector.name if task.sector else 'N/A',
+                        task_status
+                    ])
+
+                table = Table(data, colWidths=[2*cm, 8*cm, 4*cm, 3*cm, 4*cm, 3*cm])
+                table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d6efd')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 10),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+                    ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                    ('FONTSIZE', (0, 1), (-1, -1), 8),
+                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+                ]))
+
+                elements.append(table)
+            else:
+                elements.append(Paragraph('Nenhuma tarefa encontrada', styles['Normal']))
+
+        # ============================================
+        # EXPORTAÇÃO DE LEMBRETES
+        # ============================================
+        elif export_type == 'reminders':
+            elements.append(Paragraph('Relatório de SLA - Lembretes', title_style))
+            elements.append(Paragraph(f'Gerado em {data_hora} por {usuario}', subtitle_style))
+            elements.append(Spacer(1, 0.5*cm))
+
+            # Buscar lembretes
+            lembretes = Reminder.query.filter(
+                Reminder.status == 'ativo'
+            ).order_by(Reminder.due_date.asc(), Reminder.completed.asc()).limit(100).all()
+
+            if lembretes:
+                data = [['ID', 'Nome', 'Tipo', 'Responsável', 'Vencimento', 'Status']]
+
+                for reminder in lembretes:
+                    if reminder.completed:
+                        reminder_status = 'Realizado'
+                    else:
+                        if reminder.due_date < datetime.now().date():
+                            reminder_status = 'Vencido'
+                        elif reminder.due_date == datetime.now().date():
+                            reminder_status = 'Vence Hoje'
+                        else:
+                            dias_restantes = (reminder.due_date - datetime.now().date()).days
+                            reminder_status = 'Próximo' if dias_restantes <= 2 else 'Pendente'
+
+                    data.append([
+                        str(reminder.id),
+                        (reminder.name[:40] + '...') if reminder.name and len(reminder.name) > 40 else (reminder.name or 'Sem nome'),
+                        reminder.type or 'Geral',
+                        reminder.user.username if reminder.user else reminder.responsible if hasattr(reminder, 'responsible') else 'N/A',
+                        reminder.due_date.strftime('%d/%m/%Y'),
+                        reminder_status
+                    ])
+
+                table = Table(data, colWidths=[2*cm, 8*cm, 3*cm, 4*cm, 3*cm, 4*cm])
+                table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#ffc107')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+                    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 10),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+                    ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+                    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+                    ('FONTSIZE', (0, 1), (-1, -1), 8),
+                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+                ]))
+
+                elements.append(table)
+            else:
+                elements.append(Paragraph('Nenhum lembrete encontrado', styles['Normal']))
+
+        # Adicionar rodapé
+        elements.append(Spacer(1, 1*cm))
+        footer_text = f'Documento gerado automaticamente pelo TI OSN System • {data_hora}'
+        elements.append(Paragraph(footer_text, subtitle_style))
+
+        # Construir PDF
+        doc.build(elements)
+
+        return f'sla_{export_type}_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf'
+
+    @staticmethod
+    def write_analytics_pdf(fileobj, start: Optional[str] = None, end: Optional[str] = None) -> str:
+        """
+        Escreve o PDF com KPIs e tabelas resumidas do dashboard Analytics
+
+        Args:
+            fileobj: Arquivo binário de destino
+            start: Início do período (ISO, opcional)
+            end: Fim do período (ISO, opcional)
+
+        Returns:
+            Nome sugerido para download
+        """
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+        from .analytics.analytics_service import AnalyticsService
+
+        start, end = ReportService.analytics_period(start, end)
+        start_d = date.fromisoformat(start)
+        end_d = date.fromisoformat(end)
+
+        # Buscar dados
+        kpis = AnalyticsService.get_dashboard_kpis()
+        evolucao = AnalyticsService.get_chamados_por_periodo(start_d, end_d)
+        prioridade = AnalyticsService.get_chamados_por_prioridade()
+        perf = AnalyticsService.get_performance_por_tecnico(start_d, end_d)
+        setor = AnalyticsService.get_chamados_por_setor()
+
+        # Montar PDF
+        doc = SimpleDocTemplate(fileobj, pagesize=landscape(A4), leftMargin=20, rightMargin=20, topMargin=20, bottomMargin=20)
+        styles = getSampleStyleSheet()
+        content = []
+
+        content.append(Paragraph("Dashboard Analytics - Relatório", styles["Title"]))
+        content.append(Paragraph(f"Período: {start} a {end}", styles["Normal"]))
+        content.append(Spacer(1, 12))
+
+        # KPIs
+        kpi_table = [["Métrica", "Valor"],
+                     ["Chamados Abertos", kpis.get("chamados_abertos", 0)],
+                     ["Chamados do Mês", kpis.get("chamados_mes", 0)],
+                     ["Taxa de SLA (%)", kpis.get("sla_taxa", 0)],
+                     ["Satisfação Média", kpis.get("satisfacao_media", 0)],
+                     ["Lembretes Ativos", kpis.get("lembretes_ativos", 0)],
+                     ["Lembretes Vencidos", kpis.get("lembretes_vencidos", 0)],
+                     ["Equipamentos em Uso", kpis.get("equipamentos_uso", 0)],
+                     ["Total Tutoriais", kpis.get("total_tutoriais", 0)],
+                     ["Visualizações Tutoriais", kpis.get("total_visualizacoes", 0)],
+                     ["Tarefas Concluídas", kpis.get("tasks_concluidas", 0)],
+                     ["Tarefas Pendentes", kpis.get("tasks_pendentes", 0)]]
+        t = Table(kpi_table, hAlign='LEFT')
+        t.setStyle(TableStyle([
+            ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+            ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ]))
+        content.append(t)
+        content.append(Spacer(1, 14))
+
+        def add_table(title, data, headers):
+            content.append(Paragraph(title, styles['Heading2']))
+            rows = [headers] + [list(d.values()) if isinstance(d, dict) else d for d in data]
+            tbl = Table(rows, hAlign='LEFT')
+            tbl.setStyle(TableStyle([
+                ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+                ('GRID', (0,0), (-1,-1), 0.5, colors.grey),
+                ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+            ]))
+            content.append(tbl)
+            content.append(Spacer(1, 10))
+
+        if evolucao:
+            add_table("Evolução de Chamados", evolucao, ["periodo", "total"])
+        if prioridade:
+            add_table("Chamados por Prioridade", prioridade, ["prioridade", "total"])
+        if perf:
+            add_table("Performance por Técnico", perf, ["tecnico", "total", "tempo_medio", "sla_taxa"])
+        if setor:
+            add_table("Chamados por Setor", setor, ["setor", "total"])
+
+        doc.build(content)
+
+        return f"analytics_dashboard_{date.today().isoformat()}.pdf"
@@ -0,0 +1,299 @@
+"""
+Histórico de leituras RFID (tabela rfid_reads, somente inserção)
+
+Cada leitura aceita vira uma linha com ids inteiros compactos de leitor e
+local (tabelas rfid_reader e rfid_location); os nomes ficam em um cache em
+memória por app. As gravações são feitas em lote junto com a atualização de
+localização (ver rfid_ingest). As consultas de trilha usam os índices
+(equipment_id, ts) e (reader_id, ts) e são paginadas por chave.
+
+No PostgreSQL a tabela é particionada por dia: ``maintain`` cria as partições
+dos próximos dias, descarta as que passaram da retenção e apaga as linhas
+antigas que caíram na partição padrão. Nos demais bancos a retenção apaga as
+linhas antigas.
+
+Leitores e locais novos entram no cache antes do commit de quem grava; se a
+transação for desfeita, ``discard_dimensions`` descarta o cache.
+"""
+import logging
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import delete, insert, select, text, update
+from sqlalchemy.exc import IntegrityError
+
+from ..models import Equipment, RFIDLocation, RFIDRead, RFIDReader, db
+from ..utils.keyset import KeysetPage, keyset_page
+from ..utils.timezone_utils import get_current_time_for_db
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = 'rfid_dimensions'
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
+_PARTITION_NAME = re.compile(r'^rfid_reads_(\d{8})$')
+_dimensions_lock = threading.Lock()
+
+
+class RFIDDimensions:
+    """Cache dos ids de leitores e locais"""
+
+    def __init__(self):
+        self.readers: Dict[str, Tuple[int, Optional[int]]] = {}  # code -> (id, location_id)
+        self.reader_codes: Dict[int, str] = {}
+        self.locations: Dict[str, int] = {}  # nome -> id
+        self.location_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        locations = db.session.execute(select(RFIDLocation.id, RFIDLocation.name)).all()
+        readers = db.session.execute(select(RFIDReader.id, RFIDReader.code, RFIDReader.location_id)).all()
+        with self._lock:
+            self.locations = {row.name: row.id for row in locations}
+            self.location_names = {row.id: row.name for row in locations}
+            self.readers = {row.code: (row.id, row.location_id) for row in readers}
+            self.reader_codes = {row.id: row.code for row in readers}
+
+    def resolve(self, reader_code: str, location: str) -> Tuple[int, int]:
+        """(reader_id, location_id), cadastrando leitor/local novos"""
+        location_id = self.locations.get(location)
+        reader = self.readers.get(reader_code)
+        if location_id is not None and reader is not None and reader[1] == location_id:
+            return reader[0], location_id
+
+        # Pode ter sido cadastrado por outro processo
+        self.load()
+        location_id = self.locations.get(location)
+        if location_id is None:
+            location_id = self._insert(RFIDLocation(name=location)).id
+            with self._lock:
+                self.locations[location] = location_id
+                self.location_names[location_id] = location
+
+        reader = self.readers.get(reader_code)
+        if reader is None:
+            reader_id = self._insert(RFIDReader(code=reader_code, location_id=location_id)).id
+        else:
+            reader_id = reader[0]
+            if reader[1] != location_id:
+                # Leitor mudou de lugar; o histórico mantém o local da época de cada leitura
+                db.session.execute(
+                    update(RFIDReader).where(RFIDReader.id == reader_id).values(location_id=location_id)
+                )
+        with self._lock:
+            self.readers[reader_code] = (reader_id, location_id)
+            self.reader_codes[reader_id] = reader_code
+        return reader_id, location_id
+
+    def reader_code(self, reader_id: int) -> Optional[str]:
+        if reader_id not in self.reader_codes:
+            self.load()
+        return self.reader_codes.get(reader_id)
+
+    def location_name(self, location_id: int) -> Optional[str]:
+        if location_id not in self.location_names:
+            self.load()
+        return self.location_names.get(location_id)
+
+    def _insert(self, row):
+        """Insere leitor/local; se outro processo inseriu antes, devolve o existente"""
+        try:
+            with db.session.begin_nested():
+                db.session.add(row)
+            return row
+        except IntegrityError:
+            if isinstance(row, RFIDLocation):
+                return RFIDLocation.query.filter_by(name=row.name).one()
+            return RFIDReader.query.filter_by(code=row.code).one()
+
+
+def discard_dimensions() -> None:
+    """Descarta o cache (recarregado no próximo uso); usado após rollback"""
+    current_app.extensions.pop(EXTENSION_KEY, None)
+
+
+def get_dimensions() -> RFIDDimensions:
+    app = current_app._get_current_object()
+    dimensions = app.extensions.get(EXTENSION_KEY)
+    if dimensions is None:
+        with _dimensions_lock:
+            dimensions = app.extensions.get(EXTENSION_KEY)
+            if dimensions is None:
+                dimensions = RFIDDimensions()
+                dimensions.load()
+                app.extensions[EXTENSION_KEY] = dimensions
+    return dimensions
+
+
+class RFIDHistoryService:
+    """Gravação e consulta do histórico de leituras RFID"""
+
+    @staticmethod
+    def enabled() -> bool:
+        return current_app.config.get('RFID_HISTORY_ENABLED', True)
+
+    @staticmethod
+    def record(reads: Iterable[Tuple[int, str, str, datetime]]) -> int:
+        """
+        Insere leituras em lote (sem commit; grava na transação do chamador)
+
+        Args:
+            reads: Tuplas (equipment_id, código do leitor, local, horário UTC)
+
+        Returns:
+            Número de linhas inseridas
+        """
+        if not RFIDHistoryService.enabled():
+            return 0
+        dimensions = get_dimensions()
+        rows = []
+        for equipment_id, reader_code, location, ts in reads:
+            reader_id, location_id = dimensions.resolve(reader_code, location)
+            rows.append({'equipment_id': equipment_id, 'reader_id': reader_id,
+                         'location_id': location_id, 'ts': ts})
+        if rows:
+            db.session.execute(insert(RFIDRead), rows)
+        return len(rows)
+
+    @staticmethod
+    def equipment_trail(equipment_id: int, start: datetime, end: datetime,
+                        cursor: Optional[str] = None, per_page: int = DEFAULT_PAGE_SIZE) -> Dict:
+        """Leituras de um equipamento em [start, end), em ordem cronológica"""
+        query = RFIDRead.query.filter(
+            RFIDRead.equipment_id == equipment_id, RFIDRead.ts >= start, RFIDRead.ts < end
+        )
+        page = keyset_page(query, RFIDRead.ts, RFIDRead.id, cursor, _page_size(per_page))
+        dimensions = get_dimensions()
+        reads = [{
+            'ts': read.ts.isoformat(),
+            'reader_id': dimensions.reader_code(read.reader_id),
+            'location': dimensions.location_name(read.location_id),
+        } for read in page]
+        return _page_payload(page, reads, equipment_id=equipment_id, start=start, end=end)
+
+    @staticmethod
+    def reader_passages(reader_code: str, start: datetime, end: datetime,
+                        cursor: Optional[str] = None, per_page: int = DEFAULT_PAGE_SIZE) -> Optional[Dict]:
+        """Equipamentos lidos por um leitor em [start, end); None se o leitor não existe"""
+        dimensions = get_dimensions()
+        reader = dimensions.readers.get(reader_code)
+        if reader is None:
+            dimensions.load()
+            reader = dimensions.readers.get(reader_code)
+            if reader is None:
+                return None
+
+        query = RFIDRead.query.filter(
+            RFIDRead.reader_id == reader[0], RFIDRead.ts >= start, RFIDRead.ts < end
+        )
+        page = keyset_page(query, RFIDRead.ts, RFIDRead.id, cursor, _page_size(per_page))
+
+        equipment_ids = {read.equipment_id for read in page}
+        equipments = {}
+        if equipment_ids:
+            equipments = {row.id: row for row in db.session.execute(
+                select(Equipment.id, Equipment.name, Equipment.rfid_tag).where(Equipment.id.in_(equipment_ids))
+            )}
+        reads = []
+        for read in page:
+            equipment = equipments.get(read.equipment_id)
+            reads.append({
+                'ts': read.ts.isoformat(),
+                'equipment_id': read.equipment_id,
+                'equipment_name': equipment.name if equipment else None,
+                'rfid_tag': equipment.rfid_tag if equipment else None,
+                'location': dimensions.location_name(read.location_id),
+            })
+        return _page_payload(page, reads, reader_id=reader_code, start=start, end=end)
+
+    @staticmethod
+    def maintain(now: Optional[datetime] = None) -> int:
+        """
+        Cria as partições dos próximos dias e aplica a retenção
+
+        Returns:
+            Partições criadas/descartadas mais linhas apagadas da partição
+            padrão (PostgreSQL) ou linhas apagadas
+        """
+        now = now or get_current_time_for_db()
+        retention_days = current_app.config.get('RFID_READS_RETENTION_DAYS', 365)
+        cutoff = (now - timedelta(days=retention_days)).date() if retention_days > 0 else None
+
+        if not _is_partitioned():
+            if cutoff is None:
+                return 0
+            result = db.session.execute(delete(RFIDRead).where(
+                RFIDRead.ts < datetime.combine(cutoff, datetime.min.time())
+            ))
+            db.session.commit()
+            return result.rowcount or 0
+
+        changed = 0
+        existing = set(_partition_days())
+        days_ahead = current_app.config.get('RFID_READS_PARTITION_DAYS_AHEAD', 3)
+        for offset in range(days_ahead + 1):
+            day = now.date() + timedelta(days=offset)
+            if day in existing:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(text(
+                        f"CREATE TABLE rfid_reads_{day:%Y%m%d} PARTITION OF rfid_reads "
+                        f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+                    ))
+                changed += 1
+            except Exception as e:
+                # Ex.: a partição padrão já tem linhas desse dia
+                logger.warning(f"[RFID] Partição de {day} não criada: {str(e)}")
+
+        if cutoff is not None:
+            for day in sorted(existing):
+                if day < cutoff:
+                    db.session.execute(text(f"DROP TABLE IF EXISTS rfid_reads_{day:%Y%m%d}"))
+                    changed += 1
+            # Leituras gravadas antes de existir a partição do dia ficam na padrão
+            result = db.session.execute(
+                text("DELETE FROM rfid_reads_default WHERE ts < :cutoff"),
+                {'cutoff': datetime.combine(cutoff, datetime.min.time())},
+            )
+            changed += result.rowcount or 0
+        db.session.commit()
+        return changed
+
+
+def _page_size(per_page: int) -> int:
+    return max(1, min(per_page or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def _page_payload(page: KeysetPage, reads: List[Dict], start: datetime, end: datetime, **extra) -> Dict:
+    return {'success': True, **extra, 'start': start.isoformat(), 'end': end.isoformat(),
+            'reads': reads, 'next_cursor': page.next_cursor}
+
+
+def _is_partitioned() -> bool:
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    relkind = db.session.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = 'rfid_reads'")
+    ).scalar()
+    return relkind == 'p'
+
+
+def _partition_days() -> List:
+    names = db.session.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'rfid_reads'"
+    )).scalars()
+    days = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            days.append(datetime.strptime(match.group(1), '%Y%m%d').date())
+    return days
@@ -0,0 +1,358 @@
+"""
+Ingestão de leituras RFID em lote
+
+Um leitor de portal emite centenas de leituras por segundo, quase todas
+repetidas. O pipeline evita uma consulta e um commit por leitura:
+
+1. ``TagCache``: mapa tag -> (equipment_id, última localização) carregado em
+   uma consulta e mantido em memória. É invalidado por ``assign_rfid_tag`` /
+   ``remove_rfid_tag`` e recarregado após ``RFID_TAG_CACHE_TTL`` segundos
+   (alterações feitas em outros processos) ou, no máximo a cada
+   ``RFID_TAG_CACHE_MISS_REFRESH`` segundos, quando chega uma tag desconhecida.
+2. ``ReadDeduplicator``: descarta leituras da mesma (tag, leitor) dentro de
+   ``RFID_DEDUP_WINDOW_MS``.
+3. ``LocationBuffer``: guarda apenas a leitura mais recente de cada
+   equipamento; a cada ``RFID_FLUSH_INTERVAL_MS`` uma thread grava tudo com um
+   único ``UPDATE`` em lote por chave primária. Com intervalo 0 a gravação é
+   feita ao fim de cada lote (modo síncrono).
+4. ``ReadLog``: todas as leituras aceitas, gravadas no histórico rfid_reads
+   (ver rfid_history) na mesma transação do ``UPDATE``.
+"""
+import atexit
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from ..models import Equipment, db
+from ..utils.timezone_utils import get_current_time_for_db, local_to_utc
+from .rfid_history import RFIDHistoryService, discard_dimensions
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = 'rfid_ingestor'
+
+DEFAULT_TAG_CACHE_TTL = 300
+DEFAULT_TAG_CACHE_MISS_REFRESH = 5
+DEFAULT_DEDUP_WINDOW_MS = 2000
+DEFAULT_FLUSH_INTERVAL_MS = 500
+DEFAULT_FLUSH_MAX_PENDING = 1000
+
+_ingestor_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ScanRead:
+    """Leitura de uma tag por um leitor (scanned_at em UTC, sem timezone)"""
+    rfid_tag: str
+    reader_id: str
+    scanned_at: datetime
+
+    @classmethod
+    def from_payload(cls, item: Dict, default_time: datetime) -> 'ScanRead':
+        """
+        Cria a leitura a partir do JSON do leitor
+
+        ``timestamp`` é opcional (ISO 8601); sem timezone é tratado como horário local.
+        """
+        tag = str(item.get('rfid_tag') or '').strip()
+        reader_id = str(item.get('reader_id') or '').strip()
+        if not tag or not reader_id:
+            raise ValueError('rfid_tag e reader_id são obrigatórios')
+        raw_ts = item.get('timestamp')
+        scanned_at = default_time
+        if raw_ts:
+            parsed = datetime.fromisoformat(str(raw_ts).replace('Z', '+00:00'))
+            if parsed.tzinfo is None:
+                parsed = local_to_utc(parsed)
+            scanned_at = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return cls(tag, reader_id, scanned_at)
+
+
+class TagCache:
+    """Tags atribuídas -> (equipment_id, última localização conhecida)"""
+
+    def __init__(self, ttl: float = DEFAULT_TAG_CACHE_TTL,
+                 miss_refresh: float = DEFAULT_TAG_CACHE_MISS_REFRESH):
+        self.ttl = ttl
+        self.miss_refresh = miss_refresh
+        self._entries: Optional[Dict[str, List]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries = None
+
+    def lookup(self, tag: str) -> Optional[Tuple[int, Optional[str]]]:
+        """(equipment_id, localização) da tag, ou None se não atribuída"""
+        with self._lock:
+            now = time.monotonic()
+            if self._entries is None or now - self._loaded_at > self.ttl:
+                self._load(now)
+            entry = self._entries.get(tag)
+            if entry is None and now - self._loaded_at > self.miss_refresh:
+                # Tag pode ter sido atribuída em outro processo
+                self._load(now)
+                entry = self._entries.get(tag)
+            return (entry[0], entry[1]) if entry else None
+
+    def set_location(self, tag: str, location: str) -> None:
+        with self._lock:
+            if self._entries is not None and tag in self._entries:
+                self._entries[tag][1] = location
+
+    def _load(self, now: float) -> None:
+        rows = db.session.execute(
+            select(Equipment.rfid_tag, Equipment.id, Equipment.rfid_last_location)
+            .where(Equipment.rfid_tag.isnot(None))
+        ).all()
+        self._entries = {row.rfid_tag: [row.id, row.rfid_last_location] for row in rows}
+        self._loaded_at = now
+        self.loads += 1
+
+
+class ReadDeduplicator:
+    """Aceita uma leitura por (tag, leitor) a cada janela"""
+
+    def __init__(self, window_ms: int = DEFAULT_DEDUP_WINDOW_MS):
+        self.window_seconds = window_ms / 1000.0
+        self._last_seen: Dict[Tuple[str, str], datetime] = {}
+        self._lock = threading.Lock()
+
+    def accept(self, read: ScanRead) -> bool:
+        key = (read.rfid_tag, read.reader_id)
+        with self._lock:
+            last = self._last_seen.get(key)
+            if last is not None and abs((read.scanned_at - last).total_seconds()) < self.window_seconds:
+                return False
+            if last is None or read.scanned_at > last:
+                self._last_seen[key] = read.scanned_at
+            return True
+
+    def prune(self, older_than: datetime) -> None:
+        with self._lock:
+            self._last_seen = {k: v for k, v in self._last_seen.items() if v >= older_than}
+
+
+class LocationBuffer:
+    """Última leitura pendente de gravação por equipamento"""
+
+    def __init__(self):
+        self._pending: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+
+    def add(self, equipment_id: int, read: ScanRead, location: str) -> int:
+        """Registra a leitura (se for a mais recente) e devolve o total pendente"""
+        with self._lock:
+            current = self._pending.get(equipment_id)
+            if current is None or read.scanned_at >= current['rfid_last_scan']:
+                self._pending[equipment_id] = {
+                    'id': equipment_id,
+                    'rfid_last_location': location,
+                    'rfid_last_scan': read.scanned_at,
+                    'rfid_reader_id': read.reader_id,
+                    'rfid_status': 'ativo',
+                }
+            return len(self._pending)
+
+    def drain(self) -> List[Dict]:
+        with self._lock:
+            rows, self._pending = list(self._pending.values()), {}
+        return rows
+
+    def restore(self, rows: Iterable[Dict]) -> None:
+        """Devolve linhas de um flush que falhou, sem sobrescrever leituras mais novas"""
+        with self._lock:
+            for row in rows:
+                current = self._pending.get(row['id'])
+                if current is None or row['rfid_last_scan'] > current['rfid_last_scan']:
+                    self._pending[row['id']] = row
+
+    def __len__(self):
+        return len(self._pending)
+
+
+class ReadLog:
+    """Leituras aceitas pendentes de gravação no histórico"""
+
+    def __init__(self):
+        self._reads: List[Tuple[int, str, str, datetime]] = []
+        self._lock = threading.Lock()
+
+    def append(self, equipment_id: int, read: ScanRead, location: str) -> int:
+        with self._lock:
+            self._reads.append((equipment_id, read.reader_id, location, read.scanned_at))
+            return len(self._reads)
+
+    def drain(self) -> List[Tuple[int, str, str, datetime]]:
+        with self._lock:
+            reads, self._reads = self._reads, []
+        return reads
+
+    def restore(self, reads: List[Tuple[int, str, str, datetime]]) -> None:
+        with self._lock:
+            self._reads = reads + self._reads
+
+    def __len__(self):
+        return len(self._reads)
+
+
+class RFIDIngestor:
+    """Pipeline de leituras de um app (cache, deduplicação e gravação em lote)"""
+
+    def __init__(self, app, readers: Dict[str, Dict]):
+        config = app.config
+        self.app = app
+        self.readers = readers
+        self.tags = TagCache(
+            ttl=config.get('RFID_TAG_CACHE_TTL', DEFAULT_TAG_CACHE_TTL),
+            miss_refresh=config.get('RFID_TAG_CACHE_MISS_REFRESH', DEFAULT_TAG_CACHE_MISS_REFRESH),
+        )
+        self.dedup = ReadDeduplicator(config.get('RFID_DEDUP_WINDOW_MS', DEFAULT_DEDUP_WINDOW_MS))
+        self.buffer = LocationBuffer()
+        self.history = ReadLog() if config.get('RFID_HISTORY_ENABLED', True) else None
+        self.flush_interval = config.get('RFID_FLUSH_INTERVAL_MS', DEFAULT_FLUSH_INTERVAL_MS) / 1000.0
+        self.flush_max_pending = config.get('RFID_FLUSH_MAX_PENDING', DEFAULT_FLUSH_MAX_PENDING)
+        self.stats = {'received': 0, 'accepted': 0, 'duplicates': 0, 'unknown_tag': 0,
+                      'unknown_reader': 0, 'flushes': 0, 'rows_written': 0, 'reads_logged': 0}
+        self._flush_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def ingest(self, reads: Iterable[ScanRead]) -> Dict:
+        """
+        Processa um lote de leituras
+
+        Returns:
+            Contadores do lote e mudanças de localização detectadas
+        """
+        summary = {'received': 0, 'accepted': 0, 'duplicates': 0, 'unknown_tag': 0, 'unknown_reader': 0}
+        changes, unknown_tags = [], set()
+        pending = 0
+        for read in reads:
+            summary['received'] += 1
+            reader = self.readers.get(read.reader_id)
+            if reader is None:
+                summary['unknown_reader'] += 1
+                continue
+            if not self.dedup.accept(read):
+                summary['duplicates'] += 1
+                continue
+            entry = self.tags.lookup(read.rfid_tag)
+            if entry is None:
+                summary['unknown_tag'] += 1
+                unknown_tags.add(read.rfid_tag)
+                continue
+
+            equipment_id, old_location = entry
+            location = reader['location']
+            if old_location != location:
+                changes.append({'equipment_id': equipment_id, 'rfid_tag': read.rfid_tag,
+                                'old_location': old_location, 'new_location': location,
+                                'reader_id': read.reader_id, 'scanned_at': read.scanned_at.isoformat()})
+                self.tags.set_location(read.rfid_tag, location)
+            pending = self.buffer.add(equipment_id, read, location)
+            if self.history is not None:
+                pending = max(pending, self.history.append(equipment_id, read, location))
+            summary['accepted'] += 1
+
+        for key, value in summary.items():
+            self.stats[key] += value
+
+        if self.flush_interval <= 0 or pending >= self.flush_max_pending:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+        summary['location_changes'] = changes
+        summary['unknown_tags'] = sorted(unknown_tags)
+        summary['pending_writes'] = self.pending()
+        return summary
+
+    def pending(self) -> int:
+        """Localizações e leituras de histórico aguardando gravação"""
+        return max(len(self.buffer), len(self.history) if self.history is not None else 0)
+
+    def flush(self) -> int:
+        """
+        Grava as localizações pendentes com um UPDATE em lote e as leituras no
+        histórico, na mesma transação; devolve as localizações gravadas
+        """
+        with self._flush_lock:
+            rows = self.buffer.drain()
+            reads = self.history.drain() if self.history is not None else []
+            if not rows and not reads:
+                return 0
+            try:
+                if reads:
+                    RFIDHistoryService.record(reads)
+                if rows:
+                    db.session.execute(update(Equipment), rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                # Leitores/locais cadastrados nesta transação não existem mais
+                discard_dimensions()
+                self.buffer.restore(rows)
+                if reads:
+                    self.history.restore(reads)
+                logger.error(f"[RFID] Erro ao gravar {len(rows)} localizações: {str(e)}")
+                return 0
+            self.stats['flushes'] += 1
+            self.stats['rows_written'] += len(rows)
+            self.stats['reads_logged'] += len(reads)
+            return len(rows)
+
+    def stop(self) -> None:
+        """Para a thread de gravação e grava o que estiver pendente"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+            self._flusher = None
+        if self.pending():
+            with self.app.app_context():
+                self.flush()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with _ingestor_lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name='rfid-flush', daemon=True)
+            self._flusher.start()
+            atexit.register(self.stop)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            if not self.pending():
+                continue
+            with self.app.app_context():
+                try:
+                    self.flush()
+                    # Limpeza das janelas de deduplicação antigas
+                    keep = timedelta(seconds=max(self.dedup.window_seconds * 10, 60))
+                    self.dedup.prune(get_current_time_for_db() - keep)
+                finally:
+                    db.session.remove()
+
+
+def get_ingestor(readers: Dict[str, Dict]) -> RFIDIngestor:
+    """Pipeline do app atual (criado na primeira leitura)"""
+    app = current_app._get_current_object()
+    ingestor = app.extensions.get(EXTENSION_KEY)
+    if ingestor is None:
+        with _ingestor_lock:
+            ingestor = app.extensions.get(EXTENSION_KEY)
+            if ingestor is None:
+                ingestor = RFIDIngestor(app, readers)
+                app.extensions[EXTENSION_KEY] = ingestor
+    return ingestor
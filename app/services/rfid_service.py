@@ -7,9 +7,16 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
 from flask import current_app
+from sqlalchemy import and_, func, or_, select, update
 
 from ..models import Equipment, db
 from ..utils.timezone_utils import get_current_time_for_db
+from .cache_service import CacheService
+from .rfid_history import RFIDHistoryService, discard_dimensions
+from .notification_service import NotificationService
+from .recipient_resolver import RecipientResolver
+from .rfid_ingest import EXTENSION_KEY, ScanRead, get_ingestor
+from .system_config_service import SystemConfigService
 
 logger = logging.getLogger(__name__)
 
@@ -74,8 +81,11 @@ class RFIDService:
             # Verificar se houve mudança de localização
             location_changed = old_location != location
 
+            RFIDHistoryService.record([(equipment.id, reader_id, location, equipment.rfid_last_scan)])
+
             # Salvar alterações
             db.session.commit()
+            RFIDService.invalidate_tag_cache()
 
             logger.info(f"Equipamento {equipment.id} ({rfid_tag}) detectado em {location}")
 
@@ -92,12 +102,60 @@ class RFIDService:
         except Exception as e:
             logger.error(f"Erro ao processar leitura RFID: {str(e)}")
             db.session.rollback()
+            discard_dimensions()
             return {
                 "success": False,
                 "message": f"Erro interno: {str(e)}",
                 "equipment": None
             }
 
+    @staticmethod
+    def scan_batch(items: List[Dict]) -> Dict:
+        """
+        Processa um lote de leituras de um ou mais leitores
+
+        As leituras passam pelo cache de tags e pela deduplicação por
+        (tag, leitor); as localizações são gravadas em lote (ver rfid_ingest).
+
+        Args:
+            items: Leituras no formato {"rfid_tag", "reader_id", "timestamp" (opcional)}
+
+        Returns:
+            Dict com contadores do lote, mudanças de localização e tags desconhecidas
+        """
+        now = get_current_time_for_db()
+        reads, invalid = [], 0
+        for item in items:
+            try:
+                reads.append(ScanRead.from_payload(item, now))
+            except (ValueError, TypeError, AttributeError):
+                invalid += 1
+
+        try:
+            result = get_ingestor(RFIDService.CONNECTED_READERS).ingest(reads)
+        except Exception as e:
+            logger.error(f"Erro ao processar lote RFID: {str(e)}")
+            db.session.rollback()
+            return {"success": False, "message": f"Erro interno: {str(e)}"}
+
+        result["invalid"] = invalid
+        result["success"] = True
+        result["message"] = f"{result['accepted']}/{len(items)} leituras aceitas"
+        return result
+
+    @staticmethod
+    def flush_pending_scans() -> int:
+        """Grava imediatamente as localizações pendentes do lote"""
+        ingestor = current_app.extensions.get(EXTENSION_KEY)
+        return ingestor.flush() if ingestor else 0
+
+    @staticmethod
+    def invalidate_tag_cache() -> None:
+        """Descarta o cache tag -> equipamento (após atribuir/remover tags)"""
+        ingestor = current_app.extensions.get(EXTENSION_KEY)
+        if ingestor is not None:
+            ingestor.tags.invalidate()
+
     @staticmethod
     def assign_rfid_tag(equipment_id: int, rfid_tag: str) -> Dict:
         """
@@ -127,6 +185,7 @@ class RFIDService:
             equipment.rfid_last_scan = get_current_time_for_db()
 
             db.session.commit()
+            RFIDService.invalidate_tag_cache()
 
             logger.info(f"Tag RFID {rfid_tag} atribuída ao equipamento {equipment_id}")
 
@@ -166,6 +225,7 @@ class RFIDService:
             equipment.rfid_reader_id = None
 
             db.session.commit()
+            RFIDService.invalidate_tag_cache()
 
             logger.info(f"Tag RFID {old_tag} removida do equipamento {equipment_id}")
 
@@ -243,6 +303,87 @@ class RFIDService:
             logger.error(f"Erro ao buscar equipamentos perdidos: {str(e)}")
             return []
 
+    @staticmethod
+    def lost_thresholds() -> Tuple[int, Dict[str, int]]:
+        """Horas sem leitura para considerar perdido: (padrão, {categoria: horas})"""
+        default_hours = SystemConfigService.get('rfid', 'lost_threshold_hours', 24)
+        by_category = SystemConfigService.get('rfid', 'lost_threshold_hours_by_category', {}) or {}
+        return int(default_hours), {str(k).lower(): int(v) for k, v in by_category.items()}
+
+    @staticmethod
+    def detect_lost_equipment(now: Optional[datetime] = None) -> int:
+        """
+        Marca como perdidos os equipamentos sem leitura dentro da janela da categoria
+
+        Lê apenas a fatia antiga do índice (rfid_status, rfid_last_scan), marca
+        tudo com um UPDATE em lote e enfileira um único alerta para a TI (apenas
+        usuários com email de ``equipment_lost`` ativo), listando só os
+        equipamentos que o UPDATE de fato marcou.
+
+        Returns:
+            Número de equipamentos marcados
+        """
+        now = now or get_current_time_for_db()
+        default_hours, by_category = RFIDService.lost_thresholds()
+        cutoffs = {category: now - timedelta(hours=hours) for category, hours in by_category.items()}
+        default_cutoff = now - timedelta(hours=default_hours)
+        latest_cutoff = max([default_cutoff, *cutoffs.values()])
+
+        category = func.lower(Equipment.category)
+        window = [and_(category == name, Equipment.rfid_last_scan < cutoff) for name, cutoff in cutoffs.items()]
+        default_window = Equipment.rfid_last_scan < default_cutoff
+        if cutoffs:
+            default_window = and_(category.notin_(list(cutoffs)), default_window)
+        window.append(default_window)
+
+        stale = db.session.execute(
+            select(Equipment.id, Equipment.name, Equipment.patrimony, Equipment.category,
+                   Equipment.rfid_tag, Equipment.rfid_last_location, Equipment.rfid_last_scan)
+            .where(Equipment.rfid_status == "ativo", Equipment.rfid_last_scan < latest_cutoff, or_(*window))
+            .order_by(Equipment.rfid_last_scan)
+        ).all()
+        if not stale:
+            return 0
+
+        # Leituras que chegarem depois da consulta mantêm o equipamento ativo
+        stale_ids = [row.id for row in stale]
+        statement = (
+            update(Equipment)
+            .where(Equipment.id.in_(stale_ids), Equipment.rfid_status == "ativo",
+                   Equipment.rfid_last_scan < latest_cutoff)
+            .values(rfid_status="perdido")
+            .execution_options(synchronize_session=False)
+        )
+        if db.engine.dialect.update_returning:
+            marked_ids = set(db.session.execute(statement.returning(Equipment.id)).scalars())
+        else:
+            db.session.execute(statement)
+            marked_ids = set(db.session.execute(
+                select(Equipment.id).where(Equipment.id.in_(stale_ids), Equipment.rfid_status == "perdido")
+            ).scalars())
+        marked_rows = [row for row in stale if row.id in marked_ids]
+        marked = len(marked_rows)
+
+        if marked and SystemConfigService.get('rfid', 'auto_alert_lost', True):
+            resolver = RecipientResolver()
+            NotificationService.send_email_fan_out(
+                resolver.with_email_enabled(resolver.ti_users(active_only=True), 'equipment_lost'),
+                f"[RFID] {marked} equipamento(s) sem leitura - possivelmente perdidos",
+                "emails/equipment_lost_alert.html",
+                "ti_user",
+                commit=False,
+                equipments=marked_rows,
+                default_hours=default_hours,
+                by_category=by_category,
+            )
+        db.session.commit()
+        if marked:
+            # UPDATE em lote não passa pelos eventos do ORM
+            CacheService.invalidate('equipment')
+
+        logger.warning(f"[RFID] {marked} equipamento(s) marcados como perdidos")
+        return marked
+
     @staticmethod
     def get_reader_status() -> Dict:
         """
@@ -0,0 +1,282 @@
+"""
+Execução coordenada dos jobs agendados entre processos
+
+Cada processo (ex.: workers do gunicorn) tem seu próprio APScheduler com os
+mesmos jobs. Antes de executar uma rodada, o processo precisa obter o lease do
+job na tabela ``scheduler_lease``: a aquisição é um ``UPDATE`` condicional (ou
+``INSERT`` na primeira vez, protegido pela chave primária), portanto atômica
+em qualquer banco. O lease vale por quase todo o intervalo do job, de modo que
+os disparos dos demais processos na mesma rodada são ignorados. Enquanto o job executa,
+uma thread renova ``heartbeat_at`` do lease; um lease "executando" só é
+considerado abandonado quando o heartbeat para de ser renovado (processo
+morto), e não após um tempo fixo de execução. Cada execução fica registrada
+em ``scheduler_job_run`` (início, duração, linhas, erro).
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+
+from ..models import SchedulerJobRun, SchedulerLease, db
+from ..utils.timezone_utils import get_current_time_for_db
+
+logger = logging.getLogger(__name__)
+
+# Folga entre o fim do lease e o próximo disparo do intervalo
+LEASE_GRACE_SECONDS = 30
+# Intervalo de renovação do heartbeat do lease durante a execução
+HEARTBEAT_INTERVAL_SECONDS = 60
+# Lease "executando" sem heartbeat há mais tempo que isso é considerado abandonado
+STALE_HEARTBEAT_SECONDS = 5 * HEARTBEAT_INTERVAL_SECONDS
+HISTORY_RETENTION_DAYS = 30
+
+# Chaves usadas para extrair "linhas processadas" do retorno dos jobs
+_ROW_COUNT_KEYS = ('processed', 'sent', 'created', 'updated', 'claimed')
+
+
+def process_owner() -> str:
+    """Identificação do processo atual (host:pid)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _LeaseHeartbeat:
+    """Thread que renova o heartbeat do lease enquanto o job executa"""
+
+    def __init__(self, engine, job_id: str, owner: str, interval_seconds: float):
+        self.engine = engine
+        self.job_id = job_id
+        self.owner = owner
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"lease-heartbeat-{job_id}",
+                                        daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self) -> None:
+        # Conexão própria: a sessão do job não é compartilhada entre threads
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                with self.engine.begin() as connection:
+                    SchedulerRuntime.heartbeat(self.job_id, self.owner, connection)
+            except Exception:
+                logger.exception(f"Erro ao renovar o lease do job {self.job_id}")
+
+
+class SchedulerRuntime:
+    """Lease por job, execução e histórico de rodadas"""
+
+    @staticmethod
+    def acquire_lease(job_id: str, interval_seconds: float, owner: Optional[str] = None) -> bool:
+        """
+        Tenta obter o lease de uma rodada do job
+
+        Args:
+            job_id: Identificador do job
+            interval_seconds: Intervalo do job (define a validade do lease)
+            owner: Processo solicitante (padrão: host:pid atual)
+
+        Returns:
+            True se este processo deve executar a rodada
+        """
+        owner = owner or process_owner()
+        now = get_current_time_for_db()
+        window = max(interval_seconds - min(LEASE_GRACE_SECONDS, interval_seconds * 0.1), 1)
+        values = dict(owner=owner, acquired_at=now, expires_at=now + timedelta(seconds=window),
+                      running_since=now, heartbeat_at=now)
+
+        table = SchedulerLease.__table__
+        result = db.session.execute(
+            update(table).where(
+                table.c.job_id == job_id,
+                table.c.expires_at <= now,
+                db.or_(
+                    table.c.running_since.is_(None),
+                    func.coalesce(table.c.heartbeat_at, table.c.running_since)
+                    < now - timedelta(seconds=STALE_HEARTBEAT_SECONDS),
+                ),
+            ).values(**values)
+        )
+        if result.rowcount == 1:
+            db.session.commit()
+            return True
+        db.session.commit()
+
+        if db.session.get(SchedulerLease, job_id) is not None:
+            return False
+        try:
+            db.session.add(SchedulerLease(job_id=job_id, **values))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            # Outro processo criou o lease ao mesmo tempo
+            db.session.rollback()
+            return False
+
+    @staticmethod
+    def heartbeat(job_id: str, owner: Optional[str] = None, connection=None) -> bool:
+        """
+        Renova o heartbeat do lease de um job em execução
+
+        Args:
+            job_id: Identificador do job
+            owner: Processo dono do lease (padrão: host:pid atual)
+            connection: Conexão a usar (padrão: sessão atual, com commit)
+
+        Returns:
+            False se o lease não pertence mais a este processo
+        """
+        table = SchedulerLease.__table__
+        statement = update(table).where(
+            table.c.job_id == job_id,
+            table.c.owner == (owner or process_owner()),
+            table.c.running_since.isnot(None),
+        ).values(heartbeat_at=get_current_time_for_db())
+        if connection is not None:
+            return connection.execute(statement).rowcount == 1
+        result = db.session.execute(statement)
+        db.session.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def release_lease(job_id: str, owner: Optional[str] = None) -> None:
+        """Marca o fim da execução (o lease continua valendo até expires_at)"""
+        table = SchedulerLease.__table__
+        db.session.execute(
+            update(table).where(
+                table.c.job_id == job_id, table.c.owner == (owner or process_owner())
+            ).values(running_since=None)
+        )
+        db.session.commit()
+
+    @staticmethod
+    def run(job_id: str, job: Callable, interval_seconds: float):
+        """
+        Executa o job se este processo obtiver o lease, registrando a rodada
+
+        Returns:
+            Retorno do job, ou None se a rodada pertence a outro processo ou falhou
+        """
+        owner = process_owner()
+        if not SchedulerRuntime.acquire_lease(job_id, interval_seconds, owner):
+            logger.debug(f"Job {job_id}: rodada executada por outro processo")
+            return None
+
+        heartbeat = _LeaseHeartbeat(db.engine, job_id, owner, HEARTBEAT_INTERVAL_SECONDS)
+        heartbeat.start()
+        try:
+            run = SchedulerJobRun(job_id=job_id, owner=owner, status=SchedulerJobRun.STATUS_RUNNING,
+                                  started_at=get_current_time_for_db())
+            db.session.add(run)
+            db.session.commit()
+            run_id = run.id
+
+            started = time.perf_counter()
+            result, error = None, None
+            try:
+                result = job()
+            except Exception as e:
+                error = e
+                logger.exception(f"Erro no job agendado {job_id}")
+                db.session.rollback()
+
+            run = db.session.get(SchedulerJobRun, run_id)
+            run.finished_at = get_current_time_for_db()
+            run.duration_ms = int((time.perf_counter() - started) * 1000)
+            if error is None:
+                run.status = SchedulerJobRun.STATUS_SUCCESS
+                run.rows_processed = SchedulerRuntime.rows_processed(result)
+            else:
+                run.status = SchedulerJobRun.STATUS_FAILED
+                run.error = f"{type(error).__name__}: {error}"[:2000]
+            db.session.commit()
+            return result
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            # Liberado mesmo se o registro da rodada falhar
+            heartbeat.stop()
+            try:
+                SchedulerRuntime.release_lease(job_id, owner)
+            except Exception:
+                db.session.rollback()
+                logger.exception(f"Erro ao liberar o lease do job {job_id}")
+
+    @staticmethod
+    def rows_processed(result) -> Optional[int]:
+        """Quantidade de itens processados a partir do retorno do job"""
+        if isinstance(result, bool):
+            return None
+        if isinstance(result, int):
+            return result
+        if isinstance(result, (list, tuple)):
+            return len(result)
+        if isinstance(result, dict):
+            for key in _ROW_COUNT_KEYS:
+                value = result.get(key)
+                if isinstance(value, int) and not isinstance(value, bool):
+                    return value
+            counts = [v for v in result.values() if isinstance(v, int) and not isinstance(v, bool)]
+            return sum(counts) if counts else None
+        return None
+
+    @staticmethod
+    def recent_runs(limit: int = 50, job_id: Optional[str] = None) -> List[Dict]:
+        """Últimas execuções (mais recentes primeiro)"""
+        query = SchedulerJobRun.query
+        if job_id:
+            query = query.filter(SchedulerJobRun.job_id == job_id)
+        return [r.to_dict() for r in query.order_by(SchedulerJobRun.started_at.desc()).limit(limit)]
+
+    @staticmethod
+    def job_summary(hours: int = 24) -> List[Dict]:
+        """Resumo por job no período: execuções, erros, duração média/máxima e última execução"""
+        since = get_current_time_for_db() - timedelta(hours=hours)
+        rows = db.session.query(
+            SchedulerJobRun.job_id,
+            func.count(SchedulerJobRun.id),
+            func.sum(db.case((SchedulerJobRun.status == SchedulerJobRun.STATUS_FAILED, 1), else_=0)),
+            func.avg(SchedulerJobRun.duration_ms),
+            func.max(SchedulerJobRun.duration_ms),
+            func.sum(SchedulerJobRun.rows_processed),
+            func.max(SchedulerJobRun.started_at),
+        ).filter(SchedulerJobRun.started_at >= since).group_by(SchedulerJobRun.job_id).all()
+
+        leases = {lease.job_id: lease for lease in SchedulerLease.query.all()}
+        summary = []
+        for job_id, runs, errors, avg_ms, max_ms, rows_total, last_run in sorted(rows):
+            lease = leases.get(job_id)
+            summary.append({
+                'job_id': job_id,
+                'runs': runs,
+                'errors': int(errors or 0),
+                'avg_duration_ms': round(float(avg_ms), 1) if avg_ms is not None else None,
+                'max_duration_ms': max_ms,
+                'rows_processed': int(rows_total) if rows_total is not None else None,
+                'last_run': last_run.isoformat() if last_run else None,
+                'owner': lease.owner if lease else None,
+                'running': bool(lease and lease.running_since),
+            })
+        return summary
+
+    @staticmethod
+    def cleanup_history(days: int = HISTORY_RETENTION_DAYS) -> int:
+        """Remove execuções mais antigas que ``days`` dias"""
+        limit = get_current_time_for_db() - timedelta(days=days)
+        deleted = SchedulerJobRun.query.filter(SchedulerJobRun.started_at < limit).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+        return deleted
@@ -0,0 +1,113 @@
+"""
+Recálculo de status de SLA em lote
+
+O status de SLA de empréstimos (``EquipmentLoan.sla_status``) e chamados
+(``Chamado.sla_status``) é recalculado no banco com um ``UPDATE ... SET
+sla_status = CASE ...`` restrito às linhas cujo status mudou. As regras são as
+mesmas de ``EquipmentLoan.update_sla_status`` e ``Chamado.status_sla``; as
+linhas que mudaram são devolvidas para que o chamador envie alertas. Como o
+UPDATE em lote não passa pelos eventos do ORM, o cache de resultados é
+invalidado explicitamente quando alguma linha muda.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, case, or_, select, update
+
+from ..models import Chamado, EquipmentLoan, db
+from ..utils.timezone_utils import get_current_time_for_db
+from .cache_service import MODEL_TAGS, CacheService
+
+# Prazo restante abaixo do qual o SLA fica em "atencao"
+ATTENTION_WINDOW = timedelta(hours=1)
+
+
+@dataclass(frozen=True)
+class SlaTransition:
+    """Linha cujo status de SLA mudou no recálculo"""
+    id: int
+    status: str
+
+
+class SlaEngine:
+    """Atualização de status de SLA com instruções em lote"""
+
+    @staticmethod
+    def equipment_loan_status(now: datetime):
+        """Expressão CASE equivalente a EquipmentLoan.update_sla_status"""
+        deadline = EquipmentLoan.sla_deadline
+        return case(
+            (EquipmentLoan.status == "devolvido", "cumprido"),
+            (deadline < now, "vencido"),
+            (deadline < now + ATTENTION_WINDOW, "atencao"),
+            else_="normal",
+        )
+
+    @staticmethod
+    def chamado_status(now: datetime):
+        """Expressão CASE equivalente a Chamado.status_sla"""
+        deadline = Chamado.prazo_sla
+        return case(
+            (Chamado.sla_cumprido == True, "cumprido"),
+            (Chamado.sla_cumprido == False, "vencido"),
+            (deadline.is_(None), "normal"),
+            (deadline < now, "vencido"),
+            (deadline < now + ATTENTION_WINDOW, "atencao"),
+            else_="normal",
+        )
+
+    @staticmethod
+    def recompute_equipment_loans(now: Optional[datetime] = None) -> List[SlaTransition]:
+        """
+        Recalcula o SLA dos empréstimos ativos com prazo definido
+
+        Args:
+            now: Momento de referência (padrão: horário local, como update_sla_status)
+
+        Returns:
+            Empréstimos cujo status mudou, com o novo status
+        """
+        now = now or datetime.now()
+        return SlaEngine._apply(
+            EquipmentLoan,
+            SlaEngine.equipment_loan_status(now),
+            and_(EquipmentLoan.status == "ativo", EquipmentLoan.sla_deadline.isnot(None)),
+        )
+
+    @staticmethod
+    def recompute_chamados(now: Optional[datetime] = None) -> List[SlaTransition]:
+        """
+        Recalcula o SLA persistido dos chamados
+
+        Args:
+            now: Momento de referência (padrão: get_current_time_for_db, como status_sla)
+
+        Returns:
+            Chamados cujo status mudou, com o novo status
+        """
+        now = now or get_current_time_for_db()
+        return SlaEngine._apply(Chamado, SlaEngine.chamado_status(now))
+
+    @staticmethod
+    def _apply(model, new_status, scope=None) -> List[SlaTransition]:
+        column = model.__table__.c.sla_status
+        table = model.__table__
+        changed = or_(column.is_(None), column != new_status)
+        condition = and_(scope, changed) if scope is not None else changed
+
+        if db.engine.dialect.update_returning:
+            rows = db.session.execute(
+                update(table).where(condition).values(sla_status=new_status)
+                .returning(table.c.id, table.c.sla_status)
+            ).all()
+        else:
+            rows = db.session.execute(select(table.c.id, new_status).where(condition)).all()
+            if rows:
+                db.session.execute(
+                    update(table).where(table.c.id.in_([r[0] for r in rows])).values(sla_status=new_status)
+                )
+        db.session.commit()
+        if rows:
+            CacheService.invalidate(MODEL_TAGS[model.__name__])
+        return [SlaTransition(row[0], row[1]) for row in rows]
@@ -269,6 +269,7 @@ class SystemConfigService:
             # RFID
             ('rfid', 'scan_interval', 5, 'int', 'Intervalo de scan (segundos)'),
             ('rfid', 'lost_threshold_hours', 24, 'int', 'Horas para considerar perdido'),
+            ('rfid', 'lost_threshold_hours_by_category', {}, 'json', 'Horas para considerar perdido, por categoria'),
             ('rfid', 'auto_alert_lost', True, 'bool', 'Alertar automaticamente equipamentos perdidos'),
             ('rfid', 'track_movement', True, 'bool', 'Rastrear movimentação'),
         ]
@@ -0,0 +1,219 @@
+"""
+Serviço de métricas de tutoriais calculadas no banco de dados
+"""
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, case, cast, func
+
+from ..models import FeedbackTutorial, Tutorial, TutorialViewCounter, VisualizacaoTutorial, db
+from ..utils import time_buckets
+
+logger = logging.getLogger(__name__)
+
+
+class TutorialMetricsService:
+    """
+    Métricas de tutoriais via agregações SQL e contador materializado de visualizações
+    """
+
+    @staticmethod
+    def feedback_counts(autor_id: Optional[int] = None,
+                        tutorial_id: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Conta feedbacks úteis e não úteis com uma única query agregada
+
+        Args:
+            autor_id: Restringe aos tutoriais de um autor (opcional)
+            tutorial_id: Restringe a um tutorial (opcional)
+
+        Returns:
+            Tupla (úteis, não úteis)
+        """
+        query = db.session.query(
+            func.count(case((FeedbackTutorial.util == True, 1))),  # noqa: E712
+            func.count(case((FeedbackTutorial.util == False, 1))),  # noqa: E712
+        )
+        if autor_id is not None:
+            query = query.join(Tutorial, Tutorial.id == FeedbackTutorial.tutorial_id).filter(
+                Tutorial.autor_id == autor_id
+            )
+        if tutorial_id is not None:
+            query = query.filter(FeedbackTutorial.tutorial_id == tutorial_id)
+
+        util, nao_util = query.one()
+        return util or 0, nao_util or 0
+
+    @staticmethod
+    def total_views(autor_id: Optional[int] = None) -> int:
+        """
+        Total de visualizações a partir do contador materializado
+
+        Args:
+            autor_id: Restringe aos tutoriais de um autor (opcional)
+
+        Returns:
+            Quantidade de visualizações
+        """
+        query = db.session.query(func.coalesce(func.sum(TutorialViewCounter.total_views), 0))
+        if autor_id is not None:
+            query = query.join(Tutorial, Tutorial.id == TutorialViewCounter.tutorial_id).filter(
+                Tutorial.autor_id == autor_id
+            )
+        return int(query.scalar() or 0)
+
+    @staticmethod
+    def top_viewed(limit: int = 10, include_unviewed: bool = False) -> List[Dict]:
+        """
+        Tutoriais mais visualizados (ORDER BY visualizações DESC LIMIT n)
+
+        Args:
+            limit: Número máximo de tutoriais
+            include_unviewed: Se True, completa o ranking com tutoriais sem visualizações
+
+        Returns:
+            Lista de dicionários com id, titulo, categoria e visualizacoes
+        """
+        views = func.coalesce(TutorialViewCounter.total_views, 0)
+        query = db.session.query(
+            Tutorial.id,
+            Tutorial.titulo,
+            Tutorial.categoria,
+            views.label('visualizacoes'),
+        ).outerjoin(
+            TutorialViewCounter, TutorialViewCounter.tutorial_id == Tutorial.id
+        )
+        if not include_unviewed:
+            query = query.filter(TutorialViewCounter.total_views > 0)
+
+        rows = query.order_by(views.desc(), Tutorial.id).limit(limit).all()
+        return [
+            {
+                'id': r.id,
+                'titulo': r.titulo,
+                'categoria': r.categoria or 'Geral',
+                'visualizacoes': r.visualizacoes,
+            }
+            for r in rows
+        ]
+
+    @staticmethod
+    def stats_by_tutorial(tutorial_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """
+        Visualizações e feedbacks de vários tutoriais com duas queries agrupadas
+
+        Args:
+            tutorial_ids: IDs dos tutoriais
+
+        Returns:
+            Dict {tutorial_id: {'visualizacoes', 'feedbacks_util', 'feedbacks_nao_util'}}
+        """
+        stats = {
+            tid: {'visualizacoes': 0, 'feedbacks_util': 0, 'feedbacks_nao_util': 0}
+            for tid in tutorial_ids
+        }
+        if not stats:
+            return stats
+
+        views = db.session.query(
+            TutorialViewCounter.tutorial_id, TutorialViewCounter.total_views
+        ).filter(TutorialViewCounter.tutorial_id.in_(tutorial_ids)).all()
+        for tutorial_id, total in views:
+            stats[tutorial_id]['visualizacoes'] = total or 0
+
+        feedbacks = db.session.query(
+            FeedbackTutorial.tutorial_id,
+            func.count(case((FeedbackTutorial.util == True, 1))),  # noqa: E712
+            func.count(case((FeedbackTutorial.util == False, 1))),  # noqa: E712
+        ).filter(
+            FeedbackTutorial.tutorial_id.in_(tutorial_ids)
+        ).group_by(FeedbackTutorial.tutorial_id).all()
+        for tutorial_id, util, nao_util in feedbacks:
+            stats[tutorial_id]['feedbacks_util'] = util or 0
+            stats[tutorial_id]['feedbacks_nao_util'] = nao_util or 0
+
+        return stats
+
+    @staticmethod
+    def daily_views(tutorial_id: int, limit: int = 15) -> List[Tuple[date, int]]:
+        """
+        Visualizações por dia de um tutorial (apenas os ``limit`` dias mais recentes com acesso)
+
+        Args:
+            tutorial_id: ID do tutorial
+            limit: Quantidade máxima de dias
+
+        Returns:
+            Lista de tuplas (dia, visualizações) em ordem cronológica
+        """
+        dialect_name = db.session.get_bind().dialect.name
+        day = time_buckets.bucket_expression(VisualizacaoTutorial.data, 'day', dialect_name)
+        if day is None:
+            day = cast(VisualizacaoTutorial.data, Date)
+        day = day.label('dia')
+
+        rows = db.session.query(day, func.count(VisualizacaoTutorial.id)).filter(
+            VisualizacaoTutorial.tutorial_id == tutorial_id
+        ).group_by(day).order_by(day.desc()).limit(limit).all()
+
+        return [
+            (time_buckets.coerce_bucket(dia, 'day'), total)
+            for dia, total in reversed(rows)
+        ]
+
+    @staticmethod
+    def dashboard_summary(top_n: int = 5) -> Dict:
+        """
+        Resumo de tutoriais para o dashboard
+
+        Args:
+            top_n: Quantidade de tutoriais no ranking de visualizações
+
+        Returns:
+            Dict com total, feedbacks e ranking de visualizações
+        """
+        total_tutoriais = db.session.query(func.count(Tutorial.id)).scalar() or 0
+        feedbacks_util, feedbacks_nao_util = TutorialMetricsService.feedback_counts()
+        top = TutorialMetricsService.top_viewed(limit=top_n)
+
+        return {
+            'total': total_tutoriais,
+            'feedbacks_util': feedbacks_util,
+            'feedbacks_nao_util': feedbacks_nao_util,
+            'top_ids': [t['id'] for t in top],
+            'top_labels': [t['titulo'] for t in top],
+            'top_values': [t['visualizacoes'] for t in top],
+        }
+
+    @staticmethod
+    def rebuild_view_counters() -> int:
+        """
+        Recalcula o contador materializado a partir de VisualizacaoTutorial
+
+        Usado para o preenchimento inicial ou para corrigir divergências.
+
+        Returns:
+            Quantidade de tutoriais com contador gravado
+        """
+        try:
+            rows = db.session.query(
+                VisualizacaoTutorial.tutorial_id,
+                func.count(VisualizacaoTutorial.id),
+                func.max(VisualizacaoTutorial.data),
+            ).group_by(VisualizacaoTutorial.tutorial_id).all()
+
+            db.session.query(TutorialViewCounter).delete(synchronize_session=False)
+            db.session.bulk_insert_mappings(TutorialViewCounter, [
+                {'tutorial_id': tutorial_id, 'total_views': total, 'last_viewed_at': last_view}
+                for tutorial_id, total, last_view in rows
+            ])
+            db.session.commit()
+
+            logger.info(f"Contadores de visualização recalculados para {len(rows)} tutoriais")
+            return len(rows)
+
+        except Exception as e:
+            logger.error(f"Erro ao recalcular contadores de visualização: {str(e)}")
+            db.session.rollback()
+            raise
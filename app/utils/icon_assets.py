@@ -0,0 +1,94 @@
+"""
+Geração dos ícones PWA e do favicon a partir de ``static/icons/logo.svg``
+
+A renderização (cairosvg/Pillow) não roda mais em ``create_app``: os ícones
+são gerados pelo comando ``flask icons`` (ex.: no deploy) ou, se ainda
+faltarem, na primeira requisição do processo. ``missing_icons`` só verifica a
+existência dos arquivos, sem importar as bibliotecas de imagem.
+"""
+import logging
+import os
+from io import BytesIO
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+ICON_TARGETS = (
+    (144, 'icon-144x144.png'),
+    (180, 'icon-180x180.png'),
+    (192, 'icon-192x192.png'),
+    (512, 'icon-512x512.png'),
+)
+
+
+def missing_icons(static_folder: str) -> List[str]:
+    """Arquivos de ícone ainda não gerados (vazio se não houver logo.svg)"""
+    icons_dir = os.path.join(static_folder, 'icons')
+    if not os.path.exists(os.path.join(icons_dir, 'logo.svg')):
+        return []
+    missing = [
+        os.path.join(icons_dir, filename)
+        for _, filename in ICON_TARGETS
+        if not os.path.exists(os.path.join(icons_dir, filename))
+    ]
+    ico_path = os.path.join(static_folder, 'favicon.ico')
+    if not os.path.exists(ico_path):
+        missing.append(ico_path)
+    return missing
+
+
+def ensure_icons(static_folder: str) -> bool:
+    """
+    Gera os ícones ausentes
+
+    Os PNGs dependem do cairosvg (opcional); sem ele, o favicon é gerado a
+    partir do ícone 192x192 já existente.
+
+    Returns:
+        True se algum arquivo foi criado
+    """
+    icons_dir = os.path.join(static_folder, 'icons')
+    svg_path = os.path.join(icons_dir, 'logo.svg')
+    if not os.path.exists(svg_path):
+        return False
+    try:
+        import cairosvg  # opcional
+    except Exception:
+        cairosvg = None
+
+    def render_svg(size) -> Optional[bytes]:
+        if not cairosvg:
+            return None
+        with open(svg_path, 'rb') as f:
+            data = f.read()
+        return cairosvg.svg2png(bytestring=data, output_width=size, output_height=size)
+
+    updated = False
+    for size, filename in ICON_TARGETS:
+        out_path = os.path.join(icons_dir, filename)
+        if not os.path.exists(out_path):
+            png_bytes = render_svg(size)
+            if png_bytes:
+                with open(out_path, 'wb') as w:
+                    w.write(png_bytes)
+                updated = True
+
+    ico_path = os.path.join(static_folder, 'favicon.ico')
+    if not os.path.exists(ico_path):
+        from PIL import Image
+
+        png32 = render_svg(32)
+        png192_path = os.path.join(icons_dir, 'icon-192x192.png')
+        if png32:
+            im = Image.open(BytesIO(png32)).convert('RGBA')
+        elif os.path.exists(png192_path):
+            im = Image.open(png192_path).convert('RGBA')
+        else:
+            im = None
+        if im is not None:
+            im.save(ico_path, format='ICO', sizes=[(16, 16), (32, 32)])
+            updated = True
+
+    if updated:
+        logger.info('Icon assets ensured/updated')
+    return updated
@@ -0,0 +1,93 @@
+"""
+Paginação por chave (keyset/seek)
+
+Em vez de ``OFFSET``, cada página continua a partir do último registro da
+anterior: ``WHERE (ordem, id) > (último_valor, último_id)``. O custo não cresce
+com o número da página e a listagem não "pula" registros quando novas linhas
+entram. O cursor é opaco para o cliente (JSON em base64 url-safe).
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, List, Optional
+
+from sqlalchemy import and_, or_
+
+
+@dataclass
+class KeysetPage:
+    """Página de resultados e cursor da próxima"""
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    per_page: int = 0
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(value, row_id: int) -> str:
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, column) -> Optional[tuple]:
+    """Valor de ordenação e id do cursor, ou None se inválido"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        python_type = column.type.python_type
+        if value is not None and python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif value is not None and python_type is date:
+            value = date.fromisoformat(value)
+        return value, int(row_id)
+    except (ValueError, TypeError, NotImplementedError):
+        return None
+
+
+def keyset_page(query, order_column, id_column, cursor: Optional[str] = None,
+                per_page: int = 50, descending: bool = False) -> KeysetPage:
+    """
+    Executa uma página de ``query`` ordenada por (order_column, id_column)
+
+    Args:
+        query: Query ORM já filtrada (sem order_by/limit)
+        order_column: Coluna de ordenação (não nula)
+        id_column: Chave primária, usada como desempate
+        cursor: Cursor devolvido pela página anterior
+        per_page: Tamanho da página
+        descending: Ordem decrescente
+
+    Returns:
+        KeysetPage; uma linha extra é lida para saber se há próxima página
+    """
+    position = decode_cursor(cursor, order_column) if cursor else None
+    if position is not None:
+        value, row_id = position
+        if descending:
+            query = query.filter(or_(order_column < value, and_(order_column == value, id_column < row_id)))
+        else:
+            query = query.filter(or_(order_column > value, and_(order_column == value, id_column > row_id)))
+
+    if descending:
+        query = query.order_by(order_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(order_column.asc(), id_column.asc())
+
+    rows = query.limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, order_column.key), getattr(last, id_column.key))
+    return KeysetPage(items=items, next_cursor=next_cursor, per_page=per_page)
@@ -0,0 +1,305 @@
+"""
+Índice de arquivos de log (offsets por timestamp e nível)
+
+Para cada arquivo de log (o atual e os rotacionados ``.1``, ``.2``...) é mantido
+um índice lateral com um registro de tamanho fixo por entrada:
+``(offset em bytes, timestamp em ms, nível)``. Há um arquivo de registros com
+todas as entradas e um por nível, então filtrar por nível ou por período é
+aritmética de posição e busca binária, sem ler o log. São reconhecidas linhas
+em texto ("data hora,ms NÍVEL: ...") e em JSON (``{"ts": ..., "level": ...}``).
+
+O índice é incremental: ``refresh`` só lê os bytes escritos desde a última
+execução. O nome do índice usa o inode e a primeira linha do arquivo, assim ele
+continua válido depois que o ``RotatingFileHandler`` renomeia ``app.log`` para
+``app.log.1`` e é refeito quando o arquivo é truncado ou substituído.
+
+As entradas são lidas do fim para o início em blocos (``seek``), de forma que
+uma página custa O(tamanho da página) e não O(tamanho do log).
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import struct
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+RECORD = struct.Struct('<QqB')  # offset, timestamp (ms), nível
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+LEVEL_CODES = {name: code for code, name in enumerate(LEVELS)}
+OTHER_LEVEL = 255
+
+# Início de uma entrada: "2030-05-06 12:00:00,123 ERROR: ..." (dois-pontos opcional)
+ENTRY_HEADER = re.compile(rb'^(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2}),(\d{3})\s+(\w+)(?::|\s|$)')
+# Mesma informação no início de uma linha JSON (utils/structured_logging)
+JSON_ENTRY_HEADER = re.compile(
+    rb'^\{"ts":\s*"(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2}),(\d{3})",\s*"level":\s*"(\w+)"'
+)
+
+READ_CHUNK = 1024 * 1024
+RECORD_BLOCK = 4096
+MAX_SPAN_READ = 1024 * 1024
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_ms(value: datetime) -> int:
+    """Timestamp do log (horário local, sem timezone) em ms"""
+    return int((value - _EPOCH).total_seconds() * 1000)
+
+
+def from_ms(value: int) -> datetime:
+    return _EPOCH + timedelta(milliseconds=value)
+
+
+class RecordFile:
+    """Registros de tamanho fixo (offset, ts, nível) em ordem de escrita"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.path) // RECORD.size
+        except OSError:
+            return 0
+
+    def append(self, data: bytes) -> None:
+        with open(self.path, 'ab') as f:
+            f.write(data)
+
+    def read(self, lo: int, hi: int) -> List[Tuple[int, int, int]]:
+        """Registros [lo, hi) em uma única leitura"""
+        if hi <= lo:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(lo * RECORD.size)
+            data = f.read((hi - lo) * RECORD.size)
+        return list(RECORD.iter_unpack(data))
+
+    def bisect(self, ts_ms: int, right: bool = False) -> int:
+        """Primeira posição com ts >= ts_ms (ou > ts_ms com right=True)"""
+        lo, hi = 0, len(self)
+        if not hi:
+            return 0
+        with open(self.path, 'rb') as f:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                f.seek(mid * RECORD.size)
+                _, ts, _ = RECORD.unpack(f.read(RECORD.size))
+                if ts < ts_ms or (right and ts == ts_ms):
+                    lo = mid + 1
+                else:
+                    hi = mid
+        return lo
+
+    def window(self, start: Optional[datetime], end: Optional[datetime]) -> Tuple[int, int]:
+        """Posições [lo, hi) das entradas com start <= ts <= end"""
+        lo = self.bisect(to_ms(start)) if start else 0
+        hi = self.bisect(to_ms(end), right=True) if end else len(self)
+        return lo, max(lo, hi)
+
+
+class IndexedLogFile:
+    """Um arquivo de log e seu índice lateral"""
+
+    def __init__(self, path: str, index_dir: str):
+        self.path = path
+        self.index_dir = index_dir
+        self.key = self._identity()
+        self.bytes_parsed = 0  # Bytes lidos do log no último refresh
+
+    @property
+    def indexable(self) -> bool:
+        return self.key is not None
+
+    def _identity(self) -> Optional[str]:
+        """inode + hash da primeira linha; None enquanto a primeira linha não terminou"""
+        try:
+            with open(self.path, 'rb') as f:
+                head = f.readline(4096)
+            inode = os.stat(self.path).st_ino
+        except OSError:
+            return None
+        if not head.endswith(b'\n'):
+            return None
+        return f"{inode}-{hashlib.sha1(head).hexdigest()[:12]}"
+
+    def _index_path(self, suffix: str) -> str:
+        return os.path.join(self.index_dir, f"{self.key}.{suffix}")
+
+    def records(self, level: Optional[str] = None) -> RecordFile:
+        """Registros de todas as entradas ou de um nível"""
+        return RecordFile(self._index_path(level.upper() if level else 'all'))
+
+    def _load_meta(self) -> Dict:
+        try:
+            with open(self._index_path('json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'size': 0}
+
+    def _save_meta(self, meta: Dict) -> None:
+        path = self._index_path('json')
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    def _reset(self) -> None:
+        for path in glob.glob(os.path.join(self.index_dir, f"{self.key}.*")):
+            if not path.endswith('.lock'):
+                os.remove(path)
+
+    def refresh(self) -> int:
+        """Indexa os bytes novos do log; devolve quantas entradas foram adicionadas"""
+        self.bytes_parsed = 0
+        if not self.indexable:
+            return 0
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(self._index_path('lock'), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                return self._refresh_locked()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refresh_locked(self) -> int:
+        meta = self._load_meta()
+        size = os.path.getsize(self.path)
+        if size < meta['size']:
+            # Truncado no mesmo inode: refazer
+            self._reset()
+            meta = {'size': 0}
+        if size == meta['size']:
+            return 0
+
+        added = 0
+        position = meta['size']
+        with open(self.path, 'rb') as f:
+            f.seek(position)
+            while position < size:
+                chunk = f.read(min(READ_CHUNK, size - position))
+                end = chunk.rfind(b'\n')
+                if end < 0:
+                    if len(chunk) < READ_CHUNK:
+                        break  # Última linha ainda sendo escrita
+                    end = len(chunk) - 1  # Linha enorme: segue sem indexar o meio
+                    position += end + 1
+                    continue
+                chunk = chunk[:end + 1]
+                added += self._index_chunk(chunk, position)
+                position += len(chunk)
+                self.bytes_parsed += len(chunk)
+                f.seek(position)
+
+        meta['size'] = position
+        self._save_meta(meta)
+        return added
+
+    def _index_chunk(self, chunk: bytes, base_offset: int) -> int:
+        everything, by_level = [], {}
+        offset = 0
+        for line in chunk.split(b'\n')[:-1]:  # O trecho sempre termina em '\n'
+            match = (JSON_ENTRY_HEADER if line[:1] == b'{' else ENTRY_HEADER).match(line)
+            if match:
+                year, month, day, hour, minute, second, ms = (int(g) for g in match.groups()[:7])
+                try:
+                    ts = to_ms(datetime(year, month, day, hour, minute, second, ms * 1000))
+                except ValueError:
+                    ts = None
+                if ts is not None:
+                    level = LEVEL_CODES.get(match.group(8).decode('ascii', 'ignore').upper(), OTHER_LEVEL)
+                    record = RECORD.pack(base_offset + offset, ts, level)
+                    everything.append(record)
+                    if level != OTHER_LEVEL:
+                        by_level.setdefault(level, []).append(record)
+            offset += len(line) + 1
+
+        if everything:
+            self.records().append(b''.join(everything))
+        for level, records in by_level.items():
+            self.records(LEVELS[level]).append(b''.join(records))
+        return len(everything)
+
+    def indexed_size(self) -> int:
+        return self._load_meta()['size']
+
+    def iter_reverse(self, records: RecordFile, lo: int, hi: int) -> Iterator[Tuple[int, int, int, bytes]]:
+        """
+        Entradas [lo, hi) do fim para o início: (offset, ts, nível, linha)
+
+        Lê blocos de registros e, quando estão próximos, o trecho do log que
+        os contém em uma única leitura.
+        """
+        with open(self.path, 'rb') as f:
+            while hi > lo:
+                block_lo = max(lo, hi - RECORD_BLOCK)
+                block = records.read(block_lo, hi)
+                hi = block_lo
+                if not block:
+                    continue
+                span_start = block[0][0]
+                f.seek(block[-1][0])
+                tail = f.readline()
+                span_end = block[-1][0] + len(tail)
+                if span_end - span_start <= MAX_SPAN_READ:
+                    f.seek(span_start)
+                    data = f.read(span_end - span_start)
+                    for offset, ts, level in reversed(block):
+                        rel = offset - span_start
+                        line_end = data.find(b'\n', rel)
+                        yield offset, ts, level, data[rel:line_end if line_end >= 0 else len(data)]
+                else:
+                    for offset, ts, level in reversed(block):
+                        f.seek(offset)
+                        yield offset, ts, level, f.readline().rstrip(b'\n')
+
+
+class LogIndex:
+    """Arquivo de log atual e rotacionados, do mais novo para o mais antigo"""
+
+    def __init__(self, log_path: str, index_dir: Optional[str] = None):
+        self.log_path = log_path
+        # Um diretório por log: a limpeza de índices órfãos não afeta outros logs
+        base_dir = index_dir or os.path.join(os.path.dirname(os.path.abspath(log_path)), '.logindex')
+        self.index_dir = os.path.join(base_dir, os.path.basename(log_path))
+
+    def paths(self) -> List[str]:
+        rotated = []
+        for path in glob.glob(f"{glob.escape(self.log_path)}.*"):
+            suffix = path[len(self.log_path) + 1:]
+            if suffix.isdigit():
+                rotated.append((int(suffix), path))
+        return [self.log_path] + [path for _, path in sorted(rotated)]
+
+    def refresh(self) -> List[IndexedLogFile]:
+        """Atualiza os índices e remove os de arquivos que não existem mais"""
+        files = [IndexedLogFile(path, self.index_dir) for path in self.paths() if os.path.exists(path)]
+        files = [file for file in files if file.indexable]
+        for file in files:
+            file.refresh()
+        self._collect_garbage({file.key for file in files})
+        return files
+
+    def _collect_garbage(self, live_keys) -> None:
+        try:
+            names = os.listdir(self.index_dir)
+        except OSError:
+            return
+        for name in names:
+            key = name.split('.', 1)[0]
+            if key not in live_keys:
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                except OSError:
+                    pass
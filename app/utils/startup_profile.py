@@ -0,0 +1,54 @@
+"""
+Perfil de inicialização da aplicação
+
+Com ``STARTUP_PROFILE=true`` no ambiente, ``create_app`` mede o tempo de cada
+etapa (extensões, blueprints, scheduler...) incluindo os imports feitos
+dentro dela, registra um resumo no log e guarda as medições em
+``app.extensions['startup_profile']``. Desligado, as etapas não custam nada.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """Tempos por etapa de ``create_app``"""
+
+    def __init__(self, enabled: bool, started_at: float = None):
+        self.enabled = enabled
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.phases: List[Dict] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({'name': name, 'ms': round((time.perf_counter() - started) * 1000, 2)})
+
+    def record(self, name: str, seconds: float) -> None:
+        """Registra uma etapa medida fora do profiler (ex.: import do pacote)"""
+        if self.enabled:
+            self.phases.append({'name': name, 'ms': round(seconds * 1000, 2)})
+
+    def report(self) -> Dict:
+        return {
+            'create_app_ms': round((time.perf_counter() - self.started_at) * 1000, 2),
+            'phases': sorted(self.phases, key=lambda p: p['ms'], reverse=True),
+        }
+
+    def log(self) -> None:
+        if not self.enabled:
+            return
+        report = self.report()
+        lines = [f"  {p['name']:<28} {p['ms']:>9.1f} ms" for p in report['phases']]
+        logger.warning(
+            "Perfil de inicialização (create_app: %.1f ms)\n%s", report['create_app_ms'], '\n'.join(lines)
+        )
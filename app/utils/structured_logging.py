@@ -0,0 +1,168 @@
+"""
+Logging estruturado (JSON lines) e buffer em memória dos registros recentes
+
+Cada registro vira um dicionário montado uma única vez e compartilhado pelos
+handlers: o ``JsonLinesFormatter`` grava uma linha JSON por registro e o
+``RingBufferHandler`` guarda os mais recentes para o visualizador de logs do
+admin, sem formatar nem reparsear texto.
+
+Dentro de uma requisição, ``RequestContextFilter`` acrescenta request id,
+usuário, rota e latência até o momento. ``init_request_logging`` gera o
+request id (ou usa o cabeçalho ``X-Request-ID``), devolve-o na resposta e
+registra uma linha de acesso em nível INFO (exceto arquivos estáticos). As
+linhas de acesso vão para o buffer e o stdout; o ``AccessLogFilter`` as
+mantém fora do arquivo rotativo, a menos que ``LOG_ACCESS_TO_FILE`` esteja
+ligado.
+
+A linha JSON começa com ``{"ts":"AAAA-MM-DD HH:MM:SS,mmm","level":"..."``,
+formato reconhecido pelo índice de logs (utils/log_index).
+"""
+import itertools
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+from flask import g, has_request_context, request, session
+
+EXTENSION_KEY = 'log_ring_buffer'
+
+# Campos de contexto copiados do registro (via filtro ou ``extra=``)
+CONTEXT_FIELDS = ('request_id', 'user_id', 'method', 'route', 'status', 'latency_ms')
+
+_DEFAULT_FORMATTER = logging.Formatter()
+
+
+def structured(record: logging.LogRecord, formatter: logging.Formatter = None) -> Dict:
+    """Dicionário do registro (montado uma vez e guardado no próprio registro)"""
+    data = getattr(record, '_structured', None)
+    if data is not None:
+        return data
+    formatter = formatter or _DEFAULT_FORMATTER
+    data = {
+        'ts': formatter.formatTime(record),
+        'level': record.levelname,
+        'logger': record.name,
+        'message': record.getMessage(),
+        'file': f"{record.pathname}:{record.lineno}",
+    }
+    for field in CONTEXT_FIELDS:
+        value = getattr(record, field, None)
+        if value is not None:
+            data[field] = value
+    if record.exc_info:
+        data['exc'] = formatter.formatException(record.exc_info)
+    record._structured = data
+    return data
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Uma linha JSON por registro"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(structured(record, self), ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Acrescenta request id, usuário, rota e latência aos registros da requisição"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, 'request_id', None) is not None or not has_request_context():
+            return True
+        record.request_id = g.get('request_id')
+        record.method = request.method
+        record.route = request.url_rule.rule if request.url_rule else request.path
+        # Usuário já carregado pelo Flask-Login (sem consultar o banco)
+        user = g.get('_login_user')
+        user_id = getattr(user, 'id', None) if user is not None else session.get('_user_id')
+        if user_id is not None:
+            record.user_id = int(user_id) if str(user_id).isdigit() else user_id
+        started = g.get('request_started')
+        if started is not None and getattr(record, 'latency_ms', None) is None:
+            record.latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        return True
+
+
+class AccessLogFilter(logging.Filter):
+    """Descarta as linhas de acesso (usado no handler de arquivo)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not getattr(record, 'access', False)
+
+
+class RingBufferHandler(logging.Handler):
+    """Últimos ``capacity`` registros estruturados, com número de sequência"""
+
+    def __init__(self, capacity: int = 1000, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+        self._sequence = itertools.count(1)
+        self._buffer_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            data = structured(record, self.formatter)
+            with self._buffer_lock:
+                self.records.append((next(self._sequence), data))
+        except Exception:
+            self.handleError(record)
+
+    def recent(self, level: Optional[str] = None, search: Optional[str] = None,
+               after: int = 0, limit: int = 100, offset: int = 0) -> Dict:
+        """
+        Registros mais recentes primeiro, sem copiar o buffer inteiro
+
+        Returns:
+            dict com 'entries' [(seq, registro)], 'total' e 'last_seq'
+        """
+        with self._buffer_lock:
+            snapshot = list(self.records)
+        if snapshot and after > snapshot[-1][0]:
+            after = 0  # Sequência de outro processo ou de antes de reiniciar
+        needle = search.lower() if search else None
+        entries: List = []
+        total = 0
+        for seq, data in reversed(snapshot):
+            if seq <= after:
+                break
+            if level and data['level'] != level:
+                continue
+            if needle and needle not in data['message'].lower():
+                continue
+            total += 1
+            if total > offset and len(entries) < limit:
+                entries.append((seq, data))
+        return {'entries': entries, 'total': total, 'last_seq': snapshot[-1][0] if snapshot else after}
+
+
+def init_request_logging(app) -> None:
+    """Request id e linha de acesso por requisição"""
+
+    @app.before_request
+    def start_request_log():
+        g.request_started = time.perf_counter()
+        g.request_id = (request.headers.get('X-Request-ID') or uuid.uuid4().hex[:16])[:64]
+
+    @app.after_request
+    def finish_request_log(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+            if not _is_static(request.endpoint) and app.logger.isEnabledFor(logging.INFO):
+                latency = round((time.perf_counter() - g.request_started) * 1000, 1)
+                app.logger.info(
+                    "%s %s %s", request.method, request.path, response.status_code,
+                    extra={'status': response.status_code, 'latency_ms': latency, 'access': True},
+                )
+        return response
+
+
+def _is_static(endpoint: Optional[str]) -> bool:
+    return bool(endpoint) and (endpoint == 'static' or endpoint.endswith('.static'))
+
+
+def get_ring_buffer(app) -> Optional[RingBufferHandler]:
+    return app.extensions.get(EXTENSION_KEY)
@@ -0,0 +1,188 @@
+"""
+Séries temporais agrupadas por período (dia, semana ou mês).
+
+Gera a contagem de registros por período com um único ``GROUP BY`` por
+entidade, usando a função de truncamento de data nativa de cada banco
+(``strftime``/``date`` no SQLite e ``date_trunc`` no PostgreSQL). Os
+períodos sem registros são preenchidos com zero em Python.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import Date, cast, func
+from sqlalchemy.orm import Query
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def bucket_start(value: date, granularity: str) -> date:
+    """Retorna a data inicial do período que contém ``value``"""
+    if isinstance(value, datetime):
+        value = value.date()
+    if granularity == 'month':
+        return value.replace(day=1)
+    if granularity == 'week':
+        # Semanas começam na segunda-feira (mesma convenção do date_trunc)
+        return value - timedelta(days=value.weekday())
+    return value
+
+
+def next_bucket(value: date, granularity: str) -> date:
+    """Retorna a data inicial do período seguinte"""
+    if granularity == 'month':
+        return value + relativedelta(months=1)
+    if granularity == 'week':
+        return value + timedelta(weeks=1)
+    return value + timedelta(days=1)
+
+
+def build_buckets(start: date, end: date, granularity: str = 'month') -> List[date]:
+    """
+    Lista as datas iniciais de todos os períodos entre ``start`` e ``end``
+
+    Args:
+        start: Data inicial (inclusiva)
+        end: Data final (inclusiva)
+        granularity: 'day', 'week' ou 'month'
+
+    Returns:
+        Lista ordenada de datas iniciais de período
+    """
+    _validate_granularity(granularity)
+    buckets = []
+    current = bucket_start(start, granularity)
+    last = bucket_start(end, granularity)
+    while current <= last:
+        buckets.append(current)
+        current = next_bucket(current, granularity)
+    return buckets
+
+
+def last_n_buckets(count: int, granularity: str = 'month', today: Optional[date] = None) -> List[date]:
+    """Retorna os ``count`` últimos períodos, terminando no período atual"""
+    _validate_granularity(granularity)
+    today = today or date.today()
+    current = bucket_start(today, granularity)
+    buckets = [current]
+    for _ in range(count - 1):
+        if granularity == 'month':
+            current = current - relativedelta(months=1)
+        elif granularity == 'week':
+            current = current - timedelta(weeks=1)
+        else:
+            current = current - timedelta(days=1)
+        buckets.append(current)
+    return list(reversed(buckets))
+
+
+def bucket_expression(column, granularity: str, dialect_name: str):
+    """
+    Expressão SQL que trunca ``column`` para o início do período
+
+    Args:
+        column: Coluna de data/datetime do modelo
+        granularity: 'day', 'week' ou 'month'
+        dialect_name: Nome do dialeto SQLAlchemy ('sqlite', 'postgresql', ...)
+
+    Returns:
+        Expressão SQLAlchemy ou None se o dialeto não tiver suporte nativo
+    """
+    _validate_granularity(granularity)
+    if dialect_name == 'sqlite':
+        if granularity == 'month':
+            return func.strftime('%Y-%m-01', column)
+        if granularity == 'week':
+            return func.date(column, '-6 days', 'weekday 1')
+        return func.date(column)
+    if dialect_name == 'postgresql':
+        return cast(func.date_trunc(granularity, column), Date)
+    return None
+
+
+def count_by_bucket(query: Query, column, start: date, end: date,
+                    granularity: str = 'month') -> Dict[date, int]:
+    """
+    Conta registros de ``query`` por período com um único ``GROUP BY``
+
+    A query recebida pode já conter filtros de permissão e de data; eles são
+    preservados e combinados com o intervalo solicitado.
+
+    Args:
+        query: Query base (ex.: ``Task.query`` já filtrada)
+        column: Coluna de data usada no agrupamento
+        start: Data inicial (inclusiva)
+        end: Data final (inclusiva)
+        granularity: 'day', 'week' ou 'month'
+
+    Returns:
+        Dict {data inicial do período: quantidade} apenas com períodos não vazios
+    """
+    _validate_granularity(granularity)
+    range_start = bucket_start(start, granularity)
+    range_end = next_bucket(bucket_start(end, granularity), granularity)
+
+    dialect_name = query.session.get_bind().dialect.name
+    expression = bucket_expression(column, granularity, dialect_name)
+    if expression is None:
+        # Dialeto sem função de truncamento conhecida: agrupa por dia e consolida em Python
+        expression = cast(column, Date)
+
+    bucket = expression.label('bucket')
+    rows = (
+        query.order_by(None)
+        .filter(column >= range_start, column < range_end)
+        .with_entities(bucket, func.count())
+        .group_by(bucket)
+        .all()
+    )
+
+    counts: Dict[date, int] = {}
+    for raw_bucket, total in rows:
+        key = coerce_bucket(raw_bucket, granularity)
+        if key is None:
+            continue
+        counts[key] = counts.get(key, 0) + (total or 0)
+    return counts
+
+
+def series(query: Query, column, buckets: List[date], granularity: str = 'month') -> List[int]:
+    """
+    Série de contagens alinhada a ``buckets``, com zero nos períodos vazios
+
+    Args:
+        query: Query base (preserva os filtros já aplicados)
+        column: Coluna de data usada no agrupamento
+        buckets: Datas iniciais dos períodos (ver ``build_buckets``/``last_n_buckets``)
+        granularity: 'day', 'week' ou 'month'
+
+    Returns:
+        Lista de contagens, uma por período
+    """
+    if not buckets:
+        return []
+    counts = count_by_bucket(query, column, buckets[0], buckets[-1], granularity)
+    return [counts.get(bucket, 0) for bucket in buckets]
+
+
+def series_for(queries: List[Tuple[str, Query, Any]], buckets: List[date],
+               granularity: str = 'month') -> Dict[str, List[int]]:
+    """Gera várias séries de uma vez a partir de tuplas (nome, query, coluna)"""
+    return {
+        name: series(query, column, buckets, granularity)
+        for name, query, column in queries
+    }
+
+
+def coerce_bucket(value, granularity: str) -> Optional[date]:
+    """Converte o valor retornado pelo banco em data inicial do período"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return bucket_start(value, granularity)
+
+
+def _validate_granularity(granularity: str) -> None:
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Granularidade inválida: {granularity}")
@@ -0,0 +1,47 @@
+"""persisted sla_status on chamado
+
+Revision ID: add_chamado_sla_status
+Revises: add_reminder_alert_log
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_chamado_sla_status'
+down_revision = 'add_reminder_alert_log'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('chamado', schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column('sla_status', sa.String(length=20), nullable=False, server_default='normal')
+        )
+        batch_op.create_index('ix_chamado_sla_status_prazo_sla', ['sla_status', 'prazo_sla'], unique=False)
+
+    # Mesmas regras de Chamado.status_sla
+    now = datetime.utcnow()
+    op.get_bind().execute(
+        sa.text(
+            "UPDATE chamado SET sla_status = CASE "
+            "WHEN sla_cumprido = :true THEN 'cumprido' "
+            "WHEN sla_cumprido = :false THEN 'vencido' "
+            "WHEN prazo_sla IS NULL THEN 'normal' "
+            "WHEN prazo_sla < :now THEN 'vencido' "
+            "WHEN prazo_sla < :attention THEN 'atencao' "
+            "ELSE 'normal' END"
+        ),
+        {'true': True, 'false': False, 'now': now, 'attention': now + timedelta(hours=1)},
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('chamado', schema=None) as batch_op:
+        batch_op.drop_index('ix_chamado_sla_status_prazo_sla')
+        batch_op.drop_column('sla_status')
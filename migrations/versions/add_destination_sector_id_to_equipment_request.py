@@ -0,0 +1,69 @@
+"""add destination_sector_id to equipment_request
+
+Revision ID: add_destination_sector_id
+Revises: c5f8a9d3e7b2
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_destination_sector_id'
+down_revision = 'c5f8a9d3e7b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Setor de destino resolvido (substitui o filtro LIKE '%setor%' em destination_sector)
+    with op.batch_alter_table('equipment_request') as batch_op:
+        batch_op.add_column(sa.Column('destination_sector_id', sa.Integer(), nullable=True))
+        batch_op.create_index(
+            'ix_equipment_request_destination_sector_id', ['destination_sector_id'], unique=False
+        )
+        batch_op.create_foreign_key(
+            'fk_equipment_request_destination_sector_id', 'sector',
+            ['destination_sector_id'], ['id']
+        )
+
+    # Backfill único a partir do texto livre de destination_sector (sem depender dos modelos atuais)
+    bind = op.get_bind()
+    sectors = bind.execute(sa.text('SELECT id, name FROM sector')).fetchall()
+    requests = bind.execute(sa.text(
+        'SELECT id, destination_sector FROM equipment_request '
+        'WHERE destination_sector IS NOT NULL'
+    )).fetchall()
+
+    for request_id, destination in requests:
+        sector_id = _resolve_sector_id(destination, sectors)
+        if sector_id:
+            bind.execute(
+                sa.text('UPDATE equipment_request SET destination_sector_id = :sector_id WHERE id = :id'),
+                {'sector_id': sector_id, 'id': request_id}
+            )
+
+
+def _resolve_sector_id(destination, sectors):
+    """Nome exato (sem diferenciar maiúsculas) ou o nome de setor mais longo contido no texto"""
+    if not destination:
+        return None
+    destination_lower = destination.strip().lower()
+    best_id, best_len = None, 0
+    for sector_id, name in sectors:
+        if not name:
+            continue
+        name_lower = name.strip().lower()
+        if name_lower == destination_lower:
+            return sector_id
+        if name_lower in destination_lower and len(name_lower) > best_len:
+            best_id, best_len = sector_id, len(name_lower)
+    return best_id
+
+
+def downgrade():
+    with op.batch_alter_table('equipment_request') as batch_op:
+        batch_op.drop_constraint('fk_equipment_request_destination_sector_id', type_='foreignkey')
+        batch_op.drop_index('ix_equipment_request_destination_sector_id')
+        batch_op.drop_column('destination_sector_id')
@@ -0,0 +1,47 @@
+"""export_job queue table for background report generation
+
+Revision ID: add_export_job
+Revises: add_hot_query_indexes
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_export_job'
+down_revision = 'add_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'export_job',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(length=32), nullable=False),
+        sa.Column('kind', sa.String(length=30), nullable=False),
+        sa.Column('params', sa.Text(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('progress', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=True),
+        sa.Column('file_name', sa.String(length=200), nullable=True),
+        sa.Column('mimetype', sa.String(length=100), nullable=True),
+        sa.Column('file_size', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('token'),
+    )
+    op.create_index('ix_export_job_status_created_at', 'export_job', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_export_job_status_created_at', table_name='export_job')
+    op.drop_table('export_job')
@@ -0,0 +1,28 @@
+"""export_job.claim_token and progress_updated_at heartbeat for the worker that owns a job
+
+Revision ID: add_export_job_claim_token
+Revises: add_scheduler_lease_heartbeat
+Create Date: 2026-10-18 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_export_job_claim_token'
+down_revision = 'add_scheduler_lease_heartbeat'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('export_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claim_token', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('progress_updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('export_job', schema=None) as batch_op:
+        batch_op.drop_column('progress_updated_at')
+        batch_op.drop_column('claim_token')
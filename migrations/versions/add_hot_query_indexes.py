@@ -0,0 +1,47 @@
+"""composite indexes for hot query shapes
+
+Revision ID: add_hot_query_indexes
+Revises: backfill_user_sector_id
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_query_indexes'
+down_revision = 'backfill_user_sector_id'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_chamado_status_data_abertura', 'chamado', ['status', 'data_abertura']),
+    ('ix_chamado_solicitante_id', 'chamado', ['solicitante_id']),
+    ('ix_chamado_setor_id', 'chamado', ['setor_id']),
+    ('ix_task_user_id_completed_date', 'task', ['user_id', 'completed', 'date']),
+    ('ix_reminder_status_completed_due_date', 'reminder', ['status', 'completed', 'due_date']),
+    ('ix_reminder_user_id_due_date', 'reminder', ['user_id', 'due_date']),
+    ('ix_equipment_loan_status_expected_return_date', 'equipment_loan', ['status', 'expected_return_date']),
+]
+
+# Índices criados manualmente por PerformanceService.create_database_indexes,
+# substituídos pelos compostos acima
+SUPERSEDED_INDEXES = [
+    'idx_chamado_status_data',
+    'idx_task_date_completed',
+    'idx_reminder_due_date_status',
+]
+
+
+def upgrade():
+    for name in SUPERSEDED_INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, _columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
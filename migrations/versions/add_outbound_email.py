@@ -0,0 +1,47 @@
+"""outbound_email queue table for batched email dispatch
+
+Revision ID: add_outbound_email
+Revises: add_export_job
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_outbound_email'
+down_revision = 'add_export_job'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'outbound_email',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipients', sa.Text(), nullable=False),
+        sa.Column('subject', sa.String(length=255), nullable=False),
+        sa.Column('html_body', sa.Text(), nullable=True),
+        sa.Column('text_body', sa.Text(), nullable=True),
+        sa.Column('sender', sa.String(length=255), nullable=True),
+        sa.Column('category', sa.String(length=100), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_outbound_email_status_next_attempt_at', 'outbound_email',
+        ['status', 'next_attempt_at'], unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_outbound_email_status_next_attempt_at', table_name='outbound_email')
+    op.drop_table('outbound_email')
@@ -0,0 +1,26 @@
+"""outbound_email.claim_token identifying the dispatcher run that claimed a message
+
+Revision ID: add_outbound_email_claim_token
+Revises: add_rfid_lost_index
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_outbound_email_claim_token'
+down_revision = 'add_rfid_lost_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('outbound_email', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claim_token', sa.String(length=32), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('outbound_email', schema=None) as batch_op:
+        batch_op.drop_column('claim_token')
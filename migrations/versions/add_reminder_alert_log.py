@@ -0,0 +1,36 @@
+"""reminder_alert_log ledger for upcoming reminder notifications
+
+Revision ID: add_reminder_alert_log
+Revises: add_outbound_email
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_reminder_alert_log'
+down_revision = 'add_outbound_email'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reminder_alert_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('reminder_id', sa.Integer(), nullable=False),
+        sa.Column('horizon_days', sa.Integer(), nullable=False),
+        sa.Column('due_date', sa.Date(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['reminder_id'], ['reminder.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'reminder_id', 'horizon_days', 'due_date', name='uq_reminder_alert_log_reminder_horizon_due'
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table('reminder_alert_log')
@@ -0,0 +1,26 @@
+"""index on equipment (rfid_status, rfid_last_scan) for the lost-equipment detector
+
+Revision ID: add_rfid_lost_index
+Revises: add_rfid_reads
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_rfid_lost_index'
+down_revision = 'add_rfid_reads'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_equipment_rfid_status_rfid_last_scan', 'equipment',
+        ['rfid_status', 'rfid_last_scan'], unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_equipment_rfid_status_rfid_last_scan', table_name='equipment')
@@ -0,0 +1,82 @@
+"""rfid_reads append-only history with reader/location dimension tables
+
+Revision ID: add_rfid_reads
+Revises: add_scheduler_lease
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_rfid_reads'
+down_revision = 'add_scheduler_lease'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'rfid_location',
+        sa.Column('id', sa.SmallInteger(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+    op.create_table(
+        'rfid_reader',
+        sa.Column('id', sa.SmallInteger(), nullable=False),
+        sa.Column('code', sa.String(length=50), nullable=False),
+        sa.Column('location_id', sa.SmallInteger(), nullable=True),
+        sa.ForeignKeyConstraint(['location_id'], ['rfid_location.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('code'),
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Particionada por dia: a chave primária precisa incluir a coluna de partição
+        op.execute(
+            """
+            CREATE TABLE rfid_reads (
+                id BIGSERIAL NOT NULL,
+                equipment_id INTEGER NOT NULL,
+                reader_id SMALLINT NOT NULL,
+                location_id SMALLINT NOT NULL,
+                ts TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                PRIMARY KEY (id, ts)
+            ) PARTITION BY RANGE (ts)
+            """
+        )
+        op.execute('CREATE TABLE rfid_reads_default PARTITION OF rfid_reads DEFAULT')
+        today = datetime.utcnow().date()
+        for offset in range(3):
+            day = today + timedelta(days=offset)
+            op.execute(
+                f"CREATE TABLE rfid_reads_{day:%Y%m%d} PARTITION OF rfid_reads "
+                f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+            )
+    else:
+        op.create_table(
+            'rfid_reads',
+            sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+            sa.Column('equipment_id', sa.Integer(), nullable=False),
+            sa.Column('reader_id', sa.SmallInteger(), nullable=False),
+            sa.Column('location_id', sa.SmallInteger(), nullable=False),
+            sa.Column('ts', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    # No PostgreSQL os índices são criados em todas as partições
+    op.create_index('ix_rfid_reads_equipment_id_ts', 'rfid_reads', ['equipment_id', 'ts'], unique=False)
+    op.create_index('ix_rfid_reads_reader_id_ts', 'rfid_reads', ['reader_id', 'ts'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_rfid_reads_reader_id_ts', table_name='rfid_reads')
+    op.drop_index('ix_rfid_reads_equipment_id_ts', table_name='rfid_reads')
+    op.drop_table('rfid_reads')
+    op.drop_table('rfid_reader')
+    op.drop_table('rfid_location')
@@ -0,0 +1,51 @@
+"""scheduler_lease and scheduler_job_run for single-process job execution
+
+Revision ID: add_scheduler_lease
+Revises: add_chamado_sla_status
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_scheduler_lease'
+down_revision = 'add_chamado_sla_status'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scheduler_lease',
+        sa.Column('job_id', sa.String(length=100), nullable=False),
+        sa.Column('owner', sa.String(length=200), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('running_since', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('job_id'),
+    )
+    op.create_table(
+        'scheduler_job_run',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(length=100), nullable=False),
+        sa.Column('owner', sa.String(length=200), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('rows_processed', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_scheduler_job_run_job_id_started_at', 'scheduler_job_run',
+        ['job_id', 'started_at'], unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_scheduler_job_run_job_id_started_at', table_name='scheduler_job_run')
+    op.drop_table('scheduler_job_run')
+    op.drop_table('scheduler_lease')
@@ -0,0 +1,26 @@
+"""scheduler_lease.heartbeat_at refreshed while a job is running
+
+Revision ID: add_scheduler_lease_heartbeat
+Revises: add_outbound_email_claim_token
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_scheduler_lease_heartbeat'
+down_revision = 'add_outbound_email_claim_token'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('scheduler_lease', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('scheduler_lease', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
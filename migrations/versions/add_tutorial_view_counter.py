@@ -0,0 +1,43 @@
+"""add tutorial_view_counter
+
+Revision ID: add_tutorial_view_counter
+Revises: add_destination_sector_id
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_tutorial_view_counter'
+down_revision = 'add_destination_sector_id'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Contador materializado de visualizações (evita COUNT sobre visualizacao_tutorial)
+    op.create_table(
+        'tutorial_view_counter',
+        sa.Column('tutorial_id', sa.Integer(), nullable=False),
+        sa.Column('total_views', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_viewed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['tutorial_id'], ['tutorial.id']),
+        sa.PrimaryKeyConstraint('tutorial_id'),
+    )
+    op.create_index(
+        'ix_tutorial_view_counter_total_views', 'tutorial_view_counter', ['total_views'], unique=False
+    )
+
+    # Preenchimento inicial a partir das visualizações existentes
+    op.execute(
+        'INSERT INTO tutorial_view_counter (tutorial_id, total_views, last_viewed_at) '
+        'SELECT tutorial_id, COUNT(*), MAX(data) FROM visualizacao_tutorial '
+        'GROUP BY tutorial_id'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_tutorial_view_counter_total_views', table_name='tutorial_view_counter')
+    op.drop_table('tutorial_view_counter')
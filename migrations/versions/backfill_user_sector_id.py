@@ -0,0 +1,47 @@
+"""backfill user.sector_id from the user's first reminder
+
+Revision ID: backfill_user_sector_id
+Revises: add_tutorial_view_counter
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'backfill_user_sector_id'
+down_revision = 'add_tutorial_view_counter'
+branch_labels = None
+depends_on = None
+
+
+user_table = sa.table('user', sa.column('id', sa.Integer), sa.column('sector_id', sa.Integer))
+reminder_table = sa.table(
+    'reminder',
+    sa.column('id', sa.Integer),
+    sa.column('user_id', sa.Integer),
+    sa.column('sector_id', sa.Integer),
+)
+
+
+def upgrade():
+    # O setor do usuário passa a vir de user.sector_id; usuários sem setor herdam o
+    # setor do primeiro lembrete (mesma heurística usada até então nas permissões)
+    first_reminder_sector = (
+        sa.select(reminder_table.c.sector_id)
+        .where(reminder_table.c.user_id == user_table.c.id)
+        .order_by(reminder_table.c.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    op.execute(
+        user_table.update()
+        .where(user_table.c.sector_id.is_(None))
+        .values(sector_id=first_reminder_sector)
+    )
+
+
+def downgrade():
+    # Backfill de dados: não há como distinguir setores preenchidos manualmente
+    pass
@@ -8,6 +8,7 @@ Uso:
     python scripts/db_manager.py test          # Testa conexão
     python scripts/db_manager.py migrate       # Aplica migrations pendentes
     python scripts/db_manager.py status        # Status das migrations
+    python scripts/db_manager.py check-indexes # Verifica planos das consultas frequentes
 """
 import sys
 import os
@@ -204,6 +205,44 @@ def inspect(table_name):
         sys.exit(1)
 
 
+@cli.command('check-indexes')
+@click.option('--verbose', '-v', is_flag=True, help='Mostra o plano completo de cada consulta')
+def check_indexes(verbose):
+    """Verifica se as consultas frequentes usam índices (EXPLAIN)."""
+    click.echo("🔍 Verificando planos das consultas frequentes...")
+
+    try:
+        from app.services.query_plan_service import QueryPlanService
+
+        app = create_app()
+        with app.app_context():
+            results = QueryPlanService.check()
+
+        failed = 0
+        for result in results:
+            if result.ok:
+                click.echo(f"✓ {result.name}")
+            else:
+                failed += 1
+                click.echo(f"✗ {result.name} ({result.source})")
+                for line in result.full_scans:
+                    click.echo(f"    varredura completa: {line}")
+                if result.error:
+                    click.echo(f"    erro: {result.error}")
+            if verbose:
+                for line in result.plan:
+                    click.echo(f"    {line}")
+
+        if failed:
+            click.echo(f"\n✗ {failed} consulta(s) sem índice adequado")
+            sys.exit(1)
+        click.echo(f"\n✓ {len(results)} consultas usando índices")
+
+    except Exception as e:
+        click.echo(f"✗ Erro: {e}")
+        sys.exit(1)
+
+
 @cli.command()
 @click.option('--backup-dir', default='backups', help='Diretório para backup')
 def backup(backup_dir):
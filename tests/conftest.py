@@ -4,6 +4,12 @@ Configurações globais para testes do TI Reminder App
 import pytest
 import tempfile
 import os
+import socketserver
+import threading
+
+# Jobs agendados não rodam no processo de testes (lido pelo config no import)
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+
 from app import create_app, db
 from app.models import User, Sector, SlaConfig
 from werkzeug.security import generate_password_hash
@@ -24,7 +30,10 @@ def app():
         'WTF_CSRF_ENABLED': False,
         'MAIL_SUPPRESS_SEND': True,
         'LOG_TO_STDOUT': False,
-        'SCHEDULER_API_ENABLED': False
+        'SCHEDULER_API_ENABLED': False,
+        'RESULT_CACHE_BACKEND': 'null',
+        # Emails ficam na fila; os testes da fila habilitam o envio imediato quando precisam
+        'MAIL_SEND_IMMEDIATELY': False
     }
     
     app = create_app()
@@ -71,6 +80,114 @@ def db_session(app):
         db.session.remove()
 
 
+@pytest.fixture
+def memory_cache(app):
+    """Substitui o cache de resultados (desativado nos testes) por um cache em memória"""
+    from app.services.cache_service import CacheService, MemoryCacheBackend, ResultCache
+
+    previous = app.extensions.get(CacheService.EXTENSION_KEY)
+    cache = ResultCache(MemoryCacheBackend(max_entries=10), default_ttl=60)
+    app.extensions[CacheService.EXTENSION_KEY] = cache
+    yield cache
+    if previous is None:
+        app.extensions.pop(CacheService.EXTENSION_KEY, None)
+    else:
+        app.extensions[CacheService.EXTENSION_KEY] = previous
+
+
+class DebuggingSMTPServer(socketserver.ThreadingTCPServer):
+    """Servidor SMTP local que apenas registra as mensagens recebidas"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.fail_rcpt = set()  # Destinatários recusados com erro permanente
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self._reply('220 localhost debugging SMTP')
+        mail_from, rcpt_tos = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self._reply('250 localhost')
+            elif verb == 'MAIL':
+                mail_from, rcpt_tos = command[10:].strip('<> '), []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                address = command[8:].strip('<> ')
+                if address in server.fail_rcpt:
+                    self._reply('550 Mailbox unavailable')
+                else:
+                    rcpt_tos.append(address)
+                    self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b'.\r\n', b'.\n', b''):
+                        break
+                    data.append(data_line)
+                with server.lock:
+                    server.messages.append({
+                        'mail_from': mail_from, 'rcpt_tos': rcpt_tos, 'data': b''.join(data),
+                    })
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('250 OK')
+
+
+@pytest.fixture
+def smtp_server(app):
+    """Servidor SMTP de depuração local configurado como destino do Flask-Mail"""
+    from flask_mail import Mail
+
+    server = DebuggingSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    keys = ('MAIL_SERVER', 'MAIL_PORT', 'MAIL_USE_TLS', 'MAIL_USE_SSL', 'MAIL_USERNAME',
+            'MAIL_PASSWORD', 'MAIL_SUPPRESS_SEND', 'MAIL_DEFAULT_SENDER', 'SMTP_SERVER')
+    previous_config = {key: app.config.get(key) for key in keys}
+    previous_state = app.extensions.get('mail')
+    app.config.update(
+        MAIL_SERVER='127.0.0.1', MAIL_PORT=server.port, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+        MAIL_USERNAME=None, MAIL_PASSWORD=None, MAIL_SUPPRESS_SEND=False,
+        MAIL_DEFAULT_SENDER='ti@test.com', SMTP_SERVER=None,
+    )
+    Mail().init_app(app)
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+    app.config.update(previous_config)
+    app.extensions['mail'] = previous_state
+
+
 @pytest.fixture
 def sample_sector(db_session):
     """Cria um setor de exemplo"""
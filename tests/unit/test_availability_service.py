@@ -0,0 +1,185 @@
+"""
+Testes do índice de disponibilidade de equipamentos
+"""
+import json
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+import pytest
+from flask_login import login_user
+from sqlalchemy import event
+
+from app import db
+from app.blueprints.equipment_clean import api_availability
+from app.models import Equipment, EquipmentLoan, EquipmentReservation
+from app.services.availability_service import (KIND_RESERVATION, AvailabilityService, BusyInterval,
+                                               IntervalIndex)
+from app.services.equipment_service import EquipmentService
+
+BASE = datetime(2030, 3, 4, 8, 0)
+
+
+@contextmanager
+def _count_selects():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _busy(start_hours, end_hours, kind=KIND_RESERVATION, ref_id=1):
+    return BusyInterval(BASE + timedelta(hours=start_hours), BASE + timedelta(hours=end_hours),
+                        kind, ref_id, 'joao')
+
+
+def _equipment(db_session, name='Notebook'):
+    equipment = Equipment(name=name, category='notebook', status='disponivel', condition='bom')
+    db_session.add(equipment)
+    db_session.commit()
+    return equipment
+
+
+def _reservation(db_session, equipment, user, start, end, status='confirmada'):
+    reservation = EquipmentReservation(
+        equipment_id=equipment.id, user_id=user.id,
+        start_date=start.date(), start_time=start.time(), end_date=end.date(), end_time=end.time(),
+        expected_return_date=end.date(), expected_return_time=end.time(),
+        start_datetime=start, end_datetime=end, status=status,
+    )
+    db_session.add(reservation)
+    db_session.commit()
+    return reservation
+
+
+def _loan(db_session, equipment, user, loan_date, return_date, return_time=time(18, 0)):
+    loan = EquipmentLoan(equipment_id=equipment.id, user_id=user.id, loan_date=loan_date,
+                         loan_time=loan_date.time(), expected_return_date=return_date,
+                         expected_return_time=return_time, status='ativo')
+    db_session.add(loan)
+    db_session.commit()
+    return loan
+
+
+@pytest.mark.unit
+class TestIntervalIndex:
+    """Consultas sobre os intervalos ordenados"""
+
+    def test_conflict_finds_first_overlap(self):
+        index = IntervalIndex([_busy(0, 10, ref_id=1), _busy(2, 3, ref_id=2), _busy(12, 14, ref_id=3)])
+
+        assert index.conflict(BASE + timedelta(hours=10), BASE + timedelta(hours=12)) is None
+        assert index.conflict(BASE + timedelta(hours=5), BASE + timedelta(hours=6)).ref_id == 1
+        assert index.conflict(BASE + timedelta(hours=11), BASE + timedelta(hours=13)).ref_id == 3
+        assert index.conflict(BASE - timedelta(hours=2), BASE) is None
+
+    def test_blocks_and_next_free_slot(self):
+        index = IntervalIndex([_busy(1, 3), _busy(2, 4), _busy(5, 6)])
+        day_end = BASE + timedelta(hours=8)
+
+        assert index.busy_blocks(BASE, day_end) == [
+            (BASE + timedelta(hours=1), BASE + timedelta(hours=4)),
+            (BASE + timedelta(hours=5), BASE + timedelta(hours=6)),
+        ]
+        assert index.free_blocks(BASE, day_end) == [
+            (BASE, BASE + timedelta(hours=1)),
+            (BASE + timedelta(hours=4), BASE + timedelta(hours=5)),
+            (BASE + timedelta(hours=6), day_end),
+        ]
+        assert index.next_free_slot(BASE + timedelta(hours=1), timedelta(hours=1)) == BASE + timedelta(hours=4)
+        assert index.next_free_slot(BASE + timedelta(hours=1), timedelta(hours=2)) == BASE + timedelta(hours=6)
+
+
+@pytest.mark.unit
+class TestAvailabilityService:
+    """Índice carregado do banco para vários equipamentos"""
+
+    def test_one_query_for_a_catalog_page(self, db_session, regular_user):
+        equipments = [_equipment(db_session, f'Notebook {i}') for i in range(5)]
+        _reservation(db_session, equipments[0], regular_user, BASE, BASE + timedelta(hours=4))
+        _reservation(db_session, equipments[1], regular_user, BASE, BASE + timedelta(hours=4), status='pendente')
+        _loan(db_session, equipments[2], regular_user, BASE - timedelta(days=1), BASE.date())
+        equipments = Equipment.query.order_by(Equipment.id).all()
+
+        with _count_selects() as statements:
+            result = AvailabilityService.catalog_availability(equipments, start=BASE + timedelta(hours=1))
+
+        assert len(statements) == 1
+        assert [result[e.id]['available'] for e in equipments] == [False, True, False, True, True]
+        assert result[equipments[0].id]['next_free'] == BASE + timedelta(hours=4)
+        assert result[equipments[2].id]['next_free'] == datetime.combine(BASE.date(), time(18, 0))
+
+    def test_overdue_loan_stays_busy(self, db_session, regular_user):
+        equipment = _equipment(db_session)
+        now = BASE + timedelta(days=3)
+        _loan(db_session, equipment, regular_user, BASE - timedelta(days=2), BASE.date())
+
+        index = AvailabilityService.build_index([equipment], now, now + timedelta(hours=1), now=now)
+        available, reason = index.check(equipment.id, now, now + timedelta(hours=1))
+
+        assert available is False
+        assert reason == f'Emprestado para {regular_user.username} (devolução atrasada)'
+        assert index.next_free_slot(equipment.id, now, timedelta(hours=1)) is None
+        assert index.calendar(equipment.id, now, now + timedelta(days=1))['free_blocks'] == []
+
+    def test_check_equipment_availability_keeps_messages(self, db_session, regular_user):
+        equipment = _equipment(db_session)
+        _reservation(db_session, equipment, regular_user, BASE + timedelta(hours=1), BASE + timedelta(hours=3))
+
+        available, reason = EquipmentService.check_equipment_availability(
+            equipment.id, BASE.date(), BASE.date(), '10:00', '12:00'
+        )
+        assert available is False
+        assert reason == f'Reservado por {regular_user.username} de 04/03/2030 09:00 a 04/03/2030 11:00'
+
+        assert EquipmentService.check_equipment_availability(
+            equipment.id, BASE.date(), BASE.date(), '11:00', '12:00'
+        ) == (True, '')
+
+        equipment.condition = 'danificado'
+        db_session.commit()
+        assert EquipmentService.check_equipment_availability(
+            equipment.id, BASE.date(), BASE.date(), '11:00', '12:00'
+        ) == (False, 'Equipamento em condição inadequada: danificado')
+
+    def test_calendar_api(self, app, db_session, regular_user, admin_user):
+        equipment = _equipment(db_session)
+        _reservation(db_session, equipment, admin_user, BASE + timedelta(hours=1), BASE + timedelta(hours=3))
+
+        url = f'/equipment/api/availability?equipment_id={equipment.id}&start=2030-03-04&end=2030-03-04'
+        with app.test_request_context(url):
+            login_user(regular_user)
+            payload = json.loads(api_availability().get_data())
+
+        calendar = payload['equipments'][0]
+        assert calendar['busy'] == [{'start': '2030-03-04T09:00:00', 'end': '2030-03-04T11:00:00',
+                                     'kind': KIND_RESERVATION, 'overdue': False}]
+        assert calendar['free_blocks'] == [
+            {'start': '2030-03-04T00:00:00', 'end': '2030-03-04T09:00:00'},
+            {'start': '2030-03-04T11:00:00', 'end': '2030-03-05T00:00:00'},
+        ]
+
+        with app.test_request_context('/equipment/api/availability?equipment_id=1&start=2030-01-01&end=2030-12-31'):
+            login_user(regular_user)
+            _, status = api_availability()
+        assert status == 400
+
+    def test_calendar_api_accepts_timezone_offsets(self, app, db_session, regular_user, admin_user):
+        equipment = _equipment(db_session)
+        _reservation(db_session, equipment, admin_user, BASE + timedelta(hours=1), BASE + timedelta(hours=3))
+
+        # 05:00-04:00 é 09:00 UTC, o formato gravado no banco
+        url = (f'/equipment/api/availability?equipment_id={equipment.id}'
+               '&start=2030-03-04T05:00:00-04:00&end=2030-03-04T12:00:00%2B00:00')
+        with app.test_request_context(url):
+            login_user(regular_user)
+            payload = json.loads(api_availability().get_data())
+
+        assert payload['start'] == '2030-03-04T09:00:00'
+        assert payload['equipments'][0]['busy'][0]['start'] == '2030-03-04T09:00:00'
@@ -0,0 +1,76 @@
+"""
+Testes unitários para os contadores de badges da navegação
+"""
+import pytest
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Chamado, Equipment, EquipmentReservation
+from app.services.badge_counter_service import BadgeCounterService
+
+
+def _chamado(user, sector, status='Aberto'):
+    return Chamado(titulo='t', descricao='d', status=status,
+                   solicitante_id=user.id, setor_id=sector.id)
+
+
+@pytest.mark.unit
+class TestBadgeCounterService:
+    """Testes do BadgeCounterService"""
+
+    def test_counts_by_role(self, db_session, admin_user, regular_user, sample_sector):
+        """Testa contadores de staff (todos os chamados + reservas) e de usuário comum"""
+        equipment = Equipment(name='Notebook', category='Notebook', status='disponivel')
+        db_session.add(equipment)
+        db_session.flush()
+        start = datetime(2024, 1, 10, 9)
+        db_session.add_all([
+            _chamado(admin_user, sample_sector),
+            _chamado(regular_user, sample_sector, 'Em Andamento'),
+            _chamado(regular_user, sample_sector, 'Fechado'),
+            EquipmentReservation(
+                equipment_id=equipment.id, user_id=regular_user.id,
+                start_date=start.date(), start_time=time(9), end_date=start.date(), end_time=time(17),
+                start_datetime=start, end_datetime=start + timedelta(hours=8),
+                expected_return_date=start.date(), expected_return_time=time(17),
+            ),
+        ])
+        db_session.commit()
+
+        assert BadgeCounterService.get_counts(admin_user) == {
+            'pending_approvals_count': 1, 'chamados_abertos_count': 2
+        }
+        assert BadgeCounterService.get_counts(regular_user) == {
+            'pending_approvals_count': 0, 'chamados_abertos_count': 1
+        }
+
+    def test_memoized_until_status_change(self, db_session, admin_user, sample_sector, memory_cache):
+        """Testa que os contadores não consultam o banco até um chamado mudar de status"""
+        chamado = _chamado(admin_user, sample_sector)
+        db_session.add(chamado)
+        db_session.commit()
+
+        assert BadgeCounterService.get_counts(admin_user)['chamados_abertos_count'] == 1
+
+        statements = []
+
+        def count_statements(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count_statements)
+        try:
+            BadgeCounterService.get_counts(admin_user)
+            assert statements == []
+
+            chamado.prioridade = 'Alta'
+            db_session.commit()
+            BadgeCounterService.get_counts(admin_user)
+            assert not any('count' in s.lower() for s in statements)
+
+            chamado.status = 'Fechado'
+            db_session.commit()
+            assert BadgeCounterService.get_counts(admin_user)['chamados_abertos_count'] == 0
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statements)
@@ -0,0 +1,112 @@
+"""
+Testes unitários para o cache de resultados
+"""
+import pytest
+from datetime import date
+
+from app.models import Task
+from app.services.cache_service import (
+    CacheService, FileSystemCacheBackend, MemoryCacheBackend, ResultCache, cached_result
+)
+
+
+@pytest.mark.unit
+class TestResultCache:
+    """Testes do ResultCache e dos backends"""
+
+    def test_memory_backend_lru_and_ttl(self, monkeypatch):
+        """Testa expiração por TTL e descarte do item menos usado"""
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set('a', 1, ttl=None)
+        backend.set('b', 2, ttl=None)
+        backend.get('a')
+        backend.set('c', 3, ttl=None)
+
+        assert backend.get('a') == 1
+        assert backend.get('c') == 3
+        assert backend.size() == 2
+
+        import app.services.cache_service as cache_module
+        now = cache_module.time.monotonic()
+        backend.set('d', 4, ttl=5)
+        monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now + 10)
+        assert backend.get('d') is cache_module._MISSING
+
+    def test_hits_misses_and_scope(self):
+        """Testa contadores e separação de chaves por escopo de permissão"""
+        cache = ResultCache(MemoryCacheBackend(), default_ttl=60)
+        calls = []
+
+        def producer():
+            calls.append(1)
+            return {'total': len(calls)}
+
+        first = cache.get_or_set('dashboard', producer, params={'sector_id': 1}, scope={'role': 'admin'})
+        second = cache.get_or_set('dashboard', producer, params={'sector_id': 1}, scope={'role': 'admin'})
+        other = cache.get_or_set('dashboard', producer, params={'sector_id': 1},
+                                 scope={'role': 'user', 'user_id': 5})
+
+        assert first == second == {'total': 1}
+        assert other == {'total': 2}
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 2
+        assert stats['namespaces']['dashboard'] == {'hits': 1, 'misses': 2}
+
+    def test_invalidate_by_tag(self):
+        """Testa que invalidar uma tag afeta apenas as entradas que dependem dela"""
+        cache = ResultCache(MemoryCacheBackend(), default_ttl=60)
+        counter = {'task': 0, 'chamado': 0}
+
+        def produce(name):
+            counter[name] += 1
+            return counter[name]
+
+        cache.get_or_set('tasks', lambda: produce('task'), tags=('task',))
+        cache.get_or_set('chamados', lambda: produce('chamado'), tags=('chamado',))
+        cache.invalidate('task')
+
+        assert cache.get_or_set('tasks', lambda: produce('task'), tags=('task',)) == 2
+        assert cache.get_or_set('chamados', lambda: produce('chamado'), tags=('chamado',)) == 1
+
+    def test_filesystem_backend(self, tmp_path):
+        """Testa o backend em arquivos"""
+        backend = FileSystemCacheBackend(str(tmp_path), max_entries=1)
+        backend.set('a', {'x': date(2024, 1, 1)}, ttl=60)
+        assert backend.get('a') == {'x': date(2024, 1, 1)}
+
+        backend.set('b', 2, ttl=60)
+        assert backend.size() == 1
+
+        generation = backend.get_generation('task')
+        backend.bump_generation('task')
+        assert backend.get_generation('task') != generation
+
+    def test_commit_invalidates_tagged_entries(self, db_session, admin_user, memory_cache):
+        """Testa a invalidação automática após o commit de uma tarefa"""
+
+        @cached_result('tests', tags=('task',))
+        def count_tasks():
+            return Task.query.count()
+
+        assert count_tasks() == 0
+        db_session.add(Task(description='a', responsible='x', date=date.today(), user_id=admin_user.id))
+        db_session.flush()
+        assert count_tasks() == 0  # ainda não confirmado: entrada anterior continua válida
+
+        db_session.commit()
+        assert count_tasks() == 1
+        assert memory_cache.stats()['invalidations'] >= 1
+
+    def test_permission_scope(self, db_session, ti_user, regular_user):
+        """Testa o escopo compartilhado só por admins e individual (usuário e setor) para os demais"""
+        assert CacheService.permission_scope({'can_view_all': True, 'is_admin': True}) == {'role': 'admin'}
+
+        ti_scope = CacheService.permission_scope({'can_view_all': True, 'is_ti': True, 'user_id': ti_user.id})
+        assert ti_scope == {'role': 'ti', 'user_id': ti_user.id, 'sector_id': ti_user.sector_id}
+
+        other_ti = CacheService.permission_scope({'can_view_all': True, 'is_ti': True, 'user_id': regular_user.id})
+        assert other_ti != ti_scope
+        assert CacheService.permission_scope({'can_view_all': False, 'user_id': regular_user.id}) == {
+            'role': 'user', 'user_id': regular_user.id, 'sector_id': regular_user.sector_id
+        }
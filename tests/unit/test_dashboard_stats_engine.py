@@ -0,0 +1,104 @@
+"""
+Testes unitários para o DashboardStatsEngine
+"""
+import pytest
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Chamado, Equipment, EquipmentRequest, Reminder, Task
+from app.services.dashboard_stats_engine import (
+    DashboardStatsEngine, DashboardStatsSnapshot, TaskCounters
+)
+
+
+@pytest.mark.unit
+class TestDashboardStatsEngine:
+    """Testes do motor de estatísticas agregadas"""
+
+    def _seed(self, db_session, user, sector):
+        hoje = date.today()
+        db_session.add_all([
+            Task(description='Concluída', responsible='x', completed=True,
+                 date=hoje, user_id=user.id, sector_id=sector.id),
+            Task(description='Pendente', responsible='x', completed=False,
+                 date=hoje + timedelta(days=2), user_id=user.id, sector_id=sector.id),
+            Task(description='Vencida', responsible='x', completed=False,
+                 date=hoje - timedelta(days=2), user_id=user.id, sector_id=sector.id),
+            Reminder(name='R1', type='Licença', due_date=hoje, responsible='x',
+                     completed=True, user_id=user.id, sector_id=sector.id),
+            Reminder(name='R2', type='Licença', due_date=hoje, responsible='x',
+                     completed=False, user_id=user.id, sector_id=sector.id),
+            Chamado(titulo='C1', descricao='d', status='Aberto',
+                    solicitante_id=user.id, setor_id=sector.id),
+            Chamado(titulo='C2', descricao='d', status='Aberto',
+                    solicitante_id=user.id, setor_id=sector.id),
+            Chamado(titulo='C3', descricao='d', status='Fechado',
+                    solicitante_id=user.id, setor_id=sector.id),
+            Equipment(name='Notebook', category='Notebook', status='disponivel'),
+            Equipment(name='Monitor', category='Monitor', status='manutencao'),
+        ])
+        db_session.commit()
+
+    def test_global_snapshot_counts(self, db_session, admin_user, sample_sector):
+        """Testa contadores globais agregados"""
+        self._seed(db_session, admin_user, sample_sector)
+
+        snapshot = DashboardStatsEngine.global_snapshot()
+
+        assert isinstance(snapshot, DashboardStatsSnapshot)
+        assert snapshot.tasks == TaskCounters(total=3, done=1, pending=1, expired=1)
+        assert snapshot.reminders.total == 2
+        assert snapshot.reminders.pending == 1
+        assert snapshot.chamados.total == 3
+        assert snapshot.chamados.aberto == 2
+        assert snapshot.chamados.fechado == 1
+        assert snapshot.inventory.total == 2
+        assert snapshot.inventory.manutencao == 1
+        assert snapshot.asset_flow.emprestimos_total == 0
+
+    def test_global_snapshot_without_inventory(self, db_session, admin_user, sample_sector):
+        """Testa que o inventário fica zerado sem permissão"""
+        self._seed(db_session, admin_user, sample_sector)
+
+        snapshot = DashboardStatsEngine.global_snapshot(include_inventory=False)
+
+        assert snapshot.inventory.total == 0
+
+    def test_filtered_snapshot_respects_query(self, db_session, admin_user, sample_sector):
+        """Testa que os contadores respeitam a query filtrada"""
+        self._seed(db_session, admin_user, sample_sector)
+
+        snapshot = DashboardStatsEngine.filtered_snapshot(
+            Task.query.filter(Task.completed == True),  # noqa: E712
+            Reminder.query,
+            Chamado.query.filter(Chamado.status == 'Aberto'),
+            EquipmentRequest.query,
+        )
+        stats = snapshot.as_dict()
+
+        assert stats['tasks']['total'] == 1
+        assert stats['chamados'] == {
+            'total': 2, 'aberto': 2, 'em_andamento': 0, 'resolvido': 0, 'fechado': 0
+        }
+        assert stats['equipamentos']['total'] == 0
+        assert 'inventory' not in stats
+
+    def test_global_snapshot_query_count(self, db_session, admin_user, sample_sector):
+        """Testa que o snapshot global usa uma query por tabela"""
+        self._seed(db_session, admin_user, sample_sector)
+        statements = []
+
+        def _count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', _count)
+        try:
+            DashboardStatsEngine.global_snapshot()
+        finally:
+            event.remove(engine, 'before_cursor_execute', _count)
+
+        # Task, Reminder, Chamado, Equipment, EquipmentReservation, EquipmentLoan
+        assert len(statements) == 6
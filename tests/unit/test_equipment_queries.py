@@ -0,0 +1,117 @@
+"""
+Testes das consultas do módulo de equipamentos (equipment_v2)
+"""
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+import pytest
+from flask_login import login_user
+from sqlalchemy import event
+
+from app import db
+from app.blueprints import equipment_clean
+from app.models import Equipment, EquipmentLoan, EquipmentReservation
+from app.services.equipment_queries import EquipmentQueries
+from app.services.equipment_service import EquipmentService
+
+# Limite de consultas por página (usuário, badges do layout e a listagem)
+MAX_STATEMENTS_PER_PAGE = 12
+
+
+@contextmanager
+def _count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _seed(db_session, user, count, start=0):
+    """Equipamentos com um empréstimo ativo e uma solicitação pendente cada"""
+    base = datetime(2030, 1, 1, 9, 0)
+    for i in range(start, start + count):
+        equipment = Equipment(name=f'Notebook {i:03d}', category='notebook', status='disponivel',
+                              condition='bom', patrimony=f'PAT-{i:03d}')
+        db_session.add(equipment)
+        db_session.flush()
+        db_session.add(EquipmentLoan(
+            equipment_id=equipment.id, user_id=user.id, loan_date=base, loan_time=base.time(),
+            expected_return_date=(base - timedelta(days=i % 2)).date(), expected_return_time=time(18, 0),
+            status='ativo',
+        ))
+        db_session.add(EquipmentReservation(
+            equipment_id=equipment.id, user_id=user.id, status='pendente',
+            start_date=base.date(), start_time=time(9, 0), end_date=base.date(), end_time=time(18, 0),
+            expected_return_date=base.date(), expected_return_time=time(18, 0),
+            start_datetime=base, end_datetime=base + timedelta(hours=9),
+        ))
+    db_session.commit()
+
+
+def _render(app, view, user, **kwargs):
+    with app.test_request_context():
+        login_user(user)
+        with _count_statements() as statements:
+            html = view(**kwargs)
+    return html, len(statements)
+
+
+@pytest.mark.unit
+class TestKeysetPagination:
+    """Paginação por chave com empates na coluna de ordenação"""
+
+    def test_pages_cover_all_rows_once(self, db_session, regular_user):
+        _seed(db_session, regular_user, 7)
+
+        seen, cursor = [], None
+        while True:
+            page = EquipmentQueries.active_loans(cursor, per_page=3)
+            seen.extend(loan.id for loan in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        expected = [loan.id for loan in EquipmentLoan.query.order_by(EquipmentLoan.id.desc())]
+        assert seen == expected
+
+    def test_invalid_cursor_restarts(self, db_session, regular_user):
+        _seed(db_session, regular_user, 2)
+        assert len(EquipmentQueries.catalog('nao-e-um-cursor', per_page=10)) == 2
+
+
+@pytest.mark.unit
+class TestEquipmentQueryCounts:
+    """Número de consultas fixo, independente da quantidade de linhas"""
+
+    @pytest.mark.parametrize('view_name', [
+        'catalog', 'my_loans', 'my_requests', 'admin_loans', 'admin_pending', 'admin_equipment', 'index',
+    ])
+    def test_page_query_count_is_bounded(self, app, db_session, admin_user, view_name):
+        view = getattr(equipment_clean, view_name)
+        _seed(db_session, admin_user, 2)
+        _render(app, view, admin_user)  # aquecimento (caches do layout)
+        _, small = _render(app, view, admin_user)
+
+        _seed(db_session, admin_user, 10, start=2)
+        html, large = _render(app, view, admin_user)
+
+        assert large == small
+        assert large <= MAX_STATEMENTS_PER_PAGE
+        if view_name != 'index':
+            assert 'Notebook 000' in html or 'Notebook 011' in html
+
+    def test_equipment_stats_counts_without_loading_rows(self, db_session, regular_user):
+        _seed(db_session, regular_user, 4)
+
+        with _count_statements() as statements:
+            stats = EquipmentService.get_equipment_stats()
+
+        assert len(statements) == 2
+        assert stats['active_loans'] == 4
+        assert stats['overdue_loans'] == len(EquipmentService.get_overdue_loans())
@@ -0,0 +1,180 @@
+"""
+Testes da fila de exportação em segundo plano
+"""
+import os
+import zipfile
+from datetime import timedelta
+
+import pytest
+from flask_login import login_user
+
+from app.models import ExportJob
+from app.routes import export_job_download
+from app.services import export_job_service
+from app.services.export_job_service import ExportJobService
+from app.utils.timezone_utils import get_current_time_for_db
+
+
+@pytest.fixture
+def export_config(app, tmp_path):
+    """Jobs executados na própria chamada e gravados em diretório temporário"""
+    previous = {key: app.config.get(key) for key in ('EXPORT_JOB_WORKERS', 'EXPORT_JOB_DIR')}
+    app.config.update(EXPORT_JOB_WORKERS=0, EXPORT_JOB_DIR=str(tmp_path))
+    yield tmp_path
+    app.config.update(previous)
+
+
+@pytest.mark.unit
+class TestExportJobService:
+    """Submissão, execução e expiração dos jobs"""
+
+    def test_excel_job_writes_file(self, db_session, admin_user, export_config):
+        job = ExportJobService.submit('excel', {
+            'args': {'export_type': 'tasks'}, 'user_id': admin_user.id, 'is_admin': True,
+        }, admin_user.id)
+
+        db_session.refresh(job)
+        assert job.status == ExportJob.STATUS_DONE
+        assert job.progress == 100
+        assert job.file_name == 'relatorio_reminder.xlsx'
+        assert os.path.dirname(job.file_path) == str(export_config)
+        assert job.file_size == os.path.getsize(job.file_path)
+        assert zipfile.is_zipfile(job.file_path)
+
+    def test_sla_pdf_job(self, db_session, admin_user, export_config):
+        job = ExportJobService.submit('sla_pdf', {'export_type': 'tasks', 'usuario': 'admin'}, admin_user.id)
+
+        db_session.refresh(job)
+        assert job.status == ExportJob.STATUS_DONE
+        assert job.mimetype == 'application/pdf'
+        with open(job.file_path, 'rb') as f:
+            assert f.read(4) == b'%PDF'
+
+    def test_job_is_claimed_only_once(self, db_session, admin_user, export_config):
+        job = ExportJobService.submit('analytics_pdf', {}, admin_user.id)
+
+        assert ExportJobService.run(job.id) is False
+
+    def test_failed_job_records_error(self, db_session, admin_user, export_config, monkeypatch):
+        def failing(params, fileobj, progress):
+            raise RuntimeError('falhou')
+
+        monkeypatch.setitem(export_job_service._RENDERERS, 'falha', failing)
+
+        job = ExportJobService.submit('falha', {}, admin_user.id)
+
+        db_session.refresh(job)
+        assert job.status == ExportJob.STATUS_FAILED
+        assert job.error == 'falhou'
+        assert os.listdir(export_config) == []
+
+    def test_ti_excel_job_runs_in_worker_thread(self, app, db_session, ti_user, export_config):
+        """O worker não tem sessão: o setor vai nos parâmetros do job"""
+        app.config['EXPORT_JOB_WORKERS'] = 1
+        job = ExportJobService.submit('excel', {
+            'args': {'export_type': 'chamados'}, 'user_id': ti_user.id, 'is_ti': True,
+            'sector_id': ti_user.sector_id,
+        }, ti_user.id)
+        app.extensions.pop(export_job_service.EXTENSION_KEY).shutdown(wait=True)
+
+        db_session.refresh(job)
+        assert job.status == ExportJob.STATUS_DONE, job.error
+
+    def test_stale_running_job_is_requeued(self, db_session, admin_user, export_config):
+        job = ExportJobService.submit('sla_pdf', {}, admin_user.id)
+        long_ago = get_current_time_for_db() - timedelta(hours=2)
+        job.status = ExportJob.STATUS_RUNNING
+        job.created_at = job.started_at = job.progress_updated_at = long_ago
+        db_session.commit()
+
+        assert ExportJobService.requeue_pending() == 1
+
+        db_session.refresh(job)
+        assert job.status == ExportJob.STATUS_DONE
+
+    def test_running_job_with_recent_heartbeat_is_not_requeued(self, db_session, admin_user,
+                                                               export_config):
+        job = ExportJobService.submit('sla_pdf', {}, admin_user.id)
+        job.status = ExportJob.STATUS_RUNNING
+        job.created_at = job.started_at = get_current_time_for_db() - timedelta(hours=2)
+        job.progress_updated_at = get_current_time_for_db()
+        db_session.commit()
+
+        assert ExportJobService.requeue_pending() == 0
+        db_session.refresh(job)
+        assert job.status == ExportJob.STATUS_RUNNING
+
+    def test_worker_that_lost_the_claim_discards_its_file(self, db_session, admin_user,
+                                                          export_config, monkeypatch):
+        def renderer(params, fileobj, progress):
+            fileobj.write(b'antigo')
+            # Job considerado abandonado e reassumido enquanto esta execução gerava o arquivo
+            job = ExportJob.query.filter_by(kind='lento').one()
+            job.claim_token = 'outra-execucao'
+            db_session.commit()
+            return 'lento.txt', 'text/plain'
+
+        monkeypatch.setitem(export_job_service._RENDERERS, 'lento', renderer)
+
+        job = ExportJobService.submit('lento', {}, admin_user.id)
+
+        db_session.refresh(job)
+        assert job.status == ExportJob.STATUS_RUNNING
+        assert job.file_path is None
+        assert os.listdir(export_config) == []
+
+    def test_unknown_kind_is_rejected(self, db_session, admin_user):
+        with pytest.raises(ValueError):
+            ExportJobService.submit('inexistente', {}, admin_user.id)
+
+    def test_cleanup_expired_removes_file(self, db_session, admin_user, export_config):
+        job = ExportJobService.submit('sla_pdf', {}, admin_user.id)
+        path = job.file_path
+        job.expires_at = get_current_time_for_db() - timedelta(minutes=1)
+        db_session.commit()
+
+        assert ExportJobService.cleanup_expired() == 1
+
+        db_session.refresh(job)
+        assert job.status == ExportJob.STATUS_EXPIRED
+        assert not os.path.exists(path)
+
+    def test_other_users_cannot_see_job(self, db_session, admin_user, regular_user, export_config):
+        job = ExportJobService.submit('sla_pdf', {}, admin_user.id)
+
+        assert ExportJobService.get_for_user(job.token, regular_user) is None
+        assert ExportJobService.get_for_user(job.token, admin_user) == job
+
+
+@pytest.mark.unit
+class TestExportJobDownload:
+    """Download do arquivo gerado"""
+
+    def test_download_supports_range(self, app, db_session, admin_user, export_config):
+        job = ExportJobService.submit('sla_pdf', {}, admin_user.id)
+
+        with app.test_request_context(headers={'Range': 'bytes=0-3'}):
+            login_user(admin_user)
+            response = export_job_download(job.token)
+            response.direct_passthrough = False
+            body = response.get_data()
+
+        assert response.status_code == 206
+        assert body == b'%PDF'
+        response.close()
+
+    def test_analytics_blueprint_submits_through_shared_helper(self, app, db_session, admin_user,
+                                                               export_config):
+        from flask import session
+
+        from app.analytics_routes import export_pdf
+
+        with app.test_request_context('/api/analytics/export/pdf?async=1'):
+            login_user(admin_user)
+            session['user_id'] = admin_user.id
+            response, status = export_pdf()
+
+        assert status == 202
+        job = ExportJob.query.filter_by(token=response.get_json()['id']).one()
+        assert job.kind == 'analytics_pdf'
+        assert job.user_id == admin_user.id
@@ -0,0 +1,126 @@
+"""
+Testes da exportação de relatórios em streaming
+"""
+import csv
+import io
+import zipfile
+from datetime import date
+
+import pytest
+from flask import session
+
+from app.models import Reminder, ReminderHistory, Task
+from app.routes import export_excel
+from app.services.export_service import ExportFilters, ExportService
+
+
+def _task(db_session, user, description, completed=False):
+    task = Task(description=description, date=date(2026, 10, 1), responsible=user.username,
+                completed=completed, user_id=user.id, sector_id=user.sector_id)
+    db_session.add(task)
+    return task
+
+
+@pytest.mark.unit
+class TestExportService:
+    """Abas, filtros e formatos da exportação"""
+
+    def test_regular_user_only_exports_own_rows(self, db_session, admin_user, regular_user):
+        _task(db_session, regular_user, 'minha')
+        _task(db_session, admin_user, 'do admin')
+        db_session.commit()
+
+        sheets = ExportService.build_sheets(ExportFilters(), 'tasks', regular_user.id)
+
+        assert [s.key for s in sheets] == ['tasks']
+        rows = list(sheets[0].rows())
+        assert [r[0] for r in rows] == ['minha']
+        assert rows[0][3] == 'TI'
+
+    def test_filters_are_applied(self, db_session, admin_user):
+        _task(db_session, admin_user, 'feita', completed=True)
+        _task(db_session, admin_user, 'aberta')
+        db_session.commit()
+
+        filters = ExportFilters(task_status='done', start_date=date(2026, 9, 1))
+        sheets = ExportService.build_sheets(filters, 'tasks', admin_user.id, is_admin=True, is_ti=True)
+
+        assert [r[0] for r in sheets[0].rows()] == ['feita']
+
+    def test_reminder_history_respects_reminder_filters(self, db_session, admin_user):
+        kept = Reminder(name='Licença', type='licenca', due_date=date(2026, 10, 1),
+                        responsible='admin', user_id=admin_user.id, status='ativo')
+        other = Reminder(name='Contrato', type='contrato', due_date=date(2026, 10, 1),
+                         responsible='admin', user_id=admin_user.id, status='pausado')
+        db_session.add_all([kept, other])
+        db_session.flush()
+        db_session.add_all([
+            ReminderHistory(reminder_id=kept.id, original_due_date=kept.due_date,
+                            action_type='completed', completed=True, completed_by=admin_user.id),
+            ReminderHistory(reminder_id=other.id, original_due_date=other.due_date, action_type='skipped'),
+        ])
+        db_session.commit()
+
+        sheets = ExportService.build_sheets(ExportFilters(reminder_state='ativo'), 'reminders_history',
+                                            admin_user.id, is_admin=True)
+
+        rows = list(sheets[0].rows())
+        assert len(rows) == 1
+        assert rows[0][0] == 'Licença'
+        assert rows[0][5] == 'admin_test'
+
+    def test_write_xlsx_creates_all_sheets(self, db_session, admin_user):
+        _task(db_session, admin_user, 'tarefa')
+        db_session.commit()
+        sheets = ExportService.build_sheets(ExportFilters(), 'all', admin_user.id, is_admin=True)
+
+        output = io.BytesIO(b''.join(ExportService.stream_xlsx(sheets)))
+
+        with zipfile.ZipFile(output) as archive:
+            workbook = archive.read('xl/workbook.xml').decode('utf-8')
+        for name in ('Tarefas', 'Lembretes', 'Histórico Lembretes', 'Chamados', 'Equipamentos', 'Tutoriais'):
+            assert f'name="{name}"' in workbook
+
+    def test_stream_csv_zip_has_one_csv_per_sheet(self, db_session, admin_user):
+        for i in range(3):
+            _task(db_session, admin_user, f'tarefa {i}')
+        db_session.commit()
+        sheets = ExportService.build_sheets(ExportFilters(), 'all', admin_user.id, is_admin=True)
+
+        output = io.BytesIO(b''.join(ExportService.stream_csv_zip(sheets)))
+
+        with zipfile.ZipFile(output) as archive:
+            assert len(archive.namelist()) == len(sheets)
+            content = archive.read('Tarefas.csv').decode('utf-8-sig')
+        rows = list(csv.reader(io.StringIO(content)))
+        assert rows[0][0] == 'Descrição'
+        assert len(rows) == 4
+
+
+@pytest.mark.unit
+class TestExportRoute:
+    """Rota /export/excel"""
+
+    def _call(self, app, query_string, user):
+        with app.test_request_context(f'/export/excel?{query_string}'):
+            session['user_id'] = user.id
+            session['is_admin'] = user.is_admin
+            session['is_ti'] = user.is_ti
+            response = export_excel()
+        return response
+
+    def test_csv_export_streams_single_sheet(self, app, db_session, regular_user):
+        _task(db_session, regular_user, 'minha tarefa')
+        db_session.commit()
+
+        response = self._call(app, 'export_type=tasks&format=csv', regular_user)
+
+        assert response.is_streamed
+        assert response.mimetype == 'text/csv'
+        assert 'minha tarefa' in b''.join(response.response).decode('utf-8-sig')
+
+    def test_xlsx_export_is_default(self, app, db_session, admin_user):
+        response = self._call(app, 'export_type=chamados', admin_user)
+
+        assert 'relatorio_reminder.xlsx' in response.headers['Content-Disposition']
+        assert zipfile.is_zipfile(io.BytesIO(b''.join(response.response)))
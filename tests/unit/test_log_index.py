@@ -0,0 +1,112 @@
+"""
+Testes do índice de logs e do LogReaderService
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.log_reader_service import LogReaderService
+from app.utils.log_index import IndexedLogFile, LogIndex
+
+BASE = datetime(2030, 5, 6, 12, 0)
+
+
+def _line(minutes, level, message):
+    stamp = (BASE + timedelta(minutes=minutes)).strftime('%Y-%m-%d %H:%M:%S,000')
+    return f"{stamp} {level}: {message} [in /app/x.py:{minutes}]\n"
+
+
+def _write(path, lines, mode='a'):
+    with open(path, mode, encoding='utf-8') as f:
+        f.writelines(lines)
+
+
+@pytest.fixture
+def log_file(app, tmp_path):
+    """LOG_FILE apontando para um arquivo temporário"""
+    path = str(tmp_path / 'app.log')
+    previous = app.config.get('LOG_FILE'), app.config.get('LOG_INDEX_DIR')
+    app.config['LOG_FILE'] = path
+    app.config['LOG_INDEX_DIR'] = str(tmp_path / 'index')
+    with app.app_context():
+        yield path
+    app.config['LOG_FILE'], app.config['LOG_INDEX_DIR'] = previous
+
+
+@pytest.mark.unit
+class TestLogIndex:
+    """Indexação incremental e rotação"""
+
+    def test_only_new_bytes_are_parsed(self, tmp_path):
+        path = str(tmp_path / 'app.log')
+        _write(path, [_line(i, 'INFO', f'evento {i}') for i in range(100)])
+        first_size = os.path.getsize(path)
+        index_dir = str(tmp_path / 'index')
+
+        indexed = IndexedLogFile(path, index_dir)
+        assert indexed.refresh() == 100
+        assert indexed.bytes_parsed == first_size
+
+        _write(path, [_line(200, 'ERROR', 'falha'), 'Traceback (most recent call last):\n', '2030-05-06 parcial'])
+        indexed = IndexedLogFile(path, index_dir)
+        assert indexed.refresh() == 1
+        assert indexed.bytes_parsed == os.path.getsize(path) - first_size - len('2030-05-06 parcial')
+        assert len(indexed.records('ERROR')) == 1
+        assert IndexedLogFile(path, index_dir).refresh() == 0
+
+    def test_index_survives_rotation_and_rebuilds_after_truncation(self, tmp_path):
+        path = str(tmp_path / 'app.log')
+        index = LogIndex(path, str(tmp_path / 'index'))
+        _write(path, [_line(i, 'INFO', f'antigo {i}') for i in range(10)])
+        index.refresh()
+
+        # Rotação do RotatingFileHandler: renomeia e começa um arquivo novo
+        os.rename(path, path + '.1')
+        _write(path, [_line(20 + i, 'WARNING', f'novo {i}') for i in range(3)])
+        files = index.refresh()
+        assert [(os.path.basename(f.path), f.bytes_parsed > 0) for f in files] == [('app.log', True),
+                                                                                 ('app.log.1', False)]
+
+        _write(path, [_line(30, 'DEBUG', 'reescrito')], mode='w')
+        files = index.refresh()
+        assert len(files[0].records()) == 1
+
+
+@pytest.mark.unit
+class TestLogReaderService:
+    """Paginação, filtros e estatísticas sobre o índice"""
+
+    def test_pages_newest_first_across_rotated_files(self, log_file):
+        _write(log_file + '.1', [_line(i, 'INFO', f'evento {i}') for i in range(5)])
+        _write(log_file, [_line(10 + i, 'ERROR' if i % 2 else 'INFO', f'evento {10 + i}') for i in range(5)])
+
+        first = LogReaderService.read_logs(limit=3)
+        second = LogReaderService.read_logs(limit=3, offset=3)
+        assert first['total'] == 10
+        assert [log['message'] for log in first['logs'] + second['logs']] == [
+            'evento 14', 'evento 13', 'evento 12', 'evento 11', 'evento 10', 'evento 4',
+        ]
+        assert first['logs'][0]['file'] == '/app/x.py:14'
+        assert first['logs'][0]['timestamp'] == BASE + timedelta(minutes=14)
+
+        errors = LogReaderService.read_logs(level='ERROR')
+        assert [log['message'] for log in errors['logs']] == ['evento 13', 'evento 11']
+
+        window = LogReaderService.read_logs(start_date=BASE + timedelta(minutes=3),
+                                            end_date=BASE + timedelta(minutes=11))
+        assert [log['message'] for log in window['logs']] == ['evento 11', 'evento 10', 'evento 4', 'evento 3']
+
+        found = LogReaderService.read_logs(search='EVENTO 1', limit=2)
+        assert found['total'] == 6  # evento 1 e 10..14
+        assert [log['message'] for log in found['logs']] == ['evento 14', 'evento 13']
+
+    def test_statistics_use_cutoff(self, log_file):
+        now = datetime.now()
+        old = (now - timedelta(hours=30)).strftime('%Y-%m-%d %H:%M:%S,000')
+        recent = (now - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S,000')
+        _write(log_file, [f"{old} ERROR: antigo\n", f"{recent} ERROR: recente\n",
+                          f"{recent} CRITICAL: grave\n", f"{recent} WARNING: aviso\n"])
+
+        stats = LogReaderService.get_log_statistics(hours=24)
+        assert (stats['errors_count'], stats['warnings_count'], stats['total_count']) == (2, 1, 3)
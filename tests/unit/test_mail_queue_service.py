@@ -0,0 +1,154 @@
+"""
+Testes da fila de emails de saída
+"""
+from datetime import timedelta
+
+import pytest
+
+from app.email_utils import send_email
+from app.models import OutboundEmail
+from app.services.mail_queue_service import MailQueueService
+from app.services.notification_service import NotificationService
+from app.utils.timezone_utils import get_current_time_for_db
+
+
+@pytest.mark.unit
+class TestMailQueueService:
+    """Enfileiramento, envio em lote e novas tentativas"""
+
+    def test_dispatch_uses_single_connection(self, db_session, smtp_server):
+        for i in range(5):
+            MailQueueService.enqueue([f'user{i}@test.com'], f'Assunto {i}', html_body='<p>oi</p>')
+
+        result = MailQueueService.dispatch()
+
+        assert result['sent'] == 5
+        assert result['connections'] == 1
+        assert smtp_server.connections == 1
+        assert sorted(m['rcpt_tos'][0] for m in smtp_server.messages) == [
+            f'user{i}@test.com' for i in range(5)
+        ]
+        assert OutboundEmail.query.filter_by(status=OutboundEmail.STATUS_SENT).count() == 5
+
+    def test_concurrency_opens_one_connection_per_worker(self, db_session, smtp_server):
+        for i in range(6):
+            MailQueueService.enqueue([f'user{i}@test.com'], 'Assunto', text_body='oi')
+
+        result = MailQueueService.dispatch(concurrency=3)
+
+        assert result['sent'] == 6
+        assert smtp_server.connections == 3
+
+    def test_failed_message_is_retried_with_backoff(self, app, db_session, smtp_server):
+        smtp_server.fail_rcpt.add('bloqueado@test.com')
+        message = MailQueueService.enqueue(['bloqueado@test.com'], 'Assunto', text_body='oi')
+        MailQueueService.enqueue(['ok@test.com'], 'Assunto', text_body='oi')
+
+        result = MailQueueService.dispatch()
+
+        db_session.refresh(message)
+        assert result['sent'] == 1
+        assert result['retried'] == 1
+        assert message.status == OutboundEmail.STATUS_PENDING
+        assert message.attempts == 1
+        assert message.next_attempt_at > get_current_time_for_db() + timedelta(seconds=30)
+
+        # Ainda dentro do backoff: nada a enviar
+        assert MailQueueService.dispatch()['claimed'] == 0
+
+    def test_message_fails_after_max_attempts(self, db_session, smtp_server):
+        smtp_server.fail_rcpt.add('bloqueado@test.com')
+        message = MailQueueService.enqueue(['bloqueado@test.com'], 'Assunto', text_body='oi')
+        message.max_attempts = 1
+        db_session.commit()
+
+        result = MailQueueService.dispatch()
+
+        db_session.refresh(message)
+        assert result['failed'] == 1
+        assert message.status == OutboundEmail.STATUS_FAILED
+        assert '550' in message.last_error
+
+    def test_unreachable_server_requeues_batch(self, app, db_session, smtp_server):
+        MailQueueService.enqueue(['user@test.com'], 'Assunto', text_body='oi')
+        smtp_server.shutdown()
+        smtp_server.server_close()
+
+        result = MailQueueService.dispatch()
+
+        message = OutboundEmail.query.one()
+        assert result['retried'] == 1
+        assert message.status == OutboundEmail.STATUS_PENDING
+        assert 'Falha na conexão SMTP' in message.last_error
+
+    def test_stale_claims_are_released(self, db_session, smtp_server):
+        message = MailQueueService.enqueue(['user@test.com'], 'Assunto', text_body='oi')
+        message.status = OutboundEmail.STATUS_SENDING
+        message.claimed_at = get_current_time_for_db() - timedelta(hours=1)
+        db_session.commit()
+
+        assert MailQueueService.dispatch()['sent'] == 1
+
+    def test_claims_with_same_timestamp_do_not_overlap(self, db_session, monkeypatch):
+        from app.services import mail_queue_service
+
+        for i in range(4):
+            MailQueueService.enqueue([f'user{i}@test.com'], 'Assunto', text_body='oi')
+        frozen = get_current_time_for_db() + timedelta(seconds=1)
+        monkeypatch.setattr(mail_queue_service, 'get_current_time_for_db', lambda: frozen)
+
+        first = {m.id for m in MailQueueService._claim_batch(2)}
+        second = {m.id for m in MailQueueService._claim_batch(2)}
+
+        assert len(first) == len(second) == 2
+        assert not first & second
+
+    def test_queue_stats(self, db_session, smtp_server):
+        MailQueueService.enqueue(['user@test.com'], 'Assunto', text_body='oi')
+        MailQueueService.dispatch()
+        MailQueueService.enqueue(['user2@test.com'], 'Assunto', text_body='oi')
+
+        stats = MailQueueService.queue_stats()
+
+        assert stats['pending'] == 1
+        assert stats['sent'] == 1
+        assert stats['recent_runs'][-1]['sent'] == 1
+
+    def test_notification_is_enqueued(self, app, db_session):
+        with app.test_request_context():
+            assert NotificationService.send_email_notification(
+                'user@test.com', 'Assunto', 'emails/simple_notification.html', message='Olá'
+            )
+
+        message = OutboundEmail.query.one()
+        assert message.recipient_list == ['user@test.com']
+        assert message.category == 'emails/simple_notification.html'
+        assert message.html_body
+        assert message.status == OutboundEmail.STATUS_PENDING
+
+    def test_transactional_email_is_sent_immediately(self, app, db_session, smtp_server,
+                                                     monkeypatch):
+        monkeypatch.setitem(app.config, 'MAIL_SEND_IMMEDIATELY', True)
+
+        assert send_email('Assunto', ['user@test.com'], 'oi') is True
+
+        message = OutboundEmail.query.one()
+        assert message.status == OutboundEmail.STATUS_SENT
+        assert [m['rcpt_tos'] for m in smtp_server.messages] == [['user@test.com']]
+
+        # Mensagens gravadas pelo job chamador (commit=False) ficam para o dispatcher
+        MailQueueService.enqueue(['outro@test.com'], 'Assunto', text_body='oi', commit=False,
+                                 immediate=True)
+        db_session.commit()
+        assert OutboundEmail.query.filter_by(status=OutboundEmail.STATUS_PENDING).count() == 1
+
+    def test_immediate_send_failure_keeps_message_queued(self, app, db_session, smtp_server,
+                                                         monkeypatch):
+        monkeypatch.setitem(app.config, 'MAIL_SEND_IMMEDIATELY', True)
+        smtp_server.fail_rcpt.add('bloqueado@test.com')
+
+        assert send_email('Assunto', ['bloqueado@test.com'], 'oi') is True
+
+        message = OutboundEmail.query.one()
+        assert message.status == OutboundEmail.STATUS_PENDING
+        assert message.attempts == 1
@@ -302,6 +302,54 @@ class TestEquipmentRequest:
         assert not request.can_be_approved_by(other_user)
         assert not request.can_be_edited_by(other_user)
 
+    def test_resolve_sector_id(self):
+        """Testa resolução do texto de destino para setor"""
+        sectors = [(1, 'TI'), (2, 'Financeiro'), (3, 'TI Infraestrutura')]
+
+        assert EquipmentRequest.resolve_sector_id('financeiro', sectors) == 2
+        assert EquipmentRequest.resolve_sector_id('TI Infraestrutura - Sala 3', sectors) == 3
+        assert EquipmentRequest.resolve_sector_id('Recepção', sectors) is None
+        assert EquipmentRequest.resolve_sector_id(None, sectors) is None
+
+    def test_destination_sector_id_maintained_on_write(self, db_session, regular_user, sample_sector):
+        """Testa que destination_sector_id acompanha destination_sector"""
+        financeiro = Sector(name='Financeiro')
+        db_session.add(financeiro)
+        db_session.commit()
+
+        request = EquipmentRequest(
+            description='Monitor',
+            requester_id=regular_user.id,
+            destination_sector='TI - Sala 2'
+        )
+        db_session.add(request)
+        db_session.commit()
+        assert request.destination_sector_id == sample_sector.id
+
+        request.destination_sector = 'Financeiro'
+        db_session.commit()
+        assert request.destination_sector_id == financeiro.id
+
+        request.destination_sector = 'Recepção'
+        db_session.commit()
+        assert request.destination_sector_id is None
+
+    def test_backfill_destination_sectors(self, db_session, regular_user, sample_sector):
+        """Testa backfill de solicitações antigas sem setor resolvido"""
+        request = EquipmentRequest(
+            description='Teclado',
+            requester_id=regular_user.id,
+            destination_sector='TI'
+        )
+        db_session.add(request)
+        db_session.commit()
+        db_session.query(EquipmentRequest).update({'destination_sector_id': None})
+        db_session.commit()
+
+        assert EquipmentRequest.backfill_destination_sectors() == 1
+        db_session.refresh(request)
+        assert request.destination_sector_id == sample_sector.id
+
 
 @pytest.mark.unit
 class TestSlaConfig:
@@ -0,0 +1,124 @@
+"""
+Testes do compositor de notificações (renderização compartilhada em fan-out)
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import OutboundEmail
+from app.services import notification_composer
+from app.services.notification_composer import NotificationComposer
+
+
+def _equipment():
+    return SimpleNamespace(
+        name='Notebook <Dell>', patrimony='PAT-1', category='notebook', brand=None, model=None,
+        location=None, status='disponivel', condition='bom', next_maintenance=None,
+        last_maintenance=None, maintenance_notes=None, days_until_maintenance=lambda: 3,
+    )
+
+
+@pytest.mark.unit
+class TestNotificationComposer:
+    """Uma renderização por evento, campos do destinatário substituídos"""
+
+    def test_fan_out_renders_template_once(self, app, db_session, test_factory, monkeypatch):
+        users = [
+            test_factory.create_user(db_session, username=f'ti{i}', email=f'ti{i}@test.com', is_ti=True)
+            for i in range(4)
+        ]
+        renders = []
+        original = NotificationComposer.render
+        monkeypatch.setattr(
+            NotificationComposer, 'render',
+            staticmethod(lambda name, **ctx: renders.append(name) or original(name, **ctx)),
+        )
+
+        with app.app_context():
+            sent = NotificationComposer.fan_out(
+                users, 'Manutenção', 'emails/equipment_maintenance_alert.html', 'ti_user',
+                equipment=_equipment(),
+            )
+
+        assert sent == 4
+        assert renders == ['emails/equipment_maintenance_alert.html']
+        bodies = {m.recipients: m.html_body for m in OutboundEmail.query.all()}
+        assert len(bodies) == 4
+        for user in users:
+            assert f'Olá, {user.username}!' in bodies[user.email]
+            assert 'Notebook &lt;Dell&gt;' in bodies[user.email]
+
+    def test_recipient_fields_are_escaped(self, app):
+        with app.app_context():
+            shared = NotificationComposer.render_shared(
+                'emails/equipment_maintenance_alert.html', 'ti_user', equipment=_equipment()
+            )
+            body = shared.for_recipient(SimpleNamespace(username='<b>x</b>'))
+
+        assert shared.fields == ['username']
+        assert 'Olá, &lt;b&gt;x&lt;/b&gt;!' in body
+
+    def test_filtered_recipient_falls_back_to_per_recipient_render(self, app, db_session, monkeypatch):
+        template = app.jinja_env.from_string('<p>{{ user.username|upper }}</p>')
+        monkeypatch.setattr(NotificationComposer, 'get_template', staticmethod(lambda name: template))
+        users = [SimpleNamespace(username='ana', email='ana@test.com'),
+                 SimpleNamespace(username='bia', email='bia@test.com')]
+
+        with app.app_context():
+            assert NotificationComposer.render_shared('inline.html', 'user') is None
+            NotificationComposer.fan_out(users, 'Assunto', 'inline.html', 'user')
+
+        bodies = sorted(m.html_body for m in OutboundEmail.query.all())
+        assert bodies == ['<p>ANA</p>', '<p>BIA</p>']
+
+    def test_conditional_on_recipient_falls_back_to_per_recipient_render(self, app, db_session, monkeypatch):
+        template = app.jinja_env.from_string(
+            '<p>{% if user.is_admin %}Admin{% else %}Equipe{% endif %} {{ user.username }}</p>'
+        )
+        monkeypatch.setattr(NotificationComposer, 'get_template', staticmethod(lambda name: template))
+        users = [SimpleNamespace(username='ana', email='ana@test.com', is_admin=True),
+                 SimpleNamespace(username='bia', email='bia@test.com', is_admin=False)]
+
+        with app.app_context():
+            assert NotificationComposer.render_shared('inline.html', 'user') is None
+            NotificationComposer.fan_out(users, 'Assunto', 'inline.html', 'user')
+
+        bodies = sorted(m.html_body for m in OutboundEmail.query.all())
+        assert bodies == ['<p>Admin ana</p>', '<p>Equipe bia</p>']
+
+    def test_nested_attribute_falls_back_to_per_recipient_render(self, app, db_session, monkeypatch):
+        template = app.jinja_env.from_string('<p>{{ user.username }} - {{ user.sector.name }}</p>')
+        monkeypatch.setattr(NotificationComposer, 'get_template', staticmethod(lambda name: template))
+        users = [SimpleNamespace(username='ana', email='ana@test.com', sector=SimpleNamespace(name='TI')),
+                 SimpleNamespace(username='bia', email='bia@test.com', sector=SimpleNamespace(name='RH'))]
+
+        with app.app_context():
+            assert NotificationComposer.render_shared('inline.html', 'user') is None
+            assert NotificationComposer.fan_out(users, 'Assunto', 'inline.html', 'user') == 2
+
+        bodies = sorted(m.html_body for m in OutboundEmail.query.all())
+        assert bodies == ['<p>ana - TI</p>', '<p>bia - RH</p>']
+
+    def test_method_call_falls_back_to_per_recipient_render(self, app, db_session, monkeypatch):
+        template = app.jinja_env.from_string('<p>{{ user.display_name() }}</p>')
+        monkeypatch.setattr(NotificationComposer, 'get_template', staticmethod(lambda name: template))
+        users = [SimpleNamespace(email='ana@test.com', display_name=lambda: 'Ana Souza'),
+                 SimpleNamespace(email='bia@test.com', display_name=lambda: 'Bia Lima')]
+
+        with app.app_context():
+            assert NotificationComposer.render_shared('inline.html', 'user') is None
+            assert NotificationComposer.fan_out(users, 'Assunto', 'inline.html', 'user') == 2
+
+        bodies = sorted(m.html_body for m in OutboundEmail.query.all())
+        assert bodies == ['<p>Ana Souza</p>', '<p>Bia Lima</p>']
+
+    def test_compiled_template_is_cached(self, app, monkeypatch):
+        monkeypatch.setattr(notification_composer, '_template_cache', {})
+        monkeypatch.setattr(app.jinja_env, 'auto_reload', False)
+
+        with app.app_context():
+            first = NotificationComposer.get_template('emails/simple_notification.html')
+            second = NotificationComposer.get_template('emails/simple_notification.html')
+
+        assert first is second
+        assert len(notification_composer._template_cache) == 1
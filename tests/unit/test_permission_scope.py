@@ -0,0 +1,77 @@
+"""
+Testes unitários para o escopo de permissão (setor do usuário)
+"""
+import pytest
+from datetime import date
+
+from flask import session
+from sqlalchemy import event
+
+from app import db
+from app.models import Chamado, Reminder, Sector
+from app.services.permission_manager import PermissionManager, PermissionScope
+
+
+@pytest.mark.unit
+class TestPermissionScope:
+    """Testes do PermissionScope e do setor persistido em User.sector_id"""
+
+    def test_sector_comes_from_user(self, app, db_session, regular_user, sample_sector):
+        """Testa que o setor vem de User.sector_id e não do primeiro lembrete"""
+        other = Sector(name='Financeiro')
+        db_session.add(other)
+        db_session.commit()
+        db_session.add(Reminder(name='r', type='x', due_date=date.today(), responsible='x',
+                                frequency='', user_id=regular_user.id, sector_id=other.id))
+        db_session.commit()
+
+        with app.test_request_context('/'):
+            session['user_id'] = regular_user.id
+            assert PermissionManager.get_user_sector() == sample_sector.id
+
+    def test_sector_outside_request_context(self, app, db_session, regular_user, sample_sector):
+        """Testa a consulta do setor a partir do scheduler/threads (sem sessão)"""
+        with app.app_context():
+            assert PermissionManager.get_user_sector(regular_user.id) == sample_sector.id
+            assert PermissionManager.get_user_sector() is None
+            assert PermissionManager.get_scope() == PermissionScope(user_id=None)
+
+    def test_scope_memoized_per_request(self, app, db_session, admin_user, regular_user, sample_sector):
+        """Testa que verificações repetidas de acesso não executam queries"""
+        chamados = [
+            Chamado(titulo='a', descricao='d', solicitante_id=regular_user.id, setor_id=sample_sector.id),
+            Chamado(titulo='b', descricao='d', solicitante_id=admin_user.id, setor_id=sample_sector.id),
+        ]
+        db_session.add_all(chamados)
+        db_session.commit()
+
+        with app.test_request_context('/'):
+            session['user_id'] = regular_user.id
+            scope = PermissionManager.get_scope()
+            assert scope.sector_id == sample_sector.id
+
+            pares = [(c.solicitante_id, c.setor_id) for c in chamados] * 10
+            statements = []
+
+            def count_statements(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(db.engine, 'before_cursor_execute', count_statements)
+            try:
+                results = [
+                    PermissionManager.can_user_access_chamado(regular_user.id, solicitante_id, setor_id)
+                    for solicitante_id, setor_id in pares
+                ]
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', count_statements)
+
+            assert all(results)
+            assert statements == []
+
+    def test_can_access_chamado(self):
+        """Testa a regra de acesso: próprio chamado ou do setor"""
+        scope = PermissionScope(user_id=1, sector_id=3)
+        assert scope.can_access_chamado(1, 9)
+        assert scope.can_access_chamado(2, 3)
+        assert not scope.can_access_chamado(2, 4)
+        assert not PermissionScope(user_id=1).can_access_chamado(2, None)
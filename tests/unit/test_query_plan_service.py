@@ -0,0 +1,38 @@
+"""
+Testes dos planos de execução das consultas monitoradas
+"""
+import pytest
+
+from app.services.query_plan_service import QueryPlanService
+
+
+@pytest.mark.unit
+class TestQueryPlanService:
+    """Verifica que as consultas frequentes usam índices"""
+
+    def test_hot_queries_use_indexes(self, db_session):
+        results = QueryPlanService.check()
+
+        assert results
+        failures = {r.name: r.full_scans or r.error for r in results if not r.ok}
+        assert failures == {}
+
+    def test_full_scan_detection(self):
+        plan = [
+            'SCAN chamado',
+            'SCAN reminder USING INDEX ix_reminder_user_id_due_date',
+            'SEARCH task USING INDEX ix_task_user_id_completed_date (user_id=? AND completed=?)',
+            'Seq Scan on equipment_loan',
+        ]
+
+        assert QueryPlanService.full_scans(plan) == ['SCAN chamado', 'Seq Scan on equipment_loan']
+
+    def test_pg_plan_flattening(self):
+        node = {
+            'Node Type': 'Bitmap Heap Scan', 'Relation Name': 'chamado',
+            'Plans': [{'Node Type': 'Bitmap Index Scan', 'Index Name': 'ix_chamado_setor_id'}],
+        }
+
+        lines = QueryPlanService._flatten_pg_plan(node)
+
+        assert lines == ['Bitmap Heap Scan on chamado', 'Bitmap Index Scan using ix_chamado_setor_id']
@@ -0,0 +1,101 @@
+"""
+Testes da resolução de destinatários dos jobs de notificação
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+from app.models import (Equipment, EquipmentLoan, NotificationSettings, OutboundEmail, Reminder,
+                        ReminderAlertLog, User)
+from app.services.equipment_service import EquipmentService
+from app.services.notification_service import NotificationService
+from app.services.recipient_resolver import RecipientResolver
+from app.utils.timezone_utils import get_current_time_for_db
+
+
+@contextmanager
+def _count_selects():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _overdue_loans(db_session, user, count):
+    for i in range(count):
+        equipment = Equipment(name=f'Notebook {i}', category='notebook')
+        db_session.add(equipment)
+        db_session.flush()
+        db_session.add(EquipmentLoan(
+            equipment_id=equipment.id, user_id=user.id,
+            expected_return_date=datetime.now().date(),
+            sla_deadline=datetime.now() - timedelta(hours=1), sla_status='normal',
+        ))
+    db_session.commit()
+    db_session.expunge_all()
+
+
+def _upcoming_reminders(db_session, user, count):
+    due = get_current_time_for_db().date() + timedelta(days=7)
+    for i in range(count):
+        db_session.add(Reminder(name=f'Lembrete {i}', type='licenca', due_date=due,
+                                responsible=user.username, user_id=user.id, priority='alta'))
+    db_session.commit()
+    db_session.expunge_all()
+
+
+@pytest.mark.unit
+class TestRecipientResolver:
+    """Grupos e configurações carregados uma vez por execução"""
+
+    def test_groups_and_settings_are_loaded_once(self, app, db_session, admin_user, ti_user, regular_user):
+        db_session.add(NotificationSettings(user_id=ti_user.id, email_equipment=False))
+        db_session.commit()
+
+        resolver = RecipientResolver()
+        with _count_selects() as statements:
+            for _ in range(3):
+                admins = resolver.admins()
+                ti_users = resolver.with_email_enabled(resolver.ti_users(), 'equipment_sla')
+
+        assert [u.id for u in admins] == [admin_user.id]
+        # O admin de teste também é de TI; o usuário de TI desativou emails de equipamento
+        assert [u.id for u in ti_users] == [admin_user.id]
+        assert len(statements) == 2
+
+    def test_settings_for_unknown_user_uses_defaults(self, app, db_session, regular_user):
+        resolver = RecipientResolver()
+
+        assert resolver.settings_for(regular_user.id, 'reminder_upcoming')['email_enabled'] is True
+
+    @pytest.mark.parametrize('job, setup', [
+        (EquipmentService.check_sla_status, _overdue_loans),
+        (NotificationService.check_upcoming_reminders, _upcoming_reminders),
+    ])
+    def test_job_query_count_does_not_grow_with_items(self, app, db_session, admin_user, ti_user,
+                                                      regular_user, job, setup):
+        user_id = regular_user.id
+        counts = []
+        for items in (1, 5):
+            for model in (OutboundEmail, EquipmentLoan, Equipment, ReminderAlertLog, Reminder):
+                model.query.delete()
+            db_session.commit()
+            setup(db_session, db_session.get(User, user_id), items)
+
+            with _count_selects() as statements:
+                job()
+
+            assert OutboundEmail.query.count() == items * 2
+            counts.append(len(statements))
+
+        assert counts[0] == counts[1]
@@ -0,0 +1,102 @@
+"""
+Testes da geração de recorrências de lembretes em lote
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.models import Reminder, ReminderHistory
+from app.services.recurrence_engine import RecurrenceEngine
+from app.services.reminder_service import ReminderService
+
+
+def _reminder(db_session, user, due_date, frequency, **kwargs):
+    reminder = Reminder(name='Backup', type='rotina', responsible=user.username, due_date=due_date,
+                        frequency=frequency, user_id=user.id, **kwargs)
+    db_session.add(reminder)
+    db_session.commit()
+    return reminder
+
+
+@pytest.mark.unit
+class TestRecurrenceEngine:
+    """Todas as ocorrências perdidas em uma execução"""
+
+    def test_plan_reaches_today_in_one_pass(self):
+        today = date(2026, 10, 18)
+
+        plan = RecurrenceEngine.plan(date(2026, 10, 15), 'diario', today)
+        assert plan.due_dates == [date(2026, 10, 16), date(2026, 10, 17), date(2026, 10, 18)]
+        assert not plan.ended
+
+        # Mensal a partir da ocorrência anterior, como as execuções sucessivas do job
+        plan = RecurrenceEngine.plan(date(2026, 7, 31), 'mensal', today)
+        assert plan.due_dates == [date(2026, 8, 31), date(2026, 9, 30), date(2026, 10, 30)]
+
+        plan = RecurrenceEngine.plan(date(2026, 10, 1), 'quinzenal', today, end_date=date(2026, 10, 20))
+        assert plan.due_dates == [date(2026, 10, 16)]
+        assert plan.ended
+
+        assert RecurrenceEngine.plan(date(2026, 10, 1), 'semanal', today) is None
+
+    def test_overdue_reminder_catches_up_in_single_run(self, db_session, regular_user):
+        today = date.today()
+        source = _reminder(db_session, regular_user, today - timedelta(days=3), 'diario', priority='alta')
+
+        result = ReminderService.process_recurring_reminders()
+
+        assert result['processed'] == 1
+        assert result['created'] == 3
+        occurrences = Reminder.query.order_by(Reminder.due_date).all()
+        assert [r.due_date for r in occurrences] == [today - timedelta(days=d) for d in (3, 2, 1, 0)]
+        assert [r.notified for r in occurrences] == [True, True, True, False]
+        assert all(r.priority == 'alta' and r.user_id == regular_user.id for r in occurrences)
+
+        histories = ReminderHistory.query.order_by(ReminderHistory.original_due_date).all()
+        assert [h.reminder_id for h in histories] == [r.id for r in occurrences[:3]]
+        assert histories[0].reminder_id == source.id
+
+        # Nada mais a fazer na próxima execução
+        assert ReminderService.process_recurring_reminders()['created'] == 0
+
+    def test_series_past_end_date_is_closed(self, db_session, regular_user):
+        today = date.today()
+        reminder = _reminder(db_session, regular_user, today - timedelta(days=1), 'mensal',
+                             end_date=today + timedelta(days=5))
+
+        result = RecurrenceEngine.run()
+
+        db_session.refresh(reminder)
+        assert result['closed'] == 1
+        assert result['created'] == 0
+        assert reminder.status == 'encerrado'
+        assert reminder.notified is True
+
+    def test_bulk_run_in_chunks(self, db_session, regular_user):
+        today = date.today()
+        db_session.add_all([
+            Reminder(name=f'R{i}', type='rotina', responsible='x', due_date=today - timedelta(days=2),
+                     frequency='diario', user_id=regular_user.id)
+            for i in range(250)
+        ])
+        db_session.commit()
+
+        result = RecurrenceEngine.run(chunk_size=100)
+
+        assert result['chunks'] == 3
+        assert result['processed'] == 250
+        assert result['created'] == 500
+        assert result['throughput_per_second'] > 0
+        assert Reminder.query.filter_by(notified=False).count() == 250
+        assert ReminderHistory.query.count() == 500
+
+    def test_run_invalidates_reminder_cache(self, db_session, memory_cache, regular_user):
+        from app.services.cache_service import CacheService
+
+        _reminder(db_session, regular_user, date.today() - timedelta(days=1), 'diario')
+        count = lambda: Reminder.query.count()  # noqa: E731
+
+        assert CacheService.get_or_set('reminders.count', count, tags=('reminder',)) == 1
+        RecurrenceEngine.run()
+
+        assert CacheService.get_or_set('reminders.count', count, tags=('reminder',)) == 2
@@ -0,0 +1,78 @@
+"""
+Testes do planejamento de avisos preventivos de lembretes
+"""
+from datetime import timedelta
+
+import pytest
+
+from app.models import OutboundEmail, Reminder, ReminderAlertLog
+from app.services.notification_service import NotificationService
+from app.services.reminder_alert_planner import ReminderAlertPlanner
+from app.utils.timezone_utils import get_current_time_for_db
+
+
+def _reminder(db_session, user, days, **kwargs):
+    reminder = Reminder(name=f'Vence em {days}', type='licenca', responsible=user.username,
+                        due_date=get_current_time_for_db().date() + timedelta(days=days),
+                        user_id=user.id, **kwargs)
+    db_session.add(reminder)
+    db_session.commit()
+    return reminder
+
+
+@pytest.mark.unit
+class TestReminderAlertPlanner:
+    """Uma consulta para todas as antecedências e registro dos avisos enviados"""
+
+    def test_pending_alerts_cover_all_horizons(self, db_session, regular_user):
+        for days in (90, 7, 1, 5):
+            _reminder(db_session, regular_user, days)
+        _reminder(db_session, regular_user, 3, completed=True)
+
+        alerts = ReminderAlertPlanner.pending_alerts()
+
+        assert [a.horizon_days for a in alerts] == [1, 7, 90]
+        assert alerts[0].urgency == ("CRÍTICO", "danger")
+        assert alerts[2].urgency == ("Atenção", "primary")
+
+    def test_rerun_does_not_resend(self, db_session, regular_user, admin_user):
+        _reminder(db_session, regular_user, 7, priority='alta')
+        _reminder(db_session, regular_user, 30)
+
+        assert NotificationService.check_upcoming_reminders() == 2
+        sent = OutboundEmail.query.count()
+        assert sent == 3  # dois responsáveis + admin do lembrete de alta prioridade
+        assert ReminderAlertLog.query.count() == 2
+
+        assert NotificationService.check_upcoming_reminders() == 0
+        assert OutboundEmail.query.count() == sent
+        assert ReminderAlertPlanner.pending_alerts() == []
+
+    def test_postponed_reminder_is_alerted_again(self, db_session, regular_user):
+        reminder = _reminder(db_session, regular_user, 7)
+        NotificationService.check_upcoming_reminders()
+
+        # Lembrete adiado para vencer em 3 dias a partir de hoje: novo aviso
+        reminder.due_date = get_current_time_for_db().date() + timedelta(days=3)
+        db_session.commit()
+
+        alerts = ReminderAlertPlanner.pending_alerts()
+        assert [(a.reminder.id, a.horizon_days) for a in alerts] == [(reminder.id, 3)]
+
+    def test_failed_alert_discards_its_queued_emails(self, db_session, regular_user, admin_user,
+                                                      monkeypatch):
+        failing = _reminder(db_session, regular_user, 7, priority='alta')
+        recorded = _reminder(db_session, regular_user, 30)
+        original_record = ReminderAlertPlanner.record
+
+        def record(alert):
+            if alert.reminder.id == failing.id:
+                raise RuntimeError('falha ao registrar aviso')
+            original_record(alert)
+
+        monkeypatch.setattr(ReminderAlertPlanner, 'record', staticmethod(record))
+
+        assert NotificationService.check_upcoming_reminders() == 1
+        # Apenas o e-mail do lembrete registrado permanece na fila
+        assert OutboundEmail.query.count() == 1
+        assert [log.reminder_id for log in ReminderAlertLog.query.all()] == [recorded.id]
@@ -0,0 +1,186 @@
+"""
+Testes do histórico de leituras RFID
+"""
+import json
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from flask import session
+from flask_login import login_user
+from sqlalchemy import event
+
+from app import db
+from app.models import Equipment, RFIDLocation, RFIDRead, RFIDReader
+from app.routes import rfid_equipment_trail, rfid_reader_reads
+from app.services import rfid_history, rfid_ingest
+from app.services.rfid_history import RFIDHistoryService
+from app.services.rfid_service import RFIDService
+
+BASE = datetime(2030, 5, 6, 12, 0)
+
+
+@contextmanager
+def _count_selects():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def history_app(app, db_session):
+    """Gravação síncrona e caches novos a cada teste"""
+    previous = app.config.get('RFID_FLUSH_INTERVAL_MS')
+    app.config['RFID_FLUSH_INTERVAL_MS'] = 0
+    app.extensions.pop(rfid_ingest.EXTENSION_KEY, None)
+    app.extensions.pop(rfid_history.EXTENSION_KEY, None)
+    yield app
+    ingestor = app.extensions.pop(rfid_ingest.EXTENSION_KEY, None)
+    if ingestor is not None:
+        ingestor.stop()
+    app.extensions.pop(rfid_history.EXTENSION_KEY, None)
+    app.config['RFID_FLUSH_INTERVAL_MS'] = previous
+
+
+def _tagged(db_session, count):
+    equipments = [Equipment(name=f'Notebook {i}', category='notebook', status='disponivel',
+                            condition='bom', rfid_tag=f'TAG-{i:04d}') for i in range(count)]
+    db_session.add_all(equipments)
+    db_session.commit()
+    return equipments
+
+
+def _read(tag, reader, seconds):
+    return {'rfid_tag': tag, 'reader_id': reader,
+            'timestamp': (BASE + timedelta(seconds=seconds)).isoformat() + 'Z'}
+
+
+def _call(app, view, url, user, **kwargs):
+    with app.test_request_context(url):
+        login_user(user)
+        session['is_admin'] = True
+        response = view(**kwargs)
+    if isinstance(response, tuple):
+        return response[1], json.loads(response[0].get_data())
+    return response.status_code, json.loads(response.get_data())
+
+
+@pytest.mark.unit
+class TestRFIDHistory:
+    """Gravação em lote e consultas de trilha"""
+
+    def test_batch_ingest_appends_every_accepted_read(self, history_app, db_session):
+        equipment = _tagged(db_session, 1)[0]
+
+        RFIDService.scan_batch([
+            _read('TAG-0000', 'reader_entrance', 0),
+            _read('TAG-0000', 'reader_entrance', 1),  # duplicada
+            _read('TAG-0000', 'reader_office_a', 60),
+            _read('TAG-0000', 'reader_exit', 120),
+        ])
+
+        trail = RFIDHistoryService.equipment_trail(equipment.id, BASE, BASE + timedelta(hours=1))
+        assert [(r['reader_id'], r['location']) for r in trail['reads']] == [
+            ('reader_entrance', 'Entrada Principal'), ('reader_office_a', 'Sala A'), ('reader_exit', 'Saída'),
+        ]
+        assert RFIDReader.query.count() == 3
+        assert RFIDLocation.query.count() == 3
+
+    def test_trail_pages_with_cursor_and_window(self, history_app, db_session):
+        equipment = _tagged(db_session, 1)[0]
+        readers = list(RFIDService.CONNECTED_READERS)
+        RFIDService.scan_batch([_read('TAG-0000', readers[i % 5], i * 10) for i in range(12)])
+
+        seen, cursor = [], None
+        while True:
+            page = RFIDHistoryService.equipment_trail(
+                equipment.id, BASE + timedelta(seconds=20), BASE + timedelta(seconds=100), cursor, per_page=3
+            )
+            seen.extend(r['ts'] for r in page['reads'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+
+        assert seen == [(BASE + timedelta(seconds=s)).isoformat() for s in range(20, 100, 10)]
+
+    def test_reader_passages_and_moved_reader(self, history_app, db_session):
+        first, second = _tagged(db_session, 2)
+        RFIDHistoryService.record([(first.id, 'reader_x', 'Sala A', BASE),
+                                   (second.id, 'reader_x', 'Sala A', BASE + timedelta(minutes=1))])
+        # Leitor mudou de sala; leituras antigas mantêm o local da época
+        RFIDHistoryService.record([(first.id, 'reader_x', 'Sala B', BASE + timedelta(minutes=2))])
+        db_session.commit()
+
+        with _count_selects() as statements:
+            result = RFIDHistoryService.reader_passages('reader_x', BASE, BASE + timedelta(hours=1))
+
+        assert len(statements) == 2  # página de leituras e nomes dos equipamentos
+        assert [(r['equipment_name'], r['location']) for r in result['reads']] == [
+            ('Notebook 0', 'Sala A'), ('Notebook 1', 'Sala A'), ('Notebook 0', 'Sala B'),
+        ]
+        assert RFIDHistoryService.reader_passages('reader_y', BASE, BASE + timedelta(hours=1)) is None
+
+    def test_single_scan_is_recorded(self, history_app, db_session):
+        equipment = _tagged(db_session, 1)[0]
+
+        assert RFIDService.scan_equipment('TAG-0000', 'reader_storage')['success'] is True
+
+        read = RFIDRead.query.one()
+        assert read.equipment_id == equipment.id
+        assert RFIDHistoryService.equipment_trail(
+            equipment.id, read.ts - timedelta(seconds=1), read.ts + timedelta(seconds=1)
+        )['reads'][0]['location'] == 'Depósito'
+
+    def test_failed_flush_discards_new_dimensions(self, history_app, db_session, monkeypatch):
+        _tagged(db_session, 1)
+
+        def failing_commit():
+            raise RuntimeError('banco indisponível')
+
+        monkeypatch.setattr(db.session, 'commit', failing_commit)
+        assert RFIDService.scan_batch([_read('TAG-0000', 'reader_entrance', 0)])['pending_writes'] == 1
+        assert rfid_history.EXTENSION_KEY not in history_app.extensions
+        monkeypatch.undo()
+
+        assert RFIDService.flush_pending_scans() == 1
+        read = RFIDRead.query.one()
+        assert db.session.get(RFIDReader, read.reader_id).code == 'reader_entrance'
+        assert db.session.get(RFIDLocation, read.location_id).name == 'Entrada Principal'
+
+    def test_maintain_applies_retention(self, history_app, db_session):
+        equipment = _tagged(db_session, 1)[0]
+        RFIDHistoryService.record([(equipment.id, 'reader_entrance', 'Entrada Principal', BASE - timedelta(days=400)),
+                                   (equipment.id, 'reader_entrance', 'Entrada Principal', BASE - timedelta(days=10))])
+        db_session.commit()
+
+        assert RFIDHistoryService.maintain(now=BASE) == 1
+        assert RFIDRead.query.count() == 1
+
+    def test_endpoints(self, history_app, db_session, admin_user):
+        equipment = _tagged(db_session, 1)[0]
+        RFIDService.scan_batch([_read('TAG-0000', 'reader_office_b', 0)])
+
+        status, body = _call(history_app, rfid_equipment_trail,
+                             f'/rfid/trail/{equipment.id}?start=2030-05-06T12:00:00Z&end=2030-05-06T13:00:00Z',
+                             admin_user, equipment_id=equipment.id)
+        assert status == 200
+        assert body['reads'][0]['location'] == 'Sala B'
+
+        status, body = _call(history_app, rfid_reader_reads,
+                             '/rfid/readers/reader_office_b/reads?start=2030-05-06T12:00:00Z&end=2030-05-06T13:00:00Z',
+                             admin_user, reader_id='reader_office_b')
+        assert status == 200
+        assert body['reads'][0]['rfid_tag'] == 'TAG-0000'
+
+        status, _ = _call(history_app, rfid_equipment_trail,
+                          f'/rfid/trail/{equipment.id}?start=2030-01-01T00:00:00Z&end=2030-05-06T00:00:00Z',
+                          admin_user, equipment_id=equipment.id)
+        assert status == 400
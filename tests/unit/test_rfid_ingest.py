@@ -0,0 +1,211 @@
+"""
+Testes da ingestão de leituras RFID em lote
+"""
+import json
+import random
+import time as time_module
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from flask import session
+from flask_login import login_user
+from sqlalchemy import event
+
+from app import db
+from app.models import Equipment
+from app.routes import rfid_scan_batch
+from app.services import rfid_history
+from app.services.rfid_ingest import EXTENSION_KEY, ReadDeduplicator, ScanRead
+from app.services.rfid_service import RFIDService
+
+BASE = datetime(2030, 5, 6, 12, 0)
+
+# Piso de vazão do benchmark (leituras/s); conservador para CI lento
+MIN_READS_PER_SECOND = 5000
+
+
+@contextmanager
+def _count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def ingest_app(app, db_session):
+    """Gravação síncrona e pipeline novo a cada teste"""
+    previous = app.config.get('RFID_FLUSH_INTERVAL_MS')
+    app.config['RFID_FLUSH_INTERVAL_MS'] = 0
+    app.extensions.pop(EXTENSION_KEY, None)
+    app.extensions.pop(rfid_history.EXTENSION_KEY, None)
+    yield app
+    ingestor = app.extensions.pop(EXTENSION_KEY, None)
+    if ingestor is not None:
+        ingestor.stop()
+    app.config['RFID_FLUSH_INTERVAL_MS'] = previous
+
+
+def _tagged(db_session, count):
+    equipments = [Equipment(name=f'Notebook {i}', category='notebook', status='disponivel',
+                            condition='bom', rfid_tag=f'TAG-{i:04d}') for i in range(count)]
+    db_session.add_all(equipments)
+    db_session.commit()
+    return equipments
+
+
+def _read(tag, reader, seconds=0):
+    return {'rfid_tag': tag, 'reader_id': reader,
+            'timestamp': (BASE + timedelta(seconds=seconds)).isoformat() + 'Z'}
+
+
+@pytest.mark.unit
+class TestReadParsing:
+    """Conversão das leituras do leitor"""
+
+    def test_timestamp_with_timezone_is_stored_in_utc(self):
+        read = ScanRead.from_payload({'rfid_tag': 'T', 'reader_id': 'R',
+                                      'timestamp': '2030-05-06T09:00:00-03:00'}, BASE)
+        assert read.scanned_at == datetime(2030, 5, 6, 12, 0)
+        assert ScanRead.from_payload({'rfid_tag': 'T', 'reader_id': 'R'}, BASE).scanned_at == BASE
+
+        with pytest.raises(ValueError):
+            ScanRead.from_payload({'rfid_tag': 'T'}, BASE)
+
+    def test_deduplicates_per_tag_and_reader_within_window(self):
+        dedup = ReadDeduplicator(window_ms=2000)
+
+        assert dedup.accept(ScanRead('T1', 'R1', BASE)) is True
+        assert dedup.accept(ScanRead('T1', 'R1', BASE + timedelta(seconds=1))) is False
+        assert dedup.accept(ScanRead('T1', 'R2', BASE + timedelta(seconds=1))) is True
+        assert dedup.accept(ScanRead('T1', 'R1', BASE + timedelta(seconds=2))) is True
+
+
+@pytest.mark.unit
+class TestBatchIngest:
+    """Pipeline completo contra o banco"""
+
+    def test_batch_writes_latest_location(self, ingest_app, db_session):
+        equipment = _tagged(db_session, 1)[0]
+
+        result = RFIDService.scan_batch([
+            _read('TAG-0000', 'reader_entrance', 0),
+            _read('TAG-0000', 'reader_entrance', 1),
+            _read('TAG-0000', 'reader_office_a', 5),
+            _read('TAG-9999', 'reader_entrance', 5),
+            _read('TAG-0000', 'reader_unknown', 6),
+            {'rfid_tag': 'TAG-0000'},
+        ])
+
+        assert result['success'] is True
+        assert (result['accepted'], result['duplicates'], result['unknown_tag'],
+                result['unknown_reader'], result['invalid']) == (2, 1, 1, 1, 1)
+        assert result['unknown_tags'] == ['TAG-9999']
+        assert [c['new_location'] for c in result['location_changes']] == ['Entrada Principal', 'Sala A']
+        assert result['pending_writes'] == 0
+
+        db_session.expire_all()
+        equipment = db.session.get(Equipment, equipment.id)
+        assert equipment.rfid_last_location == 'Sala A'
+        assert equipment.rfid_reader_id == 'reader_office_a'
+        assert equipment.rfid_last_scan == BASE + timedelta(seconds=5)
+        assert equipment.rfid_status == 'ativo'
+
+    def test_buffered_writes_wait_for_flush(self, ingest_app, db_session):
+        ingest_app.config['RFID_FLUSH_INTERVAL_MS'] = 60000
+        equipment = _tagged(db_session, 1)[0]
+
+        result = RFIDService.scan_batch([_read('TAG-0000', 'reader_storage')])
+        assert result['pending_writes'] == 1
+        db_session.expire_all()
+        assert db.session.get(Equipment, equipment.id).rfid_last_location is None
+
+        assert RFIDService.flush_pending_scans() == 1
+        db_session.expire_all()
+        assert db.session.get(Equipment, equipment.id).rfid_last_location == 'Depósito'
+
+    def test_assign_and_remove_invalidate_tag_cache(self, ingest_app, db_session):
+        equipment = Equipment(name='Projetor', category='projetor', status='disponivel', condition='bom')
+        db_session.add(equipment)
+        db_session.commit()
+
+        assert RFIDService.scan_batch([_read('TAG-NEW', 'reader_entrance')])['unknown_tag'] == 1
+
+        RFIDService.assign_rfid_tag(equipment.id, 'TAG-NEW')
+        assert RFIDService.scan_batch([_read('TAG-NEW', 'reader_exit', 10)])['accepted'] == 1
+
+        RFIDService.remove_rfid_tag(equipment.id)
+        assert RFIDService.scan_batch([_read('TAG-NEW', 'reader_exit', 20)])['unknown_tag'] == 1
+
+    def test_endpoint_validates_payload(self, ingest_app, db_session, admin_user):
+        _tagged(db_session, 1)
+
+        def call(payload):
+            with ingest_app.test_request_context('/rfid/scan/batch', method='POST', json=payload):
+                login_user(admin_user)
+                session['is_admin'] = True
+                response = rfid_scan_batch()
+            if isinstance(response, tuple):
+                return response[1], json.loads(response[0].get_data())
+            return response.status_code, json.loads(response.get_data())
+
+        status, body = call({'reads': [_read('TAG-0000', 'reader_entrance')]})
+        assert status == 200 and body['accepted'] == 1
+
+        assert call({'reads': []})[0] == 400
+
+        ingest_app.config['RFID_BATCH_MAX_READS'] = 2
+        try:
+            assert call({'reads': [_read('TAG-0000', 'reader_entrance')] * 3})[0] == 413
+        finally:
+            ingest_app.config['RFID_BATCH_MAX_READS'] = 5000
+
+
+@pytest.mark.unit
+class TestIngestBenchmark:
+    """Repetição de fluxos sintéticos de leitores de portal"""
+
+    def test_replay_synthetic_reader_streams(self, ingest_app, db_session):
+        tags, readers, seconds, batch_size = 200, list(RFIDService.CONNECTED_READERS), 20, 500
+        _tagged(db_session, tags)
+
+        # Cada tag fica perto de um leitor, que a relê 4 vezes por segundo;
+        # a cada 5 s um quinto das tags muda de leitor
+        rng = random.Random(42)
+        positions = {i: rng.choice(readers) for i in range(tags)}
+        stream = []
+        for second in range(seconds):
+            if second and second % 5 == 0:
+                for i in rng.sample(range(tags), tags // 5):
+                    positions[i] = rng.choice(readers)
+            for i in range(tags):
+                for _ in range(4):
+                    stream.append(_read(f'TAG-{i:04d}', positions[i], second + rng.random()))
+        batches = [stream[i:i + batch_size] for i in range(0, len(stream), batch_size)]
+
+        accepted = duplicates = 0
+        with _count_statements() as statements:
+            started = time_module.perf_counter()
+            for batch in batches:
+                result = RFIDService.scan_batch(batch)
+                accepted += result['accepted']
+                duplicates += result['duplicates']
+            elapsed = time_module.perf_counter() - started
+
+        selects = [s for s in statements if s.lstrip().upper().startswith('SELECT')]
+        updates = [s for s in statements if s.lstrip().upper().startswith('UPDATE')]
+        assert accepted + duplicates == len(stream)
+        assert duplicates > accepted
+        inserts = [s for s in statements if s.lstrip().upper().startswith('INSERT INTO RFID_READS')]
+        # Cache de tags e uma recarga de leitores/locais por leitor novo
+        assert len(selects) <= 1 + 2 * (1 + len(readers))
+        assert len(updates) <= len(batches)  # no máximo um UPDATE em lote por flush
+        assert len(inserts) <= len(batches)  # histórico também em lote
+        assert len(stream) / elapsed >= MIN_READS_PER_SECOND
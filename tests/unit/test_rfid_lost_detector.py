@@ -0,0 +1,132 @@
+"""
+Testes do detector de equipamentos RFID perdidos
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from app import db
+from app.models import Equipment, OutboundEmail
+from app.services.rfid_service import RFIDService
+from app.services.system_config_service import SystemConfigService
+
+NOW = datetime(2030, 5, 6, 12, 0)
+
+
+@contextmanager
+def _count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture
+def thresholds(db_session):
+    """Padrão de 24h e 72h para projetores"""
+    SystemConfigService.set('rfid', 'lost_threshold_hours', 24, 'int')
+    SystemConfigService.set('rfid', 'lost_threshold_hours_by_category', {'Projetor': 72}, 'json')
+    SystemConfigService.set('rfid', 'auto_alert_lost', True, 'bool')
+    yield
+    SystemConfigService.reload_cache()
+
+
+def _equipment(db_session, name, category='notebook', hours_ago=None, status='ativo'):
+    equipment = Equipment(
+        name=name, category=category, status='disponivel', condition='bom',
+        rfid_tag=f'TAG-{name}', rfid_status=status, rfid_last_location='Sala A',
+        rfid_last_scan=NOW - timedelta(hours=hours_ago) if hours_ago is not None else None,
+    )
+    db_session.add(equipment)
+    db_session.commit()
+    return equipment
+
+
+@pytest.mark.unit
+class TestLostEquipmentDetector:
+    """Marcação em lote e alerta pela fila de emails"""
+
+    def test_marks_only_stale_equipment_per_category(self, db_session, thresholds, ti_user):
+        stale = _equipment(db_session, 'nb-velho', hours_ago=30)
+        fresh = _equipment(db_session, 'nb-novo', hours_ago=2)
+        projector = _equipment(db_session, 'proj-30h', category='projetor', hours_ago=30)
+        old_projector = _equipment(db_session, 'proj-80h', category='Projetor', hours_ago=80)
+        unseen = _equipment(db_session, 'nunca-lido', status='desconhecido')
+        already_lost = _equipment(db_session, 'ja-perdido', hours_ago=500, status='perdido')
+
+        with _count_statements() as statements:
+            assert RFIDService.detect_lost_equipment(now=NOW) == 2
+
+        assert len([s for s in statements if s.lstrip().upper().startswith('UPDATE EQUIPMENT')]) == 1
+        db_session.expire_all()
+        status = {e.name: e.rfid_status for e in Equipment.query}
+        assert status == {
+            stale.name: 'perdido', fresh.name: 'ativo', projector.name: 'ativo',
+            old_projector.name: 'perdido', unseen.name: 'desconhecido', already_lost.name: 'perdido',
+        }
+        assert {e.name for e in RFIDService.get_lost_equipment()} == {'nb-velho', 'proj-80h', 'ja-perdido'}
+
+        emails = OutboundEmail.query.filter_by(category='emails/equipment_lost_alert.html').all()
+        assert [e.recipients for e in emails] == [ti_user.email]
+        assert 'nb-velho' in emails[0].html_body and 'proj-80h' in emails[0].html_body
+
+        # Segunda execução não encontra nada novo
+        assert RFIDService.detect_lost_equipment(now=NOW) == 0
+        assert OutboundEmail.query.count() == 1
+
+    def test_new_read_reactivates_and_alert_can_be_disabled(self, db_session, thresholds, ti_user):
+        equipment = _equipment(db_session, 'nb-velho', hours_ago=30)
+        SystemConfigService.set('rfid', 'auto_alert_lost', False, 'bool')
+
+        assert RFIDService.detect_lost_equipment(now=NOW) == 1
+        assert OutboundEmail.query.count() == 0
+
+        RFIDService.scan_equipment(equipment.rfid_tag, 'reader_entrance')
+        db_session.expire_all()
+        assert db.session.get(Equipment, equipment.id).rfid_status == 'ativo'
+
+    def test_alert_respects_email_settings_and_lists_only_marked(self, db_session, thresholds, ti_user,
+                                                                 test_factory, memory_cache):
+        from app.models import NotificationSettings
+        from app.services.cache_service import CacheService
+
+        opted_out = test_factory.create_user(db_session, username='ti-sem-email', email='off@test.com', is_ti=True)
+        db_session.add(NotificationSettings(user_id=opted_out.id, email_equipment=False))
+        db_session.commit()
+        _equipment(db_session, 'nb-velho', hours_ago=30)
+        _equipment(db_session, 'nb-lido-agora', hours_ago=30)
+        lost_count = lambda: Equipment.query.filter_by(rfid_status='perdido').count()  # noqa: E731
+        assert CacheService.get_or_set('rfid.lost', lost_count, tags=('equipment',)) == 0
+
+        # Uma leitura chega entre a consulta e o UPDATE
+        def read_arrives(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('UPDATE EQUIPMENT'):
+                cursor.execute("UPDATE equipment SET rfid_last_scan = ? WHERE name = 'nb-lido-agora'",
+                               (str(NOW),))
+
+        event.listen(db.engine, 'before_cursor_execute', read_arrives)
+        try:
+            assert RFIDService.detect_lost_equipment(now=NOW) == 1
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', read_arrives)
+
+        emails = OutboundEmail.query.filter_by(category='emails/equipment_lost_alert.html').all()
+        assert [e.recipients for e in emails] == [ti_user.email]
+        assert 'nb-velho' in emails[0].html_body
+        assert 'nb-lido-agora' not in emails[0].html_body
+        assert CacheService.get_or_set('rfid.lost', lost_count, tags=('equipment',)) == 1
+
+    def test_query_uses_last_scan_index(self, db_session):
+        plan = db_session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM equipment "
+            "WHERE rfid_status = 'ativo' AND rfid_last_scan < :cutoff"
+        ), {'cutoff': NOW}).all()
+        assert any('ix_equipment_rfid_status_rfid_last_scan' in str(row) for row in plan)
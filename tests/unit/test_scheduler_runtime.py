@@ -0,0 +1,121 @@
+"""
+Testes da execução coordenada dos jobs agendados
+"""
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.models import SchedulerJobRun, SchedulerLease
+from app.services import scheduler_runtime
+from app.services.scheduler_runtime import SchedulerRuntime, process_owner
+
+
+@pytest.mark.unit
+class TestSchedulerRuntime:
+    """Lease por job e histórico de execuções"""
+
+    def test_lease_is_exclusive_until_expired(self, db_session):
+        assert SchedulerRuntime.acquire_lease('job_a', 300, owner='host:1') is True
+        assert SchedulerRuntime.acquire_lease('job_a', 300, owner='host:2') is False
+
+        # Fim da execução não libera a rodada: os outros processos continuam fora
+        SchedulerRuntime.release_lease('job_a', owner='host:1')
+        assert SchedulerRuntime.acquire_lease('job_a', 300, owner='host:2') is False
+
+        lease = db_session.get(SchedulerLease, 'job_a')
+        lease.expires_at = lease.expires_at - timedelta(seconds=600)
+        db_session.commit()
+        assert SchedulerRuntime.acquire_lease('job_a', 300, owner='host:2') is True
+        assert db_session.get(SchedulerLease, 'job_a').owner == 'host:2'
+
+    def test_running_lease_is_not_taken_over(self, db_session):
+        assert SchedulerRuntime.acquire_lease('job_b', 60, owner='host:1') is True
+        lease = db_session.get(SchedulerLease, 'job_b')
+        lease.expires_at = lease.expires_at - timedelta(seconds=120)
+        db_session.commit()
+
+        # Expirado, mas ainda executando: a próxima rodada espera
+        assert SchedulerRuntime.acquire_lease('job_b', 60, owner='host:2') is False
+
+    def test_run_records_success_and_skips_second_call(self, db_session):
+        calls = []
+
+        def job():
+            calls.append(1)
+            return {'sent': 3, 'failed': 1}
+
+        assert SchedulerRuntime.run('job_c', job, 300) == {'sent': 3, 'failed': 1}
+        assert SchedulerRuntime.run('job_c', job, 300) is None
+        assert len(calls) == 1
+
+        run = SchedulerJobRun.query.filter_by(job_id='job_c').one()
+        assert run.status == SchedulerJobRun.STATUS_SUCCESS
+        assert run.rows_processed == 3
+        assert run.owner == process_owner()
+        assert run.duration_ms is not None
+        assert db_session.get(SchedulerLease, 'job_c').running_since is None
+
+    def test_run_records_failure_and_summary(self, db_session):
+        def failing_job():
+            raise RuntimeError('falhou')
+
+        assert SchedulerRuntime.run('job_d', failing_job, 300) is None
+        run = SchedulerJobRun.query.filter_by(job_id='job_d').one()
+        assert run.status == SchedulerJobRun.STATUS_FAILED
+        assert 'RuntimeError: falhou' in run.error
+
+        SchedulerRuntime.run('job_e', lambda: 5, 300)
+        summary = {item['job_id']: item for item in SchedulerRuntime.job_summary()}
+        assert summary['job_d']['errors'] == 1
+        assert summary['job_e']['runs'] == 1
+        assert summary['job_e']['rows_processed'] == 5
+        assert [r['job_id'] for r in SchedulerRuntime.recent_runs(job_id='job_e')] == ['job_e']
+
+    def test_rows_processed(self):
+        assert SchedulerRuntime.rows_processed(7) == 7
+        assert SchedulerRuntime.rows_processed([1, 2]) == 2
+        assert SchedulerRuntime.rows_processed({'created': 4, 'closed': 1}) == 4
+        assert SchedulerRuntime.rows_processed({'a': 1, 'b': 2}) == 3
+        assert SchedulerRuntime.rows_processed(True) is None
+        assert SchedulerRuntime.rows_processed(None) is None
+
+    def test_stale_heartbeat_releases_running_lease(self, db_session):
+        assert SchedulerRuntime.acquire_lease('job_f', 60, owner='host:1') is True
+        lease = db_session.get(SchedulerLease, 'job_f')
+        lease.expires_at = lease.expires_at - timedelta(seconds=120)
+        # Job longo, mas com heartbeat recente: continua com o dono atual
+        lease.running_since = lease.running_since - timedelta(hours=3)
+        db_session.commit()
+        assert SchedulerRuntime.acquire_lease('job_f', 60, owner='host:2') is False
+
+        # Heartbeat parado (processo morto): a rodada é assumida
+        lease.heartbeat_at = lease.heartbeat_at - timedelta(
+            seconds=scheduler_runtime.STALE_HEARTBEAT_SECONDS + 1)
+        db_session.commit()
+        assert SchedulerRuntime.acquire_lease('job_f', 60, owner='host:2') is True
+
+    def test_long_job_refreshes_heartbeat(self, db_session, monkeypatch):
+        monkeypatch.setattr(scheduler_runtime, 'HEARTBEAT_INTERVAL_SECONDS', 0.05)
+        seen = {}
+
+        def job():
+            first = db_session.get(SchedulerLease, 'job_g').heartbeat_at
+            db_session.commit()
+            time.sleep(0.3)
+            seen['refreshed'] = db_session.get(SchedulerLease, 'job_g').heartbeat_at > first
+            return 1
+
+        assert SchedulerRuntime.run('job_g', job, 300) == 1
+        assert seen['refreshed'] is True
+        assert db_session.get(SchedulerLease, 'job_g').running_since is None
+
+    def test_lease_released_when_recording_run_fails(self, db_session, monkeypatch):
+        def broken_rows_processed(result):
+            raise RuntimeError('falha ao registrar')
+
+        monkeypatch.setattr(SchedulerRuntime, 'rows_processed', staticmethod(broken_rows_processed))
+
+        with pytest.raises(RuntimeError):
+            SchedulerRuntime.run('job_h', lambda: 1, 300)
+        assert db_session.get(SchedulerLease, 'job_h').running_since is None
@@ -0,0 +1,100 @@
+"""
+Testes do recálculo de SLA em lote
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Chamado, Equipment, EquipmentLoan
+from app.services.sla_engine import SlaEngine
+from app.utils.timezone_utils import get_current_time_for_db
+
+
+def _loan(db_session, user, deadline, status='ativo', sla_status='normal'):
+    equipment = Equipment(name='Notebook', category='notebook')
+    db_session.add(equipment)
+    db_session.flush()
+    loan = EquipmentLoan(equipment_id=equipment.id, user_id=user.id,
+                         expected_return_date=datetime.now().date(), status=status,
+                         sla_deadline=deadline, sla_status=sla_status)
+    db_session.add(loan)
+    db_session.commit()
+    return loan
+
+
+def _chamado(db_session, user, sector, **kwargs):
+    chamado = Chamado(titulo='t', descricao='d', solicitante_id=user.id, setor_id=sector.id, **kwargs)
+    db_session.add(chamado)
+    db_session.commit()
+    return chamado
+
+
+@pytest.mark.unit
+class TestSlaEngine:
+    """Mesmas regras das propriedades, aplicadas com UPDATE em lote"""
+
+    def test_equipment_loans_return_only_transitions(self, db_session, regular_user):
+        now = datetime.now()
+        vencido = _loan(db_session, regular_user, now - timedelta(hours=2))
+        atencao = _loan(db_session, regular_user, now + timedelta(minutes=30))
+        _loan(db_session, regular_user, now + timedelta(days=2))
+        _loan(db_session, regular_user, None)
+        _loan(db_session, regular_user, now - timedelta(hours=2), status='devolvido', sla_status='cumprido')
+
+        transitions = SlaEngine.recompute_equipment_loans(now)
+
+        assert sorted((t.id, t.status) for t in transitions) == [
+            (vencido.id, 'vencido'), (atencao.id, 'atencao')
+        ]
+        assert db_session.get(EquipmentLoan, vencido.id).sla_status == 'vencido'
+        assert SlaEngine.recompute_equipment_loans(now) == []
+
+    def test_engine_matches_update_sla_status(self, db_session, regular_user):
+        now = datetime.now()
+        loans = [_loan(db_session, regular_user, now + delta) for delta in (
+            timedelta(hours=-1), timedelta(minutes=10), timedelta(hours=5)
+        )]
+        SlaEngine.recompute_equipment_loans()
+
+        for loan in loans:
+            expected = EquipmentLoan(status=loan.status, sla_deadline=loan.sla_deadline)
+            expected.update_sla_status()
+            assert db_session.get(EquipmentLoan, loan.id).sla_status == expected.sla_status
+
+    def test_chamado_status_is_persisted_on_write(self, db_session, regular_user, sample_sector):
+        now = get_current_time_for_db()
+        chamado = _chamado(db_session, regular_user, sample_sector, prazo_sla=now + timedelta(minutes=30))
+        assert chamado.sla_status == 'atencao'
+
+        chamado.sla_cumprido = True
+        db_session.commit()
+        assert chamado.sla_status == 'cumprido'
+
+    def test_chamado_transitions_over_time(self, db_session, regular_user, sample_sector):
+        now = get_current_time_for_db()
+        chamado = _chamado(db_session, regular_user, sample_sector, prazo_sla=now + timedelta(hours=3))
+        _chamado(db_session, regular_user, sample_sector)
+        assert chamado.sla_status == 'normal'
+
+        assert SlaEngine.recompute_chamados(now) == []
+        transitions = SlaEngine.recompute_chamados(now + timedelta(hours=4))
+
+        assert [(t.id, t.status) for t in transitions] == [(chamado.id, 'vencido')]
+        assert Chamado.query.filter_by(sla_status='vencido').count() == 1
+
+    def test_transitions_invalidate_result_cache(self, db_session, memory_cache, regular_user, sample_sector):
+        from app.services.cache_service import CacheService
+
+        now = get_current_time_for_db()
+        _chamado(db_session, regular_user, sample_sector, prazo_sla=now + timedelta(hours=3))
+        calls = []
+
+        def vencidos():
+            calls.append(1)
+            return Chamado.query.filter_by(sla_status='vencido').count()
+
+        assert CacheService.get_or_set('sla.vencidos', vencidos, tags=('chamado',)) == 0
+        SlaEngine.recompute_chamados(now + timedelta(hours=4))
+
+        assert CacheService.get_or_set('sla.vencidos', vencidos, tags=('chamado',)) == 1
+        assert len(calls) == 2
@@ -0,0 +1,76 @@
+"""
+Testes da inicialização preguiçosa da aplicação
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from PIL import Image
+
+from app.utils.icon_assets import ensure_icons, missing_icons
+from app.utils.startup_profile import StartupProfiler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Limite de tempo para importar o pacote e executar create_app em um processo novo
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', 4.0))
+
+HEAVY_MODULES = ('pandas', 'numpy', 'reportlab', 'xlsxwriter', 'cairosvg', 'PIL')
+
+_STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app, scheduler
+app = create_app()
+print(json.dumps({
+    'seconds': time.perf_counter() - started,
+    'heavy': [m for m in %r if m in sys.modules],
+    'scheduler_running': scheduler.running,
+    'profile': app.extensions['startup_profile'],
+}))
+""" % (HEAVY_MODULES,)
+
+
+@pytest.mark.unit
+class TestStartup:
+    """create_app sem scheduler, ícones ou bibliotecas de relatório"""
+
+    def test_create_app_is_lazy_and_within_budget(self, tmp_path):
+        env = dict(os.environ, SCHEDULER_ENABLED='false', STARTUP_PROFILE='true',
+                   DATABASE_URL=f"sqlite:///{tmp_path / 'startup.db'}")
+        output = subprocess.run(
+            [sys.executable, '-c', _STARTUP_SCRIPT], cwd=ROOT, env=env,
+            capture_output=True, text=True, timeout=120, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+        assert result['heavy'] == []
+        assert result['scheduler_running'] is False
+        phases = {p['name'] for p in result['profile']['phases']}
+        assert {'import do pacote app', 'blueprint main (routes)'} <= phases
+        assert 'scheduler' not in phases
+        assert result['seconds'] < STARTUP_BUDGET_SECONDS
+
+    def test_ensure_icons_builds_favicon_from_png(self, tmp_path):
+        icons_dir = tmp_path / 'icons'
+        icons_dir.mkdir()
+        (icons_dir / 'logo.svg').write_text('<svg xmlns="http://www.w3.org/2000/svg"/>')
+        Image.new('RGBA', (192, 192), (0, 128, 255, 255)).save(icons_dir / 'icon-192x192.png')
+
+        assert str(tmp_path / 'favicon.ico') in missing_icons(str(tmp_path))
+        ensure_icons(str(tmp_path))
+        assert (tmp_path / 'favicon.ico').exists()
+        assert str(tmp_path / 'favicon.ico') not in missing_icons(str(tmp_path))
+
+    def test_missing_icons_without_logo(self, tmp_path):
+        assert missing_icons(str(tmp_path)) == []
+        assert ensure_icons(str(tmp_path)) is False
+
+    def test_disabled_profiler_records_nothing(self):
+        profiler = StartupProfiler(enabled=False)
+        with profiler.phase('etapa'):
+            pass
+        profiler.record('import', 0.5)
+        assert profiler.phases == []
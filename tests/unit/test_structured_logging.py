@@ -0,0 +1,125 @@
+"""
+Testes do logging estruturado e do buffer de registros recentes
+"""
+import json
+import logging
+import os
+
+import pytest
+from flask import g, session
+from flask_login import login_user
+
+from app.blueprints.system_config import system_logs_recent
+from app.services.log_reader_service import LogReaderService
+from app.utils.structured_logging import (AccessLogFilter, JsonLinesFormatter, RequestContextFilter,
+                                          RingBufferHandler, get_ring_buffer)
+
+
+def _record(message, level=logging.WARNING, **extra):
+    record = logging.LogRecord('app', level, '/app/x.py', 10, message, None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+@pytest.mark.unit
+class TestStructuredLogging:
+    """Formato JSON lines e contexto da requisição"""
+
+    def test_json_line_carries_request_context(self, app, db_session, regular_user):
+        with app.test_request_context('/configuracoes/sistema/logs', headers={'X-Request-ID': 'req-123'}):
+            app.preprocess_request()
+            login_user(regular_user)
+            record = _record('Falha ao salvar %s', args=None)
+            record.args = ('chamado',)
+            RequestContextFilter().filter(record)
+            line = JsonLinesFormatter().format(record)
+
+        assert line.startswith('{"ts":"')
+        data = json.loads(line)
+        assert data['message'] == 'Falha ao salvar chamado'
+        assert data['level'] == 'WARNING'
+        assert data['request_id'] == 'req-123'
+        assert data['user_id'] == regular_user.id
+        assert data['method'] == 'GET'
+        assert data['latency_ms'] >= 0
+        assert data['file'] == '/app/x.py:10'
+
+    def test_ring_buffer_is_bounded_and_incremental(self):
+        handler = RingBufferHandler(capacity=3)
+        for i in range(5):
+            handler.emit(_record(f'evento {i}', logging.ERROR if i % 2 else logging.INFO))
+
+        recent = handler.recent()
+        assert [data['message'] for _, data in recent['entries']] == ['evento 4', 'evento 3', 'evento 2']
+        assert recent['last_seq'] == 5
+        assert [data['message'] for _, data in handler.recent(level='ERROR')['entries']] == ['evento 3']
+
+        handler.emit(_record('evento 5'))
+        assert [data['message'] for _, data in handler.recent(after=5)['entries']] == ['evento 5']
+        # Sequência desconhecida (outro processo): devolve tudo
+        assert handler.recent(after=99)['total'] == 3
+
+    def test_access_lines_skip_static_and_file(self, app):
+        buffer = get_ring_buffer(app)
+        previous_level = app.logger.level
+        app.logger.setLevel(logging.INFO)
+        try:
+            last_seq = buffer.recent()['last_seq']
+            for url in ('/static/css/app.css', '/login'):
+                with app.test_request_context(url):
+                    app.preprocess_request()
+                    app.process_response(app.response_class('ok'))
+        finally:
+            app.logger.setLevel(previous_level)
+
+        lines = [data for _, data in buffer.recent(after=last_seq)['entries']]
+        assert [line['message'] for line in lines] == ['GET /login 200']
+        assert lines[0]['status'] == 200
+
+        access = _record('GET /login 200', logging.INFO, access=True)
+        assert AccessLogFilter().filter(access) is False
+        assert AccessLogFilter().filter(_record('erro')) is True
+
+
+@pytest.mark.unit
+class TestStructuredReader:
+    """LogReaderService lendo o formato estruturado"""
+
+    def test_reads_json_lines_through_index(self, app, tmp_path):
+        path = str(tmp_path / 'app.log')
+        formatter = JsonLinesFormatter()
+        with open(path, 'w', encoding='utf-8') as f:
+            for i in range(4):
+                record = _record(f'evento {i}', logging.ERROR if i == 3 else logging.INFO,
+                                 request_id=f'r{i}', route='/rota')
+                f.write(formatter.format(record) + '\n')
+            f.write('2030-05-06 12:00:00,000 WARNING: linha de texto antiga [in /app/y.py:1]\n')
+
+        previous = app.config.get('LOG_FILE'), app.config.get('LOG_INDEX_DIR')
+        app.config['LOG_FILE'], app.config['LOG_INDEX_DIR'] = path, str(tmp_path / 'index')
+        try:
+            with app.app_context():
+                result = LogReaderService.read_logs(limit=10)
+                errors = LogReaderService.read_logs(level='ERROR')
+        finally:
+            app.config['LOG_FILE'], app.config['LOG_INDEX_DIR'] = previous
+
+        assert result['total'] == 5
+        assert [log['message'] for log in result['logs']][:2] == ['linha de texto antiga', 'evento 3']
+        assert errors['logs'][0]['request_id'] == 'r3'
+        assert errors['logs'][0]['route'] == '/rota'
+
+    def test_recent_endpoint_reads_app_buffer(self, app, db_session, admin_user):
+        assert get_ring_buffer(app) is not None
+        last_seq = LogReaderService.read_recent()['last_seq']
+        app.logger.warning('Alerta <b>de teste</b>')
+
+        with app.test_request_context(f'/configuracoes/sistema/logs/recentes?after={last_seq}'):
+            login_user(admin_user)
+            session['is_admin'] = True
+            payload = json.loads(system_logs_recent().get_data())
+
+        assert [log['message'] for log in payload['logs']] == ['Alerta <b>de teste</b>']
+        assert payload['logs'][0]['level'] == 'WARNING'
+        assert payload['last_seq'] == last_seq + 1
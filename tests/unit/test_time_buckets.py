@@ -0,0 +1,78 @@
+"""
+Testes unitários para as séries temporais agrupadas por período
+"""
+import pytest
+from datetime import date, datetime, timedelta
+
+from app.models import Chamado, Task
+from app.utils import time_buckets
+
+
+@pytest.mark.unit
+class TestTimeBuckets:
+    """Testes do módulo time_buckets"""
+
+    def test_bucket_start(self):
+        """Testa o início de período para cada granularidade"""
+        d = date(2024, 5, 16)  # quinta-feira
+        assert time_buckets.bucket_start(d, 'day') == d
+        assert time_buckets.bucket_start(d, 'week') == date(2024, 5, 13)
+        assert time_buckets.bucket_start(d, 'month') == date(2024, 5, 1)
+
+    def test_last_n_buckets(self):
+        """Testa geração dos últimos N meses"""
+        buckets = time_buckets.last_n_buckets(3, 'month', today=date(2024, 1, 20))
+        assert buckets == [date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1)]
+
+    def test_invalid_granularity(self):
+        """Testa rejeição de granularidade desconhecida"""
+        with pytest.raises(ValueError):
+            time_buckets.build_buckets(date(2024, 1, 1), date(2024, 2, 1), 'year')
+
+    def test_monthly_series_zero_fill(self, db_session, admin_user, sample_sector):
+        """Testa série mensal com preenchimento de meses vazios"""
+        db_session.add_all([
+            Task(description='a', responsible='x', date=date(2024, 1, 5), user_id=admin_user.id),
+            Task(description='b', responsible='x', date=date(2024, 1, 31), user_id=admin_user.id),
+            Task(description='c', responsible='x', date=date(2024, 3, 1), user_id=admin_user.id),
+            Task(description='d', responsible='x', date=date(2024, 4, 1), user_id=admin_user.id),
+        ])
+        db_session.commit()
+
+        buckets = time_buckets.build_buckets(date(2024, 1, 1), date(2024, 3, 31), 'month')
+        values = time_buckets.series(Task.query, Task.date, buckets, 'month')
+
+        assert values == [2, 0, 1]
+
+    def test_series_respects_filtered_query(self, db_session, admin_user, sample_sector):
+        """Testa que os filtros da query recebida são preservados"""
+        base = datetime(2024, 2, 12, 10, 30)
+        db_session.add_all([
+            Chamado(titulo='a', descricao='d', status='Aberto', data_abertura=base,
+                    solicitante_id=admin_user.id, setor_id=sample_sector.id),
+            Chamado(titulo='b', descricao='d', status='Fechado', data_abertura=base + timedelta(days=1),
+                    solicitante_id=admin_user.id, setor_id=sample_sector.id),
+            Chamado(titulo='c', descricao='d', status='Aberto', data_abertura=base + timedelta(days=7),
+                    solicitante_id=admin_user.id, setor_id=sample_sector.id),
+        ])
+        db_session.commit()
+
+        buckets = time_buckets.build_buckets(date(2024, 2, 12), date(2024, 2, 25), 'week')
+        values = time_buckets.series(
+            Chamado.query.filter(Chamado.status == 'Aberto'),
+            Chamado.data_abertura, buckets, 'week'
+        )
+
+        assert buckets == [date(2024, 2, 12), date(2024, 2, 19)]
+        assert values == [1, 1]
+
+    def test_daily_series(self, db_session, admin_user, sample_sector):
+        """Testa série diária"""
+        db_session.add_all([
+            Task(description='a', responsible='x', date=date(2024, 6, 1), user_id=admin_user.id),
+            Task(description='b', responsible='x', date=date(2024, 6, 3), user_id=admin_user.id),
+        ])
+        db_session.commit()
+
+        buckets = time_buckets.build_buckets(date(2024, 6, 1), date(2024, 6, 3), 'day')
+        assert time_buckets.series(Task.query, Task.date, buckets, 'day') == [1, 0, 1]
@@ -0,0 +1,135 @@
+"""
+Testes unitários para o TutorialMetricsService
+"""
+import pytest
+from datetime import datetime
+
+from app.models import FeedbackTutorial, Tutorial, TutorialViewCounter, VisualizacaoTutorial
+from app.services.tutorial_metrics_service import TutorialMetricsService
+
+
+def _tutorial(db_session, autor_id, titulo, categoria=None):
+    tutorial = Tutorial(titulo=titulo, conteudo='Conteúdo', categoria=categoria, autor_id=autor_id)
+    db_session.add(tutorial)
+    db_session.commit()
+    return tutorial
+
+
+@pytest.mark.unit
+class TestTutorialMetricsService:
+    """Testes das métricas de tutoriais agregadas no banco"""
+
+    def test_view_counter_incremented_on_insert(self, db_session, admin_user):
+        """Testa que cada visualização incrementa o contador materializado"""
+        tutorial = _tutorial(db_session, admin_user.id, 'A')
+
+        for _ in range(3):
+            db_session.add(VisualizacaoTutorial(tutorial_id=tutorial.id, usuario_id=admin_user.id))
+            db_session.commit()
+
+        counter = db_session.get(TutorialViewCounter, tutorial.id)
+        db_session.refresh(counter)
+        assert counter.total_views == 3
+        assert counter.last_viewed_at is not None
+        assert TutorialMetricsService.total_views() == 3
+
+    def test_view_counter_uses_single_upsert(self, db_session, admin_user):
+        """Testa que a primeira visualização não depende de UPDATE seguido de INSERT"""
+        from sqlalchemy import event
+        from app import db
+
+        tutorial = _tutorial(db_session, admin_user.id, 'A')
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if 'tutorial_view_counter' in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            db_session.add(VisualizacaoTutorial(tutorial_id=tutorial.id, usuario_id=admin_user.id))
+            db_session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert len(statements) == 1
+        assert 'ON CONFLICT' in statements[0].upper()
+
+    def test_view_invalidates_cached_tutorial_stats(self, db_session, memory_cache, admin_user):
+        """Testa que uma visualização invalida o cache com a tag 'tutorial'"""
+        from app.services.cache_service import CacheService
+
+        tutorial = _tutorial(db_session, admin_user.id, 'A')
+        assert CacheService.get_or_set('tutorial.views', TutorialMetricsService.total_views, tags=('tutorial',)) == 0
+
+        db_session.add(VisualizacaoTutorial(tutorial_id=tutorial.id, usuario_id=admin_user.id))
+        db_session.commit()
+
+        assert CacheService.get_or_set('tutorial.views', TutorialMetricsService.total_views, tags=('tutorial',)) == 1
+
+    def test_top_viewed_and_dashboard_summary(self, db_session, admin_user, regular_user):
+        """Testa ranking de visualizações e resumo do dashboard"""
+        a = _tutorial(db_session, admin_user.id, 'A', 'Rede')
+        b = _tutorial(db_session, admin_user.id, 'B')
+        c = _tutorial(db_session, regular_user.id, 'C')
+
+        db_session.add_all(
+            [VisualizacaoTutorial(tutorial_id=a.id) for _ in range(2)]
+            + [VisualizacaoTutorial(tutorial_id=b.id) for _ in range(5)]
+        )
+        db_session.add_all([
+            FeedbackTutorial(tutorial_id=a.id, usuario_id=regular_user.id, util=True),
+            FeedbackTutorial(tutorial_id=b.id, usuario_id=regular_user.id, util=True),
+            FeedbackTutorial(tutorial_id=c.id, usuario_id=admin_user.id, util=False),
+        ])
+        db_session.commit()
+
+        top = TutorialMetricsService.top_viewed(limit=5)
+        assert [t['titulo'] for t in top] == ['B', 'A']
+        assert top[1]['categoria'] == 'Rede'
+        assert top[0]['categoria'] == 'Geral'
+
+        with_unviewed = TutorialMetricsService.top_viewed(limit=5, include_unviewed=True)
+        assert [t['visualizacoes'] for t in with_unviewed] == [5, 2, 0]
+
+        summary = TutorialMetricsService.dashboard_summary(top_n=5)
+        assert summary['total'] == 3
+        assert summary['feedbacks_util'] == 2
+        assert summary['feedbacks_nao_util'] == 1
+        assert summary['top_labels'] == ['B', 'A']
+        assert summary['top_values'] == [5, 2]
+
+        assert TutorialMetricsService.total_views(autor_id=admin_user.id) == 7
+        assert TutorialMetricsService.feedback_counts(autor_id=admin_user.id) == (2, 0)
+        assert TutorialMetricsService.feedback_counts(tutorial_id=c.id) == (0, 1)
+
+        stats = TutorialMetricsService.stats_by_tutorial([a.id, c.id])
+        assert stats[a.id] == {'visualizacoes': 2, 'feedbacks_util': 1, 'feedbacks_nao_util': 0}
+        assert stats[c.id] == {'visualizacoes': 0, 'feedbacks_util': 0, 'feedbacks_nao_util': 1}
+
+    def test_daily_views(self, db_session, admin_user):
+        """Testa visualizações por dia limitadas aos dias mais recentes"""
+        tutorial = _tutorial(db_session, admin_user.id, 'A')
+        db_session.add_all([
+            VisualizacaoTutorial(tutorial_id=tutorial.id, data=datetime(2023, 12, 31, 9)),
+            VisualizacaoTutorial(tutorial_id=tutorial.id, data=datetime(2024, 1, 2, 9)),
+            VisualizacaoTutorial(tutorial_id=tutorial.id, data=datetime(2024, 1, 2, 18)),
+            VisualizacaoTutorial(tutorial_id=tutorial.id, data=datetime(2024, 1, 5, 8)),
+        ])
+        db_session.commit()
+
+        daily = TutorialMetricsService.daily_views(tutorial.id, limit=2)
+        assert [(d.isoformat(), n) for d, n in daily] == [('2024-01-02', 2), ('2024-01-05', 1)]
+
+    def test_rebuild_view_counters(self, db_session, admin_user):
+        """Testa recálculo do contador a partir das visualizações"""
+        tutorial = _tutorial(db_session, admin_user.id, 'A')
+        db_session.add_all([VisualizacaoTutorial(tutorial_id=tutorial.id) for _ in range(4)])
+        db_session.commit()
+
+        TutorialViewCounter.query.delete()
+        db_session.commit()
+        assert TutorialMetricsService.total_views() == 0
+
+        assert TutorialMetricsService.rebuild_view_counters() == 1
+        assert TutorialMetricsService.total_views() == 4